@@ -187,6 +187,7 @@ def store_embedding(
                 "day": now.day,
                 "hour": now.hour,
             },
+            "timestamp_epoch": int(now.timestamp()),
         }
 
         if metadata:
@@ -250,6 +251,21 @@ def ensure_collection(client) -> bool:
                 except Exception as e:
                     logger.warning(f"Failed to create index for {field_name}: {e}")
 
+            # Principal range index so time-window filters are range scans
+            try:
+                client.create_payload_index(
+                    collection_name=LOG_EMBEDDINGS_COLLECTION,
+                    field_name="timestamp_epoch",
+                    field_schema=models.IntegerIndexParams(
+                        type=models.IntegerIndexType.INTEGER,
+                        lookup=False,
+                        range=True,
+                        is_principal=True,
+                    ),
+                )
+            except Exception as e:
+                logger.warning(f"Failed to create index for timestamp_epoch: {e}")
+
             logger.info(f"Created collection: {LOG_EMBEDDINGS_COLLECTION}")
 
         return True
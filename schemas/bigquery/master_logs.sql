@@ -166,3 +166,61 @@ CREATE TABLE IF NOT EXISTS `diatonic-ai-gcp.central_logging_v1.etl_jobs` (
     config JSON,
     metrics JSON                                 -- Performance metrics
 );
+
+-- Stats rollups, maintained incrementally by LogLoader as batches load.
+-- Each load appends one row per (bucket, severity, service, source_table,
+-- stream) with that batch's counts; readers SUM across rows. Rebuild a date
+-- range with `python -m scripts.etl_cli rollups --start ... --end ...`.
+CREATE TABLE IF NOT EXISTS `diatonic-ai-gcp.central_logging_v1.log_rollups_minute` (
+    rollup_id STRING NOT NULL,                   -- Deterministic per batch + bucket + dimensions
+    bucket_ts TIMESTAMP NOT NULL,                -- Minute bucket (event_timestamp truncated)
+    severity STRING,
+    service_name STRING,
+    source_table STRING,
+    stream_id STRING,
+    log_count INT64 NOT NULL,
+    error_count INT64,                           -- is_error
+    audit_count INT64,                           -- is_audit
+    request_count INT64,                         -- is_request
+    trace_count INT64,                           -- has_trace
+    first_event_ts TIMESTAMP,
+    last_event_ts TIMESTAMP,
+    etl_batch_id STRING,
+    loaded_at TIMESTAMP
+)
+PARTITION BY DATE(bucket_ts)
+CLUSTER BY severity, service_name
+OPTIONS (
+    description = 'Per-minute log counts by severity/service/source/stream (additive deltas per ETL batch)',
+    partition_expiration_days = 35
+);
+
+CREATE TABLE IF NOT EXISTS `diatonic-ai-gcp.central_logging_v1.log_rollups_hour` (
+    rollup_id STRING NOT NULL,                   -- Deterministic per batch + bucket + dimensions
+    bucket_ts TIMESTAMP NOT NULL,                -- Hour bucket (event_timestamp truncated)
+    severity STRING,
+    service_name STRING,
+    source_table STRING,
+    stream_id STRING,
+    log_count INT64 NOT NULL,
+    error_count INT64,                           -- is_error
+    audit_count INT64,                           -- is_audit
+    request_count INT64,                         -- is_request
+    trace_count INT64,                           -- has_trace
+    first_event_ts TIMESTAMP,
+    last_event_ts TIMESTAMP,
+    etl_batch_id STRING,
+    loaded_at TIMESTAMP
+)
+PARTITION BY DATE(bucket_ts)
+CLUSTER BY severity, service_name
+OPTIONS (
+    description = 'Per-hour log counts by severity/service/source/stream (additive deltas per ETL batch)'
+);
+
+-- Full-text search index used by SEARCH() predicates in the query builder
+-- and agent log tools (see src/glass_pane/query_builder.text_search_clause).
+-- Also provisioned by `python -m src.cli provision-search-index`.
+CREATE SEARCH INDEX IF NOT EXISTS master_logs_search_idx
+ON `diatonic-ai-gcp.central_logging_v1.master_logs`(message, json_payload)
+OPTIONS (analyzer = 'LOG_ANALYZER');
@@ -24,6 +24,7 @@ import json
 import logging
 import os
 import sys
+import threading
 import time
 import uuid
 from dataclasses import dataclass, field, asdict
@@ -35,7 +36,6 @@ from collections import defaultdict
 import httpx
 from dotenv import load_dotenv
 from google.cloud import bigquery
-from qdrant_client import QdrantClient
 from qdrant_client.http import models
 
 # Setup paths and environment
@@ -43,6 +43,16 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(REPO_ROOT))
 load_dotenv(REPO_ROOT / ".env")
 
+from src.services.qdrant_bulk_writer import QdrantBulkWriter, create_qdrant_client
+from src.services.qdrant_schema import (
+    collection_has_sparse,
+    ensure_timestamp_epoch_index,
+    point_vector,
+    sparse_vectors_config,
+    timestamp_payload,
+)
+from src.services.sparse_encoder import sparse_encoder
+
 # Logging setup
 logging.basicConfig(
     level=logging.INFO,
@@ -178,13 +188,7 @@ class LogEntry:
         """Convert to Qdrant payload with hierarchical metadata."""
         return {
             "log_id": self.log_id,
-            "timestamp": {
-                "iso": self.timestamp.isoformat() if self.timestamp else None,
-                "year": self.timestamp.year if self.timestamp else None,
-                "month": self.timestamp.month if self.timestamp else None,
-                "day": self.timestamp.day if self.timestamp else None,
-                "hour": self.timestamp.hour if self.timestamp else None,
-            },
+            **timestamp_payload(self.timestamp),
             "severity": self.severity,
             "service_name": self.service_name,
             "resource_type": self.resource_type,
@@ -213,10 +217,12 @@ class OllamaEmbedder:
         logger.info(f"Initialized Ollama embedder: {self.model} @ {self.host} (rate {OLLAMA_RATE_LIMIT}/s)")
     
     def _rate_limit(self):
-        dt = time.time() - self._last_req
-        if dt < self._delay:
-            time.sleep(self._delay - dt)
-        self._last_req = time.time()
+        # Shared by the bulk writer's lanes, so the limit applies across all of them
+        with self._rate_lock:
+            dt = time.time() - self._last_req
+            if dt < self._delay:
+                time.sleep(self._delay - dt)
+            self._last_req = time.time()
     
     def _embed_once(self, text: str) -> List[float]:
         payload = {"model": self.model, "input": text}
@@ -650,11 +656,21 @@ class QdrantUpserter:
         self.api_key = api_key or os.getenv("QDRANT_API_KEY")
         self._last_req = 0.0
         self._delay = 1.0 / QDRANT_RATE_LIMIT
+        self._rate_lock = threading.Lock()
         
-        self.client = QdrantClient(url=self.url, api_key=self.api_key, timeout=60.0)
+        self.client = create_qdrant_client(self.url, self.api_key, timeout=60.0)
         logger.info(f"Initialized Qdrant client: {self.url} (rate {QDRANT_RATE_LIMIT}/s)")
         
         self._ensure_collection()
+        self.sparse_enabled = collection_has_sparse(self.client, self.collection_name)
+        # Created after _ensure_collection, which may switch collection_name
+        self.writer = QdrantBulkWriter(
+            self.client,
+            self.collection_name,
+            max_retries=MAX_RETRIES,
+            retry_delay=RETRY_DELAY,
+            throttle=self._rate_limit,
+        )
         self._log_collection_stats()
     
     def _ensure_collection(self):
@@ -689,7 +705,8 @@ class QdrantUpserter:
                 vectors_config=models.VectorParams(
                     size=self.vector_size,
                     distance=models.Distance.COSINE
-                )
+                ),
+                sparse_vectors_config=sparse_vectors_config(),
             )
             
             # Create indexes for common filter fields
@@ -714,16 +731,20 @@ class QdrantUpserter:
                     )
                 except Exception as e:
                     logger.warning(f"Failed to create index for {field_name}: {e}")
+
+            ensure_timestamp_epoch_index(self.client, self.collection_name)
             
             logger.info(f"Created collection {self.collection_name} with indexes")
         else:
             logger.info(f"Collection {self.collection_name} already exists and is compatible")
     
     def _rate_limit(self):
-        dt = time.time() - self._last_req
-        if dt < self._delay:
-            time.sleep(self._delay - dt)
-        self._last_req = time.time()
+        # Shared by the bulk writer's lanes, so the limit applies across all of them
+        with self._rate_lock:
+            dt = time.time() - self._last_req
+            if dt < self._delay:
+                time.sleep(self._delay - dt)
+            self._last_req = time.time()
     
     def _log_collection_stats(self):
         try:
@@ -732,39 +753,46 @@ class QdrantUpserter:
         except Exception as e:
             logger.warning(f"Could not read collection stats: {e}")
     
-    def upsert_batch(self, log_entries: List[LogEntry], embeddings: List[List[float]]):
-        """Upsert a batch of log embeddings to Qdrant with rate limiting and retry."""
+    def upsert_batch(
+        self,
+        log_entries: List[LogEntry],
+        embeddings: List[List[float]],
+        texts: Optional[List[str]] = None,
+    ):
+        """Bulk upsert log embeddings to Qdrant with rate limiting and retry.
+
+        Points are split into size-tuned batches and sent concurrently with
+        ``wait=False``; the call returns after a final durability barrier.
+        BM25 sparse vectors are added from ``texts`` when the collection supports them.
+        """
         if len(log_entries) != len(embeddings):
             raise ValueError("Mismatch between log entries and embeddings count")
         
-        points = []
-        for log_entry, embedding in zip(log_entries, embeddings):
-            points.append(
-                models.PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=embedding,
-                    payload=log_entry.to_qdrant_payload(),
-                )
+        sparse_vectors = [None] * len(log_entries)
+        if self.sparse_enabled:
+            if texts is None:
+                texts = [log_entry.get_full_trace_text() for log_entry in log_entries]
+            sparse_vectors = sparse_encoder.encode_documents(texts)
+
+        points = (
+            models.PointStruct(
+                id=str(uuid.uuid4()),
+                vector=point_vector(embedding, sparse),
+                payload=log_entry.to_qdrant_payload(),
             )
+            for log_entry, embedding, sparse in zip(log_entries, embeddings, sparse_vectors)
+        )
         
-        for attempt in range(MAX_RETRIES):
-            try:
-                self._rate_limit()
-                self.client.upsert(
-                    collection_name=self.collection_name,
-                    points=points,
-                    wait=True,
-                )
-                logger.info(f"✅ Upserted {len(points)} points to {self.collection_name}")
-                return
-            except Exception as e:
-                if attempt < MAX_RETRIES - 1:
-                    backoff = RETRY_DELAY * (2 ** attempt)
-                    logger.warning(f"Qdrant upsert error, retrying in {backoff}s: {e}")
-                    time.sleep(backoff)
-                    continue
-                logger.error(f"Failed to upsert batch after {MAX_RETRIES} retries: {e}")
-                raise
+        stats = self.writer.write(points)
+        if stats.failed_points or (stats.points and not stats.durable):
+            # Fail the batch so the checkpoint is not advanced past it
+            raise RuntimeError(
+                f"Failed to upsert {stats.failed_points}/{stats.points} points to {self.collection_name}"
+            )
+        logger.info(
+            f"✅ Upserted {stats.written} points to {self.collection_name} "
+            f"({stats.points_per_sec:.0f} points/sec)"
+        )
 
 
 class CheckpointManager:
@@ -924,7 +952,7 @@ def process_batch(
         all_embeddings.extend(embeddings)
     
     # 3. Upsert to Qdrant
-    upserter.upsert_batch(log_entries, all_embeddings)
+    upserter.upsert_batch(log_entries, all_embeddings, trace_texts)
 
 
 def main():
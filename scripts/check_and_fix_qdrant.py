@@ -22,6 +22,11 @@ def main():
     logger.info("Check Complete.")
     logger.info(f"Created Collections: {report['created']}")
     logger.info(f"Checked Collections: {report['checked']}")
+    if report.get("tenant_layout_pending"):
+        logger.info(
+            f"Still on a global HNSW graph: {report['tenant_layout_pending']} "
+            "(see scripts/migrate_qdrant_tenant_layout.py)"
+        )
     
     if report["status"] == "partial_failure":
         logger.warning("Some operations failed. Check logs.")
@@ -16,7 +16,6 @@ from pathlib import Path
 import httpx
 from dotenv import load_dotenv
 from google.cloud import bigquery
-from qdrant_client import QdrantClient
 from qdrant_client.http import models
 
 # Setup
@@ -24,6 +23,10 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(REPO_ROOT))
 load_dotenv(REPO_ROOT / ".env")
 
+from src.services.qdrant_bulk_writer import QdrantBulkWriter, create_qdrant_client
+from src.services.qdrant_schema import collection_has_sparse, point_vector, timestamp_payload
+from src.services.sparse_encoder import sparse_encoder
+
 # Configuration
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434")
 EMBED_MODEL = "qwen3-embedding:0.6b"
@@ -152,13 +155,7 @@ def build_payload(row) -> dict:
         "http_url": row.http_url,
         "http_status": row.http_status,
         "trace_id": row.trace_id,
-        "timestamp": {
-            "iso": ts.isoformat() if ts else None,
-            "year": ts.year if ts else None,
-            "month": ts.month if ts else None,
-            "day": ts.day if ts else None,
-            "hour": ts.hour if ts else None,
-        }
+        **timestamp_payload(ts),
     }
 
 
@@ -170,12 +167,14 @@ def main():
     # Initialize clients
     print("\nInitializing clients...")
     bq_client = bigquery.Client(project="diatonic-ai-gcp")
-    qdrant_client = QdrantClient(
+    qdrant_client = create_qdrant_client(
         url=os.getenv("QDRANT_URL"),
         api_key=os.getenv("QDRANT_API_KEY"),
         timeout=120
     )
 
+    sparse_enabled = collection_has_sparse(qdrant_client, COLLECTION_NAME)
+
     # Get total count
     count_query = "SELECT COUNT(*) as cnt FROM `diatonic-ai-gcp.central_logging_v1.master_logs`"
     total_count = list(bq_client.query(count_query).result())[0].cnt
@@ -212,66 +211,55 @@ def main():
     fetch_time = time.time() - start_time
     print(f"Fetched {len(rows):,} logs in {fetch_time:.1f}s")
 
-    # Process in batches - use larger batches for efficiency
-    BATCH_SIZE = 200  # Logs per Qdrant upsert
+    # Embed in batches; the bulk writer upserts concurrently in the background
+    BATCH_SIZE = 200  # Logs embedded per loop iteration
     EMBED_BATCH = 50  # Texts per Ollama batch call
 
     total_embedded = 0
-    total_upserted = 0
-    batch_count = 0
 
     print(f"\nEmbedding with {EMBED_MODEL} and upserting to Qdrant...")
     print(f"Batch size: {BATCH_SIZE}, Embed batch: {EMBED_BATCH}")
 
     embed_start = time.time()
 
-    for i in range(0, len(rows), BATCH_SIZE):
-        batch = rows[i:i + BATCH_SIZE]
-        batch_count += 1
-
-        # Build texts for this batch
-        texts = [build_log_text(row) for row in batch]
-        payloads = [build_payload(row) for row in batch]
-
-        # Embed texts using batch API
-        embeddings = []
-        for j in range(0, len(texts), EMBED_BATCH):
-            sub_texts = texts[j:j + EMBED_BATCH]
-            batch_embeddings = embed_batch(sub_texts)
-            embeddings.extend(batch_embeddings)
-
-        total_embedded += len(embeddings)
-
-        # Build points
-        points = [
-            models.PointStruct(
-                id=str(uuid.uuid4()),
-                vector=emb,
-                payload=payload
-            )
-            for emb, payload in zip(embeddings, payloads)
-        ]
-
-        # Upsert to Qdrant
-        try:
-            qdrant_client.upsert(
-                collection_name=COLLECTION_NAME,
-                points=points,
-                wait=True
-            )
-            total_upserted += len(points)
-        except Exception as e:
-            print(f"\nError upserting batch {batch_count}: {e}")
-
-        # Progress
-        elapsed = time.time() - embed_start
-        rate = total_embedded / elapsed if elapsed > 0 else 0
-        eta = (len(rows) - total_embedded) / rate if rate > 0 else 0
-
-        pct = total_embedded / len(rows) * 100
-        print(f"\rProgress: {total_embedded:,}/{len(rows):,} ({pct:.1f}%) | "
-              f"Rate: {rate:.1f}/s | ETA: {eta/60:.1f}m | "
-              f"Upserted: {total_upserted:,}", end="", flush=True)
+    def generate_points():
+        nonlocal total_embedded
+        for i in range(0, len(rows), BATCH_SIZE):
+            batch = rows[i:i + BATCH_SIZE]
+
+            # Build texts for this batch
+            texts = [build_log_text(row) for row in batch]
+            payloads = [build_payload(row) for row in batch]
+
+            # Embed texts using batch API
+            embeddings = []
+            for j in range(0, len(texts), EMBED_BATCH):
+                sub_texts = texts[j:j + EMBED_BATCH]
+                batch_embeddings = embed_batch(sub_texts)
+                embeddings.extend(batch_embeddings)
+
+            total_embedded += len(embeddings)
+            sparse_vectors = sparse_encoder.encode_documents(texts) if sparse_enabled else [None] * len(texts)
+
+            for emb, sparse, payload in zip(embeddings, sparse_vectors, payloads):
+                yield models.PointStruct(
+                    id=str(uuid.uuid4()),
+                    vector=point_vector(emb, sparse),
+                    payload=payload
+                )
+
+            # Progress
+            elapsed = time.time() - embed_start
+            rate = total_embedded / elapsed if elapsed > 0 else 0
+            eta = (len(rows) - total_embedded) / rate if rate > 0 else 0
+
+            pct = total_embedded / len(rows) * 100
+            print(f"\rProgress: {total_embedded:,}/{len(rows):,} ({pct:.1f}%) | "
+                  f"Rate: {rate:.1f}/s | ETA: {eta/60:.1f}m", end="", flush=True)
+
+    writer = QdrantBulkWriter(qdrant_client, COLLECTION_NAME)
+    stats = writer.write(generate_points())
+    total_upserted = stats.written
 
     total_time = time.time() - start_time
 
@@ -279,7 +267,8 @@ def main():
     print("COMPLETE!")
     print(f"{'=' * 60}")
     print(f"Total embedded: {total_embedded:,}")
-    print(f"Total upserted: {total_upserted:,}")
+    print(f"Total upserted: {total_upserted:,} ({stats.points_per_sec:.0f} points/sec, "
+          f"{stats.failed_points:,} failed)")
     print(f"Total time: {total_time/60:.1f} minutes")
 
     # Verify in Qdrant
@@ -9,6 +9,7 @@ Usage:
     python -m scripts.etl_cli status
     python -m scripts.etl_cli discover
     python -m scripts.etl_cli schema --apply
+    python -m scripts.etl_cli rollups --start 2026-01-01 --end 2026-01-31
 """
 
 from __future__ import annotations
@@ -216,6 +217,19 @@ def schema(apply: bool, project_id: str):
         console.print("\n[dim]Use --apply to create tables in BigQuery[/dim]")
 
 
+@cli.command()
+@click.option('--start', 'start_date', required=True, help='First log_date (YYYY-MM-DD)')
+@click.option('--end', 'end_date', required=True, help='Last log_date (YYYY-MM-DD), inclusive')
+@click.option('--project-id', default='diatonic-ai-gcp', help='GCP project ID')
+def rollups(start_date: str, end_date: str, project_id: str):
+    """Rebuild minute/hour stats rollups from master_logs for a date range."""
+    console.print(f"[yellow]Rebuilding rollups for {start_date}..{end_date}...[/yellow]")
+    loader = LogLoader(project_id)
+    loader.backfill_rollups(start_date, end_date)
+    console.print("[green]Rollups rebuilt[/green]")
+    console.print("[dim]Set ROLLUPS_SINCE to the earliest fully covered date to serve stats from rollups[/dim]")
+
+
 @cli.command()
 @click.option('--stream', 'stream_id', required=True, help='Stream to check')
 @click.option('--limit', default=10, help='Number of records to show')
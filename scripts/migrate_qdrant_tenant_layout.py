@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Switch tenant-scoped Qdrant collections to per-tenant HNSW graphs.
+
+Sets the ``is_tenant`` index on each collection's tenant field and
+``m=0``/``payload_m`` on its HNSW config. Qdrant then rebuilds the index
+in the background, and the collection has no global graph any more, so
+only run this once every search against it carries a tenant filter
+(set QDRANT_REQUIRE_TENANT=true afterwards to enforce that).
+Collections already on per-tenant graphs are skipped.
+
+Usage:
+    python scripts/migrate_qdrant_tenant_layout.py --dry-run
+    python scripts/migrate_qdrant_tenant_layout.py --collection conversation_history
+    python scripts/migrate_qdrant_tenant_layout.py --collection logs_v1 --tenant-field tenant_id
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.glass_pane.qdrant_manager import qdrant_manager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("qdrant_tenant_layout_migration")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move Qdrant collections to per-tenant HNSW graphs.")
+    parser.add_argument("--collection", action="append", help="Collection to migrate (repeatable; default: all tenant-scoped).")
+    parser.add_argument("--tenant-field", help="Tenant field for collections not managed by QdrantManager.")
+    parser.add_argument("--dry-run", action="store_true", help="Report collections that would change.")
+    args = parser.parse_args()
+
+    report = qdrant_manager.migrate_tenant_layout(
+        args.collection, tenant_field=args.tenant_field, dry_run=args.dry_run
+    )
+    logger.info(f"Migrated: {report['migrated']}")
+    logger.info(f"Skipped: {report['skipped']}")
+
+    if report["failed"]:
+        logger.error(f"Failed: {report['failed']}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Backfill `timestamp_epoch` on existing Qdrant log points.
+
+Creates the principal range index on `timestamp_epoch` and sets the field on
+every point that predates it, deriving the value from `timestamp.iso`.
+Safe to re-run: only points missing the field are touched.
+
+Usage:
+    python scripts/migrate_qdrant_timestamp_epoch.py --collection logs_embedded_qwen3
+    python scripts/migrate_qdrant_timestamp_epoch.py --all --dry-run
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from qdrant_client import QdrantClient
+
+from src.services.qdrant_schema import backfill_timestamp_epoch
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("qdrant_timestamp_epoch_migration")
+
+DEFAULT_COLLECTIONS = [
+    "logs_embedded_qwen3",
+    "logs_embedded",
+    "logs_v1",
+    "log_embeddings",
+    "conversation_history",
+    "app_logs",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill timestamp_epoch on Qdrant points.")
+    parser.add_argument("--collection", action="append", help="Collection to migrate (repeatable).")
+    parser.add_argument("--all", action="store_true", help="Migrate every known log collection that exists.")
+    parser.add_argument("--batch-size", type=int, default=256, help="Points per scroll/update page.")
+    parser.add_argument("--dry-run", action="store_true", help="Count points without writing.")
+    args = parser.parse_args()
+
+    client = QdrantClient(
+        url=os.getenv("QDRANT_URL", "http://localhost:6333"),
+        api_key=os.getenv("QDRANT_API_KEY"),
+        timeout=120,
+    )
+
+    existing = {c.name for c in client.get_collections().collections}
+    targets = args.collection or (DEFAULT_COLLECTIONS if args.all else [])
+    if not targets:
+        parser.error("pass --collection NAME or --all")
+
+    failed = False
+    for name in targets:
+        if name not in existing:
+            logger.info(f"Skipping {name}: collection does not exist")
+            continue
+        try:
+            stats = backfill_timestamp_epoch(client, name, batch_size=args.batch_size, dry_run=args.dry_run)
+            logger.info(f"{name}: {stats}")
+        except Exception as e:
+            logger.error(f"Migration failed for {name}: {e}")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    main()
@@ -4,12 +4,34 @@ This module provides checkpoint functionality to save and restore
 agent state to/from Firestore.
 
 Phase 3, Task 3.2: Checkpoint Node
+
+Checkpoints of a run form a chain. Every ``CHECKPOINT_FULL_EVERY``-th
+checkpoint (and the first one) is a full snapshot; the ones in between
+only store what changed since the previous checkpoint:
+
+    {"kind": "delta", "seq": 3, "base_checkpoint_id": "...",
+     "delta": {"evidence": {"append": [...]}, "phase": {"set": "verify"}}}
+
+List fields that only grew (evidence, tool_calls, hypotheses) store the
+new items; anything else that changed stores its new value. Payloads over
+``CHECKPOINT_COMPRESS_MIN_BYTES`` of JSON are zlib-compressed into
+``payload_z``. ``restore_state_from_checkpoint`` walks the chain back to
+the full snapshot and replays the deltas.
+
+``enqueue_checkpoint`` encodes in the caller (so deltas follow graph
+order) and hands the Firestore write to ``checkpoint_writer``, which
+batches documents on a background thread. ``save_checkpoint`` writes
+synchronously and raises on failure.
 """
 
+import json
 import logging
 import os
+import queue
 import threading
-from typing import Dict, Any, Optional
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from datetime import datetime, timezone
 
 import firebase_admin
@@ -20,6 +42,23 @@ from src.agent.schemas import CheckpointMetadata
 
 logger = logging.getLogger(__name__)
 
+# Configuration
+CHECKPOINT_COLLECTION = "checkpoints"
+# Full snapshot every N checkpoints of a run; deltas in between
+CHECKPOINT_FULL_EVERY = int(os.getenv("CHECKPOINT_FULL_EVERY", "5"))
+CHECKPOINT_COMPRESS_MIN_BYTES = int(os.getenv("CHECKPOINT_COMPRESS_MIN_BYTES", "8192"))
+# Runs whose previous snapshot is kept for delta encoding
+CHECKPOINT_TRACKED_RUNS = int(os.getenv("CHECKPOINT_TRACKED_RUNS", "256"))
+CHECKPOINT_QUEUE_MAX = int(os.getenv("CHECKPOINT_QUEUE_MAX", "1000"))
+# Firestore batches are limited to 500 writes
+CHECKPOINT_BATCH_MAX = min(int(os.getenv("CHECKPOINT_BATCH_MAX", "100")), 500)
+# Firestore commits are limited to 10 MiB; leave headroom for its own size accounting
+CHECKPOINT_BATCH_MAX_BYTES = min(int(os.getenv("CHECKPOINT_BATCH_MAX_BYTES", str(8 * 1024 * 1024))), 10 * 1024 * 1024)
+CHECKPOINT_FLUSH_INTERVAL_SEC = float(os.getenv("CHECKPOINT_FLUSH_INTERVAL_SEC", "0.5"))
+CHECKPOINT_DRAIN_SEC = float(os.getenv("CHECKPOINT_DRAIN_SEC", "10"))
+# Longest delta chain restore will follow before giving up
+CHECKPOINT_MAX_CHAIN = 1000
+
 # NOTE:
 # Do NOT initialize Firebase/Firestore at import time.
 # - GitHub Actions runners (and many local dev environments) do not have ADC.
@@ -84,28 +123,167 @@ def get_firestore_db() -> Any:
             raise
 
 
-def save_checkpoint(
+def _snapshot_state(state: AgentState) -> Dict[str, Any]:
+    """Persisted subset of the state, normalized to JSON types."""
+    snapshot = {
+        "user_query": state.get("user_query", ""),
+        "phase": state.get("phase", "unknown"),
+        "status": state.get("status", "running"),
+        "mode": state.get("mode", "interactive"),
+        "scope": state.get("scope", {}),
+        "hypotheses": state.get("hypotheses", []),
+        "evidence": state.get("evidence", []),
+        "tool_calls": state.get("tool_calls", []),
+        "runbook_ids": state.get("runbook_ids", []),
+        "error": state.get("error"),
+    }
+    # Round-trip so the copy kept for the next delta can't be mutated by the graph
+    return json.loads(json.dumps(snapshot, default=str))
+
+
+def diff_snapshots(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-field changes from ``previous`` to ``current``.
+
+    Lists that only grew become ``{"append": [new items]}``; any other
+    changed field becomes ``{"set": value}``. Unchanged fields are omitted.
+    """
+    delta = {}
+    for field, value in current.items():
+        old = previous.get(field)
+        if field in previous and old == value:
+            continue
+        if isinstance(value, list) and isinstance(old, list) and len(value) > len(old) and value[:len(old)] == old:
+            delta[field] = {"append": value[len(old):]}
+        else:
+            delta[field] = {"set": value}
+    return delta
+
+
+def apply_delta(snapshot: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of diff_snapshots: ``apply_delta(prev, diff_snapshots(prev, cur)) == cur``."""
+    result = dict(snapshot)
+    for field, change in delta.items():
+        if "append" in change:
+            result[field] = list(result.get(field) or []) + list(change["append"])
+        else:
+            result[field] = change.get("set")
+    return result
+
+
+def _encode_payload(key: str, payload: Dict[str, Any], compress_min_bytes: int) -> Tuple[Dict[str, Any], int]:
+    """Document fields holding ``payload`` and the bytes they take."""
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    if len(raw) < compress_min_bytes:
+        return {key: payload}, len(raw)
+    compressed = zlib.compress(raw)
+    return {"payload_z": compressed, "encoding": "zlib+json"}, len(compressed)
+
+
+def _decode_payload(checkpoint_data: Dict[str, Any], key: str) -> Dict[str, Any]:
+    if checkpoint_data.get("encoding") == "zlib+json":
+        return json.loads(zlib.decompress(checkpoint_data["payload_z"]))
+    return checkpoint_data.get(key) or {}
+
+
+def _doc_bytes(doc: Dict[str, Any]) -> int:
+    """Rough size of a checkpoint document as Firestore will count it."""
+    blob = doc.get("payload_z") or b""
+    rest = {k: v for k, v in doc.items() if k != "payload_z"}
+    return len(blob) + len(json.dumps(rest, default=str).encode())
+
+
+class CheckpointEncoder:
+    """Turns successive snapshots of each run into full/delta documents.
+
+    Keeps the last snapshot of up to ``max_runs`` runs (LRU); a run it has
+    forgotten, or one whose write failed, starts over with a full snapshot.
+    """
+
+    def __init__(
+        self,
+        full_every: int = CHECKPOINT_FULL_EVERY,
+        compress_min_bytes: int = CHECKPOINT_COMPRESS_MIN_BYTES,
+        max_runs: int = CHECKPOINT_TRACKED_RUNS,
+    ):
+        self.full_every = max(1, full_every)
+        self.compress_min_bytes = compress_min_bytes
+        self.max_runs = max_runs
+        # run_id -> (checkpoint_id, snapshot, seq)
+        self._runs: "OrderedDict[str, Tuple[str, Dict[str, Any], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"full": 0, "delta": 0, "compressed": 0, "bytes_written": 0, "full_snapshot_bytes": 0}
+
+    def encode(self, run_id: str, checkpoint_id: str, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Document fields for the next checkpoint of ``run_id``.
+
+        Returns ``kind``, ``seq`` and, for deltas, ``base_checkpoint_id``,
+        plus the (possibly compressed) ``state`` or ``delta`` payload.
+        """
+        full_bytes = len(json.dumps(snapshot, separators=(",", ":")).encode())
+        with self._lock:
+            previous = self._runs.get(run_id)
+            seq = previous[2] + 1 if previous is not None else 0
+            if previous is None or seq % self.full_every == 0:
+                fields, size = _encode_payload("state", snapshot, self.compress_min_bytes)
+                fields.update({"kind": "full", "seq": seq})
+            else:
+                delta = diff_snapshots(previous[1], snapshot)
+                fields, size = _encode_payload("delta", delta, self.compress_min_bytes)
+                fields.update({"kind": "delta", "seq": seq, "base_checkpoint_id": previous[0]})
+
+            self._runs[run_id] = (checkpoint_id, snapshot, seq)
+            self._runs.move_to_end(run_id)
+            while len(self._runs) > self.max_runs:
+                self._runs.popitem(last=False)
+
+            self._stats[fields["kind"]] += 1
+            self._stats["compressed"] += "payload_z" in fields
+            self._stats["bytes_written"] += size
+            self._stats["full_snapshot_bytes"] += full_bytes
+        return fields
+
+    def reset(self, run_id: str) -> None:
+        """Forget a run so its next checkpoint is a full snapshot."""
+        with self._lock:
+            self._runs.pop(run_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counts plus payload bytes written vs. what full snapshots would have taken."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["tracked_runs"] = len(self._runs)
+        return stats
+
+
+# Singleton instance
+checkpoint_encoder = CheckpointEncoder()
+
+
+def build_checkpoint(
     state: AgentState,
     checkpoint_id: Optional[str] = None,
-) -> CheckpointMetadata:
-    """Save agent state checkpoint to Firestore.
+    encoder: Optional[CheckpointEncoder] = None,
+    snapshot: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[str, Any], CheckpointMetadata]:
+    """Encode a checkpoint document for ``state``.
 
     Args:
         state: Current agent state
         checkpoint_id: Optional checkpoint ID (generated if not provided)
+        encoder: Delta encoder (default: checkpoint_encoder)
+        snapshot: ``_snapshot_state(state)`` if the caller already has it
 
     Returns:
-        CheckpointMetadata with checkpoint information
-
-    Raises:
-        Exception: If checkpoint save fails
+        Tuple of (Firestore document, CheckpointMetadata)
     """
+    encoder = encoder or checkpoint_encoder
     run_id = state.get("run_id", "unknown")
     phase = state.get("phase", "unknown")
 
-    # Generate checkpoint ID if not provided
+    # Generate checkpoint ID if not provided; microseconds keep ids of
+    # back-to-back checkpoints distinct, since deltas refer to them
     if checkpoint_id is None:
-        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S_%f")
         checkpoint_id = f"{run_id}_{phase}_{timestamp}"
 
     # Extract token usage
@@ -139,19 +317,8 @@ def save_checkpoint(
         "phase": phase,
         "timestamp": firestore.SERVER_TIMESTAMP,
         "created_at": datetime.now(timezone.utc),
-        # State snapshot
-        "state": {
-            "user_query": state.get("user_query", ""),
-            "phase": phase,
-            "status": state.get("status", "running"),
-            "mode": state.get("mode", "interactive"),
-            "scope": state.get("scope", {}),
-            "hypotheses": state.get("hypotheses", []),
-            "evidence": state.get("evidence", []),
-            "tool_calls": tool_calls,
-            "runbook_ids": state.get("runbook_ids", []),
-            "error": state.get("error"),
-        },
+        # State snapshot or delta (see CheckpointEncoder)
+        **encoder.encode(run_id, checkpoint_id, snapshot if snapshot is not None else _snapshot_state(state)),
         # Metadata
         "metadata": metadata.model_dump(),
         # Token tracking
@@ -159,26 +326,219 @@ def save_checkpoint(
         "message_count": len(messages),
         "tool_call_count": len(tool_calls),
     }
+    return checkpoint_doc, metadata
+
+
+def save_checkpoint(
+    state: AgentState,
+    checkpoint_id: Optional[str] = None,
+) -> CheckpointMetadata:
+    """Save agent state checkpoint to Firestore.
+
+    Args:
+        state: Current agent state
+        checkpoint_id: Optional checkpoint ID (generated if not provided)
+
+    Returns:
+        CheckpointMetadata with checkpoint information
+
+    Raises:
+        Exception: If checkpoint save fails
+    """
+    checkpoint_doc, metadata = build_checkpoint(state, checkpoint_id)
 
     try:
         # Save to Firestore
         client = get_firestore_db()
-        doc_ref = client.collection("checkpoints").document(checkpoint_id)
+        doc_ref = client.collection(CHECKPOINT_COLLECTION).document(metadata.checkpoint_id)
         doc_ref.set(checkpoint_doc)
 
         logger.info(
-            f"Checkpoint saved: {checkpoint_id} "
-            f"(phase={phase}, tokens={token_usage['total_tokens']}, "
-            f"messages={len(messages)})"
+            f"Checkpoint saved: {metadata.checkpoint_id} "
+            f"(phase={metadata.phase}, kind={checkpoint_doc['kind']}, "
+            f"tokens={metadata.token_usage['total_tokens']}, messages={metadata.message_count})"
         )
 
         return metadata
 
     except Exception as e:
-        logger.error(f"Failed to save checkpoint {checkpoint_id}: {e}")
+        # The chain is broken at this checkpoint; start the next one from scratch
+        checkpoint_encoder.reset(metadata.run_id)
+        logger.error(f"Failed to save checkpoint {metadata.checkpoint_id}: {e}")
         raise
 
 
+_QueuedCheckpoint = Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]
+
+
+class CheckpointWriter:
+    """Write-behind queue for checkpoint documents.
+
+    A daemon thread drains the queue and commits up to ``batch_max``
+    documents (and ``batch_max_bytes``) per Firestore batch. Documents are
+    written in the order they were enqueued. When a batch fails, its runs
+    are reset on the encoder so their next checkpoint is a full snapshot,
+    and deltas already queued against a failed checkpoint are rewritten
+    as full snapshots before they are written. A full queue falls back to
+    a synchronous write rather than dropping the checkpoint.
+    """
+
+    def __init__(
+        self,
+        get_db: Optional[Callable[[], Any]] = None,
+        encoder: Optional[CheckpointEncoder] = None,
+        max_queue: int = CHECKPOINT_QUEUE_MAX,
+        batch_max: int = CHECKPOINT_BATCH_MAX,
+        batch_max_bytes: int = CHECKPOINT_BATCH_MAX_BYTES,
+        flush_interval: float = CHECKPOINT_FLUSH_INTERVAL_SEC,
+    ):
+        self._get_db = get_db
+        self._encoder = encoder
+        self.max_queue = max_queue
+        self.batch_max = batch_max
+        self.batch_max_bytes = batch_max_bytes
+        self.flush_interval = flush_interval
+        # (checkpoint_id, doc, snapshot); the snapshot lets a delta be rewritten as full
+        self._queue: "queue.Queue[_QueuedCheckpoint]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        # Checkpoint ids whose write failed, oldest first; only queued deltas can refer to them
+        self._failed_ids: "OrderedDict[str, None]" = OrderedDict()
+        self._stats = {"enqueued": 0, "written": 0, "failed": 0, "batches": 0, "sync_fallbacks": 0, "rebased": 0}
+
+    def _db(self) -> Any:
+        return self._get_db() if self._get_db is not None else get_firestore_db()
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+                    self._thread.start()
+
+    def enqueue(self, checkpoint_doc: Dict[str, Any], snapshot: Optional[Dict[str, Any]] = None) -> None:
+        """Schedule a document from build_checkpoint for writing.
+
+        Args:
+            checkpoint_doc: Document from build_checkpoint
+            snapshot: Full state snapshot of the document, used to rewrite a
+                delta whose base failed to write
+        """
+        item = (checkpoint_doc["checkpoint_id"], checkpoint_doc, snapshot)
+        with self._lock:
+            self._pending += 1
+            self._stats["enqueued"] += 1
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self._stats["sync_fallbacks"] += 1
+            self._write([self._rebase(item)])
+            return
+        self._ensure_started()
+
+    def _rebase(self, item: "_QueuedCheckpoint") -> "_QueuedCheckpoint":
+        """Rewrite a delta whose base checkpoint failed to write as a full snapshot."""
+        checkpoint_id, doc, snapshot = item
+        if doc.get("kind") != "delta":
+            return item
+        with self._lock:
+            if doc.get("base_checkpoint_id") not in self._failed_ids:
+                return item
+            if snapshot is not None:
+                self._stats["rebased"] += 1
+        if snapshot is None:
+            logger.warning(f"Checkpoint {checkpoint_id} is a delta on a failed write and cannot be restored")
+            return item
+
+        encoder = self._encoder or checkpoint_encoder
+        fields, _ = _encode_payload("state", snapshot, encoder.compress_min_bytes)
+        rebased = {k: v for k, v in doc.items() if k not in ("delta", "payload_z", "encoding", "base_checkpoint_id")}
+        rebased.update(fields, kind="full")
+        return checkpoint_id, rebased, snapshot
+
+    def _run(self) -> None:
+        carry: Optional[_QueuedCheckpoint] = None
+        while True:
+            # Rebase at batch time, so failures of earlier batches are seen
+            first = self._rebase(carry if carry is not None else self._queue.get())
+            carry = None
+            batch, size = [first], _doc_bytes(first[1])
+            while len(batch) < self.batch_max:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval if len(batch) == 1 else 0)
+                except queue.Empty:
+                    break
+                item = self._rebase(item)
+                item_size = _doc_bytes(item[1])
+                if size + item_size > self.batch_max_bytes:
+                    carry = item
+                    break
+                batch.append(item)
+                size += item_size
+            self._write(batch)
+
+    def _write(self, items: List["_QueuedCheckpoint"]) -> None:
+        try:
+            client = self._db()
+            batch = client.batch()
+            collection = client.collection(CHECKPOINT_COLLECTION)
+            for checkpoint_id, doc, _ in items:
+                batch.set(collection.document(checkpoint_id), doc)
+            batch.commit()
+            ok = True
+        except Exception as e:
+            ok = False
+            logger.error(f"Failed to write {len(items)} checkpoints: {e}")
+            with self._lock:
+                for checkpoint_id, _, _ in items:
+                    self._failed_ids[checkpoint_id] = None
+                while len(self._failed_ids) > self.max_queue:
+                    self._failed_ids.popitem(last=False)
+            for run_id in {doc.get("run_id") for _, doc, _ in items}:
+                (self._encoder or checkpoint_encoder).reset(run_id)
+
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["written" if ok else "failed"] += len(items)
+            self._pending -= len(items)
+            self._idle.notify_all()
+
+    def flush(self, timeout: float = CHECKPOINT_DRAIN_SEC) -> bool:
+        """Block until every enqueued document is written. Returns False on timeout."""
+        with self._lock:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = self._pending
+        return stats
+
+
+# Singleton instance
+checkpoint_writer = CheckpointWriter()
+
+
+def enqueue_checkpoint(state: AgentState, checkpoint_id: Optional[str] = None) -> CheckpointMetadata:
+    """Encode a checkpoint now and write it in the background.
+
+    Args:
+        state: Current agent state
+        checkpoint_id: Optional checkpoint ID (generated if not provided)
+
+    Returns:
+        CheckpointMetadata for the enqueued checkpoint
+    """
+    snapshot = _snapshot_state(state)
+    checkpoint_doc, metadata = build_checkpoint(state, checkpoint_id, snapshot=snapshot)
+    checkpoint_writer.enqueue(checkpoint_doc, snapshot)
+    logger.debug(f"Checkpoint enqueued: {metadata.checkpoint_id} (kind={checkpoint_doc['kind']})")
+    return metadata
+
+
 def load_checkpoint(checkpoint_id: str) -> Optional[Dict[str, Any]]:
     """Load agent state checkpoint from Firestore.
 
@@ -193,7 +553,7 @@ def load_checkpoint(checkpoint_id: str) -> Optional[Dict[str, Any]]:
     """
     try:
         client = get_firestore_db()
-        doc_ref = client.collection("checkpoints").document(checkpoint_id)
+        doc_ref = client.collection(CHECKPOINT_COLLECTION).document(checkpoint_id)
         doc = doc_ref.get()
 
         if not doc.exists:
@@ -210,16 +570,58 @@ def load_checkpoint(checkpoint_id: str) -> Optional[Dict[str, Any]]:
         raise
 
 
-def restore_state_from_checkpoint(checkpoint_data: Dict[str, Any]) -> AgentState:
+def materialize_snapshot(
+    checkpoint_data: Dict[str, Any],
+    loader: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None,
+) -> Dict[str, Any]:
+    """Full state snapshot for a checkpoint, replaying deltas if needed.
+
+    Args:
+        checkpoint_data: Checkpoint document from Firestore
+        loader: Loads a checkpoint by ID (default: load_checkpoint)
+
+    Returns:
+        The ``state`` dict as a full snapshot would have stored it
+
+    Raises:
+        ValueError: If a checkpoint in the delta chain is missing
+    """
+    loader = loader or load_checkpoint
+    deltas = []
+    current = checkpoint_data
+    # Documents written before delta encoding have no kind and are full snapshots
+    while current.get("kind") == "delta":
+        if len(deltas) >= CHECKPOINT_MAX_CHAIN:
+            raise ValueError(f"Checkpoint chain too long at {current.get('checkpoint_id')}")
+        deltas.append(_decode_payload(current, "delta"))
+        base_id = current.get("base_checkpoint_id")
+        base = loader(base_id) if base_id else None
+        if base is None:
+            raise ValueError(
+                f"Checkpoint {current.get('checkpoint_id')} refers to missing base {base_id}"
+            )
+        current = base
+
+    snapshot = _decode_payload(current, "state")
+    for delta in reversed(deltas):
+        snapshot = apply_delta(snapshot, delta)
+    return snapshot
+
+
+def restore_state_from_checkpoint(
+    checkpoint_data: Dict[str, Any],
+    loader: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None,
+) -> AgentState:
     """Restore AgentState from checkpoint data.
 
     Args:
         checkpoint_data: Checkpoint document from Firestore
+        loader: Loads base checkpoints of a delta (default: load_checkpoint)
 
     Returns:
         Restored AgentState
     """
-    state_snapshot = checkpoint_data.get("state", {})
+    state_snapshot = materialize_snapshot(checkpoint_data, loader)
     metadata = checkpoint_data.get("metadata", {})
 
     # Reconstruct AgentState
@@ -262,7 +664,7 @@ def list_checkpoints_for_run(run_id: str, limit: int = 10) -> list[Dict[str, Any
     try:
         client = get_firestore_db()
         query = (
-            client.collection("checkpoints")
+            client.collection(CHECKPOINT_COLLECTION)
             .where("run_id", "==", run_id)
             .order_by("created_at", direction=firestore.Query.DESCENDING)
             .limit(limit)
@@ -284,6 +686,8 @@ def list_checkpoints_for_run(run_id: str, limit: int = 10) -> list[Dict[str, Any
 def delete_checkpoint(checkpoint_id: str) -> bool:
     """Delete a checkpoint from Firestore.
 
+    Deleting a full snapshot leaves the deltas based on it unrestorable.
+
     Args:
         checkpoint_id: Checkpoint identifier
 
@@ -292,7 +696,7 @@ def delete_checkpoint(checkpoint_id: str) -> bool:
     """
     try:
         client = get_firestore_db()
-        doc_ref = client.collection("checkpoints").document(checkpoint_id)
+        doc_ref = client.collection(CHECKPOINT_COLLECTION).document(checkpoint_id)
         doc_ref.delete()
         logger.info(f"Checkpoint deleted: {checkpoint_id}")
         return True
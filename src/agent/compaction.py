@@ -0,0 +1,195 @@
+"""Context compaction for long agent sessions.
+
+Tool outputs are appended to ``messages`` verbatim (up to ~5000 tokens for
+a bq_query_tool result) and are re-sent to the model on every phase. Once
+the prompt crosses ``COMPACTION_THRESHOLD`` of the token budget, the
+compaction node replaces older tool outputs with a structured summary:
+
+    {"compacted": true, "ref": "payload:...", "tool": "analyze_logs",
+     "original_tokens": 4210, "summary": {...}}
+
+The summary keeps the shape of the result (top-level keys, list lengths,
+the first few items, truncated strings). The full output is stored
+out-of-band in ``PayloadStore`` (Redis, and Firestore when enabled) and
+the model can get it back with the ``fetch_tool_output`` tool.
+
+The newest ``COMPACTION_KEEP_RECENT`` tool outputs are never compacted,
+so the phase that requested them still sees them in full.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.messages import BaseMessage, ToolMessage
+
+from src.services.redis_service import redis_service
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+ENABLE_COMPACTION = os.getenv("ENABLE_COMPACTION", "true").lower() == "true"
+# Fraction of the token budget the prompt may reach before compacting
+COMPACTION_THRESHOLD = float(os.getenv("COMPACTION_THRESHOLD", "0.6"))
+COMPACTION_KEEP_RECENT = int(os.getenv("COMPACTION_KEEP_RECENT", "2"))
+# Outputs smaller than this aren't worth a summary and a round trip
+COMPACTION_MIN_TOKENS = int(os.getenv("COMPACTION_MIN_TOKENS", "300"))
+COMPACTION_PAYLOAD_TTL_SEC = int(os.getenv("COMPACTION_PAYLOAD_TTL_SEC", "86400"))
+PAYLOAD_COLLECTION = "agent_payloads"
+# Firestore documents are limited to 1 MiB
+FIRESTORE_PAYLOAD_MAX_BYTES = 900_000
+
+SUMMARY_MAX_ITEMS = 3
+SUMMARY_MAX_KEYS = 20
+SUMMARY_MAX_CHARS = 200
+SUMMARY_MAX_DEPTH = 3
+
+
+def summarize_value(value: Any, depth: int = 0) -> Any:
+    """Shape-preserving digest of a JSON value.
+
+    Dicts keep their first keys, lists become ``{"count", "first"}``,
+    strings are truncated; structure below SUMMARY_MAX_DEPTH is elided.
+    """
+    if isinstance(value, dict):
+        if depth >= SUMMARY_MAX_DEPTH:
+            return f"<{len(value)} keys>"
+        items = list(value.items())
+        summary = {k: summarize_value(v, depth + 1) for k, v in items[:SUMMARY_MAX_KEYS]}
+        if len(items) > SUMMARY_MAX_KEYS:
+            summary["..."] = f"{len(items) - SUMMARY_MAX_KEYS} more keys"
+        return summary
+    if isinstance(value, list):
+        if depth >= SUMMARY_MAX_DEPTH:
+            return f"<{len(value)} items>"
+        return {"count": len(value), "first": [summarize_value(v, depth + 1) for v in value[:SUMMARY_MAX_ITEMS]]}
+    if isinstance(value, str) and len(value) > SUMMARY_MAX_CHARS:
+        return value[:SUMMARY_MAX_CHARS] + "..."
+    return value
+
+
+def summarize_tool_output(content: str) -> Any:
+    """Summary of a ToolMessage's content (JSON results keep their structure)."""
+    try:
+        return summarize_value(json.loads(content))
+    except (TypeError, ValueError):
+        return summarize_value(content)
+
+
+class PayloadStore:
+    """Out-of-band storage for compacted tool outputs, addressed by reference.
+
+    Payloads go to Redis with a TTL and, when Firestore is enabled (see
+    src.agent.checkpoint), to the ``agent_payloads`` collection so they
+    outlive the Redis entry.
+    """
+
+    def __init__(self, redis=redis_service, ttl: int = COMPACTION_PAYLOAD_TTL_SEC, firestore_db: Optional[Callable[[], Any]] = None):
+        self.redis = redis
+        self.ttl = ttl
+        self._firestore_db = firestore_db
+
+    @staticmethod
+    def reference(content: str) -> str:
+        return f"payload:{hashlib.sha256(content.encode()).hexdigest()[:32]}"
+
+    def _db(self) -> Optional[Any]:
+        try:
+            if self._firestore_db is not None:
+                return self._firestore_db()
+            from src.agent.checkpoint import get_firestore_db
+            return get_firestore_db()
+        except Exception:
+            return None  # Firestore disabled or unavailable; Redis only
+
+    def put(self, content: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Store a payload; returns its reference (same content, same reference)."""
+        ref = self.reference(content)
+        self.redis.set_cache(ref, {"content": content, **(metadata or {})}, ttl=self.ttl)
+
+        db = self._db()
+        if db is not None and len(content.encode()) <= FIRESTORE_PAYLOAD_MAX_BYTES:
+            try:
+                db.collection(PAYLOAD_COLLECTION).document(ref.split(":", 1)[1]).set({"content": content, **(metadata or {})})
+            except Exception as e:
+                logger.warning(f"Failed to store payload {ref} in Firestore: {e}")
+        return ref
+
+    def get(self, ref: str) -> Optional[str]:
+        cached = self.redis.get_cache(ref)
+        if isinstance(cached, dict) and "content" in cached:
+            return cached["content"]
+
+        db = self._db()
+        if db is None or not ref.startswith("payload:"):
+            return None
+        try:
+            doc = db.collection(PAYLOAD_COLLECTION).document(ref.split(":", 1)[1]).get()
+        except Exception as e:
+            logger.warning(f"Failed to load payload {ref} from Firestore: {e}")
+            return None
+        return (doc.to_dict() or {}).get("content") if doc.exists else None
+
+
+# Singleton instance
+payload_store = PayloadStore()
+
+
+def is_compacted(message: BaseMessage) -> bool:
+    return bool(message.additional_kwargs.get("compacted_ref"))
+
+
+def compact_messages(
+    messages: List[BaseMessage],
+    count_tokens: Callable[[str], int],
+    store: Optional[PayloadStore] = None,
+    keep_recent: int = COMPACTION_KEEP_RECENT,
+    min_tokens: int = COMPACTION_MIN_TOKENS,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> List[ToolMessage]:
+    """Compacted replacements for older, large tool outputs.
+
+    Args:
+        messages: Conversation so far
+        count_tokens: Token counter for a string
+        store: Where full outputs are kept (default: payload_store)
+        keep_recent: Newest tool outputs to leave verbatim
+        min_tokens: Smallest output worth compacting
+        metadata: Stored alongside each payload (e.g. run_id)
+
+    Returns:
+        ToolMessages with the same ids as the ones they replace, for the
+        add_messages reducer; empty when nothing qualifies
+    """
+    store = store or payload_store
+    tool_messages = [m for m in messages if isinstance(m, ToolMessage)]
+    candidates = tool_messages[:-keep_recent] if keep_recent > 0 else tool_messages
+
+    replacements: List[ToolMessage] = []
+    for message in candidates:
+        if is_compacted(message) or not message.id:
+            continue
+        content = message.content if isinstance(message.content, str) else json.dumps(message.content, default=str)
+        tokens = count_tokens(content)
+        if tokens < min_tokens:
+            continue
+
+        ref = store.put(content, {**(metadata or {}), "tool": message.name, "tool_call_id": message.tool_call_id})
+        summary = {
+            "compacted": True,
+            "ref": ref,
+            "tool": message.name,
+            "original_tokens": tokens,
+            "summary": summarize_tool_output(content),
+        }
+        replacements.append(ToolMessage(
+            content=json.dumps(summary, default=str),
+            id=message.id,
+            name=message.name,
+            tool_call_id=message.tool_call_id,
+            status=message.status,
+            additional_kwargs={**message.additional_kwargs, "compacted_ref": ref, "original_tokens": tokens},
+        ))
+    return replacements
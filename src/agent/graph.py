@@ -6,12 +6,21 @@ This module defines the agent workflow with the following phases:
 3. verify - Confirm findings and dig deeper
 4. optimize - Provide recommendations
 5. persist - Save run to BigQuery
+
+With speculative retrieval (src.agent.speculative) the retrieval node
+only starts the search; diagnose runs alongside it and the results join
+the evidence when they arrive.
+
+Tool results pass through a compaction step (src.agent.compaction) on
+their way back to the calling phase.
 """
 
 import os
 from langgraph.graph import StateGraph, END
+from src.agent.compaction import ENABLE_COMPACTION
 from src.agent.state import AgentState
 from src.agent.nodes import (
+    compaction_node,
     diagnose_node,
     verify_node,
     optimize_node,
@@ -36,6 +45,11 @@ workflow.add_node("optimize", optimize_node)
 workflow.add_node("tools", tool_node)
 workflow.add_node("persist", persist_node)
 
+# Compaction runs between tools and the calling phase
+if ENABLE_COMPACTION:
+    workflow.add_node("compact", compaction_node)
+    workflow.add_edge("tools", "compact")
+
 
 def dispatcher(state: AgentState):
     """Route tool results back to the calling phase."""
@@ -77,7 +91,7 @@ workflow.add_edge("persist", END)
 
 # Tool transitions - return to caller
 workflow.add_conditional_edges(
-    "tools",
+    "compact" if ENABLE_COMPACTION else "tools",
     dispatcher,
     {
         "diagnose": "diagnose",
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from src.agent.llm_gateway import llm_gateway
 from src.config import config
 
 
@@ -8,6 +9,9 @@ def get_llm():
 
     This is intentionally a lazy import so that modules/tests that don't need
     LLM execution can still import the codebase without Vertex/GenAI deps.
+
+    Calls go through the LLM gateway (src.agent.llm_gateway), which rate
+    limits and queues them per model.
     """
 
     try:
@@ -27,10 +31,13 @@ def get_llm():
         f"project={project_id}, location={location}, model={model}"
     )
 
-    return ChatGoogleGenerativeAI(
+    return llm_gateway.wrap(
+        ChatGoogleGenerativeAI(
+            model=model,
+            temperature=0.1,
+            streaming=True,
+            project=project_id,
+            location=location,
+        ),
         model=model,
-        temperature=0.1,
-        streaming=True,
-        project=project_id,
-        location=location,
     )
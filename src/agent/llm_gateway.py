@@ -0,0 +1,367 @@
+"""Admission control for agent model calls.
+
+Every /api/chat request drives the graph, and every phase calls the model.
+Without a limit a burst of chats turns into a burst of Vertex calls, which
+trips quota errors and slows every stream at once. ``get_llm()`` therefore
+returns a ``GatedLLM``. Before each call it takes a permit from the
+``ModelGate`` of its model:
+
+- a token bucket caps the call rate (``LLM_RATE_PER_SEC``, bursts of up
+  to ``LLM_BURST``), and ``LLM_MAX_CONCURRENCY`` caps the calls in flight
+- waiting callers are served interactive before batch; within a priority
+  they are served round-robin by user, so one user's burst can't starve
+  everyone else
+- a caller that waits longer than ``LLM_QUEUE_TIMEOUT_SEC`` gets
+  ``LLMQueueTimeoutError``
+
+Per-model overrides come from ``LLM_MODEL_LIMITS`` (JSON), e.g.
+``{"gemini-2.5-flash": {"rate_per_sec": 2, "burst": 4, "max_concurrency": 4}}``.
+
+The chat handler sets ``llm_caller`` (user and mode) for its run. A call
+that has to queue dispatches ``llm_queue`` custom events ("queued", then
+"admitted" with the wait), which the handler streams as SSE status events.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks.manager import adispatch_custom_event, dispatch_custom_event
+from langchain_core.runnables import Runnable, RunnableConfig
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+LLM_GATEWAY_ENABLED = os.getenv("LLM_GATEWAY_ENABLED", "true").lower() == "true"
+LLM_RATE_PER_SEC = float(os.getenv("LLM_RATE_PER_SEC", "5"))
+LLM_BURST = int(os.getenv("LLM_BURST", "10"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_QUEUE_TIMEOUT_SEC = float(os.getenv("LLM_QUEUE_TIMEOUT_SEC", "60"))
+LLM_MODEL_LIMITS: Dict[str, Dict[str, float]] = json.loads(os.getenv("LLM_MODEL_LIMITS", "{}"))
+
+# Served first to last
+PRIORITIES = ("interactive", "batch")
+QUEUE_EVENT = "llm_queue"
+
+
+@dataclass(frozen=True)
+class LLMCaller:
+    """Who a model call is made for."""
+    user_id: str = "anonymous"
+    # Agent state mode: interactive | batch
+    priority: str = "batch"
+
+
+# Set by the chat handler for the duration of a run; calls without one are batch
+llm_caller: contextvars.ContextVar[Optional[LLMCaller]] = contextvars.ContextVar("llm_caller", default=None)
+
+
+class LLMQueueTimeoutError(RuntimeError):
+    """A model call waited longer than its queue timeout."""
+
+
+class TokenBucket:
+    """Rate limiter: ``rate`` tokens per second, holding at most ``capacity``."""
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+
+    def try_acquire(self) -> float:
+        """Take a token if one is available.
+
+        Returns:
+            0.0 if a token was taken, else seconds until one will be
+        """
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+
+@dataclass
+class _Waiter:
+    caller: LLMCaller
+    enqueued: float = field(default_factory=time.monotonic)
+    granted: bool = False
+
+
+class ModelGate:
+    """Concurrency limit, rate limit and fair queue for one model."""
+
+    def __init__(
+        self,
+        model: str,
+        rate_per_sec: float = LLM_RATE_PER_SEC,
+        burst: int = LLM_BURST,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(rate_per_sec, burst, clock)
+        self._cond = threading.Condition()
+        self._active = 0
+        # priority -> user_id -> that user's waiters, users in round-robin order
+        self._waiting: Dict[str, "OrderedDict[str, Deque[_Waiter]]"] = {p: OrderedDict() for p in PRIORITIES}
+        self._refill_in = 0.0
+        self._stats = {"admitted": 0, "queued": 0, "timeouts": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+
+    def _queue_length(self) -> int:
+        return sum(len(w) for users in self._waiting.values() for w in users.values())
+
+    def _dispatch(self) -> None:
+        """Grant permits to waiters in fair order while slots and tokens last. Holds _cond."""
+        self._refill_in = 0.0
+        while self._active < self.max_concurrency:
+            users = next((u for u in self._waiting.values() if u), None)
+            if users is None:
+                break
+            delay = self.bucket.try_acquire()
+            if delay > 0:
+                self._refill_in = delay
+                break
+            user_id, waiters = next(iter(users.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                users.move_to_end(user_id)
+            else:
+                del users[user_id]
+            waiter.granted = True
+            self._active += 1
+        self._cond.notify_all()
+
+    def acquire(
+        self,
+        caller: LLMCaller,
+        timeout: float = LLM_QUEUE_TIMEOUT_SEC,
+        on_queued: Optional[Callable[[int], None]] = None,
+    ) -> float:
+        """Block until a permit is granted.
+
+        Args:
+            caller: User and priority of the call
+            timeout: Longest time to wait in the queue
+            on_queued: Called with the queue length if the call has to wait
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            LLMQueueTimeoutError: If no permit is granted within timeout
+        """
+        priority = caller.priority if caller.priority in self._waiting else PRIORITIES[-1]
+        waiter = _Waiter(caller)
+        deadline = waiter.enqueued + timeout
+        with self._cond:
+            self._waiting[priority].setdefault(caller.user_id, deque()).append(waiter)
+            self._dispatch()
+            queue_length = 0 if waiter.granted else self._queue_length()
+            if queue_length:
+                self._stats["queued"] += 1
+
+        if queue_length and on_queued is not None:
+            on_queued(queue_length)
+
+        with self._cond:
+            while not waiter.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._drop(priority, waiter)
+                    self._stats["timeouts"] += 1
+                    raise LLMQueueTimeoutError(
+                        f"Model {self.model} call waited more than {timeout}s for a slot"
+                    )
+                # Wake for a release, or when the bucket refills
+                self._cond.wait(min(remaining, self._refill_in) if self._refill_in else remaining)
+                if not waiter.granted:
+                    self._dispatch()
+
+            waited = time.monotonic() - waiter.enqueued
+            self._stats["admitted"] += 1
+            self._stats["wait_ms_total"] += waited * 1000
+            self._stats["wait_ms_max"] = max(self._stats["wait_ms_max"], waited * 1000)
+        return waited
+
+    def _drop(self, priority: str, waiter: _Waiter) -> None:
+        users = self._waiting[priority]
+        waiters = users.get(waiter.caller.user_id)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del users[waiter.caller.user_id]
+
+    def release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._dispatch()
+            self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self._stats)
+            stats["active"] = self._active
+            stats["waiting"] = self._queue_length()
+        wait_ms_total = stats.pop("wait_ms_total")
+        stats["wait_ms_avg"] = round(wait_ms_total / stats["admitted"], 1) if stats["admitted"] else 0.0
+        stats["wait_ms_max"] = round(stats["wait_ms_max"], 1)
+        return stats
+
+
+class LLMGateway:
+    """One ModelGate per model name."""
+
+    def __init__(self, enabled: bool = LLM_GATEWAY_ENABLED):
+        self.enabled = enabled
+        self._gates: Dict[str, ModelGate] = {}
+        self._lock = threading.Lock()
+
+    def gate(self, model: str) -> ModelGate:
+        if model not in self._gates:
+            with self._lock:
+                if model not in self._gates:
+                    self._gates[model] = ModelGate(model, **LLM_MODEL_LIMITS.get(model, {}))
+        return self._gates[model]
+
+    def wrap(self, llm: Any, model: Optional[str] = None) -> Any:
+        """Gate ``llm``'s calls (returned unchanged when the gateway is disabled)."""
+        if not self.enabled:
+            return llm
+        return GatedLLM(llm, model or getattr(llm, "model", None) or "default", self)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            gates = dict(self._gates)
+        return {model: gate.get_stats() for model, gate in gates.items()}
+
+
+# Singleton instance
+llm_gateway = LLMGateway()
+
+
+def _queue_event(data: Dict[str, Any]) -> None:
+    """Report queueing on the graph's event stream (no-op outside a run)."""
+    try:
+        dispatch_custom_event(QUEUE_EVENT, data)
+    except Exception as e:
+        logger.debug(f"LLM queue event not dispatched: {e}")
+
+
+async def _aqueue_event(data: Dict[str, Any]) -> None:
+    """Async ``_queue_event``, for calls made from async graph nodes."""
+    try:
+        await adispatch_custom_event(QUEUE_EVENT, data)
+    except Exception as e:
+        logger.debug(f"LLM queue event not dispatched: {e}")
+
+
+class GatedLLM(Runnable[Any, Any]):
+    """Chat model wrapper that takes a gateway permit around each call.
+
+    ``invoke``/``ainvoke`` hold the permit for the call, ``stream``/``astream``
+    until the stream ends; ``batch``, ``abatch`` and ``transform`` go through
+    them, one permit per input. Being a Runnable it composes (``prompt | llm``),
+    and ``bind_tools``/``with_structured_output`` return gated models too.
+    """
+
+    def __init__(self, llm: Any, model: str, gateway: LLMGateway):
+        self._llm = llm
+        self.model = model
+        self._gateway = gateway
+
+    def bind_tools(self, *args, **kwargs) -> "GatedLLM":
+        return GatedLLM(self._llm.bind_tools(*args, **kwargs), self.model, self._gateway)
+
+    def with_structured_output(self, *args, **kwargs) -> "GatedLLM":
+        return GatedLLM(self._llm.with_structured_output(*args, **kwargs), self.model, self._gateway)
+
+    def _event(self, caller: LLMCaller, status: str, **data: Any) -> Dict[str, Any]:
+        return {"status": status, "model": self.model, "priority": caller.priority, **data}
+
+    def _acquire(self) -> ModelGate:
+        caller = llm_caller.get() or LLMCaller()
+        gate = self._gateway.gate(self.model)
+
+        queued = []
+
+        def on_queued(queue_length: int) -> None:
+            queued.append(queue_length)
+            _queue_event(self._event(caller, "queued", queue_length=queue_length))
+
+        waited = gate.acquire(caller, on_queued=on_queued)
+        if queued:
+            _queue_event(self._event(caller, "admitted", wait_ms=round(waited * 1000, 1)))
+        return gate
+
+    async def _aacquire(self) -> ModelGate:
+        """``_acquire`` for the event loop: waits in a worker thread."""
+        caller = llm_caller.get() or LLMCaller()
+        gate = self._gateway.gate(self.model)
+        loop = asyncio.get_running_loop()
+
+        queued: List[Any] = []
+
+        def on_queued(queue_length: int) -> None:
+            # Runs in the worker thread; dispatch on the loop
+            queued.append(asyncio.run_coroutine_threadsafe(
+                _aqueue_event(self._event(caller, "queued", queue_length=queue_length)), loop
+            ))
+
+        acquiring = asyncio.ensure_future(asyncio.to_thread(gate.acquire, caller, on_queued=on_queued))
+        try:
+            waited = await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # The thread keeps waiting; hand back the permit once it is granted
+            acquiring.add_done_callback(lambda f: f.cancelled() or f.exception() or gate.release())
+            raise
+        if queued:
+            await asyncio.wrap_future(queued[0])
+            await _aqueue_event(self._event(caller, "admitted", wait_ms=round(waited * 1000, 1)))
+        return gate
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        gate = self._acquire()
+        try:
+            return self._llm.invoke(input, config, **kwargs)
+        finally:
+            gate.release()
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        gate = await self._aacquire()
+        try:
+            return await self._llm.ainvoke(input, config, **kwargs)
+        finally:
+            gate.release()
+
+    def stream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[Any]:
+        gate = self._acquire()
+        try:
+            yield from self._llm.stream(input, config, **kwargs)
+        finally:
+            gate.release()
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        gate = await self._aacquire()
+        try:
+            async for chunk in self._llm.astream(input, config, **kwargs):
+                yield chunk
+        finally:
+            gate.release()
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__") or name == "_llm":
+            raise AttributeError(name)
+        return getattr(self._llm, name)
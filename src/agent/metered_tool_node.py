@@ -6,10 +6,14 @@ for each tool invocation, including duration, status, and cost.
 Phase 3, Task 3.4: MeteredToolNode wrapper
 """
 
+import contextvars
 import logging
+import os
+import threading
 import time
 import uuid
-from typing import Any, Dict, List, Optional, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 from datetime import datetime, timezone
 
 from langchain_core.runnables.config import RunnableConfig
@@ -21,9 +25,23 @@ from langgraph._internal._constants import CONF, CONFIG_KEY_RUNTIME
 
 from src.agent.state import AgentState
 from src.agent.tokenization import estimate_tool_output_tokens
+from src.agent.tools.bq import dry_run_usage
+from src.agent.tools.result_cache import tool_cache_usage
 
 logger = logging.getLogger(__name__)
 
+# Configuration
+TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "4"))
+TOOL_TIMEOUT_SEC = float(os.getenv("TOOL_TIMEOUT_SEC", "60"))
+TOOL_EXECUTOR_WORKERS = int(os.getenv("TOOL_EXECUTOR_WORKERS", "16"))
+# Timed-out calls still holding executor threads before the executor is replaced
+TOOL_EXECUTOR_MAX_ABANDONED = int(os.getenv("TOOL_EXECUTOR_MAX_ABANDONED", str(max(1, TOOL_EXECUTOR_WORKERS // 2))))
+
+_tool_executor: Optional[ThreadPoolExecutor] = None
+# Timed-out calls still running on _tool_executor
+_abandoned = 0
+_executor_lock = threading.Lock()
+
 
 def _ensure_toolnode_config(config: Optional[RunnableConfig]) -> RunnableConfig:
     """Ensure ToolNode has a Runtime available when invoked outside a graph.
@@ -70,6 +88,7 @@ class ToolInvocationMetrics:
         self.result: Optional[Any] = None
         self.token_count: Optional[int] = None
         self.cost_usd: Optional[float] = None
+        self.cache_hit = False
         self.metadata: Dict[str, Any] = {}
 
     @staticmethod
@@ -110,13 +129,13 @@ class ToolInvocationMetrics:
             # Assume $0.01 per 1000 tokens for tool outputs
             self.cost_usd = (self.token_count / 1000) * 0.01
 
-    def fail(self, error_message: str):
-        """Mark invocation as failed."""
+    def fail(self, error_message: str, status: str = "error"):
+        """Mark invocation as failed (status "error" or "timeout")."""
         self.completed_at = datetime.now(timezone.utc)
         self.duration_ms = int(
             (self.completed_at - self.started_at).total_seconds() * 1000
         )
-        self.status = "error"
+        self.status = status
         self.error_message = error_message
 
     def to_dict(self) -> Dict[str, Any]:
@@ -162,29 +181,98 @@ class ToolInvocationMetrics:
             "duration_ms": self.duration_ms,
             "token_count": self.token_count,
             "cost_usd": self.cost_usd,
+            "cache_hit": self.cache_hit,
             "phase": self.phase,
             "metadata": self.metadata,
         }
 
 
+def _get_tool_executor() -> ThreadPoolExecutor:
+    """Shared executor for tool calls (created on first use)."""
+    global _tool_executor
+    if _tool_executor is None:
+        with _executor_lock:
+            if _tool_executor is None:
+                _tool_executor = ThreadPoolExecutor(
+                    max_workers=TOOL_EXECUTOR_WORKERS, thread_name_prefix="metered-tool"
+                )
+    return _tool_executor
+
+
+def _abandon_call(executor: ThreadPoolExecutor, future: Future) -> None:
+    """Count a timed-out call against the executor until its thread is free.
+
+    Once ``TOOL_EXECUTOR_MAX_ABANDONED`` hung calls hold its threads, the
+    executor is retired (its threads exit as their calls finish) and the
+    next call gets a fresh one, so hung tools can't starve later calls.
+    """
+    global _tool_executor, _abandoned
+
+    def release(_future: Future) -> None:
+        global _abandoned
+        with _executor_lock:
+            if executor is _tool_executor:
+                _abandoned -= 1
+
+    with _executor_lock:
+        if executor is not _tool_executor:
+            return
+        _abandoned += 1
+        retire = _abandoned >= TOOL_EXECUTOR_MAX_ABANDONED
+        if retire:
+            _tool_executor = None
+            _abandoned = 0
+    if retire:
+        logger.warning(f"Replacing tool executor: {TOOL_EXECUTOR_MAX_ABANDONED} timed-out calls still hold its threads")
+        executor.shutdown(wait=False)
+    else:
+        future.add_done_callback(release)
+
+
 def create_metered_tool_node(
     tools: Sequence[BaseTool],
     publish_metrics: bool = True,
+    max_concurrency: int = TOOL_MAX_CONCURRENCY,
+    timeout: Optional[float] = TOOL_TIMEOUT_SEC,
+    tool_timeouts: Optional[Dict[str, float]] = None,
 ) -> callable:
     """Create a metered tool node function.
 
     This creates a node function that wraps ToolNode execution
-    with metrics tracking.
+    with metrics tracking. The tool calls of one turn run concurrently
+    (at most ``max_concurrency`` at a time), so a multi-tool turn takes
+    about as long as its slowest call. Output messages and metrics keep
+    the order of the model's tool calls.
+
+    A call that runs longer than its timeout is reported to the model as an
+    error ToolMessage and recorded with status "timeout"; its thread cannot
+    be interrupted and finishes in the background. The timeout counts from
+    when the call starts running; a call still waiting for an executor
+    thread after its timeout is cancelled and reported as not started.
 
     Args:
         tools: List of tools
         publish_metrics: Whether to publish metrics to Pub/Sub
+        max_concurrency: Max tool calls running at once per turn
+        timeout: Default per-call timeout in seconds (None = no limit)
+        tool_timeouts: Per-tool overrides of ``timeout`` by tool name
 
     Returns:
         Node function that tracks metrics
     """
     tool_node = ToolNode(tools)
     metrics_buffer: List[ToolInvocationMetrics] = []
+    tool_timeouts = dict(tool_timeouts or {})
+
+    def invoke_one(tool_input: Dict[str, Any], tool_cfg: RunnableConfig):
+        # Runs in its own copied context, so these records are this call's
+        usage: Dict[str, int] = {}
+        cache: Dict[str, Any] = {}
+        dry_run_usage.set(usage)
+        tool_cache_usage.set(cache)
+        started = time.monotonic()
+        result = tool_node.invoke(tool_input, config=tool_cfg)
+        return result, started, int((time.monotonic() - started) * 1000), usage, cache
 
     def metered_tool_node_func(
         state: AgentState,
@@ -207,9 +295,9 @@ def create_metered_tool_node(
 
         tool_cfg = _ensure_toolnode_config(config)
 
-        # Track metrics for each tool call
+        # One entry per tool call, in the model's order
         tool_call_metrics: List[ToolInvocationMetrics] = []
-        tool_messages: List[ToolMessage] = []
+        calls: List[Dict[str, Any]] = []
 
         for tool_call in last_message.tool_calls:
             invocation_id = str(uuid.uuid4())
@@ -217,7 +305,7 @@ def create_metered_tool_node(
             parameters = tool_call.get("args", {})
 
             # Create metrics tracker
-            metrics = ToolInvocationMetrics(
+            tool_call_metrics.append(ToolInvocationMetrics(
                 invocation_id=invocation_id,
                 run_id=run_id,
                 tool_name=tool_name,
@@ -225,23 +313,40 @@ def create_metered_tool_node(
                 phase=phase,
                 session_id=session_id,
                 user_id=user_id,
-            )
+            ))
+
+            # Each call still sees the full state
+            call = dict(tool_call)
+            call.setdefault("id", invocation_id)
+            call["type"] = "tool_call"
+            calls.append(call)
+
+        turn_start = time.monotonic()
+        outcomes = _run_calls(
+            calls,
+            lambda call: invoke_one(
+                {"__type": "tool_call_with_context", "tool_call": call, "state": state}, tool_cfg
+            ),
+            max_concurrency,
+            [tool_timeouts.get(call["name"], timeout) for call in calls],
+        )
 
-            try:
-                # Execute ONE tool call at a time while still providing full state.
-                call = dict(tool_call)
-                call.setdefault("id", invocation_id)
-                call["type"] = "tool_call"
+        turn_ms = int((time.monotonic() - turn_start) * 1000)
+        tool_messages: List[ToolMessage] = []
+        first_error: Optional[BaseException] = None
 
-                tool_input = {
-                    "__type": "tool_call_with_context",
-                    "tool_call": call,
-                    "state": state,
-                }
+        for call, metrics, outcome in zip(calls, tool_call_metrics, outcomes):
+            tool_name = metrics.tool_name
+            metrics.metadata["parallel_calls"] = len(calls)
 
-                start_time = time.time()
-                result = tool_node.invoke(tool_input, config=tool_cfg)
-                duration_ms = int((time.time() - start_time) * 1000)
+            if outcome[0] == "ok":
+                _, (result, started, duration_ms, usage, cache) = outcome
+                # Time spent waiting for a concurrency slot
+                metrics.metadata["queue_ms"] = int((started - turn_start) * 1000)
+                if usage:
+                    # BigQuery dry-run cache hits/misses/skips during this call
+                    metrics.metadata["dry_run_cache"] = usage
+                metrics.cache_hit = bool(cache.get("cache_hit"))
 
                 # Collect ToolNode outputs (ToolMessage list) for downstream graph use.
                 if isinstance(result, dict) and "messages" in result:
@@ -259,16 +364,44 @@ def create_metered_tool_node(
                     f"(tokens={metrics.token_count}, cost=${metrics.cost_usd:.4f})"
                 )
 
-            except Exception as e:
-                # Mark as failed
-                metrics.fail(str(e))
-                logger.error(f"Tool invocation failed: {tool_name} - {e}")
-                raise
-
-            finally:
-                # Buffer metrics
-                tool_call_metrics.append(metrics)
-                metrics_buffer.append(metrics)
+            elif outcome[0] == "not_started":
+                limit = outcome[1]
+                metrics.fail(f"Not started within {limit}s (tool executor busy)", status="timeout")
+                metrics.metadata["started"] = False
+                logger.error(f"Tool invocation not started: {tool_name} waited {limit}s for an executor thread")
+                tool_messages.append(ToolMessage(
+                    content=f"Error: {tool_name} could not start within {limit}s because the tool executor is busy",
+                    name=tool_name,
+                    tool_call_id=call["id"],
+                    status="error",
+                ))
+
+            elif outcome[0] == "timeout":
+                limit = outcome[1]
+                metrics.fail(f"Timed out after {limit}s", status="timeout")
+                logger.error(f"Tool invocation timed out: {tool_name} after {limit}s")
+                tool_messages.append(ToolMessage(
+                    content=f"Error: {tool_name} timed out after {limit}s",
+                    name=tool_name,
+                    tool_call_id=call["id"],
+                    status="error",
+                ))
+
+            else:
+                error = outcome[1]
+                metrics.fail(str(error))
+                logger.error(f"Tool invocation failed: {tool_name} - {error}")
+                first_error = first_error or error
+
+            # Buffer metrics
+            metrics_buffer.append(metrics)
+
+        if len(calls) > 1:
+            total_ms = sum(m.duration_ms or 0 for m in tool_call_metrics)
+            logger.info(f"Tool turn: {len(calls)} calls in {turn_ms}ms (sum of calls {total_ms}ms)")
+
+        if first_error is not None:
+            raise first_error
 
         # Publish metrics if enabled
         if publish_metrics and tool_call_metrics:
@@ -295,26 +428,101 @@ def create_metered_tool_node(
     return metered_tool_node_func
 
 
+def _run_calls(
+    calls: List[Any],
+    fn: Callable[[Any], Any],
+    max_concurrency: int,
+    timeouts: List[Optional[float]],
+) -> List[Tuple[str, Any]]:
+    """Run ``fn(call)`` for each call on the tool executor.
+
+    At most ``max_concurrency`` calls run at once. Each call's timeout
+    counts from when it starts running; a call that has not started within
+    its timeout (every executor thread busy) is cancelled. Returns one
+    outcome per call, in order: ("ok", value), ("error", exception),
+    ("timeout", seconds) or ("not_started", seconds).
+    """
+    executor = _get_tool_executor()
+    outcomes: List[Optional[Tuple[str, Any]]] = [None] * len(calls)
+    pending = list(range(len(calls)))
+    # i -> (future, submitted at); starts[i] is set by the call's thread
+    running: Dict[int, Tuple[Future, float]] = {}
+    starts: List[Optional[float]] = [None] * len(calls)
+    cap = max(1, max_concurrency)
+
+    def start_and_run(i: int) -> Any:
+        starts[i] = time.monotonic()
+        return fn(calls[i])
+
+    def deadline(i: int) -> Optional[float]:
+        if not timeouts[i]:
+            return None
+        return (starts[i] or running[i][1]) + timeouts[i]
+
+    while pending or running:
+        while pending and len(running) < cap:
+            i = pending.pop(0)
+            ctx = contextvars.copy_context()
+            running[i] = (executor.submit(ctx.run, start_and_run, i), time.monotonic())
+
+        deadlines = [d for d in map(deadline, running) if d is not None]
+        wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+        futures = {future: i for i, (future, _) in running.items()}
+        done, _ = wait(futures, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            i = futures[future]
+            del running[i]
+            try:
+                outcomes[i] = ("ok", future.result())
+            except Exception as e:
+                outcomes[i] = ("error", e)
+
+        now = time.monotonic()
+        for i, (future, _) in list(running.items()):
+            limit = deadline(i)
+            if limit is None or now < limit:
+                continue
+            if starts[i] is None:
+                if future.cancel():
+                    del running[i]
+                    outcomes[i] = ("not_started", timeouts[i])
+                else:
+                    # Picked up by a thread just now; its timeout starts here
+                    starts[i] = now
+                continue
+            # Can't interrupt a thread; stop waiting, free the slot and
+            # count the thread against the executor until it finishes
+            del running[i]
+            outcomes[i] = ("timeout", timeouts[i])
+            _abandon_call(executor, future)
+
+    return outcomes
+
+
 def _publish_metrics_batch(metrics: List[ToolInvocationMetrics]):
     """Publish metrics batch to Pub/Sub.
 
+    Messages go through the shared publisher, whose batch settings turn a
+    turn's metrics into a single publish RPC.
+
     Args:
         metrics: List of metrics to publish
     """
     try:
-        from google.cloud import pubsub_v1
         from src.config import config
+        from src.services.pubsub_publisher import pubsub_publisher
         import json
 
-        publisher = pubsub_v1.PublisherClient()
-        topic_path = publisher.topic_path(
+        topic_path = pubsub_publisher.topic_path(
             config.PROJECT_ID_AGENT, "tool-invocation-metrics"
         )
 
         for metric in metrics:
             message_data = json.dumps(metric.to_dict()).encode("utf-8")
-            future = publisher.publish(topic_path, message_data)
             # Don't wait for result (fire and forget)
+            if pubsub_publisher.publish(topic_path, message_data, tool_name=metric.tool_name) is None:
+                return
 
         logger.debug(f"Published {len(metrics)} tool metrics to Pub/Sub")
 
@@ -15,9 +15,15 @@ from src.agent.tools.definitions import (
     # New enhanced tools
     analyze_logs, get_log_summary, find_related_logs, suggest_queries,
     # Semantic search tools (Phase 2)
-    semantic_search_logs, find_similar_logs
+    semantic_search_logs, find_similar_logs,
+    # Compacted tool outputs
+    fetch_tool_output,
 )
 from src.agent.tokenization import TokenBudgetManager, estimate_tool_output_tokens
+from src.agent.speculative import (
+    ENABLE_SPECULATIVE_RETRIEVAL, RETRIEVAL_CUTOFF_MS,
+    build_semantic_context, semantic_search, speculative_retrieval,
+)
 try:
     from langgraph.prebuilt import ToolNode
 except ModuleNotFoundError:  # Optional dependency for some dev/test environments
@@ -28,7 +34,8 @@ import logging
 logger = logging.getLogger(__name__)
 
 # Global token budget manager (initialized per-request)
-# This is a module-level reference that gets updated per request
+# This is a module-level reference that gets updated per request. Creating one
+# is cheap: the encoding and per-message counts are cached process-wide.
 _token_manager: Optional[TokenBudgetManager] = None
 
 
@@ -145,6 +152,8 @@ tools = [
     trace_lookup_tool,
     service_health_tool,
     bq_query_tool,
+    # Full output of compacted tool results
+    fetch_tool_output,
     # Supporting tools
     runbook_search_tool,
     repo_search_tool,
@@ -211,64 +220,46 @@ def retrieval_node(state: AgentState):
     Performs vector search to find semantically similar logs/content
     before diagnosis begins. Adds context to help the agent.
 
-    This node runs before diagnose to provide relevant background.
+    With speculative retrieval (the default) the search only starts here
+    and runs alongside the first diagnose call; see src.agent.speculative.
     """
     from src.services.vector_service import vector_service
-    from src.config import config
 
     user_query = state.get("user_query", "")
 
     # Skip if vector search is disabled or no query
     if not vector_service.enabled or not user_query:
         logger.debug("Skipping retrieval: vector search disabled or no query")
-        return {
-            "phase": "diagnose",
-            "evidence": state.get("evidence", []),
-        }
+        return {"phase": "diagnose"}
+
+    if ENABLE_SPECULATIVE_RETRIEVAL:
+        speculative_retrieval.start(state.get("run_id", ""), user_query)
+        return {"phase": "diagnose"}
 
     try:
         # Perform semantic search
-        project_id = config.PROJECT_ID_LOGS
-        results = vector_service.semantic_search_logs(
-            query=user_query,
-            project_id=project_id,
-            top_k=5,  # Get top 5 relevant logs
-        )
+        results = semantic_search(user_query)
 
         if results:
-            # Add results as evidence
-            evidence = state.get("evidence", [])
-            semantic_context = {
-                "type": "semantic_search",
-                "query": user_query,
-                "results": [
-                    {
-                        "score": r.score,
-                        "content": r.content[:500],  # Limit content length
-                        "severity": r.metadata.get("severity"),
-                        "service": r.metadata.get("service"),
-                        "timestamp": r.timestamp,
-                    }
-                    for r in results
-                ],
-                "count": len(results),
-            }
-            evidence.append(semantic_context)
-
             logger.info(f"Retrieval found {len(results)} relevant logs for query")
 
             return {
                 "phase": "diagnose",
-                "evidence": evidence,
+                "evidence": state.get("evidence", []) + [build_semantic_context(user_query, results)],
             }
 
     except Exception as e:
         logger.warning(f"Retrieval error (non-fatal): {e}")
 
-    return {
-        "phase": "diagnose",
-        "evidence": state.get("evidence", []),
-    }
+    return {"phase": "diagnose"}
+
+
+def collect_retrieval(state: AgentState, timeout: float = 0.0) -> Dict[str, Any]:
+    """State update adding speculative retrieval results, if they have arrived."""
+    context = speculative_retrieval.collect(state.get("run_id", ""), timeout=timeout)
+    if context is None:
+        return {}
+    return {"evidence": state.get("evidence", []) + [context]}
 
 
 def diagnose_node(state: AgentState):
@@ -300,6 +291,8 @@ Goal: Understand the request and gather evidence immediately.
         "messages": [res],
         "phase": "diagnose",
         "token_budget": update_token_budget(state, manager, "diagnose"),
+        # Retrieval ran alongside the model call; give it a short grace period
+        **collect_retrieval(state, timeout=RETRIEVAL_CUTOFF_MS / 1000),
     }
 
 def verify_node(state: AgentState):
@@ -331,6 +324,7 @@ Goal: Confirm findings and dig deeper if needed.
         "messages": [res],
         "phase": "verify",
         "token_budget": update_token_budget(state, manager, "verify"),
+        **collect_retrieval(state),
     }
 
 def optimize_node(state: AgentState):
@@ -363,19 +357,67 @@ Goal: Provide actionable recommendations and final report.
         "messages": [res],
         "phase": "optimize",
         "token_budget": update_token_budget(state, manager, "optimize"),
+        **collect_retrieval(state),
     }
 
+def compaction_node(state: AgentState):
+    """Compaction node - summarize older tool outputs once the prompt grows.
+
+    Runs after each tool step. When the conversation reaches
+    COMPACTION_THRESHOLD of the token budget (or the manager says to
+    summarize), older large tool outputs are replaced in place with
+    summaries and their full text is stored for fetch_tool_output.
+    """
+    from src.agent.compaction import COMPACTION_THRESHOLD, compact_messages
+
+    messages = state.get("messages", [])
+    manager = get_token_manager()
+    prompt_tokens = manager.count_messages(messages)
+    if prompt_tokens < COMPACTION_THRESHOLD * manager.max_tokens and not manager.should_summarize(COMPACTION_THRESHOLD):
+        return {}
+
+    try:
+        replacements = compact_messages(
+            messages,
+            manager.count_tokens,
+            metadata={"run_id": state.get("run_id", "unknown")},
+        )
+    except Exception as e:
+        logger.warning(f"Compaction failed (non-fatal): {e}")
+        return {}
+    if not replacements:
+        return {}
+
+    saved = sum(m.additional_kwargs["original_tokens"] for m in replacements) - sum(
+        manager.count_tokens(m.content) for m in replacements
+    )
+    logger.info(f"Compacted {len(replacements)} tool outputs: ~{saved} tokens saved (prompt was {prompt_tokens})")
+
+    return {
+        "messages": replacements,
+        "evidence": state.get("evidence", []) + [
+            {
+                "type": "compaction",
+                "refs": [m.additional_kwargs["compacted_ref"] for m in replacements],
+                "prompt_tokens": prompt_tokens,
+                "tokens_saved": saved,
+            }
+        ],
+    }
+
+
 def checkpoint_node(state: AgentState):
     """Checkpoint node - save state snapshot to Firestore.
 
-    Saves current state to Firestore and emits checkpoint event.
+    Encodes the checkpoint (delta or full snapshot) and hands the Firestore
+    write to the write-behind queue, then emits checkpoint event.
     Phase 3, Task 3.2: Checkpoint Node
     """
     try:
-        from src.agent.checkpoint import save_checkpoint
+        from src.agent.checkpoint import enqueue_checkpoint
 
-        # Save checkpoint
-        metadata = save_checkpoint(state)
+        # Enqueue checkpoint
+        metadata = enqueue_checkpoint(state)
 
         logger.info(
             f"Checkpoint created: {metadata.checkpoint_id} "
@@ -412,6 +454,10 @@ def persist_node(state: AgentState):
     # Get final token budget status
     final_budget = update_token_budget(state, manager, "persist")
 
+    # Keep retrieval results that arrived after the last phase; drop the rest
+    state = {**state, **collect_retrieval(state)}
+    speculative_retrieval.discard(run_id or "")
+
     if run_id:
         # Extract evidence from messages (simplification)
         # Ideally we'd parse tool outputs
@@ -0,0 +1,195 @@
+"""Speculative retrieval for the agent graph.
+
+``retrieval_node`` used to embed the query and search the vector store
+before ``diagnose_node`` could call the model, so every chat paid the
+embed + search latency before its first token. With speculative retrieval
+the node only starts the search on a background executor and returns;
+the first diagnose call runs concurrently with it.
+
+Results are collected, never awaited for long:
+
+- after the first diagnose call returns, ``diagnose_node`` waits at most
+  ``RETRIEVAL_CUTOFF_MS`` for the search and adds the results as
+  ``semantic_search`` evidence ("in_time")
+- if they are not ready by then, later phases pick them up without
+  waiting ("late")
+- searches still running when the run persists, or older than
+  ``RETRIEVAL_MAX_AGE_SEC``, are dropped ("missed")
+
+``get_stats()`` reports how often results arrive in time.
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+ENABLE_SPECULATIVE_RETRIEVAL = os.getenv("ENABLE_SPECULATIVE_RETRIEVAL", "true").lower() == "true"
+# Longest the first diagnose call waits for retrieval after the model has answered
+RETRIEVAL_CUTOFF_MS = int(os.getenv("RETRIEVAL_CUTOFF_MS", "50"))
+RETRIEVAL_MAX_AGE_SEC = float(os.getenv("RETRIEVAL_MAX_AGE_SEC", "120"))
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "4"))
+RETRIEVAL_TOP_K = 5
+
+
+def semantic_search(query: str) -> List[Any]:
+    """Vector search for ``query`` in the logs project (the retrieval node's search)."""
+    from src.services.vector_service import vector_service
+    from src.config import config
+
+    return vector_service.semantic_search_logs(
+        query=query,
+        project_id=config.PROJECT_ID_LOGS,
+        top_k=RETRIEVAL_TOP_K,
+    )
+
+
+def build_semantic_context(query: str, results: List[Any]) -> Dict[str, Any]:
+    """Evidence entry for semantic search results."""
+    return {
+        "type": "semantic_search",
+        "query": query,
+        "results": [
+            {
+                "score": r.score,
+                "content": r.content[:500],  # Limit content length
+                "severity": r.metadata.get("severity"),
+                "service": r.metadata.get("service"),
+                "timestamp": r.timestamp,
+            }
+            for r in results
+        ],
+        "count": len(results),
+    }
+
+
+@dataclass
+class _PendingRetrieval:
+    query: str
+    future: Future
+    started: float = field(default_factory=time.monotonic)
+    # Set once a collect found it unfinished; a later arrival counts as late
+    deferred: bool = False
+
+
+class SpeculativeRetrieval:
+    """Background semantic searches keyed by run_id."""
+
+    def __init__(
+        self,
+        search_fn: Callable[[str], List[Any]] = semantic_search,
+        max_workers: int = RETRIEVAL_WORKERS,
+        max_age_sec: float = RETRIEVAL_MAX_AGE_SEC,
+    ):
+        self.search_fn = search_fn
+        self.max_workers = max_workers
+        self.max_age_sec = max_age_sec
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: "OrderedDict[str, _PendingRetrieval]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"started": 0, "in_time": 0, "late": 0, "missed": 0, "failed": 0, "empty": 0}
+        self._latency_ms_total = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="speculative-retrieval"
+                    )
+        return self._executor
+
+    def start(self, run_id: str, query: str) -> None:
+        """Start the search for a run; a search already pending for it is dropped."""
+        self._expire()
+        self.discard(run_id)
+        ctx = contextvars.copy_context()
+        future = self._get_executor().submit(ctx.run, self.search_fn, query)
+        with self._lock:
+            self._pending[run_id] = _PendingRetrieval(query=query, future=future)
+            self._stats["started"] += 1
+
+    def collect(self, run_id: str, timeout: float = 0.0) -> Optional[Dict[str, Any]]:
+        """Evidence entry for a run's search if it finishes within ``timeout`` seconds.
+
+        Returns None when nothing is pending, the search is still running
+        (it stays pending for a later collect), failed, or found nothing.
+        """
+        with self._lock:
+            pending = self._pending.get(run_id)
+        if pending is None:
+            return None
+
+        try:
+            results = pending.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            pending.deferred = True
+            return None
+        except Exception as e:
+            logger.warning(f"Speculative retrieval failed (non-fatal): {e}")
+            self._finish(run_id, "failed", pending)
+            return None
+
+        arrival = "late" if pending.deferred else "in_time"
+        latency_ms = self._finish(run_id, arrival, pending)
+        if not results:
+            self._bump("empty")
+            return None
+
+        logger.info(f"Retrieval found {len(results)} relevant logs for query ({arrival}, {latency_ms:.0f}ms)")
+        return {
+            **build_semantic_context(pending.query, results),
+            "arrival": arrival,
+            "retrieval_ms": round(latency_ms, 1),
+        }
+
+    def discard(self, run_id: str) -> None:
+        """Drop a run's search; counts as missed if it hadn't been collected."""
+        with self._lock:
+            pending = self._pending.pop(run_id, None)
+            if pending is not None:
+                self._stats["missed"] += 1
+        if pending is not None:
+            pending.future.cancel()
+
+    def _finish(self, run_id: str, outcome: str, pending: _PendingRetrieval) -> float:
+        latency_ms = (time.monotonic() - pending.started) * 1000
+        with self._lock:
+            if self._pending.get(run_id) is pending:
+                del self._pending[run_id]
+            self._stats[outcome] += 1
+            self._latency_ms_total += latency_ms
+        return latency_ms
+
+    def _bump(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.max_age_sec
+        with self._lock:
+            stale = [run_id for run_id, p in self._pending.items() if p.started < cutoff]
+        for run_id in stale:
+            self.discard(run_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._pending)
+            finished = stats["in_time"] + stats["late"] + stats["failed"]
+            stats["avg_retrieval_ms"] = round(self._latency_ms_total / finished, 1) if finished else 0.0
+        arrived = stats["in_time"] + stats["late"] + stats["missed"]
+        stats["in_time_rate"] = round(stats["in_time"] / arrived, 3) if arrived else 0.0
+        return stats
+
+
+# Singleton instance
+speculative_retrieval = SpeculativeRetrieval()
@@ -5,9 +5,9 @@ including token budget tracking for context management.
 """
 
 from typing import TypedDict, List, Dict, Any, Optional, Annotated
-import operator
 from datetime import datetime, timezone
 from langchain_core.messages import BaseMessage
+from langgraph.graph.message import add_messages
 
 
 class TokenBudgetState(TypedDict, total=False):
@@ -34,7 +34,8 @@ class AgentState(TypedDict, total=False):
     # Core execution state
     run_id: str
     user_query: str
-    messages: Annotated[List[BaseMessage], operator.add]
+    # Appends, and replaces messages with a matching id (context compaction)
+    messages: Annotated[List[BaseMessage], add_messages]
     scope: Dict[str, Any]
     hypotheses: List[str]
     evidence: List[Dict[str, Any]]
@@ -4,7 +4,11 @@ This module provides token counting and budget enforcement to prevent
 context window overflow in long conversations.
 """
 
-from typing import List, Dict, Any
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from langchain_core.messages import BaseMessage
 
 try:
@@ -32,6 +36,132 @@ class TokenBudgetExceeded(Exception):
     pass
 
 
+# Per-message token counts remembered across requests (see count_messages)
+MESSAGE_TOKEN_CACHE_MAX = int(os.getenv("MESSAGE_TOKEN_CACHE_MAX", "20000"))
+
+# Text the byte-length estimator is calibrated on: prose, log lines, JSON
+# payloads and SQL (ASCII), plus non-ASCII text for the multi-byte ratio.
+_CALIBRATION_ASCII = [
+    "The checkout service started returning 502 errors at 14:05 UTC after the "
+    "latest deploy. Most failures come from the payment gateway timing out, and "
+    "retries are piling up in the worker queue. I'd roll back revision 42 first.",
+    "2026-10-01T14:05:12.345Z ERROR api-gateway [req=7f3a9c1e] upstream connect "
+    "error or disconnect/reset before headers. reset reason: connection timeout",
+    '{"severity": "ERROR", "service_name": "billing-worker", "message": "Deadline '
+    'exceeded while calling Firestore", "trace_id": "4bf92f3577b34da6a3ce929d0e0e4736"}',
+    "SELECT service_name, COUNT(*) AS errors FROM `central_logging_v1.master_logs` "
+    "WHERE log_date >= DATE_SUB(CURRENT_DATE(), INTERVAL 1 DAY) AND severity = "
+    "'ERROR' GROUP BY service_name ORDER BY errors DESC LIMIT 10",
+]
+_CALIBRATION_OTHER = [
+    "Der Dienst antwortet nicht: Zeitüberschreitung bei der Verbindung zur Datenbank.",
+    "サービスがタイムアウトしました。データベースへの接続を確認してください。",
+    "Сервис вернул ошибку 503 после обновления конфигурации.",
+]
+
+_encoding_cache: Dict[str, Any] = {}
+_estimator_cache: Dict[str, "ByteLengthEstimator"] = {}
+_encoding_lock = threading.Lock()
+
+
+def get_encoding(model: str = "gpt-4"):
+    """Tokenizer for a model, loaded once per process.
+
+    tiktoken's encoding_for_model builds the BPE ranks on every call; the
+    managers created per request share one encoding instead.
+    """
+    if tiktoken is None:
+        return _FallbackEncoding()
+    encoding = _encoding_cache.get(model)
+    if encoding is not None:
+        return encoding
+    with _encoding_lock:
+        encoding = _encoding_cache.get(model)
+        if encoding is None:
+            # Prefer model-specific encodings when available.
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except Exception:
+                # Fallback to a common encoding.
+                encoding = tiktoken.get_encoding("cl100k_base")
+            _encoding_cache[model] = encoding
+    return encoding
+
+
+class ByteLengthEstimator:
+    """Approximate token counts from UTF-8 byte length.
+
+    ASCII and multi-byte text tokenize at very different rates, so each has
+    its own bytes-per-token ratio. ``calibrate`` fits both against a real
+    encoding. An estimate costs a length check (or one UTF-8 encode)
+    instead of a BPE pass; src.bench.token_accounting reports its error.
+    """
+
+    def __init__(self, ascii_bytes_per_token: float = 4.0, other_bytes_per_token: float = 2.5):
+        self.ascii_bytes_per_token = ascii_bytes_per_token
+        self.other_bytes_per_token = other_bytes_per_token
+
+    @classmethod
+    def calibrate(cls, encoding) -> "ByteLengthEstimator":
+        """Fit the ratios to ``encoding`` on the built-in calibration text."""
+        ascii_text = "\n".join(_CALIBRATION_ASCII)
+        ascii_ratio = len(ascii_text) / max(1, len(encoding.encode(ascii_text)))
+
+        other_text = "\n".join(_CALIBRATION_OTHER)
+        ascii_chars = len(other_text.encode("ascii", "ignore"))
+        other_bytes = len(other_text.encode("utf-8")) - ascii_chars
+        other_tokens = len(encoding.encode(other_text)) - ascii_chars / ascii_ratio
+        other_ratio = other_bytes / other_tokens if other_tokens > 0 else ascii_ratio
+        return cls(ascii_ratio, other_ratio)
+
+    def estimate(self, text: str) -> float:
+        """Fractional token estimate; sums of chunk estimates stay unbiased."""
+        if text.isascii():
+            return len(text) / self.ascii_bytes_per_token
+        ascii_chars = len(text.encode("ascii", "ignore"))
+        other_bytes = len(text.encode("utf-8")) - ascii_chars
+        return ascii_chars / self.ascii_bytes_per_token + other_bytes / self.other_bytes_per_token
+
+
+def get_estimator(encoding) -> ByteLengthEstimator:
+    """Byte-length estimator calibrated for ``encoding`` (once per process)."""
+    estimator = _estimator_cache.get(encoding.name)
+    if estimator is None:
+        estimator = ByteLengthEstimator.calibrate(encoding)
+        _estimator_cache[encoding.name] = estimator
+    return estimator
+
+
+class _MessageTokenCache:
+    """LRU of per-message token counts keyed on (encoding, message id, content hash)."""
+
+    def __init__(self, max_entries: int = MESSAGE_TOKEN_CACHE_MAX):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, int], int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str, int]) -> Optional[int]:
+        with self._lock:
+            count = self._entries.get(key)
+            if count is not None:
+                self._entries.move_to_end(key)
+            return count
+
+    def put(self, key: Tuple[str, str, int], count: int) -> None:
+        with self._lock:
+            self._entries[key] = count
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_message_tokens = _MessageTokenCache()
+
+
 class TokenBudgetManager:
     """Manages token budget for a conversation.
     
@@ -55,15 +185,8 @@ class TokenBudgetManager:
                        Note: Gemini 2.5 Flash supports 1M tokens, but we use
                        a conservative limit to allow for tool outputs and safety margin.
         """
-        if tiktoken is None:
-            self.encoding = _FallbackEncoding()
-        else:
-            # Prefer model-specific encodings when available.
-            try:
-                self.encoding = tiktoken.encoding_for_model(model)
-            except Exception:
-                # Fallback to a common encoding.
-                self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.encoding = get_encoding(model)
+        self._estimator: Optional[ByteLengthEstimator] = None
         self.max_tokens = max_tokens
         self.tokens_used = 0
     
@@ -77,11 +200,25 @@ class TokenBudgetManager:
             Number of tokens
         """
         return len(self.encoding.encode(text))
+
+    def estimate_tokens(self, text: str) -> float:
+        """Approximate (fractional) token count from byte length, without encoding.
+
+        For progress reporting on streamed text; use count_tokens where the
+        count is charged against the budget.
+        """
+        if self._estimator is None:
+            self._estimator = get_estimator(self.encoding)
+        return self._estimator.estimate(text)
     
     def count_messages(self, messages: List[BaseMessage]) -> int:
         """Count tokens in a list of messages.
         
         Includes overhead for message formatting (4 tokens per message).
+        Per-message counts are memoized process-wide, keyed on message id
+        and content hash (id-less messages such as the per-phase system
+        prompts on content alone), so a conversation's history is encoded
+        once rather than on every turn.
         
         Args:
             messages: List of LangChain messages
@@ -93,7 +230,12 @@ class TokenBudgetManager:
         for msg in messages:
             # Count content tokens
             content = str(msg.content)
-            total += self.count_tokens(content)
+            key = (self.encoding.name, getattr(msg, "id", None) or "", hash(content))
+            count = _message_tokens.get(key)
+            if count is None:
+                count = self.count_tokens(content)
+                _message_tokens.put(key, count)
+            total += count
             
             # Add message overhead (role, formatting, etc.)
             total += 4
@@ -163,6 +305,76 @@ class TokenBudgetManager:
         return self.tokens_used >= (threshold * self.max_tokens)
 
 
+class IncrementalTokenCounter:
+    """Counts tokens of streamed text without encoding every chunk.
+
+    Text is buffered and encoded in segments that end just before a space,
+    where BPE tokens (which carry their leading space) break. Each character
+    is encoded about once, and words split across chunks are not double
+    counted as they are when per-chunk counts are summed.
+
+    With ``estimate_fn`` nothing is encoded while streaming: ``add`` returns
+    a running byte-length estimate and ``total`` encodes the text once.
+
+    Example:
+        >>> counter = IncrementalTokenCounter(manager.count_tokens)
+        >>> for chunk in chunks:
+        ...     counter.add(chunk)
+        >>> completion_tokens = counter.total()
+    """
+
+    def __init__(
+        self,
+        count_fn: Callable[[str], int],
+        min_segment: int = 256,
+        estimate_fn: Optional[Callable[[str], float]] = None,
+    ):
+        """Initialize the counter.
+
+        Args:
+            count_fn: Token counter for a string (e.g. TokenBudgetManager.count_tokens)
+            min_segment: Characters to buffer before encoding a segment
+            estimate_fn: Approximate counter for progress while streaming
+                (e.g. TokenBudgetManager.estimate_tokens)
+        """
+        self._count_fn = count_fn
+        self._estimate_fn = estimate_fn
+        self.min_segment = min_segment
+        self._pending: List[str] = []
+        self._pending_len = 0
+        self.counted = 0
+        self.estimated = 0.0
+
+    def add(self, text: str) -> int:
+        """Add streamed text; returns tokens counted so far (excluding the buffered tail).
+
+        With an estimate_fn, returns the running estimate instead.
+        """
+        self._pending.append(text)
+        self._pending_len += len(text)
+        if self._estimate_fn is not None:
+            self.estimated += self._estimate_fn(text)
+            return round(self.estimated)
+        if self._pending_len < self.min_segment:
+            return self.counted
+
+        pending = "".join(self._pending)
+        cut = pending.rfind(" ")
+        if cut <= 0:
+            self._pending = [pending]
+            return self.counted
+        self.counted += self._count_fn(pending[:cut])
+        self._pending = [pending[cut:]]
+        self._pending_len = len(pending) - cut
+        return self.counted
+
+    def total(self) -> int:
+        """Tokens in all text added so far, including the buffered tail."""
+        if not self._pending_len:
+            return self.counted
+        return self.counted + self._count_fn("".join(self._pending))
+
+
 def estimate_tool_output_tokens(tool_name: str, input_data: Dict[str, Any]) -> int:
     """Estimate token count for tool output.
     
@@ -197,3 +409,36 @@ def estimate_tool_output_tokens(tool_name: str, input_data: Dict[str, Any]) -> i
         base_estimate = int(base_estimate * (limit / 20))  # Assume 20 is baseline
     
     return base_estimate
+
+
+@dataclass(frozen=True)
+class ToolFreshness:
+    """How long a tool's result may be reused by the tool result cache.
+
+    Attributes:
+        ttl_sec: Freshness window; results are keyed on floor(now / ttl_sec)
+        casefold_args: Arguments compared case-insensitively (enums the
+            model spells inconsistently, e.g. intent="Errors" vs "errors")
+    """
+    ttl_sec: int
+    casefold_args: Tuple[str, ...] = ()
+
+
+# Freshness policies for read-only tools. Tools not listed (bq_query_tool,
+# create_view_tool, runbook/repo search, dashboard specs) are never cached.
+TOOL_FRESHNESS: Dict[str, ToolFreshness] = {
+    "analyze_logs": ToolFreshness(60, ("intent", "timeframe", "severity_filter")),
+    "get_log_summary": ToolFreshness(60),
+    "search_logs_tool": ToolFreshness(30, ("severity",)),
+    "find_related_logs": ToolFreshness(60),
+    "service_health_tool": ToolFreshness(60),
+    "trace_lookup_tool": ToolFreshness(300),  # Spans don't change once written
+    "semantic_search_logs": ToolFreshness(120, ("severity",)),
+    "find_similar_logs": ToolFreshness(120),
+    "suggest_queries": ToolFreshness(300),
+}
+
+
+def get_tool_freshness(tool_name: str) -> Optional[ToolFreshness]:
+    """Freshness policy for a tool, or None if its results must not be cached."""
+    return TOOL_FRESHNESS.get(tool_name)
@@ -1,6 +1,15 @@
 from __future__ import annotations
 
-from typing import List, Dict, Any, Optional
+import contextvars
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Union
 
 from src.config import config
 from src.agent.tools.contracts import BQDryRunInput, BQDryRunOutput, BQQueryInput, BQQueryOutput
@@ -12,6 +21,21 @@ except ModuleNotFoundError:  # Optional dependency for local unit tests
 
 _client = None
 
+# Threads for concurrent tool queries (run_bq_queries)
+BQ_TOOL_WORKERS = int(os.getenv("BQ_TOOL_WORKERS", "8"))
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Dry-run results are reused for this long per SQL/param signature/partition window
+DRY_RUN_CACHE_TTL_SEC = int(os.getenv("DRY_RUN_CACHE_TTL_SEC", "300"))
+DRY_RUN_CACHE_MAX_ENTRIES = int(os.getenv("DRY_RUN_CACHE_MAX_ENTRIES", "1024"))
+_DATE_PREFIX = re.compile(r"^(\d{4}-\d{2}-\d{2})")
+
+# Per-invocation dry-run counters; the metered tool node sets a fresh dict per tool call
+dry_run_usage: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar(
+    "dry_run_usage", default=None
+)
+
 def get_client():
     global _client
     if bigquery is None:
@@ -26,20 +50,107 @@ def __getattr__(name):
         return get_client()
     raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
 
+def _param_type(v: Any) -> str:
+    if isinstance(v, int):
+        return "INT64"
+    elif isinstance(v, bool):
+        return "BOOL"
+    elif isinstance(v, float):
+        return "FLOAT64"
+    return "STRING"
+
+def _query_parameters(params: Optional[Dict[str, Any]]) -> list:
+    query_params = []
+    for k, v in (params or {}).items():
+        param_type = _param_type(v)
+        value = v if param_type != "STRING" else str(v)
+        query_params.append(bigquery.ScalarQueryParameter(k, param_type, value))
+    return query_params
+
+class DryRunCache:
+    """TTL cache of dry-run results.
+
+    Keyed on whitespace-normalized SQL plus a parameter signature: each
+    parameter's name and type, the value of numeric parameters (``@hours``
+    sets the partition window), and only the day of date/timestamp strings,
+    which is the partition bucket they select. Other string values (service
+    names, search text) don't change which partitions are scanned, so one
+    estimate serves every value of the template.
+    """
+
+    def __init__(self, ttl: int = DRY_RUN_CACHE_TTL_SEC, max_entries: int = DRY_RUN_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[BQDryRunOutput, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "skipped": 0, "evictions": 0}
+
+    @staticmethod
+    def key(sql: str, params: Optional[Dict[str, Any]] = None) -> str:
+        signature = []
+        for name, value in sorted((params or {}).items()):
+            if isinstance(value, str):
+                match = _DATE_PREFIX.match(value)
+                bucket = match.group(1) if match else None
+            else:
+                bucket = value
+            signature.append([name, _param_type(value), bucket])
+        material = json.dumps([" ".join(sql.split()), signature], default=str)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[BQDryRunOutput]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[1] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: str, result: BQDryRunOutput) -> None:
+        with self._lock:
+            self._entries[key] = (result, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def record(self, event: str) -> None:
+        """Count a hit, miss or skipped dry run (process-wide and for the current tool call)."""
+        usage = dry_run_usage.get()
+        with self._lock:
+            self._stats[event] += 1
+            if usage is not None:
+                usage[event] = usage.get(event, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        looked_up = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / looked_up, 3) if looked_up else 0.0
+        return stats
+
+dry_run_cache = DryRunCache()
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=BQ_TOOL_WORKERS, thread_name_prefix="bq-tool")
+    return _executor
+
 def run_bq_dry_run(inp: BQDryRunInput) -> BQDryRunOutput:
     job_config = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False)
     if inp.params:
-        query_params = []
-        for k, v in inp.params.items():
-            if isinstance(v, int):
-                query_params.append(bigquery.ScalarQueryParameter(k, "INT64", v))
-            elif isinstance(v, bool):
-                query_params.append(bigquery.ScalarQueryParameter(k, "BOOL", v))
-            elif isinstance(v, float):
-                query_params.append(bigquery.ScalarQueryParameter(k, "FLOAT64", v))
-            else:
-                query_params.append(bigquery.ScalarQueryParameter(k, "STRING", str(v)))
-        job_config.query_parameters = query_params
+        job_config.query_parameters = _query_parameters(inp.params)
 
     try:
         query_job = get_client().query(inp.sql, job_config=job_config)
@@ -51,38 +162,84 @@ def run_bq_dry_run(inp: BQDryRunInput) -> BQDryRunOutput:
         # In a real tool, we might want to return the error in a structured way
         raise e
 
-def run_bq_query(inp: BQQueryInput) -> BQQueryOutput:
-    # 1. Dry Run First (Safety Gate)
-    dry_run_out = run_bq_dry_run(BQDryRunInput(sql=inp.sql, params=inp.params))
-    
+def cached_dry_run(inp: BQDryRunInput) -> BQDryRunOutput:
+    """run_bq_dry_run through dry_run_cache (failed dry runs are not cached)."""
+    key = dry_run_cache.key(inp.sql, inp.params)
+    cached = dry_run_cache.get(key)
+    if cached is not None:
+        dry_run_cache.record("hits")
+        return cached
+    dry_run_cache.record("misses")
+    result = run_bq_dry_run(inp)
+    dry_run_cache.put(key, result)
+    return result
+
+def _cost_gate(inp: BQQueryInput) -> None:
+    if inp.skip_dry_run:
+        dry_run_cache.record("skipped")
+        return
+    _check_bytes(cached_dry_run(BQDryRunInput(sql=inp.sql, params=inp.params)))
+
+def _check_bytes(dry_run_out: BQDryRunOutput) -> None:
     if dry_run_out.bytes_estimate > config.MAX_BQ_BYTES_ESTIMATE:
         raise ValueError(f"Query exceeds byte limit: {dry_run_out.bytes_estimate} > {config.MAX_BQ_BYTES_ESTIMATE}")
 
-    # 2. Execute
+def _execute(inp: BQQueryInput) -> BQQueryOutput:
     job_config = bigquery.QueryJobConfig()
+    if inp.skip_dry_run:
+        # No estimate was checked; BigQuery fails the job instead of exceeding the limit
+        job_config.maximum_bytes_billed = config.MAX_BQ_BYTES_ESTIMATE
     if inp.params:
-        query_params = []
-        for k, v in inp.params.items():
-            if isinstance(v, int):
-                query_params.append(bigquery.ScalarQueryParameter(k, "INT64", v))
-            elif isinstance(v, bool):
-                query_params.append(bigquery.ScalarQueryParameter(k, "BOOL", v))
-            elif isinstance(v, float):
-                query_params.append(bigquery.ScalarQueryParameter(k, "FLOAT64", v))
-            else:
-                query_params.append(bigquery.ScalarQueryParameter(k, "STRING", str(v)))
-        job_config.query_parameters = query_params
-    
+        job_config.query_parameters = _query_parameters(inp.params)
+
     query_job = get_client().query(inp.sql, job_config=job_config)
-    
+
     # Wait for result
     rows = query_job.result(max_results=inp.max_rows)
-    
+
     row_data = [dict(row) for row in rows]
-    
+
     return BQQueryOutput(
         job_id=query_job.job_id,
         rows=row_data,
         total_bytes_processed=query_job.total_bytes_processed or 0,
         cache_hit=query_job.cache_hit or False
     )
+
+def run_bq_query(inp: BQQueryInput) -> BQQueryOutput:
+    # 1. Dry Run First (Safety Gate), reused for identical templates
+    _cost_gate(inp)
+
+    # 2. Execute
+    return _execute(inp)
+
+def run_bq_queries(inputs: List[BQQueryInput]) -> List[Union[BQQueryOutput, Exception]]:
+    """Run independent queries concurrently, with the same dry-run gate as run_bq_query.
+
+    All dry runs are issued at once and each query starts as soon as its
+    dry run passes, so N queries take about two round trips instead of 2N.
+
+    Returns:
+        One entry per input, in order: the output, or the exception that
+        query raised (byte limit, dry-run or execution error)
+    """
+    executor = _get_executor()
+    # Copied contexts keep dry-run usage attributed to the calling tool
+    dry_runs = [executor.submit(contextvars.copy_context().run, _cost_gate, inp) for inp in inputs]
+
+    results: List[Union[BQQueryOutput, Exception, None]] = [None] * len(inputs)
+    executions = {}
+    for i, (inp, dry_run) in enumerate(zip(inputs, dry_runs)):
+        try:
+            dry_run.result()
+        except Exception as e:
+            results[i] = e
+            continue
+        executions[i] = executor.submit(_execute, inp)
+
+    for i, execution in executions.items():
+        try:
+            results[i] = execution.result()
+        except Exception as e:
+            results[i] = e
+    return results
@@ -15,6 +15,9 @@ class BQQueryInput(BaseModel):
     sql: str
     params: Optional[Dict[str, Any]] = None
     max_rows: int = 1000
+    # Builder-generated query whose scan is bounded by partition filters: no
+    # dry run; MAX_BQ_BYTES_ESTIMATE is enforced as maximum_bytes_billed instead
+    skip_dry_run: bool = False
 
 class BQQueryOutput(BaseModel):
     job_id: str
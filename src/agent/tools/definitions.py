@@ -5,15 +5,31 @@ import json
 import hashlib
 import re
 
-from src.agent.tools.bq import run_bq_query
+from src.agent.tools.bq import run_bq_queries, run_bq_query
 from src.agent.tools.contracts import BQQueryInput, LogEvent, TraceSpan
+from src.agent.tools.result_cache import cached_tool
 from src.config import config
+from src.glass_pane.config import glass_config
 
 # Smart defaults for common queries
 DEFAULT_HOURS = 24
 DEFAULT_LIMIT = 50
 SEVERITY_LEVELS = ["DEBUG", "INFO", "NOTICE", "WARNING", "ERROR", "CRITICAL", "ALERT", "EMERGENCY"]
 
+def _stats_query_builder():
+    """Query builder for master_logs stats, using rollups when configured."""
+    from src.glass_pane.query_builder import CanonicalQueryBuilder
+
+    return CanonicalQueryBuilder(
+        project_id=config.PROJECT_ID_LOGS,
+        view_name="central_logging_v1.master_logs",
+        rollups_since=glass_config.rollups_since,
+    )
+
+def _param_dict(params) -> Dict[str, Any]:
+    """BigQuery ScalarQueryParameters -> the dict form BQQueryInput takes."""
+    return {p.name: p.value for p in params}
+
 def normalize_log_event(row: Dict[str, Any]) -> LogEvent:
     """Normalize a BigQuery row from master_logs to LogEvent model."""
     # Handle json_payload - can be string or dict from master_logs
@@ -115,6 +131,7 @@ def create_view_tool(dataset: str, view_name: str, sql: str) -> Dict[str, Any]:
         return {"error": str(e)}
 
 @tool
+@cached_tool
 def search_logs_tool(query: str, severity: Optional[str] = None, service: Optional[str] = None, hours: int = 1, limit: int = 20) -> Dict[str, Any]:
     """
     Searches logs in the central logging dataset (master_logs).
@@ -175,9 +192,13 @@ def search_logs_tool(query: str, severity: Optional[str] = None, service: Option
         params["service"] = f"%{service}%"
 
     if query:
-        # Search in message and json_payload
-        sql += " AND (LOWER(message) LIKE LOWER(@query_pattern) OR LOWER(CAST(json_payload AS STRING)) LIKE LOWER(@query_pattern))"
-        params["query_pattern"] = f"%{query}%"
+        # Search in message and json_payload (search index when the term allows)
+        from src.glass_pane.query_builder import text_search_clause
+
+        predicate, params["query_pattern"] = text_search_clause(
+            query, param="query_pattern", mode=glass_config.search_mode
+        )
+        sql += f" AND {predicate}"
 
     sql += f" ORDER BY event_timestamp DESC LIMIT {limit}"
 
@@ -197,6 +218,7 @@ def runbook_search_tool(query: str) -> str:
     return json.dumps([])
 
 @tool
+@cached_tool
 def trace_lookup_tool(trace: str, project: str) -> Dict[str, Any]:
     """
     Fetch spans for a trace to pinpoint failing handler + latency breakdown.
@@ -229,6 +251,7 @@ def trace_lookup_tool(trace: str, project: str) -> Dict[str, Any]:
         return {"error": str(e)}
 
 @tool
+@cached_tool
 def service_health_tool(service: str, region: Optional[str] = None) -> Dict[str, Any]:
     """
     Detect bad deploys, env drift, missing secrets, revision regressions.
@@ -270,6 +293,7 @@ def service_health_tool(service: str, region: Optional[str] = None) -> Dict[str,
 # ============================================
 
 @tool
+@cached_tool
 def analyze_logs(
     intent: str = "summary",
     timeframe: str = "24h",
@@ -328,63 +352,92 @@ def analyze_logs(
     partition_filter = f"log_date BETWEEN '{start_date}' AND '{end_date}'"
 
     try:
-        # 1. Get severity distribution
-        stats_sql = f"""
+        # The sections are independent, so all five queries run concurrently.
+        # Patterns are only reported when there are top errors, but are
+        # fetched alongside rather than after them.
+        builder = _stats_query_builder()
+        stats_query = builder.build_count_by_severity_query(hours=hours)
+        service_query = builder.build_count_by_service_query(hours=hours)
+        window_params = {"start_time": start_time, "end_time": end_time}
+
+        error_sql = f"""
         SELECT
+            event_timestamp,
             severity,
-            COUNT(*) as count
+            service_name,
+            source_table,
+            message,
+            trace_id,
+            span_id,
+            resource_type
         FROM `{table}`
         WHERE {partition_filter}
           AND event_timestamp BETWEEN TIMESTAMP(@start_time) AND TIMESTAMP(@end_time)
-        GROUP BY severity
-        ORDER BY count DESC
+          AND severity IN ('ERROR', 'CRITICAL', 'ALERT', 'EMERGENCY')
+        ORDER BY event_timestamp DESC
+        LIMIT 25
         """
-        stats_res = run_bq_query(BQQueryInput(sql=stats_sql, params={"start_time": start_time, "end_time": end_time}))
-        severity_counts = {row['severity']: row['count'] for row in stats_res.rows}
-        results["stats"]["by_severity"] = severity_counts
-        results["stats"]["total_logs"] = sum(severity_counts.values())
-        results["stats"]["error_count"] = severity_counts.get('ERROR', 0) + severity_counts.get('CRITICAL', 0)
-        results["stats"]["warning_count"] = severity_counts.get('WARNING', 0)
 
-        # 2. Get service distribution
-        service_sql = f"""
+        warning_sql = f"""
         SELECT
+            event_timestamp,
             service_name,
-            COUNT(*) as total,
-            COUNTIF(severity IN ('ERROR', 'CRITICAL')) as errors,
-            COUNTIF(severity = 'WARNING') as warnings
+            message
         FROM `{table}`
         WHERE {partition_filter}
           AND event_timestamp BETWEEN TIMESTAMP(@start_time) AND TIMESTAMP(@end_time)
-        GROUP BY service_name
-        ORDER BY errors DESC, total DESC
-        LIMIT 10
+          AND severity = 'WARNING'
+        ORDER BY event_timestamp DESC
+        LIMIT 15
         """
-        service_res = run_bq_query(BQQueryInput(sql=service_sql, params={"start_time": start_time, "end_time": end_time}))
-        results["services_affected"] = [
-            {"service": row['service_name'] or 'unknown', "total": row['total'], "errors": row['errors'], "warnings": row['warnings']}
-            for row in service_res.rows
-        ]
 
-        # 3. Get top errors with details
-        error_sql = f"""
+        pattern_sql = f"""
         SELECT
-            event_timestamp,
-            severity,
             service_name,
-            source_table,
-            message,
-            trace_id,
-            span_id,
-            resource_type
+            REGEXP_EXTRACT(message, r'^([A-Za-z]+Error|Exception|[A-Z][a-z]+Exception):?') as error_type,
+            COUNT(*) as occurrences,
+            MIN(event_timestamp) as first_seen,
+            MAX(event_timestamp) as last_seen
         FROM `{table}`
         WHERE {partition_filter}
           AND event_timestamp BETWEEN TIMESTAMP(@start_time) AND TIMESTAMP(@end_time)
-          AND severity IN ('ERROR', 'CRITICAL', 'ALERT', 'EMERGENCY')
-        ORDER BY event_timestamp DESC
-        LIMIT 25
+          AND severity IN ('ERROR', 'CRITICAL')
+          AND message IS NOT NULL
+        GROUP BY service_name, error_type
+        HAVING error_type IS NOT NULL
+        ORDER BY occurrences DESC
+        LIMIT 10
         """
-        error_res = run_bq_query(BQQueryInput(sql=error_sql, params={"start_time": start_time, "end_time": end_time}))
+
+        # Builder stats queries are bounded by the @hours partition window and
+        # read rollups where possible, so they skip the dry run
+        queries = [
+            BQQueryInput(sql=stats_query["sql"], params=_param_dict(stats_query["params"]), skip_dry_run=True),
+            BQQueryInput(sql=service_query["sql"], params=_param_dict(service_query["params"]), skip_dry_run=True),
+            BQQueryInput(sql=error_sql, params=window_params),
+            BQQueryInput(sql=warning_sql, params=window_params),
+        ]
+        outputs = run_bq_queries(queries)
+
+        def rows(i):
+            if isinstance(outputs[i], Exception):
+                raise outputs[i]
+            return outputs[i].rows
+
+        # 1-2. Severity and service distribution (served from rollups when covered)
+        severity_counts = {row['severity']: row['count'] for row in rows(0)}
+        results["stats"]["by_severity"] = severity_counts
+        results["stats"]["total_logs"] = sum(severity_counts.values())
+        results["stats"]["error_count"] = severity_counts.get('ERROR', 0) + severity_counts.get('CRITICAL', 0)
+        results["stats"]["warning_count"] = severity_counts.get('WARNING', 0)
+
+        top_services = sorted(rows(1), key=lambda r: (r['error_count'], r['count']), reverse=True)[:10]
+        results["services_affected"] = [
+            {"service": row['service_name'] or 'unknown', "total": row['count'], "errors": row['error_count'], "warnings": row['warning_count']}
+            for row in top_services
+        ]
+
+        # 3. Top errors with details
         results["top_errors"] = [
             {
                 "timestamp": str(row['event_timestamp']),
@@ -395,53 +448,26 @@ def analyze_logs(
                 "source": row['source_table'],
                 "resource_type": row.get('resource_type')
             }
-            for row in error_res.rows
+            for row in rows(2)
         ]
 
-        # 4. Get top warnings
-        warning_sql = f"""
-        SELECT
-            event_timestamp,
-            service_name,
-            message
-        FROM `{table}`
-        WHERE {partition_filter}
-          AND event_timestamp BETWEEN TIMESTAMP(@start_time) AND TIMESTAMP(@end_time)
-          AND severity = 'WARNING'
-        ORDER BY event_timestamp DESC
-        LIMIT 15
-        """
-        warning_res = run_bq_query(BQQueryInput(sql=warning_sql, params={"start_time": start_time, "end_time": end_time}))
+        # 4. Top warnings
         results["top_warnings"] = [
             {
                 "timestamp": str(row['event_timestamp']),
                 "service": row['service_name'] or 'unknown',
                 "message": (row['message'] or '')[:200]
             }
-            for row in warning_res.rows
+            for row in rows(3)
         ]
 
-        # 5. Pattern detection - group similar errors
-        if include_patterns and results["top_errors"]:
-            pattern_sql = f"""
-            SELECT
-                service_name,
-                REGEXP_EXTRACT(message, r'^([A-Za-z]+Error|Exception|[A-Z][a-z]+Exception):?') as error_type,
-                COUNT(*) as occurrences,
-                MIN(event_timestamp) as first_seen,
-                MAX(event_timestamp) as last_seen
-            FROM `{table}`
-            WHERE {partition_filter}
-              AND event_timestamp BETWEEN TIMESTAMP(@start_time) AND TIMESTAMP(@end_time)
-              AND severity IN ('ERROR', 'CRITICAL')
-              AND message IS NOT NULL
-            GROUP BY service_name, error_type
-            HAVING error_type IS NOT NULL
-            ORDER BY occurrences DESC
-            LIMIT 10
-            """
+        # 5. Pattern detection - group similar errors. Run only once the
+        # batch shows ERROR/CRITICAL rows to group; otherwise it bills a scan
+        # that can only come back empty.
+        if include_patterns and results["stats"]["error_count"] > 0 and results["top_errors"]:
             try:
-                pattern_res = run_bq_query(BQQueryInput(sql=pattern_sql, params={"start_time": start_time, "end_time": end_time}))
+                (pattern_output,) = run_bq_queries([BQQueryInput(sql=pattern_sql, params=window_params)])
+                outputs.append(pattern_output)
                 results["patterns"] = [
                     {
                         "service": row['service_name'] or 'unknown',
@@ -450,7 +476,7 @@ def analyze_logs(
                         "first_seen": str(row['first_seen']),
                         "last_seen": str(row['last_seen'])
                     }
-                    for row in pattern_res.rows
+                    for row in rows(4)
                 ]
             except:
                 pass  # Pattern detection is optional
@@ -479,6 +505,7 @@ def analyze_logs(
 
 
 @tool
+@cached_tool
 def get_log_summary(hours: int = 24) -> Dict[str, Any]:
     """
     Quick summary of log activity. Use this for overview requests like
@@ -490,34 +517,9 @@ def get_log_summary(hours: int = 24) -> Dict[str, Any]:
     Returns:
         Quick summary with counts and health status
     """
-    from src.config import config
-
-    project_id = config.PROJECT_ID_LOGS
-    table = f"{project_id}.central_logging_v1.master_logs"
-
-    # Calculate date range for partition pruning
-    start_date = (datetime.utcnow() - timedelta(hours=hours)).strftime("%Y-%m-%d")
-    end_date = datetime.utcnow().strftime("%Y-%m-%d")
-    start_time = (datetime.utcnow() - timedelta(hours=hours)).isoformat()
-    end_time = datetime.utcnow().isoformat()
-
     try:
-        sql = f"""
-        SELECT
-            COUNT(*) as total_logs,
-            COUNTIF(severity = 'ERROR') as errors,
-            COUNTIF(severity = 'CRITICAL') as critical,
-            COUNTIF(severity = 'WARNING') as warnings,
-            COUNTIF(severity = 'INFO') as info,
-            COUNT(DISTINCT service_name) as services_active,
-            MIN(event_timestamp) as earliest,
-            MAX(event_timestamp) as latest
-        FROM `{table}`
-        WHERE log_date BETWEEN '{start_date}' AND '{end_date}'
-          AND event_timestamp BETWEEN TIMESTAMP(@start_time) AND TIMESTAMP(@end_time)
-        """
-
-        res = run_bq_query(BQQueryInput(sql=sql, params={"start_time": start_time, "end_time": end_time}))
+        query = _stats_query_builder().build_summary_query(hours=hours)
+        res = run_bq_query(BQQueryInput(sql=query["sql"], params=_param_dict(query["params"]), skip_dry_run=True))
 
         if res.rows:
             row = res.rows[0]
@@ -562,6 +564,7 @@ def get_log_summary(hours: int = 24) -> Dict[str, Any]:
 
 
 @tool
+@cached_tool
 def find_related_logs(
     error_message: str,
     time_window_minutes: int = 30,
@@ -577,6 +580,7 @@ def find_related_logs(
         include_context: Include surrounding logs from same service/trace
     """
     from src.config import config
+    from src.glass_pane.query_builder import text_search_clause
 
     project_id = config.PROJECT_ID_LOGS
     table = f"{project_id}.central_logging_v1.master_logs"
@@ -584,6 +588,10 @@ def find_related_logs(
     # Use recent partition for error search
     recent_date = (datetime.utcnow() - timedelta(days=7)).strftime("%Y-%m-%d")
 
+    pattern_predicate, pattern = text_search_clause(
+        error_message, param="pattern", columns=("message",), mode=glass_config.search_mode
+    )
+
     try:
         # First, find the error
         find_sql = f"""
@@ -597,7 +605,7 @@ def find_related_logs(
             source_table
         FROM `{table}`
         WHERE log_date >= '{recent_date}'
-            AND LOWER(message) LIKE LOWER(@pattern)
+            AND {pattern_predicate}
             AND severity IN ('ERROR', 'CRITICAL', 'WARNING')
         ORDER BY event_timestamp DESC
         LIMIT 5
@@ -605,7 +613,7 @@ def find_related_logs(
 
         find_res = run_bq_query(BQQueryInput(
             sql=find_sql,
-            params={"pattern": f"%{error_message}%"}
+            params={"pattern": pattern}
         ))
 
         if not find_res.rows:
@@ -701,6 +709,7 @@ def find_related_logs(
 
 
 @tool
+@cached_tool
 def suggest_queries(context: str = "") -> Dict[str, Any]:
     """
     Suggest relevant queries based on current context or common use cases.
@@ -791,6 +800,7 @@ def suggest_queries(context: str = "") -> Dict[str, Any]:
 # ============================================
 
 @tool
+@cached_tool
 def semantic_search_logs(
     query: str,
     top_k: int = 10,
@@ -868,6 +878,7 @@ def semantic_search_logs(
 
 
 @tool
+@cached_tool
 def find_similar_logs(
     log_text: str,
     top_k: int = 5,
@@ -929,3 +940,31 @@ def find_similar_logs(
         return {"error": "Vector service not available"}
     except Exception as e:
         return {"error": str(e)}
+
+
+@tool
+def fetch_tool_output(ref: str, offset: int = 0, max_chars: int = 20000) -> Dict[str, Any]:
+    """
+    Retrieve the full output of an earlier tool call that was compacted.
+    Older tool results in long sessions are replaced by a summary with a
+    "ref" (e.g. "payload:3f9a..."); use this when the summary isn't enough.
+
+    Args:
+        ref: The "ref" value from the compacted result
+        offset: Character offset to start from, for outputs larger than max_chars
+        max_chars: Maximum characters to return (default: 20000)
+
+    Returns:
+        The stored output text, and the next offset if more remains
+    """
+    from src.agent.compaction import payload_store
+
+    content = payload_store.get(ref)
+    if content is None:
+        return {"error": f"No stored output for {ref} (it may have expired)"}
+
+    chunk = content[offset:offset + max_chars]
+    result: Dict[str, Any] = {"ref": ref, "content": chunk, "total_chars": len(content)}
+    if offset + max_chars < len(content):
+        result["next_offset"] = offset + max_chars
+    return result
@@ -0,0 +1,169 @@
+"""Result cache for the read-only agent tools in definitions.py.
+
+Agent runs call the same tools with the same arguments over and over
+(``get_log_summary(hours=24)`` at the start of most sessions), within a
+session and across users. ``cached_tool`` wraps a tool function and keys
+its result on:
+
+- the tool name
+- the canonicalized arguments: defaults filled in, whitespace collapsed,
+  and the policy's ``casefold_args`` lowercased, so ``analyze_logs()`` and
+  ``analyze_logs(intent="Summary ", timeframe="24H")`` share an entry
+- a time bucket, ``floor(now / ttl_sec)`` from the tool's freshness policy
+  (``TOOL_FRESHNESS`` in src.agent.tokenization)
+
+Results live in an in-process LRU and in Redis (via ``redis_service``, so
+Cloud Run instances share them) until the end of their bucket. Error
+results (``{"error": ...}``) and exceptions are never cached.
+"""
+
+import contextvars
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.agent.tokenization import ToolFreshness, get_tool_freshness
+from src.services.redis_service import redis_service
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "true").lower() == "true"
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "256"))
+
+# Per-invocation cache outcome; the metered tool node sets a fresh dict per tool call
+tool_cache_usage: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "tool_cache_usage", default=None
+)
+
+
+def canonical_args(fn: Callable, args: tuple, kwargs: Dict[str, Any], policy: ToolFreshness) -> Dict[str, Any]:
+    """Bound arguments of ``fn`` with defaults applied and strings normalized."""
+    bound = inspect.signature(fn).bind(*args, **kwargs)
+    bound.apply_defaults()
+    canonical = {}
+    for name, value in bound.arguments.items():
+        if isinstance(value, str):
+            value = " ".join(value.split())
+            if name in policy.casefold_args:
+                value = value.casefold()
+        canonical[name] = value
+    return canonical
+
+
+class ToolResultCache:
+    """Two-tier (in-process LRU + Redis) cache of tool results."""
+
+    def __init__(self, max_entries: int = TOOL_CACHE_MAX_ENTRIES, redis=redis_service, enabled: bool = TOOL_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.redis = redis
+        self.enabled = enabled
+        self._local: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    @staticmethod
+    def key(tool_name: str, args: Dict[str, Any], policy: ToolFreshness, now: Optional[float] = None) -> Tuple[str, float]:
+        """Cache key for a call and the time its bucket ends."""
+        now = now if now is not None else time.time()
+        bucket = int(now // policy.ttl_sec)
+        material = json.dumps(args, default=str, sort_keys=True)
+        digest = hashlib.sha256(material.encode()).hexdigest()[:32]
+        return f"toolcache:{tool_name}:{digest}:{bucket}", (bucket + 1) * policy.ttl_sec
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._local.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return json.loads(entry[0])
+                del self._local[key]
+
+        cached = self.redis.get_cache(key)
+        if isinstance(cached, dict) and "v" in cached and float(cached.get("exp", 0)) > now:
+            self._put_local(key, json.dumps(cached["v"]), float(cached["exp"]))
+            with self._lock:
+                self._stats["hits"] += 1
+            return cached["v"]
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, key: str, value: Any, expires_at: float) -> None:
+        ttl = math.ceil(expires_at - time.time())
+        if ttl <= 0:
+            return
+        try:
+            text = json.dumps(value, default=str)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Tool result not cacheable ({key}): {e}")
+            return
+        self._put_local(key, text, expires_at)
+        self.redis.set_cache(key, {"v": json.loads(text), "exp": expires_at}, ttl=ttl)
+        with self._lock:
+            self._stats["stores"] += 1
+
+    def _put_local(self, key: str, text: str, expires_at: float) -> None:
+        with self._lock:
+            self._local[key] = (text, expires_at)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop in-process entries (Redis entries expire on their own)."""
+        with self._lock:
+            self._local.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._local)
+        looked_up = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / looked_up, 3) if looked_up else 0.0
+        return stats
+
+
+# Singleton instance
+tool_result_cache = ToolResultCache()
+
+
+def cached_tool(fn: Callable) -> Callable:
+    """Serve ``fn``'s results from tool_result_cache per its freshness policy.
+
+    Apply under ``@tool`` so the tool keeps ``fn``'s name, signature and
+    docstring. Tools without a policy run uncached.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        policy = get_tool_freshness(fn.__name__)
+        if policy is None or not tool_result_cache.enabled:
+            return fn(*args, **kwargs)
+
+        key, expires_at = tool_result_cache.key(fn.__name__, canonical_args(fn, args, kwargs, policy), policy)
+        cached = tool_result_cache.get(key)
+        usage = tool_cache_usage.get()
+        if usage is not None:
+            usage["cache_hit"] = cached is not None
+        if cached is not None:
+            return cached
+
+        result = fn(*args, **kwargs)
+        if not (isinstance(result, dict) and "error" in result):
+            tool_result_cache.put(key, result, expires_at)
+        return result
+
+    return wrapper
@@ -4,7 +4,9 @@ from typing import Any, Dict
 
 from strawberry.fastapi import BaseContext
 
+from src.api.graphql.loaders import GraphQLLoaders
 from src.services.firebase_service import firebase_service
+from src.services.log_query_service import log_query_service
 from src.services.qdrant_service import qdrant_service
 from src.services.redis_service import redis_service
 
@@ -17,6 +19,9 @@ class GraphQLContext(BaseContext):
         # BigQuery client creation requires ADC; keep it lazy in resolvers.
         self.bq_client = None
         self.qdrant = qdrant_service
+        self.queries = log_query_service
+        # Per-request, so batching and memoization never cross requests
+        self.loaders = GraphQLLoaders()
 
 
 def get_context() -> GraphQLContext:
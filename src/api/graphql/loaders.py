@@ -0,0 +1,45 @@
+"""
+GraphQL DataLoaders
+
+One set of loaders is created per request (see context.get_context), so
+lookups requested by sibling fields in the same query are batched and
+deduplicated: N ``log(id)`` fields become one query and N
+``chat(session_id)`` fields one Firestore batch.
+"""
+
+import asyncio
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from strawberry.dataloader import DataLoader
+
+from src.services.firebase_service import firebase_service
+from src.services.log_query_service import log_query_service
+
+
+async def load_logs(log_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """Batch function for log rows by id."""
+    rows = await log_query_service.logs_by_id(log_ids)
+    return [rows.get(log_id) for log_id in log_ids]
+
+
+async def load_chats(keys: List[Tuple[str, str]]) -> List[List[Dict[str, Any]]]:
+    """Batch function for chat messages keyed by (user_id, session_id)."""
+    by_user: Dict[str, List[str]] = defaultdict(list)
+    for user_id, session_id in keys:
+        by_user[user_id].append(session_id)
+
+    messages: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for user_id, session_ids in by_user.items():
+        found = await asyncio.to_thread(firebase_service.get_messages_for_sessions, session_ids, user_id)
+        for session_id, msgs in found.items():
+            messages[(user_id, session_id)] = msgs
+    return [messages.get(key, []) for key in keys]
+
+
+class GraphQLLoaders:
+    """Per-request DataLoaders."""
+
+    def __init__(self):
+        self.log = DataLoader(load_fn=load_logs)
+        self.chat = DataLoader(load_fn=load_chats)
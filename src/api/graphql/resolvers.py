@@ -2,8 +2,6 @@
 GraphQL Resolvers
 """
 
-import hashlib
-import json
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from strawberry.fastapi import BaseContext
@@ -14,32 +12,32 @@ from src.api.graphql.types import (
 )
 from src.api.graphql.auth import get_user_from_context, require_auth
 from src.glass_pane.config import glass_config
-from src.glass_pane.query_builder import CanonicalQueryBuilder
-
-def hash_filter(filter: LogFilter) -> str:
-    """Hash filter for Redis key."""
-    filter_dict = {
-        "hours": filter.hours,
-        "limit": filter.limit,
-        "severity": filter.severity.value if filter.severity else None,
-        "service_name": filter.service_name,
-        "region": filter.region,
-        "env": filter.env,
-    }
-    return hashlib.sha256(json.dumps(filter_dict, sort_keys=True).encode()).hexdigest()
+from src.glass_pane.query_builder import LogQueryParams
+from src.services.embedding_queue import embedding_queue
+from src.services.log_broker import log_broker
+
+# Jobs listed per embedding queue
+JOBS_PEEK_COUNT = 50
+
+def _parse_ts(value: Any) -> Any:
+    """Cached rows carry ISO strings; LogEntry wants datetimes."""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return value
 
 def log_payload_to_log_entry(payload: Dict[str, Any]) -> LogEntry:
-    """Convert log payload to LogEntry."""
+    """Convert a log payload (Qdrant payload or master_logs row) to LogEntry."""
+    event_ts = _parse_ts(payload.get("timestamp") or payload.get("event_timestamp"))
     return LogEntry(
         id=payload["log_id"],
-        event_ts=payload["timestamp"],
-        ingest_ts=payload["ingest_ts"] if "ingest_ts" in payload else payload["timestamp"],
-        project_id=payload["tenant_id"],
+        event_ts=event_ts,
+        ingest_ts=_parse_ts(payload.get("ingest_ts")) or event_ts,
+        project_id=payload.get("tenant_id") or payload.get("project_id") or glass_config.logs_project_id,
         env=payload.get("env", "unknown"),
-        region=payload.get("region", "unknown"),
-        service_name=payload["service_name"],
-        severity=payload["severity"],
-        event_type=payload.get("event_type", "unknown"),
+        region=payload.get("region") or payload.get("resource_location") or "unknown",
+        service_name=payload.get("service_name") or "unknown",
+        severity=payload.get("severity") or "INFO",
+        event_type=payload.get("event_type") or payload.get("log_type") or "unknown",
         correlation_ids=payload.get("correlation_ids", []),
         labels=payload.get("labels", {}),
         message=payload.get("message"),
@@ -50,57 +48,49 @@ def log_payload_to_log_entry(payload: Dict[str, Any]) -> LogEntry:
         span_id=payload.get("span_id"),
     )
 
-# Query Resolvers
-def resolve_logs(filter: LogFilter, context: BaseContext) -> LogQuery:
-    """Resolve logs query with cache-first strategy."""
-    user_id = require_auth(get_user_from_context(context))
+def message_to_chat_event(message: Dict[str, Any]) -> ChatEvent:
+    """Convert a Firestore chat message to ChatEvent."""
+    return ChatEvent(
+        id=message.get("id") or "",
+        session_id=message.get("session_id") or "",
+        message=message.get("content") or "",
+        timestamp=_parse_ts(message.get("timestamp")) or datetime.utcnow(),
+    )
 
-    redis_key = f"logs:{hash_filter(filter)}"
-    cached = context.redis.get(redis_key)
-    if cached:
-        data = json.loads(cached)
-        logs = [log_payload_to_log_entry(p) for p in data["logs"]]
-        return LogQuery(logs=logs, total_count=data["total_count"], has_more=data["has_more"])
-
-    # Fallback to BigQuery
-    query_builder = CanonicalQueryBuilder(
-        project_id=glass_config.logs_project_id,
-        view_name=glass_config.canonical_view,
+# Query Resolvers
+async def resolve_logs(filter: LogFilter, context: BaseContext) -> LogQuery:
+    """Resolve logs query through the shared log query service."""
+    require_auth(get_user_from_context(context))
+    # master_logs has no env column and the hot tier no region; refuse rather
+    # than return (and cache) unfiltered rows under a filtered query
+    if filter.region or filter.env:
+        raise ValueError("The logs query does not support region or env filters")
+
+    hours = min(filter.hours or glass_config.default_time_window_hours, glass_config.max_time_window_hours)
+    limit = min(filter.limit or glass_config.default_limit, glass_config.max_limit)
+    params = LogQueryParams(
+        limit=limit,
+        hours=hours,
+        severity=filter.severity.value if filter.severity else None,
+        service=filter.service_name,
     )
-    hours = filter.hours or glass_config.default_time_window_hours
-    limit = filter.limit or glass_config.default_limit
-    params = {
-        "hours": hours,
-        "limit": limit,
-        "severity": filter.severity.value if filter.severity else None,
-        "service_name": filter.service_name,
-        "region": filter.region,
-        "env": filter.env,
-    }
-    results = query_builder.query_logs(**params)
-    logs = [log_payload_to_log_entry(r) for r in results]
-
-    # Cache result
-    cache_data = {
-        "logs": [vars(l) for l in logs],  # simplistic
-        "total_count": len(logs),
-        "has_more": len(logs) == limit,
-    }
-    context.redis.set(redis_key, json.dumps(cache_data), ex=300)  # 5 min
+    rows = await context.queries.list_logs(params)
+    logs = [log_payload_to_log_entry(r) for r in rows]
 
     return LogQuery(logs=logs, total_count=len(logs), has_more=len(logs) == limit)
 
-def resolve_log(id: str, context: BaseContext) -> Optional[LogEntry]:
-    """Resolve single log."""
+async def resolve_log(id: str, context: BaseContext) -> Optional[LogEntry]:
+    """Resolve single log; batched with sibling log fields by the DataLoader."""
     require_auth(get_user_from_context(context))
-    # Implement single log query
-    return None  # Placeholder
+    row = await context.loaders.log.load(id)
+    return log_payload_to_log_entry(row) if row else None
 
-def resolve_services(context: BaseContext) -> List[ServiceInfo]:
-    """Resolve services."""
+async def resolve_services(context: BaseContext) -> List[ServiceInfo]:
+    """Resolve services active in the default time window."""
     require_auth(get_user_from_context(context))
-    # Placeholder
-    return []
+    rows = await context.queries.service_stats(glass_config.default_time_window_hours)
+    # master_logs carries no region/env per service
+    return [ServiceInfo(name=r["service_name"], region="unknown", env="unknown") for r in rows if r.get("service_name")]
 
 def resolve_health(context: BaseContext) -> Health:
     """Resolve health."""
@@ -118,16 +108,20 @@ def resolve_health(context: BaseContext) -> Health:
     )
 
 def resolve_jobs(filter: Optional[LogFilter], context: BaseContext) -> List[EmbeddingJob]:
-    """Resolve embedding jobs."""
-    require_auth(get_user_from_context(context))
-    # Placeholder
-    return []
-
-def resolve_chat(session_id: str, context: BaseContext) -> List[ChatEvent]:
-    """Resolve chat events."""
+    """Resolve embedding jobs waiting in (or failed out of) the embedding queues."""
     require_auth(get_user_from_context(context))
-    # Placeholder
-    return []
+    jobs = []
+    for queue, entries in embedding_queue.peek_queues(count=JOBS_PEEK_COUNT).items():
+        status = "failed" if queue == "failed" else "queued"
+        for entry in entries:
+            jobs.append(EmbeddingJob(id=entry.get("job_id", ""), status=status, log_ids=entry.get("log_ids", [])))
+    return jobs
+
+async def resolve_chat(session_id: str, context: BaseContext) -> List[ChatEvent]:
+    """Resolve chat events; sessions requested in one query share a Firestore batch."""
+    user_id = require_auth(get_user_from_context(context))
+    messages = await context.loaders.chat.load((user_id, session_id))
+    return [message_to_chat_event(m) for m in messages]
 
 # Mutation Resolvers
 def resolve_run_query(input: RunQueryInput, context: BaseContext) -> LogQuery:
@@ -154,9 +148,19 @@ def resolve_set_tag(input: SetTagInput, context: BaseContext) -> bool:
     # Update in Firebase
     return True
 
-# Subscription (placeholder)
+# Subscription
 async def resolve_log_stream(filter: LogFilter, context: BaseContext):
-    """Log stream subscription."""
+    """Live log rows matching the filter, fanned out from the shared log broker."""
     require_auth(get_user_from_context(context))
-    # Use Firebase realtime
-    yield LogEntry(...)  # Placeholder
\ No newline at end of file
+    if filter.env:
+        raise ValueError("The logStream subscription does not support env filters")
+    subscription = log_broker.subscribe(
+        severity=filter.severity.value if filter.severity else None,
+        service=filter.service_name,
+        region=filter.region,
+    )
+    try:
+        async for row in subscription:
+            yield log_payload_to_log_entry(row)
+    finally:
+        subscription.close()
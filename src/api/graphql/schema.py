@@ -24,16 +24,16 @@ from src.api.graphql.resolvers import (
 @strawberry.type
 class Query:
     @strawberry.field
-    def logs(self, filter: LogFilter, info: strawberry.Info[BaseContext]) -> LogQuery:
-        return resolve_logs(filter, info.context)
+    async def logs(self, filter: LogFilter, info: strawberry.Info[BaseContext]) -> LogQuery:
+        return await resolve_logs(filter, info.context)
 
     @strawberry.field
-    def log(self, id: str, info: strawberry.Info[BaseContext]) -> Optional[LogEntry]:
-        return resolve_log(id, info.context)
+    async def log(self, id: str, info: strawberry.Info[BaseContext]) -> Optional[LogEntry]:
+        return await resolve_log(id, info.context)
 
     @strawberry.field
-    def services(self, info: strawberry.Info[BaseContext]) -> List[ServiceInfo]:
-        return resolve_services(info.context)
+    async def services(self, info: strawberry.Info[BaseContext]) -> List[ServiceInfo]:
+        return await resolve_services(info.context)
 
     @strawberry.field
     def health(self, info: strawberry.Info[BaseContext]) -> Health:
@@ -44,8 +44,8 @@ class Query:
         return resolve_jobs(filter, info.context)
 
     @strawberry.field
-    def chat(self, session_id: str, info: strawberry.Info[BaseContext]) -> List[ChatEvent]:
-        return resolve_chat(session_id, info.context)
+    async def chat(self, session_id: str, info: strawberry.Info[BaseContext]) -> List[ChatEvent]:
+        return await resolve_chat(session_id, info.context)
 
 # Mutations
 @strawberry.type
@@ -66,7 +66,7 @@ class Mutation:
     def set_tag(self, input: SetTagInput, info: strawberry.Info[BaseContext]) -> bool:
         return resolve_set_tag(input, info.context)
 
-# Subscriptions (placeholder, use Firebase for now)
+# Subscriptions
 @strawberry.type
 class Subscription:
     @strawberry.subscription
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 from pathlib import Path
@@ -12,18 +13,26 @@ from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 try:
     from google.api_core.exceptions import BadRequest, GoogleAPICallError
-    from google.cloud import bigquery
 except ModuleNotFoundError:
     # Optional imports for local test environments.
     BadRequest = Exception  # type: ignore
     GoogleAPICallError = Exception  # type: ignore
-    bigquery = None  # type: ignore
 from pydantic import BaseModel, Field
 from src.glass_pane.config import glass_config
 from src.services.firebase_service import firebase_service
 from src.services.redis_service import redis_service
 from src.services.qdrant_service import qdrant_service
+from src.services.bq_query_service import bq_query_service, QueryTimeoutError, BQ_PAGE_SIZE
+from src.services.log_pager import log_pager
+from src.services.hot_tier import hot_tier_store
+from src.services.log_broker import log_broker
+from src.services.query_cache import stats_cache
 from src.services.dual_write_service import dual_write_service, ChatEvent, ToolInvocation
+from src.services.pubsub_publisher import pubsub_publisher
+from src.agent.speculative import speculative_retrieval
+from src.agent.llm_gateway import LLMCaller, LLMQueueTimeoutError, QUEUE_EVENT, llm_caller, llm_gateway
+from src.services.chat_persistence import chat_persistence, CHAT_PERSIST_FLUSH_SEC
+from src.api.sse import ContentDelta, SSECoalescer, sse_frame
 from src.api.auth import get_current_user_uid
 try:
     from src.api.etl_routes import router as etl_router
@@ -50,7 +59,13 @@ async def lifespan(app: FastAPI):
             print(f"Warning: Qdrant init failed: {e}")
     # Yield control to run the app
     yield
-    # No shutdown tasks needed currently
+    # Let write-behind chat persistence and checkpoint writes finish
+    await chat_persistence.drain()
+    from src.agent.checkpoint import checkpoint_writer
+    if not await asyncio.to_thread(checkpoint_writer.flush):
+        print(f"Warning: {checkpoint_writer.get_stats()['pending']} checkpoint writes still pending")
+    # Flush batched Pub/Sub publishes (tool metrics, dual-write events)
+    await asyncio.to_thread(pubsub_publisher.shutdown)
 
 
 app = FastAPI(
@@ -63,6 +78,8 @@ app = FastAPI(
 # Chat persistence feature flags
 CHAT_REQUIRE_FIRESTORE = os.getenv("CHAT_REQUIRE_FIRESTORE", "false").lower() == "true"
 CHAT_ENABLE_REALTIME = os.getenv("CHAT_ENABLE_REALTIME", "true").lower() == "true"
+# Completion tokens between model_stream token_count events
+TOKEN_REPORT_INTERVAL = 50
 
 # CORS configuration for frontend
 allowed_origins_str = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173,http://localhost:3000")
@@ -84,16 +101,8 @@ if etl_router is not None:
 if GraphQLRouter is not None and schema is not None and get_context is not None:
     app.include_router(GraphQLRouter(schema, context_getter=get_context), prefix="/graphql", tags=["graphql"])
 
-_bq_client = None
-
-
 def get_bq_client():
-    global _bq_client
-    if bigquery is None:
-        raise RuntimeError("Missing optional dependency 'google-cloud-bigquery'")
-    if _bq_client is None:
-        _bq_client = bigquery.Client(project=glass_config.logs_project_id)
-    return _bq_client
+    return bq_query_service.client
 
 
 def get_query_builder():
@@ -103,6 +112,9 @@ def get_query_builder():
     return CanonicalQueryBuilder(
         project_id=glass_config.logs_project_id,
         view_name=glass_config.canonical_view,
+        rollups_since=glass_config.rollups_since,
+        search_mode=glass_config.search_mode,
+        hot_tier=hot_tier_store if hot_tier_store.enabled else None,
     )
 
 
@@ -145,7 +157,15 @@ def health():
         "services": {
             "redis": "connected" if redis_status else "disconnected",
             "qdrant": "connected" if qdrant_status else "disconnected"
-        }
+        },
+        "bigquery_queries": bq_query_service.get_stats(),
+        "log_pages": log_pager.get_stats(),
+        "stats_cache": stats_cache.get_stats(),
+        "hot_tier": hot_tier_store.get_stats(),
+        "chat_persistence": chat_persistence.get_stats(),
+        "log_stream": log_broker.get_stats(),
+        "speculative_retrieval": speculative_retrieval.get_stats(),
+        "llm_gateway": llm_gateway.get_stats(),
     }
 
 
@@ -179,7 +199,7 @@ def favicon():
 
 
 @app.get("/api/logs")
-def api_logs(
+async def api_logs(
     hours: int = Query(default=glass_config.default_time_window_hours, ge=1),
     limit: int = Query(default=glass_config.default_limit, ge=1),
     severity: Optional[str] = Query(default=None),
@@ -188,7 +208,6 @@ def api_logs(
     source_table: Optional[str] = Query(default=None),
 ):
     try:
-        client = get_bq_client()
         builder = get_query_builder()
 
         safe_hours = min(hours, glass_config.max_time_window_hours)
@@ -220,9 +239,7 @@ def api_logs(
             )
 
         query = builder.build_list_query(params)
-        job_config = bigquery.QueryJobConfig(query_parameters=query["params"])
-        job = client.query(query["sql"], job_config=job_config)
-        rows = [dict(row) for row in job]
+        rows = await bq_query_service.query(query["sql"], query["params"], max_results=safe_limit)
 
         for row in rows:
             if row.get("event_timestamp"):
@@ -230,6 +247,11 @@ def api_logs(
 
         return JSONResponse({"status": "success", "count": len(rows), "data": rows})
 
+    except QueryTimeoutError as e:
+        return JSONResponse(
+            {"status": "error", "error_type": "timeout", "message": str(e)},
+            status_code=504,
+        )
     except BadRequest as e:
         return JSONResponse(
             {"status": "error", "error_type": "bigquery_error", "message": e.message},
@@ -248,7 +270,7 @@ def api_logs(
 
 
 @app.get("/api/v2/logs")
-def api_logs_v2(
+async def api_logs_v2(
     hours: int = Query(default=glass_config.default_time_window_hours, ge=1),
     limit: int = Query(default=glass_config.default_limit, ge=1),
     severity: Optional[str] = Query(default=None),
@@ -256,19 +278,27 @@ def api_logs_v2(
     search: Optional[str] = Query(default=None),
     source_table: Optional[str] = Query(default=None),
     envelope: bool = Query(default=False, description="Include Universal Data Envelope fields"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    format: str = Query(default="json", pattern="^(json|ndjson)$"),
 ):
     """
     Get logs with optional Universal Data Envelope support.
 
     When envelope=true, queries the canonical view and includes
     envelope fields like environment, PII risk, and correlation IDs.
+
+    Pages are newest-first; pass the returned next_cursor to get the next
+    one. With format=ndjson rows are streamed one JSON object per line as
+    BigQuery pages arrive (limit up to MAX_STREAM_LIMIT), followed by a
+    final {"_meta": {...}} line carrying count and next_cursor.
     """
     try:
-        client = get_bq_client()
         builder = get_query_builder()
 
+        streaming = format == "ndjson"
+        max_limit = glass_config.max_stream_limit if streaming else glass_config.max_limit
         safe_hours = min(hours, glass_config.max_time_window_hours)
-        safe_limit = min(limit, glass_config.max_limit)
+        safe_limit = min(limit, max_limit)
 
         from src.glass_pane.query_builder import LogQueryParams
 
@@ -279,10 +309,11 @@ def api_logs_v2(
             service=service or None,
             search=search or None,
             source_table=source_table or None,
+            cursor=cursor or None,
         )
 
         errors = params.validate(
-            max_limit=glass_config.max_limit,
+            max_limit=max_limit,
             max_hours=glass_config.max_time_window_hours,
         )
         if errors:
@@ -296,24 +327,38 @@ def api_logs_v2(
             )
 
         # Use envelope parameter to include Universal Envelope fields
-        query = builder.build_list_query(params, use_envelope=envelope)
-        job_config = bigquery.QueryJobConfig(query_parameters=query["params"])
-        job = client.query(query["sql"], job_config=job_config)
-        rows = [dict(row) for row in job]
+        page = await log_pager.open(
+            builder,
+            params,
+            use_envelope=envelope,
+            page_size=min(safe_limit, BQ_PAGE_SIZE) if streaming else safe_limit,
+        )
 
-        for row in rows:
-            if row.get("event_timestamp"):
-                row["event_timestamp"] = row["event_timestamp"].isoformat()
-            if row.get("envelope_event_ts"):
-                row["envelope_event_ts"] = row["envelope_event_ts"].isoformat()
+        if streaming:
+            return StreamingResponse(
+                _stream_log_page(builder, page),
+                media_type="application/x-ndjson",
+                headers={"X-Page-Source": page.source},
+            )
+
+        rows = [_serialize_log_row(row) async for batch in log_pager.read(builder, page) for row in batch]
 
-        return JSONResponse({
-            "status": "success",
-            "count": len(rows),
-            "envelope_enabled": envelope,
-            "data": rows
-        })
+        return JSONResponse(
+            {
+                "status": "success",
+                "count": len(rows),
+                "envelope_enabled": envelope,
+                "next_cursor": page.next_cursor,
+                "data": rows
+            },
+            headers={"X-Page-Source": page.source},
+        )
 
+    except QueryTimeoutError as e:
+        return JSONResponse(
+            {"status": "error", "error_type": "timeout", "message": str(e)},
+            status_code=504,
+        )
     except BadRequest as e:
         return JSONResponse(
             {"status": "error", "error_type": "bigquery_error", "message": e.message},
@@ -331,45 +376,85 @@ def api_logs_v2(
         )
 
 
+def _serialize_log_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    if row.get("event_timestamp"):
+        row["event_timestamp"] = row["event_timestamp"].isoformat()
+    if row.get("envelope_event_ts"):
+        row["envelope_event_ts"] = row["envelope_event_ts"].isoformat()
+    return row
+
+
+async def _stream_log_page(builder, page):
+    """NDJSON body: one line per row, then a _meta line (status can't change mid-stream)."""
+    try:
+        async for batch in log_pager.read(builder, page):
+            yield "".join(json.dumps(_serialize_log_row(row), default=str) + "\n" for row in batch)
+    except Exception as e:
+        yield json.dumps({"_meta": {"status": "error", "count": page.rows_read, "message": str(e)}}) + "\n"
+        return
+    yield json.dumps({
+        "_meta": {"status": "success", "count": page.rows_read, "next_cursor": page.next_cursor}
+    }) + "\n"
+
+
 @app.get("/api/stats/severity")
-def api_stats_severity(
+async def api_stats_severity(
     hours: int = Query(default=glass_config.default_time_window_hours, ge=1),
 ):
     try:
-        client = get_bq_client()
         builder = get_query_builder()
 
         safe_hours = min(hours, glass_config.max_time_window_hours)
 
-        query = builder.build_count_by_severity_query(hours=safe_hours)
-        job = client.query(
-            query["sql"],
-            job_config=bigquery.QueryJobConfig(query_parameters=query["params"]),
-        )
+        if builder.hot_covers(safe_hours):
+            query = builder.build_hot_count_by_severity_query(hours=safe_hours)
+            rows = await hot_tier_store.query(query["sql"], query["params"])
+            headers = {"X-Stats-Source": "hot"}
+        else:
+            query = builder.build_count_by_severity_query(hours=safe_hours)
+            cached = await stats_cache.get_or_load(
+                query["sql"],
+                query["params"],
+                lambda: bq_query_service.query(query["sql"], query["params"]),
+            )
+            rows = cached.value
+            headers = stats_cache.cache_headers(cached)
 
-        data = {row["severity"]: row["count"] for row in job}
+        data = {row["severity"]: row["count"] for row in rows}
 
-        return JSONResponse({"status": "success", "hours": safe_hours, "data": data})
+        return JSONResponse(
+            {"status": "success", "hours": safe_hours, "data": data},
+            headers=headers,
+        )
 
+    except QueryTimeoutError as e:
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=504)
     except Exception as e:
         return JSONResponse({"status": "error", "message": str(e)}, status_code=500)
 
 
 @app.get("/api/stats/services")
-def api_stats_services(
+async def api_stats_services(
     hours: int = Query(default=glass_config.default_time_window_hours, ge=1),
 ):
     try:
-        client = get_bq_client()
         builder = get_query_builder()
 
         safe_hours = min(hours, glass_config.max_time_window_hours)
 
-        query = builder.build_count_by_service_query(hours=safe_hours)
-        job = client.query(
-            query["sql"],
-            job_config=bigquery.QueryJobConfig(query_parameters=query["params"]),
-        )
+        if builder.hot_covers(safe_hours):
+            query = builder.build_hot_count_by_service_query(hours=safe_hours)
+            rows = await hot_tier_store.query(query["sql"], query["params"])
+            headers = {"X-Stats-Source": "hot"}
+        else:
+            query = builder.build_count_by_service_query(hours=safe_hours)
+            cached = await stats_cache.get_or_load(
+                query["sql"],
+                query["params"],
+                lambda: bq_query_service.query(query["sql"], query["params"]),
+            )
+            rows = cached.value
+            headers = stats_cache.cache_headers(cached)
 
         data = [
             {
@@ -377,11 +462,16 @@ def api_stats_services(
                 "count": row["count"],
                 "error_count": row["error_count"],
             }
-            for row in job
+            for row in rows
         ]
 
-        return JSONResponse({"status": "success", "hours": safe_hours, "data": data})
+        return JSONResponse(
+            {"status": "success", "hours": safe_hours, "data": data},
+            headers=headers,
+        )
 
+    except QueryTimeoutError as e:
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=504)
     except Exception as e:
         return JSONResponse({"status": "error", "message": str(e)}, status_code=500)
 
@@ -588,6 +678,11 @@ def create_token_count_event(
         },
     }
 
+def _persistence_frames(lane) -> str:
+    """SSE frames for persistence failures recorded on a lane since the last call."""
+    return "".join(sse_frame(f.to_event()) for f in lane.pop_failures())
+
+
 @app.post("/api/chat")
 async def chat(
     request: ChatRequest,
@@ -621,10 +716,11 @@ async def chat(
             status_code=503,
         )
 
-    # Verify session ownership/existence if provided
+    # Verify session ownership/existence if provided. This read decides the
+    # response status, so it is awaited, but off the event loop.
     if session_id and firebase_available:
         try:
-            session = firebase_service.get_session(session_id)
+            session = await chat_persistence.run(firebase_service.get_session, session_id)
         except Exception as e:
             logger.warning(f"Session lookup failed; continuing without sessions: {e}")
             session = None
@@ -636,58 +732,65 @@ async def chat(
         if session.get("user_id") != current_user_uid and current_user_uid != "anonymous":
             return JSONResponse({"status": "error", "message": "Access denied"}, status_code=403)
 
-    # Create new session if needed (best-effort)
+    # Writes below are write-behind (see src.services.chat_persistence): they
+    # run in order on a background lane and failures are reported as SSE
+    # persistence_error events instead of delaying the stream.
+    lane = chat_persistence.lane()
+
+    # Create new session if needed (best-effort). The id is streamed before
+    # the write lands; if it fails the client is told to drop it.
+    session_created: Optional[asyncio.Task] = None
     if not session_id and firebase_available:
-        try:
-            session_id = firebase_service.create_session(
-                user_id=current_user_uid,
-                title=request.message[:50] + "..." if len(request.message) > 50 else request.message,
-            )
-        except Exception as e:
-            logger.warning(f"Failed to create session; continuing without sessions: {e}")
-            session_id = None
+        session_id = str(uuid.uuid4())
+        session_created = lane.submit(
+            "create_session",
+            firebase_service.create_session,
+            user_id=current_user_uid,
+            title=request.message[:50] + "..." if len(request.message) > 50 else request.message,
+            session_id=session_id,
+            required=True,
+        )
 
     # Persist user message using dual-write service (hot + cold paths) (best-effort)
     if session_id:
-        try:
-            user_event = ChatEvent.create_message_event(
-                session_id=session_id,
-                user_id=current_user_uid,
-                role="user",
-                content=request.message,
-            )
-            dual_write_service.write_event(user_event, firebase_service=firebase_service)
-            if firebase_service.realtime_enabled and CHAT_ENABLE_REALTIME:
-                firebase_service.set_realtime_data(
-                    f"chat/{session_id}/latest",
-                    {
-                        "role": "user",
-                        "content": request.message,
-                        "ts": datetime.now(timezone.utc).isoformat(),
-                    },
-                )
-        except Exception as e:
-            logger.warning(f"Failed to persist user message; continuing: {e}")
-
-        # Enqueue for async embedding and Qdrant storage (best-effort)
-        try:
-            redis_service.enqueue(
-                "q:embeddings:realtime",
+        user_event = ChatEvent.create_message_event(
+            session_id=session_id,
+            user_id=current_user_uid,
+            role="user",
+            content=request.message,
+        )
+        lane.submit("user_message", dual_write_service.write_event, user_event, firebase_service=firebase_service)
+        if CHAT_ENABLE_REALTIME and firebase_service.realtime_enabled:
+            lane.submit(
+                "user_realtime",
+                firebase_service.set_realtime_data,
+                f"chat/{session_id}/latest",
                 {
-                    "session_id": session_id,
-                    "project_id": current_user_uid,
                     "role": "user",
                     "content": request.message,
+                    "ts": datetime.now(timezone.utc).isoformat(),
                 },
             )
-        except Exception as e:
-            logger.warning(f"Failed to enqueue embedding job; continuing: {e}")
+
+        # Enqueue for async embedding and Qdrant storage (best-effort)
+        lane.submit(
+            "user_embedding",
+            redis_service.enqueue,
+            "q:embeddings:realtime",
+            {
+                "session_id": session_id,
+                "project_id": current_user_uid,
+                "role": "user",
+                "content": request.message,
+            },
+        )
 
     # --- Graph inputs ---
     # Lazy imports: allow importing this module in lightweight test environments.
     from langchain_core.messages import HumanMessage, ToolMessage
     from src.agent.graph import graph
     from src.agent.nodes import get_token_manager, reset_token_manager
+    from src.agent.tokenization import IncrementalTokenCounter
 
     run_id = str(uuid.uuid4())
     inputs = {
@@ -702,16 +805,33 @@ async def chat(
         "tool_calls": [],
     }
 
+    session_dropped = False
+
+    def session_frames() -> str:
+        """Persistence failures, plus a persisted=false session event once creating it failed."""
+        nonlocal session_dropped
+        frames = _persistence_frames(lane)
+        if session_created is not None and session_created.done() and not session_dropped:
+            if session_created.cancelled() or not session_created.result():
+                session_dropped = True
+                frames += sse_frame({"type": "session", "data": {"session_id": session_id, "persisted": False}})
+        return frames
+
     async def event_stream():
         full_response = ""
         tools_used: List[str] = []
         completion_tokens = 0
+        next_token_report = TOKEN_REPORT_INTERVAL
         active_tool_invocation: Optional[ToolInvocation] = None
 
         try:
             # Reset and get token manager for this request
             reset_token_manager()
             token_manager = get_token_manager()
+            # Progress events use the byte-length estimate; the total is encoded once at finalize
+            completion_counter = IncrementalTokenCounter(
+                token_manager.count_tokens, estimate_fn=token_manager.estimate_tokens
+            )
 
             # Track initial user message tokens (ingress phase)
             user_msg_tokens = token_manager.count_tokens(request.message) + 4  # +4 for message overhead
@@ -720,7 +840,7 @@ async def chat(
             # Send session info first
             if session_id:
                 session_payload = {"type": "session", "data": {"session_id": session_id}}
-                yield f"data: {json.dumps(session_payload)}\n\n"
+                yield sse_frame(session_payload)
 
             # Emit initial token_count event (ingress phase)
             status = token_manager.get_budget_status()
@@ -732,11 +852,18 @@ async def chat(
                 remaining=status["tokens_remaining"],
                 budget_max=status["max_tokens"],
             )
-            yield f"data: {json.dumps(ingress_event)}\n\n"
+            yield sse_frame(ingress_event)
+
+            # Model calls of this run queue as this user, at the run's priority
+            llm_caller.set(LLMCaller(user_id=current_user_uid, priority=inputs["mode"]))
 
             async for event in graph.astream_events(inputs, version="v2"):
                 kind = event["event"]
 
+                persistence_frames = session_frames()
+                if persistence_frames:
+                    yield persistence_frames
+
                 payload = {"type": kind, "data": {}}
 
                 if kind == "on_chat_model_stream":
@@ -759,16 +886,14 @@ async def chat(
 
                         if content:
                             full_response += content
+                            yield ContentDelta(content)
 
-                            # Track completion tokens (approximate by counting chunk tokens)
-                            chunk_tokens = token_manager.count_tokens(content)
-                            completion_tokens += chunk_tokens
-
-                            payload["data"] = {"content": content}
-                            yield f"data: {json.dumps(payload)}\n\n"
+                            # Track completion tokens over the accumulated text
+                            completion_tokens = completion_counter.add(content)
 
                             # Emit token_count event periodically during streaming (every ~50 tokens)
-                            if completion_tokens % 50 < chunk_tokens:
+                            if completion_tokens >= next_token_report:
+                                next_token_report = completion_tokens + TOKEN_REPORT_INTERVAL
                                 status = token_manager.get_budget_status()
                                 stream_event = create_token_count_event(
                                     phase="model_stream",
@@ -778,7 +903,11 @@ async def chat(
                                     remaining=status["tokens_remaining"] - completion_tokens,
                                     budget_max=status["max_tokens"],
                                 )
-                                yield f"data: {json.dumps(stream_event)}\n\n"
+                                yield sse_frame(stream_event)
+
+                elif kind == "on_custom_event" and event.get("name") == QUEUE_EVENT:
+                    # Waiting for (or admitted to) a model slot in the LLM gateway
+                    yield sse_frame({"type": "status", "data": {"phase": "llm_queue", **event["data"]}})
 
                 elif kind == "on_tool_start":
                     tool_name = event["name"]
@@ -790,7 +919,7 @@ async def chat(
                         "tool": tool_name,
                         "input": safe_input,
                     }
-                    yield f"data: {json.dumps(payload)}\n\n"
+                    yield sse_frame(payload)
 
                     # Start tool invocation tracking for dual-write
                     if session_id:
@@ -811,7 +940,7 @@ async def chat(
                         remaining=status["tokens_remaining"] - completion_tokens,
                         budget_max=status["max_tokens"],
                     )
-                    yield f"data: {json.dumps(tool_start_event)}\n\n"
+                    yield sse_frame(tool_start_event)
 
                 elif kind == "on_tool_end":
                     output = event["data"].get("output")
@@ -853,13 +982,17 @@ async def chat(
                             output_summary=output_summary,
                             tokens_used=tool_output_tokens,
                         )
-                        dual_write_service.write_tool_invocation(active_tool_invocation)
+                        lane.submit(
+                            "tool_invocation",
+                            dual_write_service.write_tool_invocation,
+                            active_tool_invocation,
+                        )
                         active_tool_invocation = None
 
                     # Redact tool output
                     safe_output = redactor.scrub_data(output_data)
                     payload["data"] = {"tool": tool_name, "output": safe_output}
-                    yield f"data: {json.dumps(payload)}\n\n"
+                    yield sse_frame(payload)
 
                     # Emit token_count event after tool completion
                     status = token_manager.get_budget_status()
@@ -871,9 +1004,10 @@ async def chat(
                         remaining=status["tokens_remaining"] - completion_tokens,
                         budget_max=status["max_tokens"],
                     )
-                    yield f"data: {json.dumps(tool_end_event)}\n\n"
+                    yield sse_frame(tool_end_event)
 
             # Reserve completion tokens in the manager
+            completion_tokens = completion_counter.total()
             try:
                 token_manager.reserve_tokens(completion_tokens)
             except Exception:
@@ -891,7 +1025,7 @@ async def chat(
                 remaining=final_status["tokens_remaining"],
                 budget_max=final_status["max_tokens"],
             )
-            yield f"data: {json.dumps(finalize_event)}\n\n"
+            yield sse_frame(finalize_event)
 
             # Persist assistant response using dual-write service (hot + cold paths)
             if session_id and full_response:
@@ -910,10 +1044,17 @@ async def chat(
                         "total_tokens": final_status["tokens_used"],
                     },
                 )
-                dual_write_service.write_event(assistant_event, firebase_service=firebase_service)
+                lane.submit(
+                    "assistant_message",
+                    dual_write_service.write_event,
+                    assistant_event,
+                    firebase_service=firebase_service,
+                )
 
                 # Enqueue for async embedding and Qdrant storage
-                redis_service.enqueue(
+                lane.submit(
+                    "assistant_embedding",
+                    redis_service.enqueue,
                     "q:embeddings:realtime",
                     {
                         "session_id": session_id,
@@ -922,8 +1063,10 @@ async def chat(
                         "content": full_response,
                     },
                 )
-                if firebase_service.realtime_enabled and CHAT_ENABLE_REALTIME:
-                    firebase_service.set_realtime_data(
+                if CHAT_ENABLE_REALTIME and firebase_service.realtime_enabled:
+                    lane.submit(
+                        "assistant_realtime",
+                        firebase_service.set_realtime_data,
                         f"chat/{session_id}/latest",
                         {
                             "role": "assistant",
@@ -933,6 +1076,21 @@ async def chat(
                         },
                     )
 
+            # The answer is complete; wait briefly for this request's writes so
+            # their failures can still be reported on this stream.
+            if not await lane.flush(timeout=CHAT_PERSIST_FLUSH_SEC):
+                logger.warning(f"Chat persistence still running for session {session_id}; not waiting")
+            persistence_frames = session_frames()
+            if persistence_frames:
+                yield persistence_frames
+
+        except LLMQueueTimeoutError as e:
+            logger.warning(f"Chat run {run_id} gave up waiting for a model slot: {e}")
+            yield sse_frame({
+                "type": "error",
+                "data": {"message": "The assistant is busy; please retry shortly.", "error_type": "llm_busy"},
+            })
+
         except Exception as e:
             import traceback
             error_id = str(uuid.uuid4())
@@ -945,7 +1103,7 @@ async def chat(
                 "reference_id": error_id
             }
             err_payload = {"type": "error", "data": error_details}
-            yield f"data: {json.dumps(err_payload)}\n\n"
+            yield sse_frame(err_payload)
 
         finally:
             # Clean up token manager
@@ -953,7 +1111,7 @@ async def chat(
 
         yield "event: end\ndata: [DONE]\n\n"
 
-    return StreamingResponse(event_stream(), media_type="text/event-stream")
+    return StreamingResponse(SSECoalescer().stream(event_stream()), media_type="text/event-stream")
 
 
 # Mount static files for frontend (must be after all routes)
@@ -0,0 +1,163 @@
+"""Server-Sent Events framing for the chat stream.
+
+Models stream answers a few characters at a time. Emitting one ``data:``
+frame (and one ``json.dumps``) per chunk turns a long answer into
+thousands of tiny writes. This module keeps that cheap:
+
+- ``EnvelopeEncoder`` precomputes the JSON around a fixed event envelope,
+  so a content frame is two string concatenations plus one C-level string
+  escape, byte-identical to ``json.dumps`` of the full payload.
+- ``SSECoalescer`` sits between the event generator and the response. It
+  merges consecutive content deltas into one frame and batches frames,
+  flushing once ``max_bytes`` are buffered or ``max_delay`` has passed
+  since the first buffered item, even if the model is idle.
+"""
+
+import asyncio
+import json
+import os
+from collections import deque
+from json.encoder import encode_basestring_ascii
+from typing import AsyncIterator, Deque, List, Optional, Union
+
+SSE_COALESCE_MS = float(os.getenv("SSE_COALESCE_MS", "20"))
+SSE_COALESCE_BYTES = int(os.getenv("SSE_COALESCE_BYTES", "1024"))
+
+_PLACEHOLDER = "\x00"
+
+
+def sse_frame(payload: dict) -> str:
+    """Encode a payload as one SSE data frame."""
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+class EnvelopeEncoder:
+    """Encodes ``{"type": <type>, "data": {<field>: <text>}}`` frames for a fixed type/field."""
+
+    def __init__(self, event_type: str, field: str):
+        template = sse_frame({"type": event_type, "data": {field: _PLACEHOLDER}})
+        placeholder = json.dumps(_PLACEHOLDER)
+        self._prefix, self._suffix = template.split(placeholder)
+
+    def frame(self, text: str) -> str:
+        return self._prefix + encode_basestring_ascii(text) + self._suffix
+
+
+content_encoder = EnvelopeEncoder("on_chat_model_stream", "content")
+
+
+class ContentDelta(str):
+    """A chunk of answer text; consecutive deltas are merged into one content frame."""
+
+
+SSEItem = Union[str, ContentDelta]
+
+
+class SSECoalescer:
+    """Batches SSE output on a small time/size budget."""
+
+    def __init__(
+        self,
+        max_delay: float = SSE_COALESCE_MS / 1000,
+        max_bytes: int = SSE_COALESCE_BYTES,
+        encoder: EnvelopeEncoder = content_encoder,
+    ):
+        self.max_delay = max_delay
+        self.max_bytes = max_bytes
+        self.encoder = encoder
+        self.frames_in = 0
+        self.writes_out = 0
+
+    async def stream(self, source: AsyncIterator[SSEItem]) -> AsyncIterator[str]:
+        """
+        Re-yield ``source`` in coalesced writes.
+
+        The source runs in its own task feeding a buffer, so a flush deadline
+        can fire while it is waiting on the model without a task or timeout
+        per item.
+
+        Args:
+            source: Complete SSE frames (str) and ContentDelta chunks, in order
+
+        Yields:
+            Concatenated frames; relative order of all items is preserved
+        """
+        loop = asyncio.get_running_loop()
+        arrived: Deque[SSEItem] = deque()
+        wakeup = asyncio.Event()
+        finished = False
+        error: Optional[BaseException] = None
+
+        async def produce():
+            nonlocal finished, error
+            try:
+                async for item in source:
+                    arrived.append(item)
+                    wakeup.set()
+            except Exception as e:
+                error = e
+            finally:
+                finished = True
+                wakeup.set()
+
+        producer = asyncio.ensure_future(produce())
+        frames: List[str] = []
+        content: List[str] = []
+        size = 0
+        deadline: Optional[float] = None
+        timer: Optional[asyncio.TimerHandle] = None
+
+        def drain() -> str:
+            nonlocal size, deadline
+            if content:
+                frames.append(self.encoder.frame("".join(content)))
+                content.clear()
+            out = "".join(frames)
+            frames.clear()
+            size, deadline = 0, None
+            self.writes_out += 1
+            return out
+
+        try:
+            while True:
+                while arrived:
+                    item = arrived.popleft()
+                    self.frames_in += 1
+                    if deadline is None:
+                        deadline = loop.time() + self.max_delay
+                    if isinstance(item, ContentDelta):
+                        content.append(item)
+                    else:
+                        if content:
+                            frames.append(self.encoder.frame("".join(content)))
+                            content.clear()
+                        frames.append(item)
+                    size += len(item)
+                    if size >= self.max_bytes:
+                        yield drain()
+
+                if finished:
+                    break
+                if deadline is not None and loop.time() >= deadline:
+                    yield drain()
+                    continue
+
+                wakeup.clear()
+                if timer is not None:
+                    timer.cancel()
+                timer = loop.call_at(deadline, wakeup.set) if deadline is not None else None
+                await wakeup.wait()
+
+            if frames or content:
+                yield drain()
+            if error is not None:
+                raise error
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if not producer.done():
+                producer.cancel()
+                try:
+                    await producer
+                except asyncio.CancelledError:
+                    pass
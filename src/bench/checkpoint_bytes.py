@@ -0,0 +1,118 @@
+"""
+Benchmark: checkpoint bytes written per run.
+
+Simulates ``--runs`` agent runs of ``--checkpoints`` checkpoints each. Every
+step between checkpoints adds a tool call, a few evidence entries (log rows
+as analyze_logs returns them) and occasionally a hypothesis, and moves the
+phase along, so the state grows with run length like a real session.
+
+- ``full``: the original encoding; every checkpoint stores the whole state
+- ``delta``: CheckpointEncoder with its default full-snapshot interval and
+  compression threshold
+
+Reports payload bytes per run (the ``state`` / ``delta`` field, or its
+compressed form), the largest single document payload, and how many
+checkpoints were full, delta and compressed.
+
+Usage:
+    python -m src.bench.checkpoint_bytes
+    python -m src.bench.checkpoint_bytes --runs 20 --checkpoints 30
+"""
+
+import argparse
+import json
+import random
+from typing import Any, Dict, List
+
+from src.agent.checkpoint import CheckpointEncoder, _snapshot_state
+
+SERVICES = ["checkout", "payments", "inventory", "auth", "frontend"]
+SEVERITIES = ["ERROR", "WARNING", "INFO"]
+PHASES = ["diagnose", "verify", "optimize", "persist"]
+
+
+def log_row(rng: random.Random) -> Dict[str, Any]:
+    service = rng.choice(SERVICES)
+    return {
+        "timestamp": f"2026-10-18T12:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}Z",
+        "severity": rng.choice(SEVERITIES),
+        "service": service,
+        "message": f"{service}: upstream request failed with status {rng.choice([500, 502, 503])} "
+                   f"after {rng.randint(100, 5000)}ms (retry {rng.randint(0, 3)})",
+        "trace_id": f"{rng.getrandbits(64):016x}",
+    }
+
+
+def simulate_run(run_id: str, n_checkpoints: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Successive states of one run, one per checkpoint."""
+    state: Dict[str, Any] = {
+        "run_id": run_id,
+        "user_query": "Why is checkout returning 503s since the last deploy?",
+        "phase": "diagnose",
+        "status": "running",
+        "mode": "interactive",
+        "scope": {"project": "demo", "hours": 24},
+        "hypotheses": [],
+        "evidence": [],
+        "tool_calls": [],
+        "runbook_ids": [],
+        "error": None,
+    }
+    states = []
+    for step in range(n_checkpoints):
+        state["tool_calls"] = state["tool_calls"] + [{
+            "tool_name": "analyze_logs",
+            "args": {"intent": "errors", "timeframe": "24h", "service": rng.choice(SERVICES)},
+            "duration_ms": rng.randint(200, 3000),
+            "status": "success",
+        }]
+        state["evidence"] = state["evidence"] + [
+            {"type": "log_sample", "rows": [log_row(rng) for _ in range(rng.randint(3, 8))]}
+            for _ in range(rng.randint(1, 3))
+        ]
+        if rng.random() < 0.3:
+            state["hypotheses"] = state["hypotheses"] + [f"Connection pool exhaustion in {rng.choice(SERVICES)}"]
+        state["phase"] = PHASES[min(step * len(PHASES) // n_checkpoints, len(PHASES) - 1)]
+        states.append(dict(state))
+    return states
+
+
+def payload_bytes(snapshot: Dict[str, Any]) -> int:
+    return len(json.dumps(snapshot, separators=(",", ":")).encode())
+
+
+def run(mode: str, runs: List[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    encoder = CheckpointEncoder()
+    total = largest = 0
+    for i, states in enumerate(runs):
+        for n, state in enumerate(states):
+            snapshot = _snapshot_state(state)
+            if mode == "full":
+                size = payload_bytes(snapshot)
+            else:
+                before = encoder.get_stats()["bytes_written"]
+                encoder.encode(f"run-{i}", f"run-{i}-{n}", snapshot)
+                size = encoder.get_stats()["bytes_written"] - before
+            total += size
+            largest = max(largest, size)
+
+    result = {"kb_per_run": round(total / len(runs) / 1024, 1), "max_doc_kb": round(largest / 1024, 1)}
+    if mode != "full":
+        stats = encoder.get_stats()
+        result.update({k: stats[k] for k in ("full", "delta", "compressed")})
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checkpoint bytes benchmark")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--checkpoints", type=int, default=20, help="Checkpoints per run")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    runs = [simulate_run(f"run-{i}", args.checkpoints, rng) for i in range(args.runs)]
+    print(f"{args.runs} runs, {args.checkpoints} checkpoints per run")
+    for mode in ("full", "delta"):
+        result = run(mode, runs)
+        print(f"{mode:<6} " + "  ".join(f"{k}={v}" for k, v in result.items()))
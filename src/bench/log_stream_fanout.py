@@ -0,0 +1,186 @@
+"""
+Load test: logStream fan-out through one broker vs one upstream tail per subscriber.
+
+Simulates ``--subscribers`` GraphQL logStream subscribers (default 1000),
+each with a filter drawn from ``--filters`` distinct severity/service
+combinations, while a producer appends ``--batches`` batches of
+``--rows`` log rows to an in-memory stand-in for the Redis live stream.
+
+- ``broker``: one LogStreamBroker tail; rows are decoded once and each
+  distinct filter is evaluated once per row
+- ``per_subscriber``: every subscriber polls and decodes the stream itself
+  and applies its own filter (what N independent tails would cost)
+
+Reports upstream reads, rows decoded, deliveries, delivery latency
+(p50/p99 from append to receipt) and CPU time.
+
+Usage:
+    python -m src.bench.log_stream_fanout
+    python -m src.bench.log_stream_fanout --subscribers 1000 --batches 40 --rows 50
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Tuple
+
+from src.services.log_broker import LogStreamBroker, compile_log_filter, filter_key
+
+SERVICES = ["api", "worker", "billing", "auth", "search", "ingest"]
+SEVERITIES = ["DEBUG", "INFO", "WARNING", "ERROR"]
+POLL_SEC = 0.005
+
+
+class FakeStream:
+    """Append-only list of JSON-encoded rows; reads decode like the Redis path."""
+
+    def __init__(self):
+        self.entries: List[Tuple[int, str]] = []
+        self.reads = 0
+        self.decoded = 0
+
+    def append(self, rows: List[Dict]) -> None:
+        for row in rows:
+            self.entries.append((len(self.entries) + 1, json.dumps(row)))
+
+    def read(self, last_id: str, count: int) -> List[Tuple[str, Dict]]:
+        self.reads += 1
+        start = 0 if last_id == "$" else int(last_id)
+        batch = self.entries[start:start + count]
+        self.decoded += len(batch)
+        return [(str(entry_id), json.loads(raw)) for entry_id, raw in batch]
+
+
+def make_filters(n: int, rng: random.Random) -> List[Tuple]:
+    combos = [(sev, svc) for sev in SEVERITIES for svc in SERVICES] + [(sev, None) for sev in SEVERITIES]
+    rng.shuffle(combos)
+    return [filter_key(severity=sev, service=svc) for sev, svc in combos[:n]]
+
+
+def make_batch(n: int, rng: random.Random) -> List[Dict]:
+    now = time.perf_counter()
+    return [
+        {
+            "log_id": f"{now:.6f}-{i}",
+            "severity": rng.choice(SEVERITIES),
+            "service_name": rng.choice(SERVICES),
+            "message": "request served",
+            "appended_at": now,
+        }
+        for i in range(n)
+    ]
+
+
+async def _produce(stream: FakeStream, batches: int, rows: int, interval: float, rng: random.Random) -> List[Dict]:
+    produced = []
+    for _ in range(batches):
+        await asyncio.sleep(interval)
+        batch = make_batch(rows, rng)
+        stream.append(batch)
+        produced.extend(batch)
+    return produced
+
+
+def _expected(filters: List[Tuple], rows: List[Dict]) -> List[int]:
+    return [sum(1 for row in rows if compile_log_filter(key)(row)) for key in filters]
+
+
+async def run_broker(args, keys: List[Tuple], expected: List[int], stream: FakeStream, rng) -> Dict:
+    broker = LogStreamBroker(reader=stream.read, max_queue=args.rows * args.batches, idle_sleep=POLL_SEC)
+    latencies: List[float] = []
+    subscriptions = [broker.subscribe(severity=k[0], service=k[1]) for k in keys]
+
+    async def consume(subscription, want):
+        got = 0
+        while got < want:
+            row = await subscription.__anext__()
+            latencies.append(time.perf_counter() - row["appended_at"])
+            got += 1
+        subscription.close()
+
+    consumers = [asyncio.ensure_future(consume(s, n)) for s, n in zip(subscriptions, expected)]
+    await _produce(stream, args.batches, args.rows, args.interval_ms / 1000, rng)
+    await asyncio.wait_for(asyncio.gather(*consumers), timeout=60)
+    return {"latencies": latencies, "deliveries": broker.get_stats()["deliveries"]}
+
+
+async def run_per_subscriber(args, keys: List[Tuple], expected: List[int], stream: FakeStream, rng) -> Dict:
+    latencies: List[float] = []
+    deliveries = 0
+
+    async def tail(key, want):
+        nonlocal deliveries
+        predicate = compile_log_filter(key)
+        last_id, got = "$", 0
+        while got < want:
+            entries = await asyncio.to_thread(stream.read, last_id, args.rows)
+            if not entries:
+                await asyncio.sleep(POLL_SEC)
+                continue
+            last_id = entries[-1][0]
+            now = time.perf_counter()
+            for _, row in entries:
+                if predicate(row):
+                    latencies.append(now - row["appended_at"])
+                    got += 1
+        deliveries += got
+
+    tails = [asyncio.ensure_future(tail(k, n)) for k, n in zip(keys, expected)]
+    await _produce(stream, args.batches, args.rows, args.interval_ms / 1000, rng)
+    await asyncio.wait_for(asyncio.gather(*tails), timeout=600)
+    return {"latencies": latencies, "deliveries": deliveries}
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run(mode, args) -> Dict:
+    rng = random.Random(args.seed)
+    filters = make_filters(args.filters, rng)
+    keys = [rng.choice(filters) for _ in range(args.subscribers)]
+
+    # Same rows for both modes: pre-generate with a fixed seed to size expectations
+    preview = random.Random(args.seed + 1)
+    sample = [row for _ in range(args.batches) for row in make_batch(args.rows, preview)]
+    expected = _expected(keys, sample)
+
+    stream = FakeStream()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    result = asyncio.run(mode(args, keys, expected, stream, random.Random(args.seed + 1)))
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    return {
+        "upstream_reads": stream.reads,
+        "rows_decoded": stream.decoded,
+        "deliveries": result["deliveries"],
+        "latency_p50_ms": round(1000 * _percentile(result["latencies"], 0.5), 2),
+        "latency_p99_ms": round(1000 * _percentile(result["latencies"], 0.99), 2),
+        "cpu_s": round(cpu, 2),
+        "wall_s": round(wall, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="logStream fan-out load test")
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--filters", type=int, default=12, help="Distinct subscriber filters")
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=50, help="Rows per upstream batch")
+    parser.add_argument("--interval-ms", type=float, default=50.0, help="Delay between upstream batches")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--skip-per-subscriber", action="store_true", help="Only run the broker")
+    args = parser.parse_args()
+
+    print(f"{args.subscribers} subscribers, {args.filters} filters, {args.batches} x {args.rows} rows")
+    modes = [("broker", run_broker)]
+    if not args.skip_per_subscriber:
+        modes.append(("per_subscriber", run_per_subscriber))
+    for name, mode in modes:
+        result = run(mode, args)
+        print(f"{name:<15} " + "  ".join(f"{k}={v}" for k, v in result.items()))
@@ -26,7 +26,7 @@ SCENARIOS = [
     {"name": "filtered_severity", "description": "Filtered by severity", "filters": {"severity": "ERROR"}, "hnsw_ef": 32},
     {"name": "filtered_service", "description": "Filtered by service", "filters": {"service_name": "my-service"}, "hnsw_ef": 32},
     {"name": "filtered_time", "description": "Filtered by time range", "filters": {"timestamp_from": 1609459200, "timestamp_to": 1640995200}, "hnsw_ef": 32},
-    {"name": "hybrid", "description": "Hybrid dense + sparse (if enabled)", "filters": None, "hnsw_ef": 64},
+    {"name": "hybrid", "description": "Hybrid dense + BM25 sparse, RRF fusion", "filters": None, "hnsw_ef": 64},
     {"name": "grouped_trace", "description": "Grouped by trace_id", "filters": None, "hnsw_ef": 64},
 ]
 
@@ -206,9 +206,9 @@ class BenchHarness:
                 )
                 result_count = len(response.groups)
             elif scenario["name"] == "hybrid":
-                # Placeholder for hybrid
-                response = self.query_engine.semantic_search(
-                    query_vector=query_vector,
+                response = self.query_engine.hybrid_search(
+                    dense_vector=query_vector,
+                    query_text=query_text,
                     limit=10,
                     hnsw_ef=scenario["hnsw_ef"]
                 )
@@ -0,0 +1,85 @@
+"""
+Benchmark: bytes scanned by LIKE vs SEARCH() log search predicates.
+
+Dry-runs the log list query that /api/v2/logs issues for each term twice,
+once with the substring LIKE predicate and once with SEARCH() over the
+master_logs search index, and reports BigQuery's total_bytes_processed for
+both. Dry runs are free and do not touch the query cache.
+
+Run it before and after ``python -m src.cli provision-search-index``: until
+the index covers the table, SEARCH() is estimated like a full column scan.
+
+Usage:
+    python -m src.bench.search_bytes --terms timeout "connection refused" --hours 168
+    python -m src.bench.search_bytes --terms timeout --json
+"""
+
+import argparse
+import json
+import os
+from typing import Dict, List
+
+from google.cloud import bigquery
+
+from src.glass_pane.query_builder import CanonicalQueryBuilder, LogQueryParams, is_search_tokenizable
+
+MODES = ("like", "search")
+
+
+def dry_run_bytes(client: bigquery.Client, query: Dict) -> int:
+    """total_bytes_processed for a builder query, without running it."""
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=query["params"],
+        dry_run=True,
+        use_query_cache=False,
+    )
+    return client.query(query["sql"], job_config=job_config).total_bytes_processed or 0
+
+
+def measure(client: bigquery.Client, project_id: str, dataset: str, terms: List[str], hours: int, limit: int) -> List[Dict]:
+    """Dry-run bytes per term for each search mode."""
+    results = []
+    for term in terms:
+        params = LogQueryParams(hours=hours, limit=limit, search=term)
+        row = {"term": term, "tokenizable": is_search_tokenizable(term)}
+        for mode in MODES:
+            builder = CanonicalQueryBuilder(project_id, f"{dataset}.master_logs", search_mode=mode)
+            row[f"{mode}_bytes"] = dry_run_bytes(client, builder.build_list_query(params))
+        row["saved_pct"] = (
+            round(100.0 * (1 - row["search_bytes"] / row["like_bytes"]), 1) if row["like_bytes"] else 0.0
+        )
+        results.append(row)
+    return results
+
+
+def _fmt_bytes(n: int) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if n < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TiB"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LIKE vs SEARCH() dry-run bytes benchmark")
+    parser.add_argument("--project", default=os.getenv("PROJECT_ID", "diatonic-ai-gcp"))
+    parser.add_argument("--dataset", default=os.getenv("CANONICAL_DATASET", "central_logging_v1"))
+    parser.add_argument("--terms", nargs="+", default=["timeout", "permission denied", "OOMKilled"])
+    parser.add_argument("--hours", type=int, default=168)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    client = bigquery.Client(project=args.project)
+    results = measure(client, args.project, args.dataset, args.terms, args.hours, args.limit)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'term':<30} {'LIKE':>12} {'SEARCH':>12} {'saved':>7}")
+        for r in results:
+            note = "" if r["tokenizable"] else "  (auto mode keeps LIKE)"
+            print(
+                f"{r['term']:<30} {_fmt_bytes(r['like_bytes']):>12} "
+                f"{_fmt_bytes(r['search_bytes']):>12} {r['saved_pct']:>6}%{note}"
+            )
@@ -0,0 +1,127 @@
+"""
+Benchmark: per-chunk SSE emission vs coalesced frames with incremental token counting.
+
+Replays a synthetic long answer as model chunks of a few characters and
+produces the chat stream's content and token_count frames two ways:
+
+- ``per_chunk``: the original path; one json.dumps frame and one
+  count_tokens call per chunk, one write per frame
+- ``coalesced``: ContentDelta items through SSECoalescer (precomputed
+  envelope, 20ms/1KB flush budget) and IncrementalTokenCounter
+
+Reports writes per response, writes/sec, bytes and CPU milliseconds per
+response. ``--interval-ms`` spaces chunks out like a real model so the
+time budget, not just the size budget, is exercised.
+
+Usage:
+    python -m src.bench.sse_stream --chunks 4000 --responses 20
+    python -m src.bench.sse_stream --tokenizer whitespace --interval-ms 1
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import AsyncIterator, Callable, Dict, List
+
+from src.agent.tokenization import IncrementalTokenCounter
+from src.api.sse import ContentDelta, SSECoalescer, sse_frame
+
+WORDS = (
+    "the service returned 503 errors after the deploy because the connection pool "
+    "to cloud sql was exhausted and retries amplified load on the primary instance"
+).split()
+TOKEN_REPORT_INTERVAL = 50
+
+
+def make_chunks(n_chunks: int, rng: random.Random) -> List[str]:
+    """Answer text split into 1-8 character chunks, as streaming models emit it."""
+    text = " ".join(rng.choice(WORDS) for _ in range(n_chunks))
+    chunks, i = [], 0
+    while i < len(text) and len(chunks) < n_chunks:
+        step = rng.randint(1, 8)
+        chunks.append(text[i:i + step])
+        i += step
+    return chunks
+
+
+def token_event(completion: int) -> Dict:
+    return {"type": "token_count", "data": {"completion": completion, "phase": "model_stream"}}
+
+
+async def _source(chunks: List[str], interval: float) -> AsyncIterator[str]:
+    for chunk in chunks:
+        if interval:
+            await asyncio.sleep(interval)
+        yield chunk
+
+
+async def per_chunk(chunks: List[str], count: Callable[[str], int], interval: float) -> List[str]:
+    writes, completion = [], 0
+    async for content in _source(chunks, interval):
+        chunk_tokens = count(content)
+        completion += chunk_tokens
+        writes.append(f"data: {json.dumps({'type': 'on_chat_model_stream', 'data': {'content': content}})}\n\n")
+        if completion % TOKEN_REPORT_INTERVAL < chunk_tokens:
+            writes.append(sse_frame(token_event(completion)))
+    return writes
+
+
+async def coalesced(chunks: List[str], count: Callable[[str], int], interval: float) -> List[str]:
+    async def events():
+        counter = IncrementalTokenCounter(count)
+        next_report = TOKEN_REPORT_INTERVAL
+        async for content in _source(chunks, interval):
+            yield ContentDelta(content)
+            completion = counter.add(content)
+            if completion >= next_report:
+                next_report = completion + TOKEN_REPORT_INTERVAL
+                yield sse_frame(token_event(completion))
+        yield sse_frame(token_event(counter.total()))
+
+    return [w async for w in SSECoalescer().stream(events())]
+
+
+def run(mode, chunks: List[str], count, interval: float, responses: int) -> Dict:
+    writes_total = bytes_total = 0
+    wall = cpu = 0.0
+    for _ in range(responses):
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        writes = asyncio.run(mode(chunks, count, interval))
+        cpu += time.process_time() - cpu_start
+        wall += time.perf_counter() - wall_start
+        writes_total += len(writes)
+        bytes_total += sum(len(w) for w in writes)
+    return {
+        "writes_per_response": writes_total / responses,
+        "writes_per_sec": round(writes_total / wall, 1) if wall else 0.0,
+        "bytes_per_response": bytes_total / responses,
+        "cpu_ms_per_response": round(1000 * cpu / responses, 2),
+    }
+
+
+def _counter(name: str) -> Callable[[str], int]:
+    if name == "whitespace":
+        return lambda text: len(text.split())
+    from src.agent.tokenization import TokenBudgetManager
+    return TokenBudgetManager().count_tokens
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chat SSE emission benchmark")
+    parser.add_argument("--chunks", type=int, default=4000, help="Model chunks per response")
+    parser.add_argument("--responses", type=int, default=20)
+    parser.add_argument("--interval-ms", type=float, default=0.0, help="Delay between model chunks")
+    parser.add_argument("--tokenizer", choices=["tiktoken", "whitespace"], default="tiktoken")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks, random.Random(args.seed))
+    count = _counter(args.tokenizer)
+    interval = args.interval_ms / 1000
+
+    print(f"{len(chunks)} chunks x {args.responses} responses, interval {args.interval_ms}ms")
+    for name, mode in (("per_chunk", per_chunk), ("coalesced", coalesced)):
+        result = run(mode, chunks, count, interval, args.responses)
+        print(f"{name:<10} " + "  ".join(f"{k}={v}" for k, v in result.items()))
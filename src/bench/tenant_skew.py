@@ -0,0 +1,215 @@
+"""
+Benchmark: global HNSW graph vs per-tenant graphs under a skewed tenant mix.
+
+Loads the same synthetic corpus into two scratch collections:
+- ``global``: default HNSW (m=16) with a plain keyword index on tenant_id
+- ``per_tenant``: m=0, payload_m=16, ``is_tenant`` keyword index
+
+Tenants follow a Zipf distribution, so a few tenants own most points and
+a long tail owns a handful each. Every query is tenant-filtered (as the
+query engine requires); latency and recall@k against an exact search are
+reported per tenant-size bucket.
+
+Usage:
+    python -m src.bench.tenant_skew --points 50000 --tenants 300
+    python -m src.bench.tenant_skew --url :memory: --points 2000   # smoke run
+"""
+
+import argparse
+import os
+import random
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Sequence
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from src.services.qdrant_schema import TENANT_INDEX, tenant_condition, tenant_hnsw_config
+
+TENANT_FIELD = "tenant_id"
+UPSERT_BATCH = 1000
+
+
+def zipf_weights(n_tenants: int, s: float) -> List[float]:
+    """Unnormalized Zipf weights for tenant ranks 1..n."""
+    return [1.0 / (rank ** s) for rank in range(1, n_tenants + 1)]
+
+
+def assign_tenants(n_points: int, n_tenants: int, s: float, rng: random.Random) -> List[str]:
+    """Draw a tenant for every point from a Zipf(s) distribution."""
+    tenants = [f"tenant-{i:04d}" for i in range(n_tenants)]
+    return rng.choices(tenants, weights=zipf_weights(n_tenants, s), k=n_points)
+
+
+def bucket_tenants(counts: Dict[str, int]) -> Dict[str, List[str]]:
+    """Split tenants into large (top 1%), medium and small (bottom 50%) by size."""
+    ranked = [t for t, _ in sorted(counts.items(), key=lambda kv: -kv[1])]
+    n = len(ranked)
+    top = max(1, n // 100)
+    half = n // 2
+    return {
+        "large": ranked[:top],
+        "medium": ranked[top:half] or ranked[:top],
+        "small": ranked[half:] or ranked[-1:],
+    }
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _random_vector(dim: int, rng: random.Random) -> List[float]:
+    return [rng.gauss(0.0, 1.0) for _ in range(dim)]
+
+
+def _create(client: QdrantClient, name: str, dim: int, per_tenant: bool, payload_m: int) -> None:
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(
+        collection_name=name,
+        vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE),
+        hnsw_config=tenant_hnsw_config(payload_m) if per_tenant else models.HnswConfigDiff(m=16),
+    )
+    client.create_payload_index(
+        collection_name=name,
+        field_name=TENANT_FIELD,
+        field_schema=TENANT_INDEX if per_tenant else models.PayloadSchemaType.KEYWORD,
+    )
+
+
+def _wait_indexed(client: QdrantClient, name: str, timeout: float = 600.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if client.get_collection(name).status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(1.0)
+
+
+def run(
+    url: str,
+    n_points: int,
+    n_tenants: int,
+    zipf_s: float,
+    dim: int,
+    queries_per_bucket: int,
+    top_k: int,
+    payload_m: int,
+    seed: int,
+    keep: bool,
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    rng = random.Random(seed)
+    if url == ":memory:":
+        client = QdrantClient(location=":memory:")
+    else:
+        client = QdrantClient(url=url, api_key=os.getenv("QDRANT_API_KEY"), timeout=120)
+
+    run_id = uuid.uuid4().hex[:8]
+    collections = {
+        "global": f"bench_tenant_global_{run_id}",
+        "per_tenant": f"bench_tenant_partitioned_{run_id}",
+    }
+    for layout, name in collections.items():
+        _create(client, name, dim, per_tenant=(layout == "per_tenant"), payload_m=payload_m)
+
+    tenants = assign_tenants(n_points, n_tenants, zipf_s, rng)
+    counts = Counter(tenants)
+    print(f"Loading {n_points} points across {len(counts)} tenants "
+          f"(largest={counts.most_common(1)[0][1]}, smallest={min(counts.values())})")
+
+    for start in range(0, n_points, UPSERT_BATCH):
+        batch = [
+            models.PointStruct(
+                id=start + i,
+                vector=_random_vector(dim, rng),
+                payload={TENANT_FIELD: tenants[start + i]},
+            )
+            for i in range(min(UPSERT_BATCH, n_points - start))
+        ]
+        for name in collections.values():
+            client.upsert(collection_name=name, points=batch, wait=False)
+
+    for name in collections.values():
+        _wait_indexed(client, name)
+
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for bucket, members in bucket_tenants(counts).items():
+        picks = [rng.choice(members) for _ in range(queries_per_bucket)]
+        probes = [_random_vector(dim, rng) for _ in picks]
+        results[bucket] = {}
+
+        for layout, name in collections.items():
+            latencies, recalls = [], []
+            for tenant, vector in zip(picks, probes):
+                query_filter = models.Filter(must=[tenant_condition(TENANT_FIELD, tenant)])
+
+                start = time.perf_counter()
+                approx = client.query_points(
+                    collection_name=name, query=vector, query_filter=query_filter,
+                    limit=top_k, with_payload=False,
+                ).points
+                latencies.append((time.perf_counter() - start) * 1000)
+
+                exact = client.query_points(
+                    collection_name=name, query=vector, query_filter=query_filter,
+                    limit=top_k, with_payload=False,
+                    search_params=models.SearchParams(exact=True),
+                ).points
+                truth = {p.id for p in exact}
+                if truth:
+                    recalls.append(len(truth & {p.id for p in approx}) / len(truth))
+
+            results[bucket][layout] = {
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+                f"recall@{top_k}": sum(recalls) / len(recalls) if recalls else 0.0,
+            }
+
+    if not keep:
+        for name in collections.values():
+            client.delete_collection(name)
+
+    return results
+
+
+def print_report(results: Dict[str, Dict[str, Dict[str, float]]]) -> None:
+    print(f"\n{'bucket':<8} {'layout':<11} {'p50 ms':>8} {'p95 ms':>8} {'recall':>8}")
+    for bucket, layouts in results.items():
+        for layout, stats in layouts.items():
+            recall = next(v for k, v in stats.items() if k.startswith("recall"))
+            print(f"{bucket:<8} {layout:<11} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {recall:>8.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-tenant HNSW vs global graph benchmark")
+    parser.add_argument("--url", default=os.getenv("QDRANT_URL", "http://localhost:6333"),
+                        help="Qdrant URL, or :memory: for a local smoke run")
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument("--tenants", type=int, default=300)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent (higher = more skew)")
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=100, help="Queries per tenant-size bucket")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--payload-m", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="Keep scratch collections")
+    args = parser.parse_args()
+
+    report = run(
+        url=args.url,
+        n_points=args.points,
+        n_tenants=args.tenants,
+        zipf_s=args.zipf,
+        dim=args.dim,
+        queries_per_bucket=args.queries,
+        top_k=args.top_k,
+        payload_m=args.payload_m,
+        seed=args.seed,
+        keep=args.keep,
+    )
+    print_report(report)
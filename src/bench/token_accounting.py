@@ -0,0 +1,161 @@
+"""
+Benchmark: token accounting over a long conversation.
+
+Replays a ``--messages`` long conversation (default 200) one turn at a
+time. Each turn is a request: a fresh manager (as get_token_manager /
+reset_token_manager do) counts the system prompt plus the full history
+once per agent phase, then the answer is streamed in small chunks.
+
+- ``baseline``: the original path; the encoding is built per manager and
+  every message is re-encoded on every count
+- ``cached``: TokenBudgetManager with the process-wide encoding and the
+  memoized per-message counts
+
+Reports milliseconds per turn (history counting and streamed answer),
+texts encoded, and the byte-length estimator's error against the exact
+count of each answer.
+
+Usage:
+    python -m src.bench.token_accounting
+    python -m src.bench.token_accounting --messages 200 --phases 3 --tokenizer whitespace
+"""
+
+import argparse
+import random
+import time
+import uuid
+from typing import Dict, List
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from src.agent import tokenization
+from src.agent.tokenization import IncrementalTokenCounter, TokenBudgetManager
+
+WORDS = (
+    "the checkout service returned 503 errors after revision 42 because the "
+    "connection pool to cloud sql was exhausted and retries amplified load "
+    "severity=ERROR trace_id=4bf92f35 latency_ms=2300 {\"region\": \"us-central1\"}"
+).split()
+SYSTEM_PROMPT = " ".join(WORDS * 60)
+
+
+def make_text(n_words: int, rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n_words))
+
+
+def make_conversation(n_messages: int, rng: random.Random) -> List[BaseMessage]:
+    """Alternating questions and long answers, with ids as the graph assigns them."""
+    messages: List[BaseMessage] = []
+    for i in range(n_messages):
+        if i % 2 == 0:
+            messages.append(HumanMessage(content=make_text(rng.randint(10, 40), rng), id=str(uuid.uuid4())))
+        else:
+            messages.append(AIMessage(content=make_text(rng.randint(150, 400), rng), id=str(uuid.uuid4())))
+    return messages
+
+
+def chunk(text: str, rng: random.Random) -> List[str]:
+    chunks, i = [], 0
+    while i < len(text):
+        step = rng.randint(1, 8)
+        chunks.append(text[i:i + step])
+        i += step
+    return chunks
+
+
+class CountingEncoding:
+    """Wraps an encoding to count encode calls."""
+
+    def __init__(self, encoding):
+        self._encoding = encoding
+        self.name = encoding.name
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        return self._encoding.encode(text)
+
+
+def baseline_count(encoding, messages: List[BaseMessage]) -> int:
+    return sum(len(encoding.encode(str(m.content))) + 4 for m in messages)
+
+
+def encoding_count(encoding):
+    return lambda text: len(encoding.encode(text))
+
+
+def new_baseline_encoding(model: str):
+    """What TokenBudgetManager.__init__ did per request before the process-wide cache."""
+    if tokenization.tiktoken is None:
+        return tokenization._FallbackEncoding()
+    try:
+        return tokenization.tiktoken.encoding_for_model(model)
+    except Exception:
+        return tokenization.tiktoken.get_encoding("cl100k_base")
+
+
+def run(mode: str, conversation: List[BaseMessage], phases: int, rng: random.Random) -> Dict:
+    system = SystemMessage(content=SYSTEM_PROMPT)
+    count_s = stream_s = 0.0
+    encodes = 0
+    errors: List[float] = []
+
+    tokenization._message_tokens.clear()
+    turns = range(2, len(conversation) + 1, 2)
+    for end in turns:
+        history, answer = conversation[:end - 1], conversation[end - 1]
+
+        start = time.process_time()
+        if mode == "baseline":
+            encoding = CountingEncoding(new_baseline_encoding("gpt-4"))
+            for _ in range(phases):
+                baseline_count(encoding, [system] + history)
+        else:
+            manager = TokenBudgetManager()
+            encoding = manager.encoding = CountingEncoding(manager.encoding)
+            for _ in range(phases):
+                manager.count_messages([system] + history)
+        count_s += time.process_time() - start
+
+        chunks = chunk(answer.content, rng)
+        start = time.process_time()
+        if mode == "baseline":
+            counter = IncrementalTokenCounter(encoding_count(encoding))
+        else:
+            counter = IncrementalTokenCounter(manager.count_tokens, estimate_fn=manager.estimate_tokens)
+        for piece in chunks:
+            counter.add(piece)
+        exact = counter.total()
+        stream_s += time.process_time() - start
+        encodes += encoding.calls
+
+        if mode != "baseline" and exact:
+            errors.append(abs(counter.estimated - exact) / exact)
+
+    result = {
+        "count_ms_per_turn": round(1000 * count_s / len(turns), 3),
+        "stream_ms_per_turn": round(1000 * stream_s / len(turns), 3),
+        "encodes": encodes,
+    }
+    if errors:
+        result["estimate_err_mean_pct"] = round(100 * sum(errors) / len(errors), 1)
+        result["estimate_err_max_pct"] = round(100 * max(errors), 1)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Token accounting benchmark")
+    parser.add_argument("--messages", type=int, default=200, help="Conversation length")
+    parser.add_argument("--phases", type=int, default=3, help="History counts per request (agent phases)")
+    parser.add_argument("--tokenizer", choices=["tiktoken", "whitespace"], default="tiktoken")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.tokenizer == "whitespace":
+        tokenization.tiktoken = None  # use _FallbackEncoding throughout
+
+    conversation = make_conversation(args.messages, random.Random(args.seed))
+    print(f"{args.messages} messages, {args.phases} phases per request, tokenizer={args.tokenizer}")
+    for mode in ("baseline", "cached"):
+        result = run(mode, conversation, args.phases, random.Random(args.seed + 1))
+        print(f"{mode:<9} " + "  ".join(f"{k}={v}" for k, v in result.items()))
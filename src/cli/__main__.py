@@ -3,12 +3,20 @@
 Usage:
     python -m src.cli provision-bq --dataset chat_analytics
     python -m src.cli provision-bq --dataset chat_analytics --dry-run
+    python -m src.cli provision-search-index --dry-run
 """
 
 import argparse
 import sys
 
-from src.cli.provision_bq import provision_chat_analytics, DEFAULT_DATASET, DEFAULT_PROJECT, DEFAULT_LOCATION
+from src.cli.provision_bq import (
+    provision_chat_analytics,
+    provision_log_search_index,
+    DEFAULT_DATASET,
+    DEFAULT_PROJECT,
+    DEFAULT_LOCATION,
+    LOGS_DATASET,
+)
 
 
 def main():
@@ -46,6 +54,27 @@ def main():
         help="Print what would be done without making changes",
     )
 
+    # provision-search-index command
+    search_index_parser = subparsers.add_parser(
+        "provision-search-index",
+        help="Create the master_logs full-text search index"
+    )
+    search_index_parser.add_argument(
+        "--dataset",
+        default=LOGS_DATASET,
+        help=f"Dataset holding master_logs (default: {LOGS_DATASET})",
+    )
+    search_index_parser.add_argument(
+        "--project",
+        default=DEFAULT_PROJECT,
+        help=f"GCP project ID (default: {DEFAULT_PROJECT})",
+    )
+    search_index_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print what would be done without making changes",
+    )
+
     args = parser.parse_args()
 
     if args.command == "provision-bq":
@@ -56,6 +85,13 @@ def main():
             dry_run=args.dry_run,
         )
         sys.exit(0 if success else 1)
+    elif args.command == "provision-search-index":
+        success = provision_log_search_index(
+            project_id=args.project,
+            dataset_id=args.dataset,
+            dry_run=args.dry_run,
+        )
+        sys.exit(0 if success else 1)
     else:
         parser.print_help()
         sys.exit(1)
@@ -6,6 +6,7 @@ and its tables for storing AI chat events and analytics.
 Usage:
     python -m src.cli provision-bq --dataset chat_analytics
     python -m src.cli provision-bq --dataset chat_analytics --dry-run
+    python -m src.cli provision-search-index --dry-run
 """
 
 import argparse
@@ -21,6 +22,12 @@ DEFAULT_LOCATION = os.getenv("BQ_LOCATION", "US")
 DEFAULT_DATASET = "chat_analytics"
 PARTITION_EXPIRATION_DAYS = 2555  # ~7 years
 
+# master_logs full-text search index (matches schemas/bigquery/master_logs.sql)
+LOGS_DATASET = "central_logging_v1"
+LOGS_TABLE = "master_logs"
+LOGS_SEARCH_INDEX = "master_logs_search_idx"
+LOGS_SEARCH_COLUMNS = ["message", "json_payload"]
+
 
 def get_chat_events_schema() -> list[bigquery.SchemaField]:
     """Get schema for chat_events table.
@@ -325,6 +332,83 @@ def create_views(
     return success
 
 
+def create_search_index(
+    client: bigquery.Client,
+    project_id: str,
+    dataset_id: str,
+    table_id: str,
+    index_name: str,
+    columns: list[str],
+    analyzer: str = "LOG_ANALYZER",
+    dry_run: bool = False,
+) -> bool:
+    """Create a search index so SEARCH() predicates can prune data.
+
+    Args:
+        client: BigQuery client
+        project_id: GCP project ID
+        dataset_id: Dataset name
+        table_id: Table to index
+        index_name: Search index name
+        columns: Columns to index (STRING or JSON)
+        analyzer: Text analyzer; must match the one SEARCH() uses
+        dry_run: If True, only print what would be done
+
+    Returns:
+        True if created or already exists, False on error
+    """
+    table_ref = f"{project_id}.{dataset_id}.{table_id}"
+    ddl = (
+        f"CREATE SEARCH INDEX IF NOT EXISTS {index_name}\n"
+        f"ON `{table_ref}`({', '.join(columns)})\n"
+        f"OPTIONS (analyzer = '{analyzer}')"
+    )
+
+    if dry_run:
+        print(f"[DRY RUN] Would create search index: {index_name} on {table_ref}")
+        print(f"  Columns: {', '.join(columns)}")
+        print(f"  Analyzer: {analyzer}")
+        return True
+
+    try:
+        client.query(ddl).result()
+        print(f"Created search index: {index_name} on {table_ref}")
+        return True
+    except Exception as e:
+        print(f"Error creating search index {index_name}: {e}")
+        return False
+
+
+def provision_log_search_index(
+    project_id: str = DEFAULT_PROJECT,
+    dataset_id: str = LOGS_DATASET,
+    dry_run: bool = False,
+) -> bool:
+    """Provision the master_logs search index on message/json_payload.
+
+    BigQuery builds the index asynchronously; until coverage reaches 100%
+    SEARCH() still returns correct results, just without the pruning.
+
+    Args:
+        project_id: GCP project ID
+        dataset_id: Dataset holding master_logs
+        dry_run: If True, only print what would be done
+
+    Returns:
+        True if the index was created or already exists
+    """
+    client = None if dry_run else bigquery.Client(project=project_id)
+    return create_search_index(
+        client,
+        project_id,
+        dataset_id,
+        LOGS_TABLE,
+        LOGS_SEARCH_INDEX,
+        LOGS_SEARCH_COLUMNS,
+        dry_run=dry_run,
+    )
+
+
 def provision_chat_analytics(
     project_id: str = DEFAULT_PROJECT,
     dataset_id: str = DEFAULT_DATASET,
@@ -14,6 +14,10 @@ from typing import Dict, List, Optional, Any
 from google.cloud import bigquery
 
 from src.etl.normalizer import NormalizedLog
+from src.etl.rollups import GRANULARITIES, aggregate_rollups, build_backfill_sql
+from src.services.hot_tier import hot_tier_store
+from src.services.log_broker import LOG_STREAM_KEY, LOG_STREAM_MAXLEN, encode_stream_row
+from src.services.redis_service import redis_service
 
 logger = logging.getLogger(__name__)
 
@@ -27,19 +31,33 @@ class LogLoader:
     - Deduplication by insert_id
     - ETL metadata tracking
     - Table schema management
+    - Minute/hour stats rollups maintained per batch
+    - Local hot tier fed per batch (when HOT_TIER_PATH is set)
+    - Loaded rows appended to the live log stream (GraphQL logStream)
     """
 
     MASTER_TABLE = "diatonic-ai-gcp.central_logging_v1.master_logs"
     ETL_JOBS_TABLE = "diatonic-ai-gcp.central_logging_v1.etl_jobs"
+    ROLLUP_TABLES = {
+        "minute": "diatonic-ai-gcp.central_logging_v1.log_rollups_minute",
+        "hour": "diatonic-ai-gcp.central_logging_v1.log_rollups_hour",
+    }
 
     def __init__(self, project_id: str = "diatonic-ai-gcp"):
         self.project_id = project_id
         self.client = bigquery.Client(project=project_id)
         self.etl_version = "1.0.0"
+        self.hot_tier = hot_tier_store
+        self.redis = redis_service
         self.stats = {
             "loaded": 0,
             "failed": 0,
             "duplicates": 0,
+            "rollup_rows": 0,
+            "rollup_failed": 0,
+            "hot_tier_rows": 0,
+            "hot_tier_failed": 0,
+            "live_stream_rows": 0,
         }
 
     def ensure_tables(self):
@@ -57,7 +75,12 @@ class LogLoader:
                 statements = [s.strip() for s in sql.split(";") if s.strip()]
 
                 for stmt in statements:
-                    if stmt and not stmt.startswith("--"):
+                    # Drop leading comment lines so commented statements still run
+                    lines = stmt.splitlines()
+                    while lines and lines[0].strip().startswith("--"):
+                        lines.pop(0)
+                    stmt = "\n".join(lines).strip()
+                    if stmt:
                         try:
                             self.client.query(stmt).result()
                         except Exception as e:
@@ -109,9 +132,17 @@ class LogLoader:
                 logger.error(f"Errors loading logs: {errors[:5]}")  # Show first 5
                 self.stats["failed"] += len(errors)
                 self.stats["loaded"] += len(rows) - len(errors)
+                failed = {e.get("index") for e in errors}
+                loaded_rows = [r for i, r in enumerate(rows) if i not in failed]
+                self._load_rollups(loaded_rows, batch_id)
+                self._load_hot_tier(loaded_rows, batch_id)
+                self._publish_live(loaded_rows)
                 return len(rows) - len(errors)
 
             self.stats["loaded"] += len(rows)
+            self._load_rollups(rows, batch_id)
+            self._load_hot_tier(rows, batch_id)
+            self._publish_live(rows)
             logger.info(f"Loaded {len(rows)} logs (batch: {batch_id})")
             return len(rows)
 
@@ -120,6 +151,75 @@ class LogLoader:
             self.stats["failed"] += len(logs)
             return 0
 
+    def _load_rollups(self, rows: List[Dict], batch_id: str) -> None:
+        """
+        Append minute/hour rollups for rows that made it into master_logs.
+
+        A failure here never fails the load; rollups for affected dates can be
+        rebuilt with backfill_rollups().
+        """
+        if not rows:
+            return
+
+        for granularity in GRANULARITIES:
+            rollups = aggregate_rollups(rows, granularity, batch_id)
+            try:
+                errors = self.client.insert_rows_json(
+                    self.ROLLUP_TABLES[granularity],
+                    rollups,
+                    row_ids=[r["rollup_id"] for r in rollups]
+                )
+                if errors:
+                    logger.warning(f"Errors loading {granularity} rollups: {errors[:5]}")
+                    self.stats["rollup_failed"] += len(errors)
+                self.stats["rollup_rows"] += len(rollups) - len(errors or [])
+            except Exception as e:
+                logger.warning(f"Error loading {granularity} rollups (batch: {batch_id}): {e}")
+                self.stats["rollup_failed"] += len(rollups)
+
+    def _load_hot_tier(self, rows: List[Dict], batch_id: str) -> None:
+        """
+        Mirror rows that made it into master_logs into the local hot tier.
+
+        A failure here never fails the load; the tier's coverage restarts
+        so readers fall back to BigQuery for the rows it is missing.
+        """
+        if not rows or not self.hot_tier.enabled:
+            return
+
+        try:
+            self.stats["hot_tier_rows"] += self.hot_tier.ingest(rows)
+        except Exception as e:
+            logger.error(f"Error loading hot tier (batch: {batch_id}): {e}")
+            self.stats["hot_tier_failed"] += len(rows)
+            try:
+                self.hot_tier.restart_coverage()
+            except Exception as reset_error:
+                logger.error(f"Could not restart hot tier coverage: {reset_error}")
+
+    def _publish_live(self, rows: List[Dict]) -> None:
+        """Append loaded rows to the capped live stream tailed by API instances."""
+        if not rows:
+            return
+        self.stats["live_stream_rows"] += self.redis.stream_add_many(
+            LOG_STREAM_KEY, [encode_stream_row(r) for r in rows], maxlen=LOG_STREAM_MAXLEN
+        )
+
+    def backfill_rollups(self, start_date: str, end_date: str) -> None:
+        """
+        Rebuild minute/hour rollups for a date range from master_logs.
+
+        Args:
+            start_date: First log_date (YYYY-MM-DD)
+            end_date: Last log_date (YYYY-MM-DD), inclusive
+        """
+        for granularity in GRANULARITIES:
+            for sql in build_backfill_sql(
+                self.ROLLUP_TABLES[granularity], self.MASTER_TABLE, granularity, start_date, end_date
+            ):
+                self.client.query(sql).result()
+            logger.info(f"Backfilled {granularity} rollups for {start_date}..{end_date}")
+
     def load_batch(
         self,
         logs: List[NormalizedLog],
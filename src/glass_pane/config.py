@@ -7,7 +7,8 @@ This module is used by the unified FastAPI Cloud Run service.
 
 import os
 from dataclasses import dataclass, field
-from typing import List
+from datetime import datetime, timezone
+from typing import List, Optional
 
 
 def _get_logs_project_id() -> str:
@@ -19,6 +20,16 @@ def _get_logs_project_id() -> str:
   )
 
 
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+  if not value:
+    return None
+  # Naive UTC, to compare with datetime.utcnow()
+  ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+  if ts.tzinfo is not None:
+    ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+  return ts
+
+
 @dataclass
 class GlassPaneConfig:
   # GCP / BigQuery
@@ -35,6 +46,8 @@ class GlassPaneConfig:
   # Query limits
   default_limit: int = field(default_factory=lambda: int(os.environ.get("DEFAULT_LIMIT", "100")))
   max_limit: int = field(default_factory=lambda: int(os.environ.get("MAX_LIMIT", "250")))
+  # Row cap for streamed (NDJSON) log responses
+  max_stream_limit: int = field(default_factory=lambda: int(os.environ.get("MAX_STREAM_LIMIT", "10000")))
   default_time_window_hours: int = field(
     default_factory=lambda: int(os.environ.get("DEFAULT_TIME_WINDOW_HOURS", "24"))
   )
@@ -42,6 +55,15 @@ class GlassPaneConfig:
     default_factory=lambda: int(os.environ.get("MAX_TIME_WINDOW_HOURS", "168"))
   )
 
+  # Stats rollups: ISO timestamp (UTC) from which the ETL loader has maintained
+  # log_rollups_minute/hour, e.g. "2026-10-01T00:00:00". Unset = raw scans only.
+  rollups_since: Optional[datetime] = field(
+    default_factory=lambda: _parse_timestamp(os.environ.get("ROLLUPS_SINCE"))
+  )
+
+  # Text search: "auto" (SEARCH() for plain-word terms), "search" or "like"
+  search_mode: str = field(default_factory=lambda: os.environ.get("LOG_SEARCH_MODE", "auto"))
+
   # Server
   port: int = field(default_factory=lambda: int(os.environ.get("PORT", "8080")))
 
@@ -60,6 +82,9 @@ class GlassPaneConfig:
     if self.default_time_window_hours > self.max_time_window_hours:
       errors.append("DEFAULT_TIME_WINDOW_HOURS cannot exceed MAX_TIME_WINDOW_HOURS")
 
+    if self.search_mode not in ("auto", "search", "like"):
+      errors.append("LOG_SEARCH_MODE must be one of auto, search, like")
+
     return errors
 
   @property
@@ -1,8 +1,15 @@
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from src.services.qdrant_service import qdrant_service
+from src.services.qdrant_schema import (
+    TENANT_INDEX,
+    TIMESTAMP_EPOCH_FIELD,
+    TIMESTAMP_EPOCH_INDEX,
+    apply_tenant_layout,
+    collection_hnsw_config,
+)
 
 logger = logging.getLogger("qdrant_manager")
 
@@ -15,33 +22,41 @@ class QdrantManager:
     SCHEMAS = {
         "conversation_history": {
             "vectors_config": models.VectorParams(size=768, distance=models.Distance.COSINE),
+            "tenant_field": "group_id",
+            "hnsw_config": collection_hnsw_config(),
             "sparse_vectors_config": {"text": models.SparseVectorParams()},
             "payload_indexes": [
-                {"field_name": "group_id", "schema": models.PayloadSchemaType.KEYWORD},
+                {"field_name": "group_id", "schema": TENANT_INDEX},
                 {"field_name": "session_id", "schema": models.PayloadSchemaType.KEYWORD},
                 {"field_name": "role", "schema": models.PayloadSchemaType.KEYWORD},
                 {"field_name": "timestamp.year", "schema": models.PayloadSchemaType.INTEGER},
                 {"field_name": "timestamp.month", "schema": models.PayloadSchemaType.INTEGER},
                 {"field_name": "timestamp.day", "schema": models.PayloadSchemaType.INTEGER},
                 {"field_name": "timestamp.hour", "schema": models.PayloadSchemaType.INTEGER},
+                {"field_name": TIMESTAMP_EPOCH_FIELD, "schema": TIMESTAMP_EPOCH_INDEX},
             ]
         },
         "repo_index": {
             "vectors_config": models.VectorParams(size=768, distance=models.Distance.COSINE),
+            "tenant_field": "group_id",
+            "hnsw_config": collection_hnsw_config(),
             "sparse_vectors_config": {"text": models.SparseVectorParams()},
             "payload_indexes": [
-                {"field_name": "group_id", "schema": models.PayloadSchemaType.KEYWORD},
+                {"field_name": "group_id", "schema": TENANT_INDEX},
                 {"field_name": "file_path", "schema": models.PayloadSchemaType.KEYWORD},
                 {"field_name": "commit_hash", "schema": models.PayloadSchemaType.KEYWORD},
             ]
         },
         "app_logs": {
             "vectors_config": models.VectorParams(size=768, distance=models.Distance.COSINE),
+            "tenant_field": "group_id",
+            "hnsw_config": collection_hnsw_config(),
             "payload_indexes": [
-                {"field_name": "group_id", "schema": models.PayloadSchemaType.KEYWORD},
+                {"field_name": "group_id", "schema": TENANT_INDEX},
                 {"field_name": "service", "schema": models.PayloadSchemaType.KEYWORD},
                 {"field_name": "severity", "schema": models.PayloadSchemaType.KEYWORD},
                 {"field_name": "timestamp_iso", "schema": models.PayloadSchemaType.KEYWORD}, 
+                {"field_name": TIMESTAMP_EPOCH_FIELD, "schema": TIMESTAMP_EPOCH_INDEX},
             ]
         }
     }
@@ -74,7 +89,8 @@ class QdrantManager:
                     self.client.create_collection(
                         collection_name=name,
                         vectors_config=schema["vectors_config"],
-                        sparse_vectors_config=schema.get("sparse_vectors_config")
+                        sparse_vectors_config=schema.get("sparse_vectors_config"),
+                        hnsw_config=schema.get("hnsw_config"),
                     )
                     report["created"].append(name)
                 except Exception as e:
@@ -85,6 +101,10 @@ class QdrantManager:
                 report["checked"].append(name)
                 # TODO: In a more advanced version, check vector params match. 
                 # Qdrant doesn't easily allow updating vector config on existing collections without recreation.
+                # Switching to per-tenant graphs rebuilds the HNSW index, so repair only
+                # reports it; migrate_tenant_layout() does it on request.
+                if schema.get("tenant_field") and self._has_global_graph(name):
+                    report.setdefault("tenant_layout_pending", []).append(name)
 
             # Ensure Payload Indexes
             for index_def in schema["payload_indexes"]:
@@ -101,4 +121,45 @@ class QdrantManager:
 
         return report
 
+    def migrate_tenant_layout(
+        self,
+        names: Optional[List[str]] = None,
+        tenant_field: Optional[str] = None,
+        dry_run: bool = False,
+    ) -> Dict[str, Any]:
+        """One-time switch of existing collections to per-tenant HNSW graphs.
+
+        Qdrant rebuilds each collection's HNSW index afterwards, and the
+        collection no longer has a global graph: only run this once every
+        search against it carries a tenant filter.
+
+        Args:
+            names: Collections to migrate (default: every tenant-scoped schema)
+            tenant_field: Tenant field of collections without a schema here (e.g. logs_v1)
+            dry_run: Report what would change without updating anything
+
+        Returns:
+            Report with the collections migrated, skipped and failed
+        """
+        report = {"status": "success", "migrated": [], "skipped": [], "failed": []}
+        for name in names or [n for n, s in self.SCHEMAS.items() if s.get("tenant_field")]:
+            field = self.SCHEMAS.get(name, {}).get("tenant_field") or tenant_field
+            if not field or not self._has_global_graph(name):
+                report["skipped"].append(name)
+                continue
+            if dry_run or apply_tenant_layout(self.client, name, field):
+                report["migrated"].append(name)
+            else:
+                report["failed"].append(name)
+                report["status"] = "partial_failure"
+        return report
+
+    def _has_global_graph(self, name: str) -> bool:
+        """Whether a collection still builds the global HNSW graph (m > 0)."""
+        try:
+            return self.client.get_collection(name).config.hnsw_config.m != 0
+        except Exception as e:
+            logger.warning(f"Could not inspect HNSW config for {name}: {e}")
+            return False
+
 qdrant_manager = QdrantManager()
@@ -4,11 +4,83 @@ Query builder module for canonical log queries.
 Provides type-safe, parameterized query construction over the canonical view.
 """
 
+import base64
+import json
+import re
 from dataclasses import dataclass
-from typing import Optional, List, Dict, Any
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Tuple
 
 from google.cloud import bigquery
 
+from src.services.hot_tier import HOT_TABLE, format_timestamp
+
+
+ERROR_SEVERITIES = ("ERROR", "CRITICAL", "ALERT", "EMERGENCY")
+
+# Rollup tables maintained by src.etl.loader.LogLoader (see master_logs.sql)
+ROLLUP_MINUTE_TABLE = "log_rollups_minute"
+ROLLUP_HOUR_TABLE = "log_rollups_hour"
+
+# Window boundaries, computed inside BigQuery so the SQL text (and any cache
+# key derived from it) only depends on @hours. With an integer-hour window:
+#   raw     [start, start_min) + [end_min, now]
+#   minute  [start_min, start_hour) + [end_hour, end_min)
+#   hour    [start_hour, end_hour)
+_WINDOW_START = "TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @hours HOUR)"
+_START_MINUTE = f"TIMESTAMP_ADD(TIMESTAMP_TRUNC({_WINDOW_START}, MINUTE), INTERVAL 1 MINUTE)"
+_START_HOUR = f"TIMESTAMP_ADD(TIMESTAMP_TRUNC({_WINDOW_START}, HOUR), INTERVAL 1 HOUR)"
+_END_MINUTE = "TIMESTAMP_TRUNC(CURRENT_TIMESTAMP(), MINUTE)"
+_END_HOUR = "TIMESTAMP_TRUNC(CURRENT_TIMESTAMP(), HOUR)"
+
+# Text search. master_logs has a LOG_ANALYZER search index on (message,
+# json_payload) (see master_logs.sql), which SEARCH() uses to skip data. A
+# term of plain alphanumeric words becomes SEARCH(): every word must appear
+# as a whole token, case-insensitively. Anything else (punctuation, partial
+# words like "conn*", quoted phrases) keeps substring LIKE semantics.
+SEARCH_COLUMNS = ("message", "json_payload")
+_LIKE_EXPRESSIONS = {"json_payload": "CAST(json_payload AS STRING)"}
+_SEARCHABLE_TERM = re.compile(r"^[A-Za-z0-9]+(?:\s+[A-Za-z0-9]+)*$")
+
+
+def is_search_tokenizable(term: str) -> bool:
+  """Whether SEARCH() matches the same rows a user expects from `term`."""
+  return bool(_SEARCHABLE_TERM.match(term.strip()))
+
+
+def text_search_clause(
+  term: str,
+  param: str = "search",
+  columns: Tuple[str, ...] = SEARCH_COLUMNS,
+  mode: str = "auto",
+) -> Tuple[str, str]:
+  """
+  SQL predicate and parameter value for a text search over `columns`.
+
+  Args:
+    term: User search term
+    param: Query parameter name to bind the value to
+    columns: Columns to search
+    mode: "auto" (SEARCH when tokenizable), "search" or "like"
+
+  Returns:
+    (predicate, parameter value)
+  """
+  if mode == "search" or (mode == "auto" and is_search_tokenizable(term)):
+    predicate = " OR ".join(f"SEARCH({col}, @{param})" for col in columns)
+    return f"({predicate})", " ".join(term.split())
+
+  predicate = " OR ".join(
+    f"LOWER({_LIKE_EXPRESSIONS.get(col, col)}) LIKE @{param}" for col in columns
+  )
+  return f"({predicate})", _like_value(term)
+
+
+def _like_value(term: str) -> str:
+  """Case-folded substring LIKE pattern with backslash-escaped wildcards."""
+  escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+  return f"%{escaped.lower()}%"
+
 
 VALID_SEVERITIES = [
   "DEFAULT",
@@ -23,6 +95,24 @@ VALID_SEVERITIES = [
 ]
 
 
+def encode_cursor(event_timestamp: Any, log_id: str) -> str:
+  """Opaque keyset cursor for the row after which the next page starts."""
+  if isinstance(event_timestamp, datetime):
+    event_timestamp = event_timestamp.isoformat()
+  raw = json.dumps({"ts": event_timestamp, "id": log_id}, separators=(",", ":"))
+  return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+  """Inverse of encode_cursor. Raises ValueError for malformed cursors."""
+  try:
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    data = json.loads(raw)
+    return datetime.fromisoformat(data["ts"].replace("Z", "+00:00")), str(data["id"])
+  except (ValueError, KeyError, TypeError, AttributeError) as e:
+    raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
 @dataclass
 class LogQueryParams:
   """Parameters for log query."""
@@ -33,6 +123,8 @@ class LogQueryParams:
   service: Optional[str] = None
   search: Optional[str] = None
   source_table: Optional[str] = None
+  # Keyset cursor from a previous page (see encode_cursor)
+  cursor: Optional[str] = None
 
   def validate(self, max_limit: int = 1000, max_hours: int = 168) -> List[str]:
     errors: List[str] = []
@@ -50,6 +142,12 @@ class LogQueryParams:
     if self.severity and self.severity.upper() not in VALID_SEVERITIES:
       errors.append(f"Invalid severity: {self.severity}")
 
+    if self.cursor:
+      try:
+        decode_cursor(self.cursor)
+      except ValueError:
+        errors.append("Invalid cursor")
+
     return errors
 
 
@@ -91,22 +189,130 @@ class CanonicalQueryBuilder:
     self,
     project_id: str,
     view_name: str = "central_logging_v1.master_logs",
-    include_envelope: bool = False
+    include_envelope: bool = False,
+    rollups_since: Optional[datetime] = None,
+    search_mode: str = "auto",
+    hot_tier: Optional[Any] = None,
   ):
+    """
+    Args:
+      project_id: GCP project holding the log tables
+      view_name: "dataset.table" of the raw log table
+      include_envelope: Always add Universal Envelope fields to list queries
+      rollups_since: When the loader started maintaining rollups (UTC). Stats
+        windows starting at or after this are answered from rollups; None
+        disables rollups and every stats query scans raw logs.
+      search_mode: How `search` filters are emitted ("auto", "search" or "like",
+        see text_search_clause)
+      hot_tier: Local store of recent rows (src.services.hot_tier.HotTierStore);
+        None routes everything to BigQuery
+    """
     self.project_id = project_id
     self.view_name = view_name
     self.full_view = f"{project_id}.{view_name}"
     self.include_envelope = include_envelope
+    self.rollups_since = rollups_since
+    self.search_mode = search_mode
+    self.hot_tier = hot_tier
+
+    dataset = view_name.rsplit(".", 1)[0] if "." in view_name else view_name
+    self.rollup_minute_table = f"{project_id}.{dataset}.{ROLLUP_MINUTE_TABLE}"
+    self.rollup_hour_table = f"{project_id}.{dataset}.{ROLLUP_HOUR_TABLE}"
+
+  def hot_boundary(self, use_envelope: bool = False) -> Optional[datetime]:
+    """Naive-UTC time from which the hot tier holds every row, or None.
 
-  def build_list_query(self, params: LogQueryParams, use_envelope: bool = False) -> Dict[str, Any]:
-    from datetime import datetime, timedelta
+    Envelope fields come from the canonical view, which the hot tier does
+    not mirror, so envelope queries always go to BigQuery.
+    """
+    if self.hot_tier is None or use_envelope or self.include_envelope:
+      return None
+    return self.hot_tier.coverage_start()
+
+  def hot_covers(self, hours: int, use_envelope: bool = False) -> bool:
+    """Whether a window of `hours` lies entirely inside the hot tier."""
+    boundary = self.hot_boundary(use_envelope)
+    return boundary is not None and datetime.utcnow() - timedelta(hours=hours) >= boundary
+
+  def uses_rollups(self, hours: int) -> bool:
+    """Whether a stats window of `hours` can be answered from rollups."""
+    if self.rollups_since is None:
+      return False
+    return datetime.utcnow() - timedelta(hours=hours) >= self.rollups_since
+
+  def _stats_source(self, dims: List[str], hours: int) -> str:
+    """Subquery yielding `dims`, log_count, first_ts, last_ts over the window.
+
+    Raw logs are grouped directly when rollups don't cover the window;
+    otherwise rollups cover every whole minute/hour and raw logs only the
+    sub-minute edges.
+    """
+    group = ", ".join(dims)
+    start_date = (datetime.utcnow() - timedelta(hours=hours)).strftime("%Y-%m-%d")
+    end_date = datetime.utcnow().strftime("%Y-%m-%d")
+    use_rollups = self.uses_rollups(hours)
 
+    # With rollups only the edge days hold raw rows we still need
+    if use_rollups:
+      partition_filter = f"log_date IN ('{start_date}', '{end_date}')"
+    else:
+      partition_filter = f"log_date BETWEEN '{start_date}' AND '{end_date}'"
+    raw_select = f"""
+        SELECT {group}, COUNT(*) AS log_count,
+          MIN(event_timestamp) AS first_ts, MAX(event_timestamp) AS last_ts
+        FROM `{self.full_view}`
+        WHERE {partition_filter}"""
+
+    if not use_rollups:
+      return f"""({raw_select}
+          AND event_timestamp >= {_WINDOW_START}
+        GROUP BY {group}
+      )"""
+
+    def rollup_select(table: str, where: str) -> str:
+      return f"""
+        SELECT {group}, SUM(log_count) AS log_count,
+          MIN(first_event_ts) AS first_ts, MAX(last_event_ts) AS last_ts
+        FROM `{table}`
+        WHERE {where}
+        GROUP BY {group}"""
+
+    hour_where = f"bucket_ts >= {_START_HOUR} AND bucket_ts < {_END_HOUR}"
+    minute_where = (
+      f"((bucket_ts >= {_START_MINUTE} AND bucket_ts < {_START_HOUR})"
+      f" OR (bucket_ts >= {_END_HOUR} AND bucket_ts < {_END_MINUTE}))"
+    )
+    return f"""({raw_select}
+          AND ((event_timestamp >= {_WINDOW_START} AND event_timestamp < {_START_MINUTE})
+            OR event_timestamp >= {_END_MINUTE})
+        GROUP BY {group}
+        UNION ALL{rollup_select(self.rollup_minute_table, minute_where)}
+        UNION ALL{rollup_select(self.rollup_hour_table, hour_where)}
+      )"""
+
+  def build_list_query(
+    self,
+    params: LogQueryParams,
+    use_envelope: bool = False,
+    prefetch_pages: int = 1,
+    before: Optional[datetime] = None,
+  ) -> Dict[str, Any]:
+    """Newest-first log rows, keyset-paginated on (event_timestamp, log_id).
+
+    Args:
+      params: Filters, page size (limit) and optional cursor
+      use_envelope: Query the canonical view and add envelope fields
+      prefetch_pages: Let the job return this many pages of rows so later
+        pages can be read from its destination table without a new query
+      before: Only rows older than this (naive UTC), i.e. the part of the
+        window the hot tier does not cover
+    """
     bq_params = []
     where_clauses = []
 
     # Partition filter for performance (master_logs is partitioned by log_date)
     start_date = (datetime.utcnow() - timedelta(hours=params.hours)).strftime("%Y-%m-%d")
-    end_date = datetime.utcnow().strftime("%Y-%m-%d")
+    end_date = (before or datetime.utcnow()).strftime("%Y-%m-%d")
     where_clauses.append(f"log_date BETWEEN '{start_date}' AND '{end_date}'")
 
     # Time window filter
@@ -115,6 +321,10 @@ class CanonicalQueryBuilder:
     )
     bq_params.append(bigquery.ScalarQueryParameter("hours", "INT64", params.hours))
 
+    if before is not None:
+      where_clauses.append("event_timestamp < @hot_boundary")
+      bq_params.append(bigquery.ScalarQueryParameter("hot_boundary", "TIMESTAMP", before))
+
     if params.severity:
       where_clauses.append("severity = @severity")
       bq_params.append(
@@ -126,8 +336,9 @@ class CanonicalQueryBuilder:
       bq_params.append(bigquery.ScalarQueryParameter("service", "STRING", f"%{params.service}%"))
 
     if params.search:
-      where_clauses.append("(message LIKE @search OR CAST(json_payload AS STRING) LIKE @search)")
-      bq_params.append(bigquery.ScalarQueryParameter("search", "STRING", f"%{params.search}%"))
+      predicate, value = text_search_clause(params.search, mode=self.search_mode)
+      where_clauses.append(predicate)
+      bq_params.append(bigquery.ScalarQueryParameter("search", "STRING", value))
 
     if params.source_table:
       where_clauses.append("source_table = @source_table")
@@ -135,7 +346,17 @@ class CanonicalQueryBuilder:
         bigquery.ScalarQueryParameter("source_table", "STRING", params.source_table)
       )
 
-    bq_params.append(bigquery.ScalarQueryParameter("limit", "INT64", params.limit))
+    if params.cursor:
+      cursor_ts, cursor_id = decode_cursor(params.cursor)
+      where_clauses.append(
+        "(event_timestamp < @cursor_ts OR (event_timestamp = @cursor_ts AND log_id < @cursor_id))"
+      )
+      bq_params.append(bigquery.ScalarQueryParameter("cursor_ts", "TIMESTAMP", cursor_ts))
+      bq_params.append(bigquery.ScalarQueryParameter("cursor_id", "STRING", cursor_id))
+
+    bq_params.append(
+      bigquery.ScalarQueryParameter("limit", "INT64", params.limit * max(1, prefetch_pages))
+    )
 
     # Build field list - include envelope fields if requested
     fields_list = self.DISPLAY_FIELDS.copy()
@@ -155,24 +376,35 @@ class CanonicalQueryBuilder:
       SELECT {fields}
       FROM `{view}`
       WHERE {where}
-      ORDER BY event_timestamp DESC
+      ORDER BY event_timestamp DESC, log_id DESC
       LIMIT @limit
     """
 
     return {"sql": sql.strip(), "params": bq_params}
 
-  def build_count_by_severity_query(self, hours: int = 24) -> Dict[str, Any]:
-    from datetime import datetime, timedelta
+  def build_logs_by_id_query(self, log_ids: List[str], hours: int = 168) -> Dict[str, Any]:
+    """Rows for a batch of log ids, looked back `hours` (bounds the partitions scanned)."""
     start_date = (datetime.utcnow() - timedelta(hours=hours)).strftime("%Y-%m-%d")
     end_date = datetime.utcnow().strftime("%Y-%m-%d")
-
     sql = f"""
-      SELECT
-        severity,
-        COUNT(*) as count
+      SELECT {", ".join(self.DISPLAY_FIELDS)}
       FROM `{self.full_view}`
       WHERE log_date BETWEEN '{start_date}' AND '{end_date}'
         AND event_timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @hours HOUR)
+        AND log_id IN UNNEST(@log_ids)
+    """
+    params = [
+      bigquery.ScalarQueryParameter("hours", "INT64", hours),
+      bigquery.ArrayQueryParameter("log_ids", "STRING", sorted(set(log_ids))),
+    ]
+    return {"sql": sql.strip(), "params": params}
+
+  def build_count_by_severity_query(self, hours: int = 24) -> Dict[str, Any]:
+    sql = f"""
+      SELECT
+        severity,
+        SUM(log_count) as count
+      FROM {self._stats_source(["severity"], hours)}
       GROUP BY severity
       ORDER BY count DESC
     """
@@ -180,18 +412,14 @@ class CanonicalQueryBuilder:
     return {"sql": sql.strip(), "params": params}
 
   def build_count_by_service_query(self, hours: int = 24) -> Dict[str, Any]:
-    from datetime import datetime, timedelta
-    start_date = (datetime.utcnow() - timedelta(hours=hours)).strftime("%Y-%m-%d")
-    end_date = datetime.utcnow().strftime("%Y-%m-%d")
-
+    errors = ", ".join(f"'{s}'" for s in ERROR_SEVERITIES)
     sql = f"""
       SELECT
         service_name,
-        COUNT(*) as count,
-        COUNTIF(severity IN ('ERROR', 'CRITICAL', 'ALERT', 'EMERGENCY')) as error_count
-      FROM `{self.full_view}`
-      WHERE log_date BETWEEN '{start_date}' AND '{end_date}'
-        AND event_timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @hours HOUR)
+        SUM(log_count) as count,
+        SUM(IF(severity IN ({errors}), log_count, 0)) as error_count,
+        SUM(IF(severity = 'WARNING', log_count, 0)) as warning_count
+      FROM {self._stats_source(["service_name", "severity"], hours)}
       GROUP BY service_name
       ORDER BY count DESC
     """
@@ -199,20 +427,151 @@ class CanonicalQueryBuilder:
     return {"sql": sql.strip(), "params": params}
 
   def build_source_table_stats_query(self, hours: int = 24) -> Dict[str, Any]:
-    from datetime import datetime, timedelta
-    start_date = (datetime.utcnow() - timedelta(hours=hours)).strftime("%Y-%m-%d")
-    end_date = datetime.utcnow().strftime("%Y-%m-%d")
-
     sql = f"""
       SELECT
         source_table,
         stream_id,
-        COUNT(*) as count
-      FROM `{self.full_view}`
-      WHERE log_date BETWEEN '{start_date}' AND '{end_date}'
-        AND event_timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @hours HOUR)
+        SUM(log_count) as count
+      FROM {self._stats_source(["source_table", "stream_id"], hours)}
       GROUP BY source_table, stream_id
       ORDER BY count DESC
     """
     params = [bigquery.ScalarQueryParameter("hours", "INT64", hours)]
     return {"sql": sql.strip(), "params": params}
+
+  def build_summary_query(self, hours: int = 24) -> Dict[str, Any]:
+    """Totals by severity, active services and first/last event time."""
+    sql = f"""
+      SELECT
+        IFNULL(SUM(log_count), 0) as total_logs,
+        IFNULL(SUM(IF(severity = 'ERROR', log_count, 0)), 0) as errors,
+        IFNULL(SUM(IF(severity = 'CRITICAL', log_count, 0)), 0) as critical,
+        IFNULL(SUM(IF(severity = 'WARNING', log_count, 0)), 0) as warnings,
+        IFNULL(SUM(IF(severity = 'INFO', log_count, 0)), 0) as info,
+        COUNT(DISTINCT service_name) as services_active,
+        MIN(first_ts) as earliest,
+        MAX(last_ts) as latest
+      FROM {self._stats_source(["service_name", "severity"], hours)}
+    """
+    params = [bigquery.ScalarQueryParameter("hours", "INT64", hours)]
+    return {"sql": sql.strip(), "params": params}
+
+  # Hot tier (SQLite) queries. Same filters, ordering and result columns as
+  # the BigQuery builders above, with :named parameters; run them with
+  # HotTierStore.query.
+
+  def _hot_filters(self, hours: int, params: Optional[LogQueryParams] = None) -> Tuple[List[str], Dict[str, Any]]:
+    window_start = datetime.utcnow() - timedelta(hours=hours)
+    where_clauses = ["event_timestamp >= :window_start"]
+    values: Dict[str, Any] = {"window_start": format_timestamp(window_start)}
+    if params is None:
+      return where_clauses, values
+
+    if params.severity:
+      where_clauses.append("severity = :severity")
+      values["severity"] = params.severity.upper()
+
+    if params.service:
+      where_clauses.append("service_name LIKE :service")
+      values["service"] = f"%{params.service}%"
+
+    if params.search:
+      if self.search_mode == "search" or (self.search_mode == "auto" and is_search_tokenizable(params.search)):
+        predicate = " OR ".join(f"log_search({col}, :search)" for col in SEARCH_COLUMNS)
+        values["search"] = " ".join(params.search.split())
+      else:
+        predicate = " OR ".join(f"LOWER({col}) LIKE :search ESCAPE '\\'" for col in SEARCH_COLUMNS)
+        values["search"] = _like_value(params.search)
+      where_clauses.append(f"({predicate})")
+
+    if params.source_table:
+      where_clauses.append("source_table = :source_table")
+      values["source_table"] = params.source_table
+
+    if params.cursor:
+      cursor_ts, cursor_id = decode_cursor(params.cursor)
+      where_clauses.append(
+        "(event_timestamp < :cursor_ts OR (event_timestamp = :cursor_ts AND log_id < :cursor_id))"
+      )
+      values["cursor_ts"] = format_timestamp(cursor_ts)
+      values["cursor_id"] = cursor_id
+
+    return where_clauses, values
+
+  def build_hot_list_query(self, params: LogQueryParams) -> Dict[str, Any]:
+    """Hot-tier counterpart of build_list_query (no envelope fields)."""
+    where_clauses, values = self._hot_filters(params.hours, params)
+    values["limit"] = params.limit
+    sql = f"""
+      SELECT {", ".join(self.DISPLAY_FIELDS)}
+      FROM {HOT_TABLE}
+      WHERE {" AND ".join(where_clauses)}
+      ORDER BY event_timestamp DESC, log_id DESC
+      LIMIT :limit
+    """
+    return {"sql": sql.strip(), "params": values}
+
+  def build_hot_logs_by_id_query(self, log_ids: List[str]) -> Dict[str, Any]:
+    """Hot-tier counterpart of build_logs_by_id_query."""
+    values = {f"id{i}": log_id for i, log_id in enumerate(sorted(set(log_ids)))}
+    sql = f"""
+      SELECT {", ".join(self.DISPLAY_FIELDS)}
+      FROM {HOT_TABLE}
+      WHERE log_id IN ({", ".join(f":{name}" for name in values)})
+    """
+    return {"sql": sql.strip(), "params": values}
+
+  def build_hot_count_by_severity_query(self, hours: int = 24) -> Dict[str, Any]:
+    where_clauses, values = self._hot_filters(hours)
+    sql = f"""
+      SELECT severity, COUNT(*) as count
+      FROM {HOT_TABLE}
+      WHERE {" AND ".join(where_clauses)}
+      GROUP BY severity
+      ORDER BY count DESC
+    """
+    return {"sql": sql.strip(), "params": values}
+
+  def build_hot_count_by_service_query(self, hours: int = 24) -> Dict[str, Any]:
+    where_clauses, values = self._hot_filters(hours)
+    errors = ", ".join(f"'{s}'" for s in ERROR_SEVERITIES)
+    sql = f"""
+      SELECT
+        service_name,
+        COUNT(*) as count,
+        SUM(severity IN ({errors})) as error_count,
+        SUM(severity = 'WARNING') as warning_count
+      FROM {HOT_TABLE}
+      WHERE {" AND ".join(where_clauses)}
+      GROUP BY service_name
+      ORDER BY count DESC
+    """
+    return {"sql": sql.strip(), "params": values}
+
+  def build_hot_source_table_stats_query(self, hours: int = 24) -> Dict[str, Any]:
+    where_clauses, values = self._hot_filters(hours)
+    sql = f"""
+      SELECT source_table, stream_id, COUNT(*) as count
+      FROM {HOT_TABLE}
+      WHERE {" AND ".join(where_clauses)}
+      GROUP BY source_table, stream_id
+      ORDER BY count DESC
+    """
+    return {"sql": sql.strip(), "params": values}
+
+  def build_hot_summary_query(self, hours: int = 24) -> Dict[str, Any]:
+    where_clauses, values = self._hot_filters(hours)
+    sql = f"""
+      SELECT
+        COUNT(*) as total_logs,
+        IFNULL(SUM(severity = 'ERROR'), 0) as errors,
+        IFNULL(SUM(severity = 'CRITICAL'), 0) as critical,
+        IFNULL(SUM(severity = 'WARNING'), 0) as warnings,
+        IFNULL(SUM(severity = 'INFO'), 0) as info,
+        COUNT(DISTINCT service_name) as services_active,
+        MIN(event_timestamp) as earliest,
+        MAX(event_timestamp) as latest
+      FROM {HOT_TABLE}
+      WHERE {" AND ".join(where_clauses)}
+    """
+    return {"sql": sql.strip(), "params": values}
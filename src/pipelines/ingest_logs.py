@@ -11,12 +11,21 @@ Based on spec: ingest.normalizer, embed.ollama, store.qdrant_writer.
 import os
 import uuid
 import logging
-from typing import List, Dict, Any, Iterator
+from typing import List, Dict, Any, Iterable, Iterator
 from datetime import datetime
 from src.schemas.log_payload_schema import normalize_log_payload, LogPayloadV1
 from src.services.ollama_embed import OllamaEmbedService
 from src.services.redis_service import RedisService
-from qdrant_client import QdrantClient
+from src.services.qdrant_bulk_writer import QdrantBulkWriter, create_qdrant_client
+from src.services.qdrant_schema import (
+    collection_has_sparse,
+    collection_hnsw_config,
+    ensure_tenant_index,
+    ensure_timestamp_epoch_index,
+    point_vector,
+    sparse_vectors_config,
+)
+from src.services.sparse_encoder import sparse_encoder
 from qdrant_client.http import models
 
 logger = logging.getLogger(__name__)
@@ -26,7 +35,7 @@ QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", "")
 QDRANT_COLLECTION = os.getenv("QDRANT_COLLECTION", "logs_v1")
 INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
-UPSERT_WAIT = os.getenv("UPSERT_WAIT", "false").lower() == "true"
+UPSERT_WAIT = os.getenv("UPSERT_WAIT", "true").lower() == "true"  # final durability barrier
 EMBED_DIM = int(os.getenv("EMBED_DIM", "1024"))
 MAX_CHUNK_SIZE = 4000  # For chunking long text
 CHUNK_OVERLAP = 200
@@ -88,9 +97,10 @@ class QdrantLogWriter:
     """Qdrant writer for log points with vectors."""
 
     def __init__(self):
-        self.client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY or None)
+        self.client = create_qdrant_client(QDRANT_URL, QDRANT_API_KEY or None)
         self.collection = QDRANT_COLLECTION
         self._ensure_collection()
+        self.sparse_enabled = collection_has_sparse(self.client, self.collection)
 
     def _ensure_collection(self):
         """Create/update collection for logs_v1."""
@@ -105,12 +115,15 @@ class QdrantLogWriter:
                     size=EMBED_DIM,
                     distance=models.Distance.COSINE
                 ),
-                # Sparse optional, enable if needed
-                # sparse_vectors_config={"sparse": models.SparseVectorParams()}
+                # BM25 sparse vectors for hybrid search (see sparse_encoder)
+                sparse_vectors_config=sparse_vectors_config(),
+                # Per-tenant HNSW graphs only once tenant scoping is required
+                hnsw_config=collection_hnsw_config(),
             )
+            ensure_tenant_index(self.client, self.collection, "tenant_id")
             # Add payload indexes for fast filtering
             indexes = [
-                "tenant_id", "service_name", "severity", "log_type",
+                "service_name", "severity", "log_type",
                 "timestamp_year", "timestamp_month", "timestamp_day", "timestamp_hour",
                 "http_status", "http_method", "source_table", "trace_id", "log_id"
             ]
@@ -123,19 +136,14 @@ class QdrantLogWriter:
                     )
                 except Exception as e:
                     logger.warning(f"Index {field} already exists or error: {e}")
+            ensure_timestamp_epoch_index(self.client, self.collection)
         else:
             logger.info(f"Collection {self.collection} exists")
 
-    def upsert_points(self, points: List[models.PointStruct], batch_size: int = INGEST_BATCH_SIZE, wait: bool = UPSERT_WAIT):
-        """Upsert points in batches."""
-        for i in range(0, len(points), batch_size):
-            batch = points[i:i+batch_size]
-            self.client.upsert(
-                collection_name=self.collection,
-                points=batch,
-                wait=wait
-            )
-            logger.info(f"Upserted batch {i//batch_size + 1} of {len(batch)} points")
+    def upsert_points(self, points: Iterable[models.PointStruct], batch_size: int = INGEST_BATCH_SIZE, wait: bool = UPSERT_WAIT):
+        """Upsert points as concurrent batches; ``wait`` adds a final durability barrier."""
+        writer = QdrantBulkWriter(self.client, self.collection, batch_size=batch_size)
+        return writer.write(points, durable=wait)
 
 
 class LogIngestionPipeline:
@@ -201,13 +209,16 @@ class LogIngestionPipeline:
         # Embed
         texts = [e['text'] for e in log_entries]
         embeddings = self.embed_service.embed_batch(texts)
+        sparse_vectors = [None] * len(texts)
+        if self.writer.sparse_enabled:
+            sparse_vectors = sparse_encoder.encode_documents(texts)
 
         # Create points
         points = []
-        for (entry, emb) in zip(log_entries, embeddings):
+        for (entry, emb, sparse) in zip(log_entries, embeddings, sparse_vectors):
             point = models.PointStruct(
                 id=entry['id'],
-                vector=emb,
+                vector=point_vector(emb, sparse),
                 payload=entry['payload']
             )
             points.append(point)
@@ -12,6 +12,8 @@ from datetime import datetime
 from pydantic import BaseModel, Field, field_validator, model_validator
 from enum import Enum
 
+from src.services.qdrant_schema import to_epoch
+
 
 class Severity(str, Enum):
     DEFAULT = "DEFAULT"
@@ -38,7 +40,7 @@ class LogPayloadV1(BaseModel):
     Canonical log payload schema v1.
 
     Required fields: log_id, timestamp, message (or body)
-    Derived fields: timestamp_year, etc. (added during normalization)
+    Derived fields: timestamp_year, ..., timestamp_epoch (added during normalization)
     """
 
     # Primary identifiers
@@ -54,6 +56,7 @@ class LogPayloadV1(BaseModel):
     timestamp_month: int = Field(default=0, description="Derived month")
     timestamp_day: int = Field(default=0, description="Derived day")
     timestamp_hour: int = Field(default=0, description="Derived hour")
+    timestamp_epoch: int = Field(default=0, description="Derived Unix seconds (UTC) for range filtering")
 
     # HTTP context (optional)
     http_method: Optional[str] = Field(None, description="HTTP method")
@@ -79,6 +82,7 @@ class LogPayloadV1(BaseModel):
             self.timestamp_month = self.timestamp.month
             self.timestamp_day = self.timestamp.day
             self.timestamp_hour = self.timestamp.hour
+            self.timestamp_epoch = to_epoch(self.timestamp)
         return self
 
     @field_validator('message', 'body')
@@ -0,0 +1,377 @@
+"""Async BigQuery access for API request handlers.
+
+Sync FastAPI handlers that call ``client.query()`` and iterate the job hold
+a Starlette threadpool worker for the whole job duration, so a handful of
+slow scans can starve ``/health`` and ``/api/chat``. This service keeps the
+event loop in charge instead:
+
+1. The job is submitted on a small dedicated executor (one short API call).
+2. Completion is polled with ``job.done()`` on the same executor, sleeping
+   on the event loop between polls with exponential backoff, so no thread
+   is held while BigQuery works.
+3. Results are fetched page by page with ``max_results`` so large jobs are
+   never fully materialized. ``open_result`` exposes those pages as they
+   arrive (for streaming responses) together with the job's destination
+   table and page token, and ``resume`` continues from a saved token
+   without re-running the query.
+
+An asyncio semaphore caps concurrent queries; requests beyond the cap wait
+(their queue time is recorded) rather than piling jobs onto BigQuery.
+Jobs that exceed their timeout are cancelled server-side.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+try:
+    from google.cloud import bigquery
+except ModuleNotFoundError:
+    bigquery = None  # type: ignore
+
+from src.glass_pane.config import glass_config
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+BQ_MAX_CONCURRENT_QUERIES = int(os.getenv("BQ_MAX_CONCURRENT_QUERIES", "16"))
+BQ_EXECUTOR_WORKERS = int(os.getenv("BQ_EXECUTOR_WORKERS", "8"))
+BQ_QUERY_TIMEOUT_SEC = float(os.getenv("BQ_QUERY_TIMEOUT_SEC", "60"))
+BQ_POLL_INITIAL_SEC = 0.05
+BQ_POLL_MAX_SEC = 1.0
+BQ_PAGE_SIZE = 1000
+
+
+class QueryTimeoutError(TimeoutError):
+    """Raised when a BigQuery job does not finish within its timeout."""
+
+
+class BigQueryQueryService:
+    """Bounded, non-blocking BigQuery query runner with metrics."""
+
+    def __init__(
+        self,
+        client_factory: Optional[Callable[[], Any]] = None,
+        max_concurrent: int = BQ_MAX_CONCURRENT_QUERIES,
+        executor_workers: int = BQ_EXECUTOR_WORKERS,
+        timeout: float = BQ_QUERY_TIMEOUT_SEC,
+        poll_initial: float = BQ_POLL_INITIAL_SEC,
+        poll_max: float = BQ_POLL_MAX_SEC,
+    ):
+        self._client_factory = client_factory
+        self._client = None
+        self.max_concurrent = max_concurrent
+        self.executor_workers = executor_workers
+        self.timeout = timeout
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Semaphores bind to the running loop; one per loop keeps tests and
+        # multiple event loops (e.g. TestClient) independent.
+        self._semaphores: Dict[int, asyncio.Semaphore] = {}
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, float] = {
+            "submitted": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "in_flight": 0,
+            "queued": 0,
+            "rows_returned": 0,
+            "bytes_processed": 0,
+            "total_latency_ms": 0.0,
+            "total_queue_wait_ms": 0.0,
+            "max_queue_wait_ms": 0.0,
+        }
+
+    # --- resources -------------------------------------------------------
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    if self._client_factory is not None:
+                        self._client = self._client_factory()
+                    elif bigquery is None:
+                        raise RuntimeError("Missing optional dependency 'google-cloud-bigquery'")
+                    else:
+                        self._client = bigquery.Client(project=glass_config.logs_project_id)
+        return self._client
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.executor_workers, thread_name_prefix="bq-query"
+                    )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop_id = id(asyncio.get_running_loop())
+        sem = self._semaphores.get(loop_id)
+        if sem is None:
+            sem = self._semaphores.setdefault(loop_id, asyncio.Semaphore(self.max_concurrent))
+        return sem
+
+    async def _run(self, fn: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(fn, *args, **kwargs))
+
+    def _bump(self, key: str, value: float = 1) -> None:
+        with self._lock:
+            self._metrics[key] += value
+
+    # --- queries ---------------------------------------------------------
+
+    async def query(
+        self,
+        sql: str,
+        params: Optional[List[Any]] = None,
+        max_results: Optional[int] = None,
+        timeout: Optional[float] = None,
+        job_config: Optional[Any] = None,
+    ) -> List[Dict[str, Any]]:
+        """Run a query without blocking the event loop.
+
+        Args:
+            sql: SQL text
+            params: BigQuery query parameters (ignored if job_config is given)
+            max_results: Stop fetching after this many rows
+            timeout: Seconds before the job is cancelled (default BQ_QUERY_TIMEOUT_SEC)
+            job_config: Full QueryJobConfig, for callers needing more than parameters
+
+        Returns:
+            Rows as dicts
+
+        Raises:
+            QueryTimeoutError: Job did not finish in time (it is cancelled)
+            google.api_core.exceptions.GoogleAPICallError: Job failed
+        """
+        async with self._slot():
+            job = await self._submit(sql, params, timeout, job_config)
+            rows = await self._run(self._fetch_rows, job, max_results)
+
+            self._bump("succeeded")
+            self._bump("rows_returned", len(rows))
+            self._bump("bytes_processed", getattr(job, "total_bytes_processed", None) or 0)
+            return rows
+
+    async def open_result(
+        self,
+        sql: str,
+        params: Optional[List[Any]] = None,
+        page_size: int = BQ_PAGE_SIZE,
+        max_results: Optional[int] = None,
+        timeout: Optional[float] = None,
+        job_config: Optional[Any] = None,
+    ) -> "QueryResult":
+        """Run a query and return its result for page-by-page reading.
+
+        The concurrency slot is held only until the job finishes; pages are
+        then read from the job's destination table on demand.
+
+        Args:
+            sql: SQL text
+            params: BigQuery query parameters (ignored if job_config is given)
+            page_size: Rows per page
+            max_results: Stop after this many rows
+            timeout: Seconds before the job is cancelled (default BQ_QUERY_TIMEOUT_SEC)
+            job_config: Full QueryJobConfig
+
+        Raises:
+            QueryTimeoutError: Job did not finish in time (it is cancelled)
+        """
+        async with self._slot():
+            job = await self._submit(sql, params, timeout, job_config)
+            self._bump("succeeded")
+            self._bump("bytes_processed", getattr(job, "total_bytes_processed", None) or 0)
+
+        destination = job.destination
+        return QueryResult(
+            self,
+            lambda token: self.client.list_rows(
+                destination, page_size=page_size, max_results=max_results, page_token=token
+            ),
+            destination=destination,
+        )
+
+    def resume(
+        self,
+        destination: Any,
+        page_token: str,
+        page_size: int = BQ_PAGE_SIZE,
+        max_results: Optional[int] = None,
+        offset: int = 0,
+    ) -> "QueryResult":
+        """Continue reading a finished job's destination table from a page token.
+
+        No query is run, so no bytes are billed. BigQuery keeps anonymous
+        destination tables for about 24 hours; reading an expired one raises
+        NotFound on the first page.
+
+        Args:
+            destination: Destination table (reference or "project.dataset.table")
+            page_token: QueryResult.next_page_token saved from an earlier read
+            page_size: Rows per page
+            max_results: Stop after this many rows
+            offset: Rows already read before page_token (for QueryResult.position)
+        """
+        return QueryResult(
+            self,
+            lambda token: self.client.list_rows(
+                destination, page_size=page_size, max_results=max_results, page_token=token
+            ),
+            destination=destination,
+            page_token=page_token,
+            offset=offset,
+        )
+
+    @asynccontextmanager
+    async def _slot(self):
+        """Admission control plus in-flight, latency and failure accounting."""
+        queued_at = time.perf_counter()
+        self._bump("queued")
+        semaphore = self._get_semaphore()
+        try:
+            await semaphore.acquire()
+        finally:
+            self._bump("queued", -1)
+        wait_ms = (time.perf_counter() - queued_at) * 1000
+        with self._lock:
+            self._metrics["total_queue_wait_ms"] += wait_ms
+            self._metrics["max_queue_wait_ms"] = max(self._metrics["max_queue_wait_ms"], wait_ms)
+            self._metrics["in_flight"] += 1
+            self._metrics["submitted"] += 1
+
+        start = time.perf_counter()
+        try:
+            yield
+        except QueryTimeoutError:
+            self._bump("timeouts")
+            raise
+        except Exception:
+            self._bump("failed")
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._metrics["in_flight"] -= 1
+                self._metrics["total_latency_ms"] += elapsed_ms
+            semaphore.release()
+
+    async def _submit(self, sql: str, params: Optional[List[Any]], timeout: Optional[float], job_config: Optional[Any]):
+        """Submit a job and wait for it to finish, cancelling it on timeout."""
+        if job_config is None and bigquery is not None:
+            job_config = bigquery.QueryJobConfig(query_parameters=params or [])
+        timeout = timeout or self.timeout
+
+        start = time.perf_counter()
+        job = await self._run(self.client.query, sql, job_config=job_config)
+        try:
+            await self._wait_for(job, deadline=start + timeout)
+        except QueryTimeoutError:
+            try:
+                await self._run(job.cancel)
+            except Exception as e:
+                logger.warning(f"Failed to cancel timed-out BigQuery job: {e}")
+            raise
+        return job
+
+    async def _wait_for(self, job, deadline: float) -> None:
+        delay = self.poll_initial
+        while not await self._run(job.done):
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise QueryTimeoutError(f"BigQuery job {getattr(job, 'job_id', '?')} exceeded timeout")
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, self.poll_max)
+
+    @staticmethod
+    def _fetch_rows(job, max_results: Optional[int]) -> List[Dict[str, Any]]:
+        # Job is already done, so result() only pages through the output.
+        result = job.result(max_results=max_results, page_size=min(max_results or BQ_PAGE_SIZE, BQ_PAGE_SIZE))
+        return [dict(row) for row in result]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of query counters, latency and admission-queue wait."""
+        with self._lock:
+            m = dict(self._metrics)
+        completed = m["succeeded"] + m["failed"] + m["timeouts"]
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": int(m["in_flight"]),
+            "queued": int(m["queued"]),
+            "submitted": int(m["submitted"]),
+            "succeeded": int(m["succeeded"]),
+            "failed": int(m["failed"]),
+            "timeouts": int(m["timeouts"]),
+            "rows_returned": int(m["rows_returned"]),
+            "bytes_processed": int(m["bytes_processed"]),
+            "avg_latency_ms": round(m["total_latency_ms"] / completed, 2) if completed else 0.0,
+            "avg_queue_wait_ms": round(m["total_queue_wait_ms"] / m["submitted"], 2) if m["submitted"] else 0.0,
+            "max_queue_wait_ms": round(m["max_queue_wait_ms"], 2),
+        }
+
+
+class QueryResult:
+    """Pages of a finished query, fetched on the service's executor as they are read."""
+
+    def __init__(
+        self,
+        service: BigQueryQueryService,
+        make_iterator: Callable[[Optional[str]], Any],
+        destination: Any = None,
+        page_token: Optional[str] = None,
+        offset: int = 0,
+    ):
+        self._service = service
+        self._make_iterator = make_iterator
+        self._iterator = None
+        self._pages = None
+        self.destination = destination
+        # Token of the next unread page; None once the table is exhausted
+        self.next_page_token = page_token
+        # Rows of the destination table before next_page_token
+        self.position = offset
+        self.total_rows: Optional[int] = None
+        self.done = False
+
+    async def next_page(self) -> List[Dict[str, Any]]:
+        """Fetch the next page (empty list once exhausted)."""
+        if self.done:
+            return []
+        rows = await self._service._run(self._read_page)
+        self._service._bump("rows_returned", len(rows))
+        return rows
+
+    def _read_page(self) -> List[Dict[str, Any]]:
+        if self._pages is None:
+            self._iterator = self._make_iterator(self.next_page_token)
+            self._pages = iter(self._iterator.pages)
+        page = next(self._pages, None)
+        self.next_page_token = getattr(self._iterator, "next_page_token", None)
+        self.total_rows = getattr(self._iterator, "total_rows", None)
+        if page is None or not self.next_page_token:
+            self.done = True
+        rows = [dict(row) for row in page] if page is not None else []
+        self.position += len(rows)
+        return rows
+
+    async def pages(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield pages until the result (or max_results) is exhausted."""
+        while not self.done:
+            rows = await self.next_page()
+            if rows:
+                yield rows
+
+
+# Singleton instance
+bq_query_service = BigQueryQueryService()
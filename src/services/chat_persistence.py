@@ -0,0 +1,175 @@
+"""Write-behind persistence for the /api/chat SSE path.
+
+Session creation, message writes (Firestore + Pub/Sub), Realtime Database
+updates and embedding enqueues are all blocking client calls. Made inline
+from the ``async`` chat handler they stall the event loop for every
+concurrent stream and delay the first SSE byte. Instead each request gets a
+``PersistenceLane``:
+
+- ``submit()`` schedules a call on a small dedicated executor and returns
+  immediately, so the stream starts as soon as the graph produces output.
+- Calls on one lane run in submission order, so a session document exists
+  before its messages are added and the user message lands before the
+  assistant reply. If a ``required`` call fails (e.g. session creation),
+  later calls on the lane are skipped.
+- Failures are collected on the lane; the handler drains them with
+  ``pop_failures()`` and reports them as SSE events.
+
+The executor size bounds how many blocking calls run at once; ``drain()``
+lets the app wait for outstanding writes on shutdown.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CHAT_PERSIST_WORKERS = int(os.getenv("CHAT_PERSIST_WORKERS", "8"))
+CHAT_PERSIST_DRAIN_SEC = float(os.getenv("CHAT_PERSIST_DRAIN_SEC", "10"))
+# How long a finished stream waits for its own writes so failures can still be reported
+CHAT_PERSIST_FLUSH_SEC = float(os.getenv("CHAT_PERSIST_FLUSH_SEC", "5"))
+
+
+@dataclass
+class PersistenceFailure:
+    """A write-behind call that failed or was skipped."""
+    step: str
+    error_type: str
+    skipped: bool = False
+
+    def to_event(self) -> Dict[str, Any]:
+        """SSE payload; carries no exception text (that stays in server logs)."""
+        return {
+            "type": "persistence_error",
+            "data": {"step": self.step, "error_type": self.error_type, "skipped": self.skipped},
+        }
+
+
+class PersistenceLane:
+    """Ordered write-behind calls for one chat request."""
+
+    def __init__(self, queue: "ChatPersistenceQueue"):
+        self._queue = queue
+        self._tail: Optional[asyncio.Task] = None
+        self._failures: List[PersistenceFailure] = []
+        self._aborted_by: Optional[str] = None
+
+    def submit(self, step: str, fn: Callable[..., Any], *args, required: bool = False, **kwargs) -> asyncio.Task:
+        """
+        Schedule ``fn(*args, **kwargs)`` after the lane's previous calls.
+
+        Args:
+            step: Name reported if the call fails
+            fn: Blocking callable; returning False also counts as a failure
+            required: Skip the lane's later calls if this one fails
+
+        Returns:
+            Task resolving to True if the call succeeded
+        """
+        task = asyncio.create_task(self._chain(self._tail, step, fn, args, kwargs, required))
+        self._tail = task
+        self._queue._track(task)
+        return task
+
+    async def _chain(self, previous, step, fn, args, kwargs, required) -> bool:
+        if previous is not None:
+            await previous
+        if self._aborted_by is not None:
+            self._failures.append(PersistenceFailure(step, f"skipped_after_{self._aborted_by}", skipped=True))
+            self._queue._bump("skipped")
+            return False
+
+        try:
+            ok = await self._queue.run(fn, *args, **kwargs) is not False
+            error_type = "write_failed"
+        except Exception as e:
+            logger.warning(f"Chat persistence step {step} failed: {e}")
+            ok, error_type = False, type(e).__name__
+
+        if ok:
+            self._queue._bump("completed")
+            return True
+        self._queue._bump("failed")
+        self._failures.append(PersistenceFailure(step, error_type))
+        if required:
+            self._aborted_by = step
+        return False
+
+    def pop_failures(self) -> List[PersistenceFailure]:
+        """Failures recorded since the last call."""
+        failures, self._failures = self._failures, []
+        return failures
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for every call submitted so far. Returns False on timeout."""
+        if self._tail is None:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(self._tail), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class ChatPersistenceQueue:
+    """Bounded executor plus bookkeeping shared by all persistence lanes."""
+
+    def __init__(self, max_workers: int = CHAT_PERSIST_WORKERS):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending: Set[asyncio.Task] = set()
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "skipped": 0}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="chat-persist"
+                    )
+        return self._executor
+
+    def _bump(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _track(self, task: asyncio.Task) -> None:
+        self._bump("submitted")
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking call on the persistence executor and await it."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(fn, *args, **kwargs))
+
+    def lane(self) -> PersistenceLane:
+        return PersistenceLane(self)
+
+    async def drain(self, timeout: float = CHAT_PERSIST_DRAIN_SEC) -> int:
+        """Wait for outstanding writes (e.g. on shutdown). Returns how many were still pending after timeout."""
+        pending = list(self._pending)
+        if not pending:
+            return 0
+        done, not_done = await asyncio.wait(pending, timeout=timeout)
+        if not_done:
+            logger.warning(f"{len(not_done)} chat persistence writes still pending after {timeout}s")
+        return len(not_done)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["pending"] = len(self._pending)
+        return stats
+
+
+# Singleton instance
+chat_persistence = ChatPersistenceQueue()
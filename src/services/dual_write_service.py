@@ -5,7 +5,8 @@ This service handles writing chat events to:
 2. Pub/Sub (async) - for BigQuery cold storage via Cloud Function
 
 The design ensures Firestore writes are synchronous while Pub/Sub
-publishes are async and non-blocking.
+publishes are async and non-blocking. Publishes go through the shared,
+batching publisher in src.services.pubsub_publisher.
 """
 
 import json
@@ -16,6 +17,8 @@ from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 from dataclasses import dataclass, asdict
 
+from src.services.pubsub_publisher import pubsub_publisher
+
 logger = logging.getLogger(__name__)
 
 # Feature flags
@@ -235,8 +238,7 @@ class DualWriteService:
     """
 
     _instance: Optional["DualWriteService"] = None
-    _publisher = None
-    _topic_path: Optional[str] = None
+    _topic_path: str = pubsub_publisher.topic_path(PUBSUB_PROJECT, PUBSUB_TOPIC)
 
     def __new__(cls) -> "DualWriteService":
         if cls._instance is None:
@@ -247,20 +249,10 @@ class DualWriteService:
         pass
 
     def _get_publisher(self):
-        """Lazy initialization of Pub/Sub publisher."""
-        if not ENABLE_PUBSUB:
+        """Shared Pub/Sub publisher, or None if Pub/Sub is disabled or unavailable."""
+        if not ENABLE_PUBSUB or not pubsub_publisher.available:
             return None
-
-        if self._publisher is None:
-            try:
-                from google.cloud import pubsub_v1
-                self._publisher = pubsub_v1.PublisherClient()
-                self._topic_path = self._publisher.topic_path(PUBSUB_PROJECT, PUBSUB_TOPIC)
-                logger.info(f"Pub/Sub publisher initialized for topic: {self._topic_path}")
-            except Exception as e:
-                logger.warning(f"Failed to initialize Pub/Sub publisher: {e}")
-                return None
-        return self._publisher
+        return pubsub_publisher
 
     @property
     def enabled(self) -> bool:
@@ -365,15 +357,13 @@ class DualWriteService:
 
         try:
             message_data = event.to_json().encode("utf-8")
-            # Fire and forget - don't wait for result
-            future = publisher.publish(
+            # Fire and forget - the shared publisher batches and logs failures
+            publisher.publish(
                 self._topic_path,
                 message_data,
                 event_type=event.event_type,
                 session_id=event.session_id,
             )
-            # Optional: Add callback for monitoring
-            future.add_done_callback(self._pubsub_callback)
         except Exception as e:
             logger.error(f"Pub/Sub publish error: {e}")
             raise
@@ -386,25 +376,16 @@ class DualWriteService:
 
         try:
             message_data = json.dumps(invocation.to_dict()).encode("utf-8")
-            future = publisher.publish(
+            publisher.publish(
                 self._topic_path,
                 message_data,
                 event_type="tool_invocation",
                 session_id=invocation.session_id,
             )
-            future.add_done_callback(self._pubsub_callback)
         except Exception as e:
             logger.error(f"Tool invocation publish error: {e}")
             raise
 
-    def _pubsub_callback(self, future):
-        """Callback for Pub/Sub publish completion."""
-        try:
-            message_id = future.result()
-            logger.debug(f"Published message: {message_id}")
-        except Exception as e:
-            logger.error(f"Pub/Sub publish callback error: {e}")
-
 
 # Singleton instance
 dual_write_service = DualWriteService()
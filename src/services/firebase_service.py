@@ -30,6 +30,9 @@ from src.services.redis_service import RedisService
 
 logger = logging.getLogger(__name__)
 
+# Max values in a Firestore ``in`` filter
+FIRESTORE_IN_LIMIT = 30
+
 
 def _firebase_enabled() -> bool:
     """Whether Firebase is enabled for this process.
@@ -195,13 +198,17 @@ class FirebaseService:
     # SESSION MANAGEMENT (Firestore)
     # ============================================
 
-    def create_session(self, user_id: str, title: str = "New Session") -> str:
-        """Create a new chat session."""
+    def create_session(self, user_id: str, title: str = "New Session", session_id: Optional[str] = None) -> str:
+        """Create a new chat session.
+
+        Callers that persist the session in the background pass a
+        pre-generated session_id so it can be handed out immediately.
+        """
         self._ensure_initialized()
         if not self.firestore_db:
             raise RuntimeError("Firestore not initialized")
 
-        session_id = str(uuid.uuid4())
+        session_id = session_id or str(uuid.uuid4())
         now = datetime.utcnow()
 
         session_data = {
@@ -344,6 +351,72 @@ class FirebaseService:
             logger.error(f"Error getting messages: {e}")
             return []
 
+    def get_messages_for_sessions(
+        self,
+        session_ids: List[str],
+        user_id: Optional[str] = None,
+        limit_per_session: int = 100,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Get messages for many sessions with batched reads.
+
+        Sessions are fetched in one ``get_all`` call and messages with one
+        collection-group ``in`` query per FIRESTORE_IN_LIMIT sessions, instead
+        of one query per session. That query needs the COLLECTION_GROUP
+        ``session_id`` index from firestore.indexes.json; until it is
+        deployed, each session's subcollection is read on its own.
+
+        Args:
+            session_ids: Sessions to read
+            user_id: Only return sessions owned by this user (None = no check)
+            limit_per_session: Newest messages are dropped beyond this many
+
+        Returns:
+            Messages (oldest first) keyed by session ID; sessions that don't
+            exist or belong to another user are absent
+        """
+        self._ensure_initialized()
+        if not self.firestore_db or not session_ids:
+            return {}
+
+        try:
+            ids = list(dict.fromkeys(session_ids))
+            refs = [self.firestore_db.collection("sessions").document(sid) for sid in ids]
+            allowed = [
+                doc.id for doc in self.firestore_db.get_all(refs)
+                if doc.exists and (user_id is None or (doc.to_dict() or {}).get("user_id") == user_id)
+            ]
+
+            messages: Dict[str, List[Dict[str, Any]]] = {sid: [] for sid in allowed}
+            for i in range(0, len(allowed), FIRESTORE_IN_LIMIT):
+                chunk = allowed[i:i + FIRESTORE_IN_LIMIT]
+                try:
+                    query = self.firestore_db.collection_group("messages").where("session_id", "in", chunk)
+                    docs = list(query.stream())
+                except Exception as e:
+                    logger.warning(f"Collection-group message query failed, reading sessions one by one: {e}")
+                    docs = [
+                        doc
+                        for sid in chunk
+                        for doc in self.firestore_db.collection("sessions").document(sid)
+                        .collection("messages").order_by("timestamp").limit(limit_per_session).stream()
+                    ]
+                for doc in docs:
+                    msg = doc.to_dict()
+                    if msg.get("session_id") in messages:
+                        messages[msg["session_id"]].append(msg)
+
+            for sid, msgs in messages.items():
+                # Sorted here: ordering an ``in`` query needs a composite index
+                msgs.sort(key=lambda m: str(m.get("timestamp") or ""))
+                del msgs[limit_per_session:]
+                for msg in msgs:
+                    if msg.get("timestamp"):
+                        msg["timestamp"] = msg["timestamp"].isoformat() if hasattr(msg["timestamp"], 'isoformat') else str(msg["timestamp"])
+            return messages
+        except Exception as e:
+            logger.error(f"Error getting messages for sessions: {e}")
+            return {}
+
     # ============================================
     # SAVED QUERIES (Firestore)
     # ============================================
@@ -0,0 +1,235 @@
+"""Local hot tier: the most recent hours of master_logs in an embedded SQLite file.
+
+Nearly all Glass Pane traffic asks for the last few hours, and every such
+request otherwise costs a BigQuery job (seconds of latency, billed bytes).
+The ETL loader writes each loaded batch here as well as to master_logs, and
+CanonicalQueryBuilder routes windows the hot tier fully covers to it:
+
+- ``HOT_TIER_PATH`` enables the tier (unset = disabled). Every process that
+  loads logs must point at the same file, otherwise the tier is incomplete.
+  The file is opened in WAL mode so API readers never block the loader.
+- ``HOT_TIER_HOURS`` is the retention; older rows are pruned on ingest.
+- Coverage starts when the tier first received rows: it holds every row
+  loaded since then, so earlier data (and anything past retention) is
+  still read from BigQuery.
+- Request routing checks coverage on the event loop, so the stored start
+  is cached for ``HOT_TIER_COVERAGE_TTL_SEC``; a restart made by another
+  process is seen within that time.
+
+Rows are stored with naive-UTC ISO timestamps in a fixed format so text
+order is time order, and returned with tz-aware datetimes like BigQuery's.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HOT_TIER_PATH = os.getenv("HOT_TIER_PATH", "")
+HOT_TIER_HOURS = int(os.getenv("HOT_TIER_HOURS", "24"))
+HOT_TIER_COVERAGE_TTL_SEC = float(os.getenv("HOT_TIER_COVERAGE_TTL_SEC", "5"))
+
+HOT_TABLE = "hot_logs"
+HOT_COLUMNS = [
+    "log_id",
+    "event_timestamp",
+    "severity",
+    "service_name",
+    "source_log_name",
+    "message",
+    "json_payload",
+    "source_table",
+    "stream_id",
+    "trace_id",
+    "span_id",
+    "log_type",
+    "resource_type",
+]
+# Columns holding timestamps in query results (list rows and summary stats)
+TIMESTAMP_COLUMNS = ("event_timestamp", "earliest", "latest")
+
+_TS_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {HOT_TABLE} (
+    {", ".join(f"{c} TEXT PRIMARY KEY" if c == "log_id" else f"{c} TEXT" for c in HOT_COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS {HOT_TABLE}_ts ON {HOT_TABLE} (event_timestamp DESC, log_id DESC);
+CREATE TABLE IF NOT EXISTS hot_meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def format_timestamp(ts: Any) -> Optional[str]:
+    """Normalize an ISO string or datetime to the stored naive-UTC form."""
+    if ts is None:
+        return None
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts.strftime(_TS_FORMAT)
+
+
+def _log_search(text: Optional[str], term: str) -> bool:
+    """Local stand-in for BigQuery SEARCH(): every term token is a whole token of text."""
+    if not text:
+        return False
+    return set(_TOKEN.findall(term.lower())) <= set(_TOKEN.findall(text.lower()))
+
+
+class HotTierStore:
+    """SQLite-backed store for recent log rows, shared by the loader and the API."""
+
+    def __init__(
+        self,
+        path: str = HOT_TIER_PATH,
+        retention_hours: int = HOT_TIER_HOURS,
+        coverage_ttl: float = HOT_TIER_COVERAGE_TTL_SEC,
+    ):
+        self.path = path
+        self.retention_hours = retention_hours
+        self.coverage_ttl = coverage_ttl
+        # (stored coverage_start or None, monotonic time it was read)
+        self._coverage: Optional[Tuple[Optional[datetime], float]] = None
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._stats = {"ingested": 0, "pruned": 0, "queries": 0, "query_ms": 0.0, "errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Per-thread connection (sqlite3 connections are not shareable across threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # BigQuery LIKE is case-sensitive
+            conn.execute("PRAGMA case_sensitive_like=ON")
+            conn.create_function("log_search", 2, _log_search, deterministic=True)
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def coverage_start(self) -> Optional[datetime]:
+        """Naive-UTC time from which the tier holds every loaded row, or None.
+
+        Reads hot_meta at most once per ``coverage_ttl``.
+        """
+        if not self.enabled:
+            return None
+        cached = self._coverage
+        if cached is not None and time.monotonic() - cached[1] < self.coverage_ttl:
+            start = cached[0]
+        else:
+            try:
+                row = self._connect().execute(
+                    "SELECT value FROM hot_meta WHERE key = 'coverage_start'"
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Hot tier unavailable: {e}")
+                self._stats["errors"] += 1
+                return None
+            start = datetime.strptime(row["value"], _TS_FORMAT) if row is not None else None
+            self._coverage = (start, time.monotonic())
+        if start is None:
+            return None
+        retention_start = datetime.utcnow() - timedelta(hours=self.retention_hours)
+        return max(start, retention_start)
+
+    def ingest(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Upsert loaded master_logs rows (as produced by LogLoader._to_bq_row).
+
+        Rows older than the retention window are skipped and expired rows
+        pruned. Rows with the same log_id replace each other, matching the
+        insertId dedup on master_logs.
+
+        Returns:
+            Number of rows written
+        """
+        cutoff = format_timestamp(datetime.utcnow() - timedelta(hours=self.retention_hours))
+        values = []
+        for row in rows:
+            ts = format_timestamp(row.get("event_timestamp"))
+            if not row.get("log_id") or ts is None or ts < cutoff:
+                continue
+            values.append(tuple(ts if c == "event_timestamp" else row.get(c) for c in HOT_COLUMNS))
+
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO hot_meta (key, value) VALUES ('coverage_start', ?)",
+                (format_timestamp(datetime.utcnow()),),
+            )
+            if values:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {HOT_TABLE} ({', '.join(HOT_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' for _ in HOT_COLUMNS)})",
+                    values,
+                )
+            pruned = conn.execute(f"DELETE FROM {HOT_TABLE} WHERE event_timestamp < ?", (cutoff,)).rowcount
+        self._coverage = None
+
+        self._stats["ingested"] += len(values)
+        self._stats["pruned"] += max(pruned, 0)
+        return len(values)
+
+    def restart_coverage(self) -> None:
+        """Start coverage now, e.g. after rows failed to reach the tier."""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO hot_meta (key, value) VALUES ('coverage_start', ?)",
+                (format_timestamp(datetime.utcnow()),),
+            )
+        self._coverage = None
+
+    def run(self, sql: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Execute a hot-tier query built by CanonicalQueryBuilder."""
+        start = time.perf_counter()
+        try:
+            cursor = self._connect().execute(sql, params)
+            rows = [dict(r) for r in cursor.fetchall()]
+        except sqlite3.Error:
+            self._stats["errors"] += 1
+            raise
+        for row in rows:
+            for col in TIMESTAMP_COLUMNS:
+                if row.get(col):
+                    row[col] = datetime.strptime(row[col], _TS_FORMAT).replace(tzinfo=timezone.utc)
+        self._stats["queries"] += 1
+        self._stats["query_ms"] += (time.perf_counter() - start) * 1000
+        return rows
+
+    async def query(self, sql: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Async wrapper around run(); local queries still shouldn't block the loop."""
+        return await asyncio.to_thread(self.run, sql, params)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["enabled"] = self.enabled
+        if stats["queries"]:
+            stats["avg_query_ms"] = round(stats["query_ms"] / stats["queries"], 2)
+        coverage = self.coverage_start()
+        stats["coverage_start"] = coverage.isoformat() if coverage else None
+        return stats
+
+
+# Singleton instance
+hot_tier_store = HotTierStore()
@@ -0,0 +1,249 @@
+"""In-process fan-out of live log rows to GraphQL subscribers.
+
+The ETL loader appends every row it lands in master_logs to a capped Redis
+stream (``LOG_STREAM_KEY``). Each API instance runs a single tail on that
+stream, started with the first subscriber and stopped with the last, and
+hands each batch to ``publish()``. A tail starts from the id of the
+stream's newest entry rather than ``$``, so rows appended between two
+reads are not lost:
+
+- Subscribers are grouped by filter. Each distinct filter is compiled once
+  into a predicate (``compile_log_filter``) and evaluated once per row, so
+  1k subscribers sharing a handful of filters cost a handful of checks per
+  row, and one upstream read per batch instead of one per subscriber.
+- Matches go onto each subscriber's bounded queue. A subscriber that falls
+  behind loses its oldest rows (counted as ``dropped``) rather than
+  blocking the tail or growing memory.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from src.services.redis_service import redis_service
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+LOG_STREAM_KEY = os.getenv("LOG_STREAM_KEY", "stream:logs:live")
+LOG_STREAM_MAXLEN = int(os.getenv("LOG_STREAM_MAXLEN", "10000"))
+LOG_STREAM_BATCH = int(os.getenv("LOG_STREAM_BATCH", "500"))
+LOG_STREAM_QUEUE = int(os.getenv("LOG_STREAM_QUEUE", "1000"))
+# Pause after an empty read (stream_read already blocks up to 1s when Redis is up)
+LOG_STREAM_IDLE_SEC = 0.2
+
+FilterKey = Tuple[Optional[str], Optional[str], Optional[str]]
+Predicate = Callable[[Dict[str, Any]], bool]
+# reader(last_id, count) -> [(entry_id, row), ...]
+Reader = Callable[[str, int], List[Tuple[str, Dict[str, Any]]]]
+# end_id() -> id of the stream's newest entry, or None if unknown
+EndId = Callable[[], Optional[str]]
+
+
+def filter_key(
+    severity: Optional[str] = None,
+    service: Optional[str] = None,
+    region: Optional[str] = None,
+) -> FilterKey:
+    """Normalized filter identity; subscribers with equal keys share a predicate."""
+    return (severity.upper() if severity else None, service or None, region or None)
+
+
+def compile_log_filter(key: FilterKey) -> Predicate:
+    """
+    Build a row predicate for a filter key.
+
+    Matches the list query's semantics: exact severity, substring service
+    name. Region is the row's resource_location (master_logs has no env).
+    """
+    severity, service, region = key
+    checks: List[Predicate] = []
+    if severity:
+        checks.append(lambda row: row.get("severity") == severity)
+    if service:
+        checks.append(lambda row: service in (row.get("service_name") or ""))
+    if region:
+        checks.append(lambda row: row.get("resource_location") == region)
+
+    if not checks:
+        return lambda row: True
+    if len(checks) == 1:
+        return checks[0]
+    return lambda row: all(check(row) for check in checks)
+
+
+def encode_stream_row(row: Dict[str, Any]) -> Dict[str, str]:
+    """Redis stream fields for a log row."""
+    return {"row": json.dumps(row, default=str)}
+
+
+class LogSubscription:
+    """One subscriber's bounded queue; iterate it to receive rows."""
+
+    def __init__(self, broker: "LogStreamBroker", key: FilterKey, max_queue: int):
+        self._broker = broker
+        self.key = key
+        self._queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self.delivered = 0
+        self.dropped = 0
+
+    def offer(self, row: Dict[str, Any]) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(row)
+        self.delivered += 1
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        return await self._queue.get()
+
+    def close(self) -> None:
+        self._broker.unsubscribe(self)
+
+
+class LogStreamBroker:
+    """Single upstream tail fanned out to filtered subscribers."""
+
+    def __init__(
+        self,
+        reader: Optional[Reader] = None,
+        end_id: Optional[EndId] = None,
+        stream_key: str = LOG_STREAM_KEY,
+        redis=redis_service,
+        batch_size: int = LOG_STREAM_BATCH,
+        max_queue: int = LOG_STREAM_QUEUE,
+        idle_sleep: float = LOG_STREAM_IDLE_SEC,
+    ):
+        self.stream_key = stream_key
+        self.redis = redis
+        self._reader = reader or self._read_redis
+        # A custom reader without end_id starts from "$"
+        self._end_id = end_id or (self._redis_end_id if reader is None else (lambda: None))
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.idle_sleep = idle_sleep
+        self._groups: Dict[FilterKey, Tuple[Predicate, Set[LogSubscription]]] = {}
+        self._tail: Optional[asyncio.Task] = None
+        self._last_id = "$"
+        self._stats = {"upstream_reads": 0, "rows_in": 0, "deliveries": 0, "dropped": 0, "read_errors": 0}
+
+    # --- subscribers -----------------------------------------------------
+
+    def subscribe(
+        self,
+        severity: Optional[str] = None,
+        service: Optional[str] = None,
+        region: Optional[str] = None,
+    ) -> LogSubscription:
+        """Register a subscriber and start the tail if it isn't running.
+
+        A new tail starts at the end of the stream: rows appended while
+        nobody was subscribed are not replayed as live.
+        """
+        key = filter_key(severity, service, region)
+        if key not in self._groups:
+            self._groups[key] = (compile_log_filter(key), set())
+        subscription = LogSubscription(self, key, self.max_queue)
+        self._groups[key][1].add(subscription)
+
+        if self._tail is None or self._tail.done():
+            self._last_id = "$"
+            self._tail = asyncio.ensure_future(self._run_tail())
+        return subscription
+
+    def unsubscribe(self, subscription: LogSubscription) -> None:
+        """Remove a subscriber; the tail stops with the last one."""
+        group = self._groups.get(subscription.key)
+        if group is None or subscription not in group[1]:
+            return
+        group[1].discard(subscription)
+        self._stats["dropped"] += subscription.dropped
+        if not group[1]:
+            del self._groups[subscription.key]
+        if not self._groups and self._tail is not None:
+            self._tail.cancel()
+            self._tail = None
+            self._last_id = "$"
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subs) for _, subs in self._groups.values())
+
+    # --- fan-out ---------------------------------------------------------
+
+    def publish(self, rows: List[Dict[str, Any]]) -> int:
+        """Push rows to every subscriber whose filter matches. Returns deliveries."""
+        self._stats["rows_in"] += len(rows)
+        delivered = 0
+        for predicate, subscriptions in self._groups.values():
+            matches = [row for row in rows if predicate(row)]
+            if not matches:
+                continue
+            for subscription in subscriptions:
+                for row in matches:
+                    subscription.offer(row)
+            delivered += len(matches) * len(subscriptions)
+        self._stats["deliveries"] += delivered
+        return delivered
+
+    # --- upstream --------------------------------------------------------
+
+    def _read_redis(self, last_id: str, count: int) -> List[Tuple[str, Dict[str, Any]]]:
+        entries = []
+        for _stream, messages in self.redis.stream_read(self.stream_key, last_id, count) or []:
+            for entry_id, fields in messages:
+                try:
+                    entries.append((entry_id, json.loads(fields["row"])))
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.warning(f"Skipping malformed log stream entry {entry_id}: {e}")
+        return entries
+
+    def _redis_end_id(self) -> Optional[str]:
+        return self.redis.stream_last_id(self.stream_key)
+
+    async def _resolve_start(self) -> None:
+        """Replace "$" with the newest entry id, so later reads miss nothing."""
+        try:
+            end_id = await asyncio.to_thread(self._end_id)
+        except Exception as e:
+            logger.warning(f"Log stream end lookup failed: {e}")
+            return
+        if end_id and self._last_id == "$":
+            self._last_id = end_id
+
+    async def _run_tail(self) -> None:
+        while True:
+            # "$" only returns entries added during the read itself
+            if self._last_id == "$":
+                await self._resolve_start()
+            try:
+                entries = await asyncio.to_thread(self._reader, self._last_id, self.batch_size)
+            except Exception as e:
+                self._stats["read_errors"] += 1
+                logger.warning(f"Log stream read failed: {e}")
+                entries = []
+            self._stats["upstream_reads"] += 1
+
+            if not entries:
+                await asyncio.sleep(self.idle_sleep)
+                continue
+            self._last_id = entries[-1][0]
+            self.publish([row for _, row in entries])
+
+    # --- reporting -------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["subscribers"] = self.subscriber_count
+        stats["filters"] = len(self._groups)
+        stats["tail_running"] = self._tail is not None and not self._tail.done()
+        return stats
+
+
+# Singleton instance
+log_broker = LogStreamBroker()
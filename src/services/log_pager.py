@@ -0,0 +1,234 @@
+"""Keyset pagination over log list queries with BigQuery page-token reuse.
+
+Pages are keyed on ``(event_timestamp, log_id)`` cursors, so any page can be
+fetched with a fresh query. To avoid re-scanning for every page, a fresh
+query asks for ``prefetch_pages`` pages of rows (``LIMIT`` barely changes
+the bytes BigQuery scans), serves the first, and records the job's
+destination table and page token in Redis under the cursor it handed out.
+A request presenting that cursor with the same filters reads the next page
+straight from the destination table; if the entry is missing, expired or
+too short, it falls back to a fresh keyset query.
+
+Cursor state lives in Redis through the synchronous ``redis_service``, so
+those reads and writes run in ``asyncio.to_thread`` rather than on the loop.
+
+When the builder has a hot tier (src.services.hot_tier), the newest part of
+the window is read from it first; BigQuery is only queried, for rows older
+than the hot tier's coverage, when those rows don't fill the page.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from src.glass_pane.query_builder import CanonicalQueryBuilder, LogQueryParams, decode_cursor, encode_cursor
+from src.services.bq_query_service import BigQueryQueryService, QueryResult, bq_query_service
+from src.services.redis_service import redis_service
+
+logger = logging.getLogger(__name__)
+
+LOG_PAGE_PREFETCH = int(os.getenv("LOG_PAGE_PREFETCH", "5"))
+LOG_CURSOR_TTL_SEC = int(os.getenv("LOG_CURSOR_TTL_SEC", "900"))
+
+
+def _table_id(destination: Any) -> str:
+    if hasattr(destination, "table_id"):
+        return f"{destination.project}.{destination.dataset_id}.{destination.table_id}"
+    return str(destination)
+
+
+@dataclass
+class LogPage:
+    """An open page of log rows; read it with ``LogPager.read``."""
+    result: Optional[QueryResult]  # None when the hot tier serves the whole page
+    params: LogQueryParams
+    use_envelope: bool
+    page_size: int
+    reused: bool
+    complete: bool  # the destination holds every matching row, not a LIMITed prefix
+    rows_read: int = 0
+    last_row: Optional[Dict[str, Any]] = None
+    hot_rows: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def source(self) -> str:
+        """Where the rows come from: hot, cache, query or hot+query."""
+        if self.result is None:
+            return "hot"
+        bq = "cache" if self.reused else "query"
+        return f"hot+{bq}" if self.hot_rows else bq
+
+    @property
+    def next_cursor(self) -> Optional[str]:
+        """Cursor for the following page, or None if this was the last one."""
+        if self.last_row is None or self.rows_read < self.params.limit:
+            return None
+        return encode_cursor(self.last_row["event_timestamp"], self.last_row["log_id"])
+
+
+class LogPager:
+    """Opens log pages, reusing cached query results when a cursor allows it."""
+
+    def __init__(
+        self,
+        query_service: BigQueryQueryService = bq_query_service,
+        redis=redis_service,
+        prefetch_pages: int = LOG_PAGE_PREFETCH,
+        cursor_ttl: int = LOG_CURSOR_TTL_SEC,
+    ):
+        self.query_service = query_service
+        self.redis = redis
+        self.prefetch_pages = max(1, prefetch_pages)
+        self.cursor_ttl = cursor_ttl
+        self._stats = {"fresh": 0, "reused": 0, "reuse_failed": 0, "hot": 0}
+
+    def _state_key(self, params: LogQueryParams, use_envelope: bool, cursor: str) -> str:
+        shape = asdict(replace(params, cursor=None, limit=0))
+        material = json.dumps([shape, use_envelope, cursor], sort_keys=True)
+        return f"logcursor:{hashlib.sha256(material.encode()).hexdigest()[:32]}"
+
+    async def open(
+        self,
+        builder: CanonicalQueryBuilder,
+        params: LogQueryParams,
+        use_envelope: bool = False,
+        page_size: Optional[int] = None,
+        allow_reuse: bool = True,
+    ) -> LogPage:
+        """
+        Open a page of up to ``params.limit`` rows.
+
+        Args:
+            builder: Query builder for fresh queries
+            params: Filters, page size (limit) and optional cursor
+            use_envelope: Include Universal Envelope fields
+            page_size: Rows per BigQuery page read (default: params.limit)
+            allow_reuse: Read from a cached result when the cursor has one
+
+        Returns:
+            LogPage whose first BigQuery page has not been read yet
+        """
+        page_size = page_size or params.limit
+
+        if params.cursor and allow_reuse:
+            state = await asyncio.to_thread(
+                self.redis.get_cache, self._state_key(params, use_envelope, params.cursor)
+            )
+            usable = state and (state["complete"] or state["total_rows"] - state["position"] >= params.limit)
+            if usable:
+                result = self.query_service.resume(
+                    state["destination"],
+                    state["page_token"],
+                    page_size=page_size,
+                    max_results=params.limit,
+                    offset=state["position"],
+                )
+                result.total_rows = state["total_rows"]
+                self._stats["reused"] += 1
+                return LogPage(result, params, use_envelope, page_size, reused=True, complete=state["complete"])
+
+        hot_rows: List[Dict[str, Any]] = []
+        boundary = builder.hot_boundary(use_envelope)
+        if boundary is not None:
+            cursor_ts = decode_cursor(params.cursor)[0] if params.cursor else None
+            if cursor_ts is not None and cursor_ts.tzinfo is not None:
+                cursor_ts = cursor_ts.astimezone(timezone.utc).replace(tzinfo=None)
+            # A cursor older than the boundary has nothing left in the hot tier
+            if cursor_ts is None or cursor_ts >= boundary:
+                query = builder.build_hot_list_query(params)
+                hot_rows = await builder.hot_tier.query(query["sql"], query["params"])
+                self._stats["hot"] += 1
+            window_start = datetime.utcnow() - timedelta(hours=params.hours)
+            if len(hot_rows) >= params.limit or window_start >= boundary:
+                return LogPage(None, params, use_envelope, page_size, reused=False, complete=True, hot_rows=hot_rows)
+
+        query = builder.build_list_query(
+            params, use_envelope=use_envelope, prefetch_pages=self.prefetch_pages, before=boundary
+        )
+        result = await self.query_service.open_result(
+            query["sql"], query["params"], page_size=page_size, max_results=params.limit - len(hot_rows)
+        )
+        self._stats["fresh"] += 1
+        return LogPage(result, params, use_envelope, page_size, reused=False, complete=False, hot_rows=hot_rows)
+
+    async def read(
+        self,
+        builder: CanonicalQueryBuilder,
+        page: LogPage,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yield the page's rows batch by batch as BigQuery returns them.
+
+        Hot-tier rows come first. A reused result that can no longer be
+        read (e.g. its destination table expired) is replaced by a fresh
+        query before any rows are yielded. Once exhausted, the next cursor
+        is registered for reuse.
+        """
+        if page.hot_rows:
+            page.rows_read += len(page.hot_rows)
+            page.last_row = page.hot_rows[-1]
+            yield page.hot_rows
+        if page.result is None:
+            return
+
+        try:
+            rows = await page.result.next_page()
+        except Exception as e:
+            if not page.reused:
+                raise
+            logger.info(f"Cached log page unavailable, re-querying: {e}")
+            self._stats["reuse_failed"] += 1
+            fresh = await self.open(
+                builder, page.params, page.use_envelope, page_size=page.page_size, allow_reuse=False
+            )
+            async for rows in self.read(builder, fresh):
+                yield rows
+            page.result, page.reused, page.complete = fresh.result, False, fresh.complete
+            page.hot_rows, page.rows_read, page.last_row = fresh.hot_rows, fresh.rows_read, fresh.last_row
+            return
+
+        while True:
+            if rows:
+                page.rows_read += len(rows)
+                page.last_row = rows[-1]
+                yield rows
+            if page.result.done or page.rows_read >= page.params.limit:
+                break
+            rows = await page.result.next_page()
+
+        await self._remember(page)
+
+    async def _remember(self, page: LogPage) -> None:
+        """Map the next cursor to where its rows start in the destination table."""
+        cursor = page.next_cursor
+        result = page.result
+        if not cursor or not result.next_page_token or result.destination is None:
+            return
+        total_rows = result.total_rows or 0
+        complete = page.complete or (
+            not page.reused and total_rows < page.params.limit * self.prefetch_pages
+        )
+        await asyncio.to_thread(
+            self.redis.set_cache,
+            self._state_key(page.params, page.use_envelope, cursor),
+            {
+                "destination": _table_id(result.destination),
+                "page_token": result.next_page_token,
+                "position": result.position,
+                "total_rows": total_rows,
+                "complete": complete,
+            },
+            ttl=self.cursor_ttl,
+        )
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self._stats)
+
+
+# Singleton instance
+log_pager = LogPager()
@@ -0,0 +1,123 @@
+"""Log lookups shared by the GraphQL resolvers and their DataLoaders.
+
+Every read goes through one place so the query builder settings, hot tier
+routing and result caching are the same for each caller:
+
+- ``list_logs`` returns the first page for a filter via ``logs_cache``.
+- ``logs_by_id`` answers a batch of ids with one ``log_id IN UNNEST(@ids)``
+  query (after checking the hot tier), which is what a DataLoader needs to
+  collapse many ``log(id)`` fields into a single scan.
+- ``service_stats`` reuses the ``/api/stats/services`` query and cache.
+
+Cached log rows are stored in the columnar ``pack_rows`` form.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from src.glass_pane.config import glass_config
+from src.glass_pane.query_builder import CanonicalQueryBuilder, LogQueryParams
+from src.services.bq_query_service import bq_query_service
+from src.services.hot_tier import hot_tier_store
+from src.services.query_cache import logs_cache, pack_rows, stats_cache, unpack_rows
+
+logger = logging.getLogger(__name__)
+
+
+class LogQueryService:
+    """Cached, hot-tier aware log queries over the canonical table."""
+
+    def __init__(
+        self,
+        query_service=bq_query_service,
+        hot_tier=hot_tier_store,
+        cache=logs_cache,
+        stats=stats_cache,
+    ):
+        self.query_service = query_service
+        self.hot_tier = hot_tier
+        self.cache = cache
+        self.stats = stats
+
+    def builder(self) -> CanonicalQueryBuilder:
+        return CanonicalQueryBuilder(
+            project_id=glass_config.logs_project_id,
+            view_name=glass_config.canonical_view,
+            rollups_since=glass_config.rollups_since,
+            search_mode=glass_config.search_mode,
+            hot_tier=self.hot_tier if self.hot_tier.enabled else None,
+        )
+
+    async def list_logs(self, params: LogQueryParams) -> List[Dict[str, Any]]:
+        """Newest-first rows for a filter (first page only)."""
+        builder = self.builder()
+        if builder.hot_covers(params.hours):
+            query = builder.build_hot_list_query(params)
+            return await self.hot_tier.query(query["sql"], query["params"])
+
+        query = builder.build_list_query(params)
+
+        async def load() -> Dict[str, Any]:
+            rows = await self.query_service.query(query["sql"], query["params"], max_results=params.limit)
+            return pack_rows(rows)
+
+        cached = await self.cache.get_or_load(query["sql"], query["params"], load)
+        return unpack_rows(cached.value)
+
+    async def logs_by_id(
+        self,
+        log_ids: List[str],
+        hours: Optional[int] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Rows for a batch of log ids.
+
+        Args:
+            log_ids: Ids to look up (duplicates are fine)
+            hours: Lookback window for the BigQuery scan (default max_time_window_hours)
+
+        Returns:
+            Rows keyed by log_id; ids not found in the window are absent
+        """
+        if not log_ids:
+            return {}
+        builder = self.builder()
+        found: Dict[str, Dict[str, Any]] = {}
+
+        if builder.hot_tier is not None:
+            query = builder.build_hot_logs_by_id_query(log_ids)
+            for row in await self.hot_tier.query(query["sql"], query["params"]):
+                found[row["log_id"]] = row
+
+        missing = [log_id for log_id in dict.fromkeys(log_ids) if log_id not in found]
+        if not missing:
+            return found
+
+        query = builder.build_logs_by_id_query(missing, hours=hours or glass_config.max_time_window_hours)
+
+        async def load() -> Dict[str, Any]:
+            return pack_rows(await self.query_service.query(query["sql"], query["params"]))
+
+        cached = await self.cache.get_or_load(query["sql"], query["params"], load)
+        for row in unpack_rows(cached.value):
+            found[row["log_id"]] = row
+        return found
+
+    async def service_stats(self, hours: int) -> List[Dict[str, Any]]:
+        """Per-service counts, as served by /api/stats/services."""
+        builder = self.builder()
+        if builder.hot_covers(hours):
+            query = builder.build_hot_count_by_service_query(hours=hours)
+            return await self.hot_tier.query(query["sql"], query["params"])
+
+        query = builder.build_count_by_service_query(hours=hours)
+        cached = await self.stats.get_or_load(
+            query["sql"],
+            query["params"],
+            lambda: self.query_service.query(query["sql"], query["params"]),
+        )
+        return cached.value
+
+
+# Singleton instance
+log_query_service = LogQueryService()
@@ -0,0 +1,195 @@
+"""Shared Pub/Sub publisher for tool metrics and chat dual-write.
+
+Creating a ``PublisherClient`` opens gRPC channels and starts batching
+threads, so doing it per tool turn (as the metered tool node did) costs
+far more than the publish itself. ``pubsub_publisher`` creates one client
+on first use and is shared by every caller in the process:
+
+- ``BatchSettings`` coalesce messages into one publish RPC per topic, up to
+  ``PUBSUB_BATCH_MAX_MESSAGES`` / ``PUBSUB_BATCH_MAX_BYTES`` or after
+  ``PUBSUB_BATCH_MAX_LATENCY_SEC``, whichever comes first.
+- Publisher flow control bounds the messages and bytes waiting to be sent;
+  ``PUBSUB_FLOW_LIMIT_BEHAVIOR`` decides whether publishers block, fail
+  or ignore the limit once it is reached.
+- Outstanding publishes are tracked so ``shutdown()`` (called from the
+  FastAPI lifespan) can flush them before the process exits.
+
+``FakePublisherClient`` stands in for ``PublisherClient`` in tests and
+local runs without credentials:
+
+    publisher = SharedPublisher(client_factory=FakePublisherClient)
+"""
+
+import itertools
+import logging
+import os
+import threading
+from concurrent.futures import Future, wait
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+PUBSUB_BATCH_MAX_MESSAGES = int(os.getenv("PUBSUB_BATCH_MAX_MESSAGES", "100"))
+PUBSUB_BATCH_MAX_BYTES = int(os.getenv("PUBSUB_BATCH_MAX_BYTES", str(1024 * 1024)))
+PUBSUB_BATCH_MAX_LATENCY_SEC = float(os.getenv("PUBSUB_BATCH_MAX_LATENCY_SEC", "0.05"))
+PUBSUB_FLOW_MAX_MESSAGES = int(os.getenv("PUBSUB_FLOW_MAX_MESSAGES", "1000"))
+PUBSUB_FLOW_MAX_BYTES = int(os.getenv("PUBSUB_FLOW_MAX_BYTES", str(10 * 1024 * 1024)))
+# block | error | ignore
+PUBSUB_FLOW_LIMIT_BEHAVIOR = os.getenv("PUBSUB_FLOW_LIMIT_BEHAVIOR", "block").lower()
+PUBSUB_SHUTDOWN_SEC = float(os.getenv("PUBSUB_SHUTDOWN_SEC", "10"))
+
+
+def create_publisher_client() -> Any:
+    """PublisherClient configured with this module's batch and flow-control settings."""
+    from google.cloud import pubsub_v1
+    from google.cloud.pubsub_v1 import types
+
+    batch_settings = types.BatchSettings(
+        max_messages=PUBSUB_BATCH_MAX_MESSAGES,
+        max_bytes=PUBSUB_BATCH_MAX_BYTES,
+        max_latency=PUBSUB_BATCH_MAX_LATENCY_SEC,
+    )
+    flow_control = types.PublishFlowControl(
+        message_limit=PUBSUB_FLOW_MAX_MESSAGES,
+        byte_limit=PUBSUB_FLOW_MAX_BYTES,
+        limit_exceeded_behavior=types.LimitExceededBehavior(PUBSUB_FLOW_LIMIT_BEHAVIOR),
+    )
+    return pubsub_v1.PublisherClient(
+        batch_settings=batch_settings,
+        publisher_options=types.PublisherOptions(flow_control=flow_control),
+    )
+
+
+class FakePublisherClient:
+    """In-memory PublisherClient: records messages and resolves futures immediately."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.published: List[Tuple[str, bytes, Dict[str, str]]] = []
+        self.stopped = False
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def topic_path(project: str, topic: str) -> str:
+        return f"projects/{project}/topics/{topic}"
+
+    def publish(self, topic: str, data: bytes, **attrs: str) -> Future:
+        if self.stopped:
+            raise RuntimeError("Cannot publish on a stopped publisher.")
+        future: Future = Future()
+        with self._lock:
+            self.published.append((topic, data, attrs))
+            message_id = str(next(self._ids))
+        if self.fail:
+            future.set_exception(RuntimeError("publish failed"))
+        else:
+            future.set_result(message_id)
+        return future
+
+    def stop(self) -> None:
+        self.stopped = True
+
+    def messages(self, topic: Optional[str] = None) -> List[bytes]:
+        """Data of the messages published (optionally to one topic)."""
+        with self._lock:
+            return [data for t, data, _ in self.published if topic is None or t == topic]
+
+
+class SharedPublisher:
+    """Lazily created, process-wide publisher with outstanding-publish tracking."""
+
+    def __init__(self, client_factory: Callable[[], Any] = create_publisher_client):
+        self._client_factory = client_factory
+        self._client: Optional[Any] = None
+        self._lock = threading.Lock()
+        self._outstanding: Set[Future] = set()
+        self._stats = {"published": 0, "failed": 0}
+
+    def _get_client(self) -> Optional[Any]:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    try:
+                        self._client = self._client_factory()
+                        logger.info("Shared Pub/Sub publisher initialized")
+                    except Exception as e:
+                        logger.warning(f"Failed to initialize Pub/Sub publisher: {e}")
+                        return None
+        return self._client
+
+    @property
+    def available(self) -> bool:
+        return self._get_client() is not None
+
+    @staticmethod
+    def topic_path(project: str, topic: str) -> str:
+        return f"projects/{project}/topics/{topic}"
+
+    def publish(self, topic_path: str, data: bytes, **attrs: str) -> Optional[Future]:
+        """Queue a message for the next batch to ``topic_path``.
+
+        Returns:
+            The publish future, or None if no client could be created
+
+        Raises:
+            Exception: If the client rejects the message (e.g. flow control
+                with ``PUBSUB_FLOW_LIMIT_BEHAVIOR=error``)
+        """
+        client = self._get_client()
+        if client is None:
+            return None
+        future = client.publish(topic_path, data, **attrs)
+        with self._lock:
+            self._outstanding.add(future)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future) -> None:
+        try:
+            future.result()
+            outcome = "published"
+        except Exception as e:
+            outcome = "failed"
+            logger.error(f"Pub/Sub publish failed: {e}")
+        with self._lock:
+            self._outstanding.discard(future)
+            self._stats[outcome] += 1
+
+    def flush(self, timeout: float = PUBSUB_SHUTDOWN_SEC) -> int:
+        """Wait for outstanding publishes. Returns how many are still pending."""
+        with self._lock:
+            outstanding = list(self._outstanding)
+        if not outstanding:
+            return 0
+        _, not_done = wait(outstanding, timeout=timeout)
+        if not_done:
+            logger.warning(f"{len(not_done)} Pub/Sub publishes still pending after {timeout}s")
+        return len(not_done)
+
+    def shutdown(self, timeout: float = PUBSUB_SHUTDOWN_SEC) -> int:
+        """Commit open batches, wait for them and stop the client.
+
+        A later ``publish`` creates a new client.
+        """
+        with self._lock:
+            client, self._client = self._client, None
+        if client is None:
+            return 0
+        try:
+            # stop() commits every open batch before returning
+            client.stop()
+        except Exception as e:
+            logger.warning(f"Failed to stop Pub/Sub publisher: {e}")
+        return self.flush(timeout)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["outstanding"] = len(self._outstanding)
+        return stats
+
+
+# Singleton instance
+pubsub_publisher = SharedPublisher()
@@ -0,0 +1,241 @@
+"""Bulk Qdrant writer: parallel ``wait=False`` batches with a durability barrier.
+
+Points are consumed from any iterable (list, generator, BigQuery page
+stream) and grouped into batches sized by ``batch_optimizer``. Batches
+are sent concurrently with ``wait=False``, so each request returns as
+soon as Qdrant has acknowledged it into the WAL instead of after it has
+been indexed.
+
+Ordering: every point id is routed to one lane (``crc32(id) % concurrency``)
+and each lane sends its batches sequentially. Two writes of the same id
+therefore reach Qdrant in stream order, so the last write wins exactly as
+it would with a single synchronous writer.
+
+Durability: Qdrant applies acknowledged updates in sequence, so once
+every lane has drained, one final request with ``wait=True`` only
+returns after everything queued before it has been applied. The writer
+holds back the last partial batch for that barrier (or re-sends the last
+point written when there is none).
+"""
+
+import logging
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, Iterable, List, Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from src.services.batch_optimizer import BatchOptimizer, batch_optimizer
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+BULK_UPSERT_CONCURRENCY = int(os.getenv("BULK_UPSERT_CONCURRENCY", "4"))
+BULK_MAX_IN_FLIGHT = int(os.getenv("BULK_MAX_IN_FLIGHT", "0"))  # 0 = 2x concurrency
+BULK_MAX_RETRIES = 3
+BULK_RETRY_DELAY = 1.0
+
+
+def create_qdrant_client(
+    url: str,
+    api_key: Optional[str] = None,
+    timeout: float = 60.0,
+    prefer_grpc: bool = QDRANT_PREFER_GRPC,
+) -> QdrantClient:
+    """Create a Qdrant client, optionally over gRPC.
+
+    gRPC roughly halves serialization cost for large vector batches; it
+    needs port 6334 (``QDRANT_GRPC_PORT``) reachable next to the REST port.
+    """
+    if prefer_grpc:
+        return QdrantClient(
+            url=url,
+            api_key=api_key,
+            timeout=int(timeout),
+            prefer_grpc=True,
+            grpc_port=QDRANT_GRPC_PORT,
+        )
+    return QdrantClient(url=url, api_key=api_key, timeout=timeout)
+
+
+@dataclass
+class BulkWriteStats:
+    """Outcome of one bulk write."""
+    points: int = 0
+    failed_points: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+    elapsed_s: float = 0.0
+    durable: bool = False
+
+    @property
+    def written(self) -> int:
+        return self.points - self.failed_points
+
+    @property
+    def points_per_sec(self) -> float:
+        return self.written / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["written"] = self.written
+        data["points_per_sec"] = round(self.points_per_sec, 1)
+        return data
+
+
+class QdrantBulkWriter:
+    """Concurrent, order-preserving bulk upserter for one collection."""
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        collection: str,
+        concurrency: int = BULK_UPSERT_CONCURRENCY,
+        batch_size: Optional[int] = None,
+        max_in_flight: int = BULK_MAX_IN_FLIGHT,
+        max_retries: int = BULK_MAX_RETRIES,
+        retry_delay: float = BULK_RETRY_DELAY,
+        optimizer: Optional[BatchOptimizer] = batch_optimizer,
+        throttle: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Args:
+            client: Qdrant client (REST or gRPC)
+            collection: Target collection
+            concurrency: Number of lanes sending batches in parallel
+            batch_size: Fixed batch size; None follows ``optimizer.upsert_batch_size``
+            max_in_flight: Cap on queued + running batches (bounds memory)
+            max_retries: Attempts per batch before it is counted as failed
+            retry_delay: Base backoff in seconds (doubled per attempt)
+            optimizer: Receives per-batch latency samples; None disables tuning
+            throttle: Called before every request (e.g. a rate limiter); must be thread-safe
+        """
+        self.client = client
+        self.collection = collection
+        self.concurrency = max(1, concurrency)
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight or 2 * self.concurrency
+        self.max_retries = max(1, max_retries)
+        self.retry_delay = retry_delay
+        self.optimizer = optimizer
+        self.throttle = throttle
+
+    def _current_batch_size(self) -> int:
+        if self.batch_size:
+            return self.batch_size
+        if self.optimizer is not None:
+            return self.optimizer.upsert_batch_size
+        return 100
+
+    def _lane(self, point_id) -> int:
+        return zlib.crc32(str(point_id).encode("utf-8")) % self.concurrency
+
+    def _send(self, points: List[models.PointStruct], wait: bool) -> bool:
+        """Upsert one batch with retries; returns False once retries are exhausted."""
+        for attempt in range(self.max_retries):
+            if self.throttle is not None:
+                self.throttle()
+            start = time.time()
+            try:
+                self.client.upsert(collection_name=self.collection, points=points, wait=wait)
+                self._record(start, True)
+                return True
+            except Exception as e:
+                self._record(start, False)
+                if attempt < self.max_retries - 1:
+                    backoff = self.retry_delay * (2 ** attempt)
+                    logger.warning(f"Qdrant bulk upsert error on {self.collection}, retrying in {backoff}s: {e}")
+                    time.sleep(backoff)
+                else:
+                    logger.error(f"Failed to upsert {len(points)} points to {self.collection} "
+                                 f"after {self.max_retries} attempts: {e}")
+        return False
+
+    def _record(self, start: float, success: bool) -> None:
+        if self.optimizer is not None:
+            self.optimizer.record_upsert_latency((time.time() - start) * 1000, success)
+
+    def write(self, points: Iterable[models.PointStruct], durable: bool = True) -> BulkWriteStats:
+        """Upsert a stream of points.
+
+        Args:
+            points: Points to write; consumed lazily
+            durable: Finish with a ``wait=True`` barrier so every point is
+                applied (searchable) when this returns
+
+        Returns:
+            BulkWriteStats with counts, elapsed time and points/sec
+        """
+        stats = BulkWriteStats()
+        stats_lock = threading.Lock()
+        in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        lanes = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"qdrant-bulk-{i}")
+                 for i in range(self.concurrency)]
+        buffers: List[List[models.PointStruct]] = [[] for _ in range(self.concurrency)]
+        futures: List[Future] = []
+        last_point: Optional[models.PointStruct] = None
+        start = time.time()
+
+        def run_batch(batch: List[models.PointStruct]) -> None:
+            try:
+                ok = self._send(batch, wait=False)
+                with stats_lock:
+                    stats.batches += 1
+                    if not ok:
+                        stats.failed_batches += 1
+                        stats.failed_points += len(batch)
+            finally:
+                in_flight.release()
+
+        def submit(lane: int) -> None:
+            batch, buffers[lane] = buffers[lane], []
+            in_flight.acquire()  # backpressure on the producer
+            futures.append(lanes[lane].submit(run_batch, batch))
+
+        try:
+            for point in points:
+                lane = self._lane(point.id)
+                buffers[lane].append(point)
+                stats.points += 1
+                last_point = point
+                if len(buffers[lane]) >= self._current_batch_size():
+                    submit(lane)
+
+            # Hold back one tail batch as the barrier; flush the rest
+            tails = [i for i, buf in enumerate(buffers) if buf]
+            barrier_lane = tails[-1] if durable and tails else None
+            for lane in tails:
+                if lane != barrier_lane:
+                    submit(lane)
+            for future in futures:
+                future.result()
+
+            if durable and last_point is not None:
+                # Lanes have drained, so the barrier is ordered after every
+                # acknowledged batch and sees the final version of its ids.
+                barrier = buffers[barrier_lane] if barrier_lane is not None else [last_point]
+                ok = self._send(barrier, wait=True)
+                stats.durable = ok
+                if barrier_lane is not None:
+                    stats.batches += 1
+                    if not ok:
+                        stats.failed_batches += 1
+                        stats.failed_points += len(barrier)
+        finally:
+            for executor in lanes:
+                executor.shutdown(wait=True)
+
+        stats.elapsed_s = time.time() - start
+        logger.info(
+            f"Bulk upsert to {self.collection}: {stats.written}/{stats.points} points "
+            f"in {stats.batches} batches, {stats.elapsed_s:.2f}s "
+            f"({stats.points_per_sec:.0f} points/sec, concurrency={self.concurrency}, durable={stats.durable})"
+        )
+        return stats
@@ -7,12 +7,13 @@ Optimizations applied:
 - Scalar Quantization (int8): ~4x memory reduction, vectors in RAM
 - HNSW Config: m=32, ef_construct=200 for better recall
 - Tenant Indexes: severity, service_name, log_type for partitioned search
-- Payload Indexes: timestamp.*, http_status, source_table, trace_id
+- Payload Indexes: timestamp_epoch (principal range), timestamp.*, http_status,
+  source_table, trace_id
+- Hybrid search: dense + BM25 sparse prefetch fused with RRF
 """
 
 import os
 from dataclasses import dataclass
-from datetime import datetime, timedelta
 from typing import Any, Optional
 
 import httpx
@@ -20,6 +21,9 @@ from dotenv import load_dotenv
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 
+from src.services.qdrant_schema import SPARSE_VECTOR_NAME, time_range_condition
+from src.services.sparse_encoder import sparse_encoder
+
 load_dotenv()
 
 # Configuration
@@ -142,16 +146,9 @@ class OptimizedQdrantService:
                 )
             )
 
-        # Time-based filtering using timestamp indexes
+        # Time-based filtering on the principal timestamp_epoch range index
         if hours_back:
-            cutoff = datetime.utcnow() - timedelta(hours=hours_back)
-            # Use year/month/day/hour indexes for range filtering
-            conditions.append(
-                models.FieldCondition(
-                    key="timestamp.year",
-                    range=models.Range(gte=cutoff.year)
-                )
-            )
+            conditions.append(time_range_condition(hours_back=hours_back))
 
         if not conditions:
             return None
@@ -220,21 +217,76 @@ class OptimizedQdrantService:
         )
 
         # Convert to SearchResult objects
-        return [
-            SearchResult(
-                score=point.score,
-                log_id=point.payload.get("log_id", ""),
-                severity=point.payload.get("severity", ""),
-                service_name=point.payload.get("service_name", ""),
-                message=point.payload.get("message", ""),
-                timestamp=point.payload.get("timestamp", {}).get("iso"),
-                trace_id=point.payload.get("trace_id"),
-                http_status=point.payload.get("http_status"),
-                source_table=point.payload.get("source_table"),
-                payload=point.payload,
+        return [self._to_result(point) for point in results.points]
+
+    def hybrid_search(
+        self,
+        query: str,
+        limit: int = 10,
+        hnsw_ef: int = 128,
+        prefetch_limit: Optional[int] = None,
+        **filters,
+    ) -> list[SearchResult]:
+        """Hybrid dense + BM25 sparse search fused with RRF.
+
+        Exact tokens (error codes, request IDs, hostnames) are matched by the
+        sparse branch, paraphrases by the dense branch. Requires the collection
+        to have been created with the sparse vector; otherwise the query fails
+        and callers should fall back to ``semantic_search``.
+
+        Args:
+            query: Natural language or literal query
+            limit: Maximum number of fused results
+            hnsw_ef: HNSW ef for the dense branch
+            prefetch_limit: Candidates per branch (default: 4x limit)
+            **filters: Same filters as ``semantic_search``
+        """
+        query_vector = self._embed_text(query)
+        sparse_vector = sparse_encoder.encode_query(query)
+        query_filter = self._build_filters(**filters)
+        branch_limit = prefetch_limit or max(limit * 4, limit + 10)
+
+        prefetch = [
+            models.Prefetch(
+                query=query_vector,
+                filter=query_filter,
+                limit=branch_limit,
+                params=models.SearchParams(hnsw_ef=hnsw_ef),
             )
-            for point in results.points
         ]
+        if sparse_vector.indices:
+            prefetch.append(
+                models.Prefetch(
+                    query=sparse_vector,
+                    using=SPARSE_VECTOR_NAME,
+                    filter=query_filter,
+                    limit=branch_limit,
+                )
+            )
+
+        results = self.client.query_points(
+            collection_name=self.collection,
+            prefetch=prefetch,
+            query=models.FusionQuery(fusion=models.Fusion.RRF),
+            limit=limit,
+            with_payload=True,
+        )
+        return [self._to_result(point) for point in results.points]
+
+    @staticmethod
+    def _to_result(point, score: Optional[float] = None) -> SearchResult:
+        return SearchResult(
+            score=point.score if score is None else score,
+            log_id=point.payload.get("log_id", ""),
+            severity=point.payload.get("severity", ""),
+            service_name=point.payload.get("service_name", ""),
+            message=point.payload.get("message", ""),
+            timestamp=point.payload.get("timestamp", {}).get("iso"),
+            trace_id=point.payload.get("trace_id"),
+            http_status=point.payload.get("http_status"),
+            source_table=point.payload.get("source_table"),
+            payload=point.payload,
+        )
 
     def search_errors(
         self,
@@ -274,21 +326,7 @@ class OptimizedQdrantService:
             with_vectors=False,
         )
 
-        return [
-            SearchResult(
-                score=1.0,
-                log_id=point.payload.get("log_id", ""),
-                severity=point.payload.get("severity", ""),
-                service_name=point.payload.get("service_name", ""),
-                message=point.payload.get("message", ""),
-                timestamp=point.payload.get("timestamp", {}).get("iso"),
-                trace_id=point.payload.get("trace_id"),
-                http_status=point.payload.get("http_status"),
-                source_table=point.payload.get("source_table"),
-                payload=point.payload,
-            )
-            for point in results[0]
-        ]
+        return [self._to_result(point, score=1.0) for point in results[0]]
 
     def get_collection_stats(self) -> dict[str, Any]:
         """Get collection statistics and configuration."""
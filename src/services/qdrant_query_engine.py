@@ -12,24 +12,68 @@ from typing import List, Dict, Any, Optional, Union
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 
+from src.services.qdrant_schema import (
+    QDRANT_REQUIRE_TENANT,
+    SPARSE_VECTOR_NAME,
+    MissingTenantFilterError,
+    has_tenant_condition,
+    tenant_condition,
+    time_range_condition,
+)
+from src.services.sparse_encoder import sparse_encoder
+
 logger = logging.getLogger(__name__)
 
 # Config
 QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", "")
 QDRANT_COLLECTION = os.getenv("QDRANT_COLLECTION", "logs_v1")
-QDRANT_DENSE_VECTOR = os.getenv("QDRANT_DENSE_VECTOR", "dense")
-QDRANT_SPARSE_VECTOR = os.getenv("QDRANT_SPARSE_VECTOR", "sparse")  # If enabled
+# Log collections store the dense vector unnamed; set this only for named-vector collections
+QDRANT_DENSE_VECTOR = os.getenv("QDRANT_DENSE_VECTOR", "")
+QDRANT_SPARSE_VECTOR = SPARSE_VECTOR_NAME
+# Once a collection is migrated to per-tenant graphs (m=0, see
+# scripts/migrate_qdrant_tenant_layout.py) unscoped queries become full scans.
+# QDRANT_TENANT_ID scopes callers that don't pass a tenant; QDRANT_REQUIRE_TENANT
+# (opt-in, for migrated deployments) rejects queries that still have none.
+QDRANT_TENANT_FIELD = os.getenv("QDRANT_TENANT_FIELD", "tenant_id")
+QDRANT_TENANT_ID = os.getenv("QDRANT_TENANT_ID", "")
 
 
 class QdrantQueryEngine:
     """Universal query wrapper for Qdrant /points/query."""
 
-    def __init__(self):
+    def __init__(self, tenant_id: Optional[str] = None):
         self.client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY or None)
         self.collection = QDRANT_COLLECTION
-        self.dense_vector = QDRANT_DENSE_VECTOR
+        self.dense_vector = QDRANT_DENSE_VECTOR or None
         self.sparse_vector = QDRANT_SPARSE_VECTOR
+        self.tenant_field = QDRANT_TENANT_FIELD
+        self.tenant_id = tenant_id or QDRANT_TENANT_ID or None
+        self.require_tenant = QDRANT_REQUIRE_TENANT
+
+    def scope_filter(self, query_filter: Optional[models.Filter]) -> Optional[models.Filter]:
+        """Route a query to a single tenant's HNSW graph.
+
+        Filters that already pin the tenant field pass through; otherwise the
+        engine's default tenant is added. Raises MissingTenantFilterError when
+        neither is available and tenant scoping is required.
+        """
+        if has_tenant_condition(query_filter, self.tenant_field):
+            return query_filter
+        if not self.tenant_id:
+            if self.require_tenant:
+                raise MissingTenantFilterError(
+                    f"Query on {self.collection} requires a {self.tenant_field} filter"
+                )
+            return query_filter
+
+        condition = tenant_condition(self.tenant_field, self.tenant_id)
+        if query_filter is None:
+            return models.Filter(must=[condition])
+        must = query_filter.must or []
+        if not isinstance(must, list):
+            must = [must]
+        return query_filter.model_copy(update={"must": [condition, *must]})
 
     def query_points(
         self,
@@ -43,44 +87,53 @@ class QdrantQueryEngine:
         hnsw_ef: Optional[int] = None,
         prefetch: Optional[List[Dict[str, Any]]] = None,
         fusion: Optional[str] = None,  # "rrf" or "dbsf"
-        formula: Optional[str] = None,  # Formula rescoring
+        formula: Optional[models.FormulaQuery] = None,  # Formula rescoring
         order_by: Optional[models.OrderBy] = None,
+        using: Optional[str] = None,
     ) -> models.QueryResponse:
         """
         Universal query using /points/query.
 
         Supports semantic, filtered, hybrid, formula-rescored queries.
         """
-        params = {}
-        if hnsw_ef:
-            params["hnsw_ef"] = hnsw_ef
+        search_params = models.SearchParams(hnsw_ef=hnsw_ef) if hnsw_ef else None
+        query_filter = self.scope_filter(query_filter)
 
         # Prefetch for multistage/hybrid
+        prefetch_models = None
         if prefetch:
-            # Ensure prefetch limit >= limit + offset for pagination
+            prefetch_models = []
             for p in prefetch:
+                # Ensure prefetch limit >= limit + offset for pagination
                 if "limit" in p and p["limit"] < limit + offset:
                     p["limit"] = limit + offset
                     logger.warning(f"Adjusted prefetch limit to {p['limit']}")
+                # Apply the outer filter inside each branch so fusion only sees matches
+                if query_filter is not None and "filter" not in p:
+                    p["filter"] = query_filter
+                prefetch_models.append(models.Prefetch(**p))
 
-        query_request = models.QueryRequest(
-            vector=query_vector,
-            filter=query_filter,
-            limit=limit,
-            offset=offset,
-            with_payload=with_payload,
-            with_vector=with_vector,
-            score_threshold=score_threshold,
-            params=params,
-            prefetch=prefetch,
-            fusion=fusion,
-            formula=formula,
-            order_by=order_by,
-        )
+        if fusion:
+            query = models.FusionQuery(fusion=models.Fusion(fusion))
+        elif formula is not None:
+            query = formula
+        elif order_by is not None:
+            query = models.OrderByQuery(order_by=order_by)
+        else:
+            query = query_vector
 
         response = self.client.query_points(
             collection_name=self.collection,
-            query=query_request
+            query=query,
+            using=using if query is query_vector else None,
+            prefetch=prefetch_models,
+            query_filter=query_filter,
+            search_params=search_params,
+            limit=limit,
+            offset=offset or None,
+            with_payload=with_payload,
+            with_vectors=with_vector,
+            score_threshold=score_threshold,
         )
         return response
 
@@ -103,6 +156,7 @@ class QdrantQueryEngine:
         params = {}
         if hnsw_ef:
             params["hnsw_ef"] = hnsw_ef
+        query_filter = self.scope_filter(query_filter)
 
         response = self.client.query_points_groups(
             collection_name=self.collection,
@@ -133,6 +187,7 @@ class QdrantQueryEngine:
             query_vector=query_vector,
             limit=limit,
             hnsw_ef=hnsw_ef,
+            using=self.dense_vector,
             **kwargs
         )
 
@@ -150,38 +205,55 @@ class QdrantQueryEngine:
             query_filter=query_filter,
             limit=limit,
             hnsw_ef=hnsw_ef,
+            using=self.dense_vector,
             **kwargs
         )
 
     def hybrid_search(
         self,
         dense_vector: List[float],
-        sparse_vector: Optional[Dict[str, Any]] = None,  # If sparse enabled
+        sparse_vector: Optional[models.SparseVector] = None,
         limit: int = 10,
         fusion: str = "rrf",
         hnsw_ef: int = 64,
+        query_text: Optional[str] = None,
+        prefetch_limit: Optional[int] = None,
         **kwargs
     ) -> models.QueryResponse:
-        """Hybrid search with prefetch + fusion."""
+        """Hybrid search: dense + BM25 sparse prefetch fused with RRF.
+
+        Args:
+            dense_vector: Dense query embedding
+            sparse_vector: Sparse query vector; built from ``query_text`` if omitted
+            limit: Number of fused results
+            fusion: "rrf" or "dbsf"
+            hnsw_ef: HNSW ef for the dense branch
+            query_text: Raw query, encoded with the local BM25 encoder
+            prefetch_limit: Candidates per branch (default: 4x limit)
+        """
+        if sparse_vector is None and query_text:
+            sparse_vector = sparse_encoder.encode_query(query_text)
+
+        branch_limit = prefetch_limit or max(limit * 4, limit + 10)
         prefetch = [
             {
                 "query": dense_vector,
                 "using": self.dense_vector,
-                "limit": limit + 10,  # Buffer
+                "limit": branch_limit,
+                "params": models.SearchParams(hnsw_ef=hnsw_ef),
             }
         ]
-        if sparse_vector:
+        if sparse_vector is not None and sparse_vector.indices:
             prefetch.append({
                 "query": sparse_vector,
                 "using": self.sparse_vector,
-                "limit": limit + 10,
+                "limit": branch_limit,
             })
 
         return self.query_points(
             limit=limit,
             prefetch=prefetch,
             fusion=fusion,
-            hnsw_ef=hnsw_ef,
             **kwargs
         )
 
@@ -247,20 +319,9 @@ class QdrantQueryEngine:
                 match=models.MatchValue(value=trace_id)
             ))
 
-        # Time range
-        if timestamp_from or timestamp_to:
-            time_conditions = []
-            if timestamp_from:
-                time_conditions.append(models.FieldCondition(
-                    key="timestamp",
-                    range=models.DatetimeRange(gte=timestamp_from)
-                ))
-            if timestamp_to:
-                time_conditions.append(models.FieldCondition(
-                    key="timestamp",
-                    range=models.DatetimeRange(lte=timestamp_to)
-                ))
-            if time_conditions:
-                conditions.append(models.Filter(must=time_conditions))
+        # Time range on the indexed epoch field
+        time_condition = time_range_condition(start=timestamp_from, end=timestamp_to)
+        if time_condition:
+            conditions.append(time_condition)
 
         return models.Filter(must=conditions) if conditions else None
\ No newline at end of file
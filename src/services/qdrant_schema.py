@@ -0,0 +1,339 @@
+"""Shared Qdrant payload conventions for log and memory collections.
+
+Every collection that stores time-stamped points writes an integer
+``timestamp_epoch`` (Unix seconds, UTC) next to the hierarchical
+``timestamp`` object. The epoch field carries a range-enabled integer
+index marked ``is_principal`` so Qdrant lays out storage by time and
+time-window filters become real range predicates instead of
+``timestamp.year`` equality checks.
+
+Log collections also carry a named sparse vector (BM25, see
+``sparse_encoder``) next to the unnamed dense vector for hybrid search.
+The sparse vector uses Qdrant's IDF modifier, so term statistics live in
+the collection rather than in each process.
+
+Tenant-scoped collections (``project_id``/``group_id``/``tenant_id``) mark
+the tenant field as an ``is_tenant`` keyword index. They keep Qdrant's
+global HNSW graph until they are migrated to per-tenant graphs (``m=0``,
+``payload_m``; see scripts/migrate_qdrant_tenant_layout.py). After that
+every query must carry a tenant filter, otherwise Qdrant has no graph to
+traverse and falls back to a full scan. With ``QDRANT_REQUIRE_TENANT=true``
+new collections are created with per-tenant graphs right away.
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Union
+
+from qdrant_client.http import models
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_EPOCH_FIELD = "timestamp_epoch"
+
+# Range-only integer index; lookup (exact match) is never used on this field.
+TIMESTAMP_EPOCH_INDEX = models.IntegerIndexParams(
+    type=models.IntegerIndexType.INTEGER,
+    lookup=False,
+    range=True,
+    is_principal=True,
+)
+
+TimeLike = Union[datetime, int, float, str]
+
+TENANT_PAYLOAD_M = int(os.getenv("QDRANT_TENANT_PAYLOAD_M", "16"))
+# Opt-in, for deployments whose searches all carry a tenant filter
+QDRANT_REQUIRE_TENANT = os.getenv("QDRANT_REQUIRE_TENANT", "false").lower() == "true"
+
+TENANT_INDEX = models.KeywordIndexParams(
+    type=models.KeywordIndexType.KEYWORD,
+    is_tenant=True,
+)
+
+SPARSE_VECTOR_NAME = os.getenv("QDRANT_SPARSE_VECTOR", "sparse")
+ENABLE_SPARSE_VECTORS = os.getenv("ENABLE_SPARSE_VECTORS", "true").lower() == "true"
+
+
+def to_epoch(value: Optional[TimeLike]) -> Optional[int]:
+    """Convert a datetime, ISO string or Unix timestamp to integer epoch seconds.
+
+    Naive datetimes are treated as UTC, matching how BigQuery and
+    ``datetime.utcnow()`` values flow through the pipelines.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def timestamp_payload(ts: Optional[datetime]) -> Dict[str, Any]:
+    """Build the timestamp fields written on every point.
+
+    Returns a dict with the hierarchical ``timestamp`` object and the
+    flat ``timestamp_epoch`` field, ready to merge into a payload.
+    """
+    return {
+        "timestamp": {
+            "iso": ts.isoformat() if ts else None,
+            "year": ts.year if ts else None,
+            "month": ts.month if ts else None,
+            "day": ts.day if ts else None,
+            "hour": ts.hour if ts else None,
+        },
+        TIMESTAMP_EPOCH_FIELD: to_epoch(ts),
+    }
+
+
+def time_range_condition(
+    start: Optional[TimeLike] = None,
+    end: Optional[TimeLike] = None,
+    hours_back: Optional[int] = None,
+) -> Optional[models.FieldCondition]:
+    """Build a range predicate on ``timestamp_epoch``.
+
+    Args:
+        start: Inclusive lower bound
+        end: Inclusive upper bound
+        hours_back: Shortcut for ``start = now - hours_back``; ignored if start is set
+
+    Returns:
+        FieldCondition, or None when no bound was given
+    """
+    if start is None and hours_back:
+        start = datetime.now(timezone.utc) - timedelta(hours=hours_back)
+
+    gte = to_epoch(start)
+    lte = to_epoch(end)
+    if gte is None and lte is None:
+        return None
+
+    return models.FieldCondition(
+        key=TIMESTAMP_EPOCH_FIELD,
+        range=models.Range(gte=gte, lte=lte),
+    )
+
+
+def ensure_timestamp_epoch_index(client, collection_name: str) -> bool:
+    """Create the principal range index on ``timestamp_epoch``.
+
+    Safe to call on existing collections; Qdrant treats a repeated
+    index definition as a no-op.
+    """
+    try:
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=TIMESTAMP_EPOCH_FIELD,
+            field_schema=TIMESTAMP_EPOCH_INDEX,
+        )
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to create {TIMESTAMP_EPOCH_FIELD} index on {collection_name}: {e}")
+        return False
+
+
+def _epoch_from_payload(payload: Dict[str, Any]) -> Optional[int]:
+    """Recover epoch seconds from the payload shapes written historically."""
+    ts = payload.get("timestamp")
+    if isinstance(ts, dict):
+        ts = ts.get("iso")
+    ts = ts or payload.get("timestamp_iso")
+    try:
+        return to_epoch(ts)
+    except (TypeError, ValueError):
+        return None
+
+
+def backfill_timestamp_epoch(
+    client,
+    collection_name: str,
+    batch_size: int = 256,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """Add ``timestamp_epoch`` to points written before the field existed.
+
+    Scrolls only points where the field is empty, derives the epoch from
+    ``timestamp.iso`` (or legacy ``timestamp_iso``/flat ``timestamp``),
+    and writes it back with one batched ``set_payload`` request per page.
+
+    Returns:
+        Counts of scanned, updated and skipped (unparseable) points
+    """
+    ensure_timestamp_epoch_index(client, collection_name)
+
+    stats = {"scanned": 0, "updated": 0, "skipped": 0}
+    missing = models.Filter(
+        must=[models.IsEmptyCondition(is_empty=models.PayloadField(key=TIMESTAMP_EPOCH_FIELD))]
+    )
+    offset = None
+
+    while True:
+        points, next_offset = client.scroll(
+            collection_name=collection_name,
+            scroll_filter=missing,
+            limit=batch_size,
+            offset=offset,
+            with_payload=["timestamp", "timestamp_iso"],
+            with_vectors=False,
+        )
+        if not points:
+            break
+
+        operations = []
+        for point in points:
+            stats["scanned"] += 1
+            epoch = _epoch_from_payload(point.payload or {})
+            if epoch is None:
+                stats["skipped"] += 1
+                continue
+            operations.append(
+                models.SetPayloadOperation(
+                    set_payload=models.SetPayload(
+                        payload={TIMESTAMP_EPOCH_FIELD: epoch},
+                        points=[point.id],
+                    )
+                )
+            )
+
+        if operations and not dry_run:
+            client.batch_update_points(
+                collection_name=collection_name,
+                update_operations=operations,
+                wait=True,
+            )
+        stats["updated"] += len(operations)
+
+        # Updated points drop out of the filter, but unparseable ones stay,
+        # so always advance with the server-provided offset.
+        if next_offset is None:
+            break
+        offset = next_offset
+
+    logger.info(f"timestamp_epoch backfill on {collection_name}: {stats}")
+    return stats
+
+
+def sparse_vector_params() -> models.SparseVectorParams:
+    """BM25 sparse vector params; Qdrant computes IDF server-side."""
+    return models.SparseVectorParams(modifier=models.Modifier.IDF)
+
+
+def sparse_vectors_config() -> Optional[Dict[str, models.SparseVectorParams]]:
+    """Sparse vector config for new log collections (None when disabled)."""
+    if not ENABLE_SPARSE_VECTORS:
+        return None
+    return {SPARSE_VECTOR_NAME: sparse_vector_params()}
+
+
+def collection_has_sparse(client, collection_name: str, name: str = SPARSE_VECTOR_NAME) -> bool:
+    """Whether an existing collection was created with the sparse vector.
+
+    Sparse vectors cannot be added to a collection after creation, so
+    writers check once and skip sparse encoding for older collections.
+    Collections created before the IDF modifier get it switched on here;
+    documents only carry term frequencies, so it is required for BM25
+    ranking (and applies at query time, without re-indexing).
+    """
+    if not ENABLE_SPARSE_VECTORS:
+        return False
+    try:
+        info = client.get_collection(collection_name)
+        params = (info.config.params.sparse_vectors or {}).get(name)
+        if params is None:
+            return False
+        if params.modifier != models.Modifier.IDF:
+            client.update_collection(
+                collection_name=collection_name,
+                sparse_vectors_config={name: sparse_vector_params()},
+            )
+            logger.info(f"Enabled IDF modifier on {collection_name}.{name}")
+        return True
+    except Exception as e:
+        logger.warning(f"Could not inspect sparse config for {collection_name}: {e}")
+        return False
+
+
+def point_vector(
+    dense: List[float],
+    sparse: Optional[models.SparseVector] = None,
+    sparse_name: str = SPARSE_VECTOR_NAME,
+):
+    """Vector argument for PointStruct: plain dense, or dense + named sparse."""
+    if sparse is None:
+        return dense
+    return {"": dense, sparse_name: sparse}
+
+
+class MissingTenantFilterError(ValueError):
+    """Raised when a query on a tenant-partitioned collection has no tenant filter."""
+
+
+def tenant_hnsw_config(payload_m: int = TENANT_PAYLOAD_M) -> models.HnswConfigDiff:
+    """HNSW config that builds one graph per tenant and no global graph."""
+    return models.HnswConfigDiff(m=0, payload_m=payload_m)
+
+
+def collection_hnsw_config() -> Optional[models.HnswConfigDiff]:
+    """HNSW config for a new tenant-scoped collection.
+
+    Per-tenant graphs only when tenant scoping is required; otherwise None,
+    i.e. Qdrant's default global graph, so unscoped searches stay indexed.
+    """
+    return tenant_hnsw_config() if QDRANT_REQUIRE_TENANT else None
+
+
+def ensure_tenant_index(client, collection_name: str, tenant_field: str) -> bool:
+    """Create (or upgrade) the ``is_tenant`` keyword index on the tenant field."""
+    try:
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=tenant_field,
+            field_schema=TENANT_INDEX,
+        )
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to create tenant index {collection_name}.{tenant_field}: {e}")
+        return False
+
+
+def apply_tenant_layout(client, collection_name: str, tenant_field: str, payload_m: int = TENANT_PAYLOAD_M) -> bool:
+    """Switch an existing collection to per-tenant HNSW graphs.
+
+    Qdrant rebuilds the HNSW index in the background after this call, so
+    run it from provisioning/repair tooling rather than request paths.
+    """
+    if not ensure_tenant_index(client, collection_name, tenant_field):
+        return False
+    try:
+        client.update_collection(
+            collection_name=collection_name,
+            hnsw_config=tenant_hnsw_config(payload_m),
+        )
+        logger.info(f"Applied per-tenant HNSW layout to {collection_name} on {tenant_field}")
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to update HNSW config for {collection_name}: {e}")
+        return False
+
+
+def tenant_condition(tenant_field: str, tenant_id: Optional[str]) -> models.FieldCondition:
+    """Mandatory tenant predicate; raises if the tenant is missing."""
+    if not tenant_id:
+        raise MissingTenantFilterError(f"{tenant_field} is required for tenant-partitioned search")
+    return models.FieldCondition(key=tenant_field, match=models.MatchValue(value=tenant_id))
+
+
+def has_tenant_condition(query_filter: Optional[models.Filter], tenant_field: str) -> bool:
+    """Whether a filter pins the tenant field in its top-level ``must`` clause."""
+    if query_filter is None or not query_filter.must:
+        return False
+    must = query_filter.must if isinstance(query_filter.must, list) else [query_filter.must]
+    return any(
+        isinstance(c, models.FieldCondition) and c.key == tenant_field and c.match is not None
+        for c in must
+    )
@@ -7,6 +7,14 @@ from datetime import datetime
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 
+from src.services.qdrant_schema import (
+    collection_hnsw_config,
+    ensure_tenant_index,
+    ensure_timestamp_epoch_index,
+    tenant_condition,
+    to_epoch,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -63,16 +71,14 @@ class QdrantService:
                 ),
                 sparse_vectors_config={
                     "text": models.SparseVectorParams()
-                }
+                },
+                # One HNSW graph per group_id only once tenant scoping is required
+                hnsw_config=collection_hnsw_config(),
             )
             
             # Create Tenant Index (Multitenancy)
             # using 'group_id' as the standard tenant identifier key
-            self.client.create_payload_index(
-                collection_name=self.collection_name,
-                field_name="group_id",
-                field_schema=models.PayloadSchemaType.KEYWORD,
-            )
+            ensure_tenant_index(self.client, self.collection_name, "group_id")
 
             # Create Payload Indexes for Time Hierarchy
             fields = ["session_id", "role", "timestamp.year", "timestamp.month", "timestamp.day", "timestamp.hour"]
@@ -82,6 +88,7 @@ class QdrantService:
                     field_name=field,
                     field_schema=models.PayloadSchemaType.KEYWORD if "id" in field or "role" in field else models.PayloadSchemaType.INTEGER
                 )
+            ensure_timestamp_epoch_index(self.client, self.collection_name)
             logger.info(f"Created Qdrant collection: {self.collection_name}")
 
     def upsert_memory(self, session_id: str, project_id: str, role: str, content: str, embedding: List[float], sparse_indices: List[int] = None, sparse_values: List[float] = None):
@@ -108,7 +115,8 @@ class QdrantService:
                 "hour": now.hour,
                 "minute": now.minute,
                 "second": now.second
-            }
+            },
+            "timestamp_epoch": to_epoch(now),
         }
         
         # Prepare vector(s)
@@ -139,9 +147,7 @@ class QdrantService:
         target_collection = collection_name or self.collection_name
 
         # Base filter: Tenant Isolation via group_id
-        must_conditions = [
-            models.FieldCondition(key="group_id", match=models.MatchValue(value=project_id))
-        ]
+        must_conditions = [tenant_condition("group_id", project_id)]
 
         if filters:
             for key, val in filters.items():
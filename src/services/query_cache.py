@@ -0,0 +1,282 @@
+"""Two-tier query result cache with stale-while-revalidate.
+
+Results are keyed on the query builder's SQL and parameters plus a time
+bucket (``floor(now / fresh_ttl)``), so a key is fresh for at most one
+bucket. Each write also updates a ``latest`` pointer for the same query;
+when the current bucket misses but ``latest`` is younger than
+``stale_ttl``, the stale value is served immediately and one background
+refresh fills the new bucket.
+
+Tiers:
+- In-process LRU (per instance, no serialization)
+- Redis via ``redis_service`` (shared across Cloud Run instances)
+
+Only one refresh runs per key: concurrent misses in a process share one
+load, and a Redis ``SET NX`` lock keeps other instances from refreshing
+the same key at the same time. Values must be JSON-serializable.
+
+``redis_service`` is synchronous, so Redis reads, writes and locks run in
+``asyncio.to_thread``; local hits never leave the event loop.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.services.redis_service import redis_service
+
+logger = logging.getLogger(__name__)
+
+STATS_CACHE_FRESH_SEC = int(os.getenv("STATS_CACHE_FRESH_SEC", "60"))
+STATS_CACHE_STALE_SEC = int(os.getenv("STATS_CACHE_STALE_SEC", "600"))
+LOGS_CACHE_FRESH_SEC = int(os.getenv("LOGS_CACHE_FRESH_SEC", "60"))
+LOGS_CACHE_STALE_SEC = int(os.getenv("LOGS_CACHE_STALE_SEC", "300"))
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "512"))
+REFRESH_LOCK_TTL_SEC = 30
+
+HIT = "HIT"
+STALE = "STALE"
+MISS = "MISS"
+
+
+@dataclass
+class CacheResult:
+    """Cached value plus how it was served."""
+    value: Any
+    status: str  # HIT, STALE or MISS
+    age_s: float = 0.0
+
+
+def _param_key(param: Any) -> Any:
+    """Stable representation of a BigQuery query parameter (or plain value)."""
+    name = getattr(param, "name", None)
+    if name is not None:
+        return [name, getattr(param, "type_", None), getattr(param, "value", None)]
+    return param
+
+
+def pack_rows(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Columnar, JSON-safe form of query rows for caching.
+
+    Column names are stored once instead of in every row, and datetimes
+    become ISO strings.
+    """
+    columns: List[str] = []
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+    packed = []
+    for row in rows:
+        values = []
+        for key in columns:
+            value = row.get(key)
+            values.append(value.isoformat() if isinstance(value, datetime) else value)
+        packed.append(values)
+    return {"c": columns, "r": packed}
+
+
+def unpack_rows(packed: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Inverse of pack_rows (datetimes stay ISO strings)."""
+    if isinstance(packed, list):
+        return packed  # entry written before rows were packed
+    columns = packed["c"]
+    return [dict(zip(columns, values)) for values in packed["r"]]
+
+
+class QueryCache:
+    """SQL-keyed cache with time buckets and stale-while-revalidate."""
+
+    def __init__(
+        self,
+        namespace: str,
+        fresh_ttl: int,
+        stale_ttl: int,
+        max_entries: int = QUERY_CACHE_MAX_ENTRIES,
+        redis=redis_service,
+    ):
+        self.namespace = namespace
+        self.fresh_ttl = max(1, fresh_ttl)
+        self.stale_ttl = max(self.fresh_ttl, stale_ttl)
+        self.max_entries = max_entries
+        self.redis = redis
+        self._local: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._refreshing: set = set()
+        self._background: set = set()
+        self._stats = {"hits": 0, "stale": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+
+    # --- keys ------------------------------------------------------------
+
+    def base_key(self, sql: str, params: Optional[List[Any]] = None) -> str:
+        """Key prefix for a query, independent of the time bucket."""
+        normalized = " ".join(sql.split())
+        material = json.dumps([normalized, [_param_key(p) for p in params or []]], default=str, sort_keys=True)
+        return f"qcache:{self.namespace}:{hashlib.sha256(material.encode()).hexdigest()[:32]}"
+
+    def bucket_key(self, base: str, now: Optional[float] = None) -> str:
+        bucket = int((now if now is not None else time.time()) // self.fresh_ttl)
+        return f"{base}:{bucket}"
+
+    # --- tiers -----------------------------------------------------------
+
+    async def _get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                self._local.move_to_end(key)
+                return entry
+        cached = await asyncio.to_thread(self.redis.get_cache, key)
+        if isinstance(cached, dict) and "t" in cached:
+            entry = (cached.get("v"), float(cached["t"]))
+            self._put_local(key, entry)
+            return entry
+        return None
+
+    def _put_local(self, key: str, entry: Tuple[Any, float]) -> None:
+        with self._lock:
+            self._local[key] = entry
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    async def _store(self, base: str, value: Any) -> None:
+        now = time.time()
+        entry = (value, now)
+        payload = {"v": value, "t": now}
+        bucket = self.bucket_key(base, now)
+        latest = f"{base}:latest"
+        self._put_local(bucket, entry)
+        self._put_local(latest, entry)
+        await asyncio.to_thread(self._store_redis, bucket, latest, payload)
+
+    def _store_redis(self, bucket: str, latest: str, payload: Dict[str, Any]) -> None:
+        self.redis.set_cache(bucket, payload, ttl=self.fresh_ttl)
+        self.redis.set_cache(latest, payload, ttl=self.stale_ttl)
+
+    # --- loading ---------------------------------------------------------
+
+    async def get_or_load(
+        self,
+        sql: str,
+        params: Optional[List[Any]],
+        loader: Callable[[], Awaitable[Any]],
+    ) -> CacheResult:
+        """Return a cached result for ``sql``/``params``, loading it if needed.
+
+        Args:
+            sql: Query SQL (whitespace-normalized for the key)
+            params: Query parameters
+            loader: Coroutine factory producing a fresh, JSON-serializable value
+
+        Returns:
+            CacheResult with status HIT (current bucket), STALE (served while a
+            background refresh runs) or MISS (loaded inline)
+        """
+        base = self.base_key(sql, params)
+        now = time.time()
+
+        entry = await self._get(self.bucket_key(base, now))
+        if entry is not None:
+            self._bump("hits")
+            return CacheResult(entry[0], HIT, now - entry[1])
+
+        latest = await self._get(f"{base}:latest")
+        if latest is not None and now - latest[1] < self.stale_ttl:
+            self._bump("stale")
+            self._refresh_in_background(base, loader)
+            return CacheResult(latest[0], STALE, now - latest[1])
+
+        self._bump("misses")
+        value = await self._load_once(base, loader)
+        return CacheResult(value, MISS, 0.0)
+
+    async def _load_once(self, base: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Single-flight load: concurrent callers for one key share a task."""
+        task = self._inflight.get(base)
+        if task is None or task.done():
+            task = asyncio.ensure_future(self._load(base, loader))
+            self._inflight[base] = task
+
+            def forget(done: asyncio.Task) -> None:
+                if self._inflight.get(base) is done:
+                    del self._inflight[base]
+
+            task.add_done_callback(forget)
+        # Shield so one caller's cancellation doesn't abort the shared load
+        return await asyncio.shield(task)
+
+    async def _load(self, base: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await loader()
+        await self._store(base, value)
+        return value
+
+    def _refresh_in_background(self, base: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        if base in self._refreshing:
+            return
+        self._refreshing.add(base)
+        lock_key = f"{base}:refresh"
+        token = uuid.uuid4().hex
+
+        async def refresh():
+            try:
+                if not await asyncio.to_thread(self.redis.try_lock, lock_key, REFRESH_LOCK_TTL_SEC, token):
+                    return  # another instance is refreshing
+                try:
+                    await self._load_once(base, loader)
+                    self._bump("refreshes")
+                except Exception as e:
+                    self._bump("refresh_errors")
+                    logger.warning(f"Background refresh failed for {base}: {e}")
+                finally:
+                    await asyncio.to_thread(self.redis.release_lock, lock_key, token)
+            finally:
+                self._refreshing.discard(base)
+
+        bg = asyncio.ensure_future(refresh())
+        self._background.add(bg)
+        bg.add_done_callback(self._background.discard)
+
+    def invalidate(self, sql: str, params: Optional[List[Any]] = None) -> None:
+        """Drop the process-local entries for a query (Redis entries expire on TTL)."""
+        base = self.base_key(sql, params)
+        with self._lock:
+            for key in [k for k in self._local if k.startswith(base)]:
+                del self._local[key]
+
+    # --- reporting -------------------------------------------------------
+
+    def _bump(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["local_entries"] = len(self._local)
+        served = stats["hits"] + stats["stale"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["stale"]) / served, 3) if served else 0.0
+        return stats
+
+    def cache_headers(self, result: CacheResult) -> Dict[str, str]:
+        """Response headers describing how a result was served."""
+        return {
+            "X-Cache": result.status,
+            "X-Cache-Age": str(int(result.age_s)),
+            "Cache-Control": f"private, max-age={self.fresh_ttl}, stale-while-revalidate={self.stale_ttl}",
+        }
+
+
+# Singleton instances
+stats_cache = QueryCache("stats", fresh_ttl=STATS_CACHE_FRESH_SEC, stale_ttl=STATS_CACHE_STALE_SEC)
+logs_cache = QueryCache("logs", fresh_ttl=LOGS_CACHE_FRESH_SEC, stale_ttl=LOGS_CACHE_STALE_SEC)
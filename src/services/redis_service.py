@@ -20,6 +20,15 @@ def _redis_enabled() -> bool:
     return os.getenv("ENABLE_REDIS", "false").lower() == "true"
 
 
+# Delete a lock only if it still holds the caller's token
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
 class RedisService:
     """Enhanced Redis service for caching, queuing, streaming."""
 
@@ -116,6 +125,39 @@ class RedisService:
         except Exception:
             return None
 
+    def try_lock(self, key: str, ttl: int = 30, token: str = "1") -> bool:
+        """Acquire a short-lived cross-instance lock (SET NX EX).
+
+        Returns True when Redis is unavailable so callers fall back to
+        process-local coordination instead of never proceeding. Pass a
+        unique ``token`` to release the lock safely with ``release_lock``.
+        """
+        self._connect_if_needed()
+        if not self.client:
+            return True
+        try:
+            return bool(self.client.set(key, token, nx=True, ex=ttl))
+        except Exception as e:
+            logger.error(f"Redis try_lock error: {e}")
+            return True
+
+    def release_lock(self, key: str, token: Optional[str] = None) -> None:
+        """Release a lock; with ``token``, only if this holder still owns it.
+
+        Without the check, a holder whose lock already expired would delete
+        the lock another instance has since acquired.
+        """
+        self._connect_if_needed()
+        if not self.client:
+            return
+        try:
+            if token is None:
+                self.client.delete(key)
+            else:
+                self.client.eval(_RELEASE_LOCK_SCRIPT, 1, key, token)
+        except Exception as e:
+            logger.error(f"Redis release_lock error: {e}")
+
     def _hash_key(self, key: str) -> str:
         """Generate consistent hash for keys."""
         return hashlib.sha256(key.encode()).hexdigest()
@@ -154,16 +196,29 @@ class RedisService:
         return None
 
     # Streaming methods
-    def stream_add(self, stream_name: str, data: Dict[str, Any]) -> Optional[str]:
-        """Add to stream."""
+    def stream_add(self, stream_name: str, data: Dict[str, Any], maxlen: Optional[int] = None) -> Optional[str]:
+        """Add to stream, optionally trimming it to about ``maxlen`` entries."""
         self._connect_if_needed()
         if self.client:
             try:
-                return self.client.xadd(stream_name, data)
+                return self.client.xadd(stream_name, data, maxlen=maxlen, approximate=True)
             except Exception as e:
                 logger.error(f"Stream add error: {e}")
         return None
 
+    def stream_add_many(self, stream_name: str, entries: List[Dict[str, Any]], maxlen: Optional[int] = None) -> int:
+        """Add entries to a stream in one pipeline round trip. Returns how many were added."""
+        self._connect_if_needed()
+        if self.client and entries:
+            try:
+                pipe = self.client.pipeline(transaction=False)
+                for data in entries:
+                    pipe.xadd(stream_name, data, maxlen=maxlen, approximate=True)
+                return len([r for r in pipe.execute() if r])
+            except Exception as e:
+                logger.error(f"Stream add error: {e}")
+        return 0
+
     def stream_read(self, stream_name: str, last_id: str = '0', count: int = 10) -> List[Dict[str, Any]]:
         """Read from stream."""
         self._connect_if_needed()
@@ -175,6 +230,17 @@ class RedisService:
                 logger.error(f"Stream read error: {e}")
         return []
 
+    def stream_last_id(self, stream_name: str) -> Optional[str]:
+        """Id of the newest entry in a stream ("0-0" if empty), or None if Redis is unavailable."""
+        self._connect_if_needed()
+        if self.client:
+            try:
+                entries = self.client.xrevrange(stream_name, count=1)
+                return entries[0][0] if entries else "0-0"
+            except Exception as e:
+                logger.error(f"Stream last id error: {e}")
+        return None
+
     # Pipeline specific caching
     def cache_normalized_log(self, log_id: str, normalized_data: Dict[str, Any]):
         """Cache normalized log data."""
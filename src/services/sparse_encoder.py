@@ -0,0 +1,118 @@
+"""BM25 sparse encoder for hybrid log search.
+
+Produces Qdrant sparse vectors alongside the dense embeddings so exact
+tokens (error codes, request IDs, hostnames) rank well without a larger
+dense model.
+
+Scoring is split between this encoder and Qdrant:
+- Documents carry the saturated term-frequency part
+  ``tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))`` with a fixed
+  ``avgdl`` (``SPARSE_AVG_DOC_LENGTH``)
+- Queries carry a weight of 1 per term
+- The sparse vector is configured with ``Modifier.IDF`` (see
+  ``qdrant_schema.sparse_vectors_config``), so Qdrant applies the IDF from
+  its own, collection-wide document frequencies at query time
+
+The encoder is therefore stateless: the API process (which never ingests)
+and every worker score the same way, with no local corpus statistics to
+drift apart.
+
+Token indices are a stable CRC32 hash of the token, so every process
+maps a token to the same index.
+"""
+
+import logging
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Dict, List
+
+from qdrant_client.http import models
+
+logger = logging.getLogger(__name__)
+
+# Typical tokenized length of a log line; only shapes length normalization
+SPARSE_AVG_DOC_LENGTH = float(os.getenv("SPARSE_AVG_DOC_LENGTH", "40"))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Identifiers keep their internal punctuation: ERR_CONN_REFUSED, 10.0.0.1:5432,
+# /api/v2/logs, 3f2a-...-uuid, java.lang.NullPointerException
+_TOKEN_RE = re.compile(r"[a-z0-9_](?:[a-z0-9_.:/\-]*[a-z0-9_])?")
+_SPLIT_RE = re.compile(r"[_.:/\-]+")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it of on or that the this to was were with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase tokenizer that preserves identifiers and adds their parts.
+
+    A compound token like ``err_conn_refused`` yields itself plus ``err``,
+    ``conn`` and ``refused`` so both exact and partial matches score.
+    """
+    tokens: List[str] = []
+    for tok in _TOKEN_RE.findall(text.lower()):
+        if tok in _STOPWORDS:
+            continue
+        tokens.append(tok)
+        parts = [p for p in _SPLIT_RE.split(tok) if p and p != tok]
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if p not in _STOPWORDS)
+    return tokens
+
+
+def token_index(token: str) -> int:
+    """Stable non-negative 31-bit index for a token."""
+    return zlib.crc32(token.encode("utf-8")) & 0x7FFFFFFF
+
+
+class BM25SparseEncoder:
+    """Stateless BM25 sparse encoder (IDF is applied by Qdrant)."""
+
+    def __init__(
+        self,
+        k1: float = BM25_K1,
+        b: float = BM25_B,
+        avg_doc_length: float = SPARSE_AVG_DOC_LENGTH,
+    ):
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = avg_doc_length
+
+    @staticmethod
+    def _to_sparse(weights: Dict[int, float]) -> models.SparseVector:
+        indices = sorted(weights)
+        return models.SparseVector(indices=indices, values=[weights[i] for i in indices])
+
+    def encode_documents(self, texts: List[str]) -> List[models.SparseVector]:
+        """Encode documents into BM25 term-frequency sparse vectors.
+
+        Args:
+            texts: Document texts (same texts that are dense-embedded)
+
+        Returns:
+            One SparseVector per text (empty vector for empty text)
+        """
+        vectors = []
+        for text in texts:
+            tokens = tokenize(text or "")
+            norm = self.k1 * (1.0 - self.b + self.b * len(tokens) / self.avg_doc_length)
+            weights: Dict[int, float] = {}
+            for tok, tf in Counter(tokens).items():
+                idx = token_index(tok)
+                # Hash collisions are rare; sum rather than overwrite
+                weights[idx] = weights.get(idx, 0.0) + tf * (self.k1 + 1.0) / (tf + norm)
+            vectors.append(self._to_sparse(weights))
+        return vectors
+
+    def encode_query(self, text: str) -> models.SparseVector:
+        """Encode a query as one unit weight per term; Qdrant multiplies in the IDF."""
+        return self._to_sparse({token_index(tok): 1.0 for tok in set(tokenize(text or ""))})
+
+
+# Singleton instance
+sparse_encoder = BM25SparseEncoder()
@@ -10,14 +10,28 @@ This module provides a unified interface for:
 import hashlib
 import logging
 import os
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from qdrant_client.http import models
 
+from src.services.bloom_filter import BloomFilter
 from src.services.embedding_service import embedding_service
+from src.services.qdrant_bulk_writer import QdrantBulkWriter
+from src.services.qdrant_schema import (
+    TENANT_INDEX,
+    MissingTenantFilterError,
+    collection_hnsw_config,
+    ensure_timestamp_epoch_index,
+    tenant_condition,
+    time_range_condition,
+    timestamp_payload,
+)
 from src.services.qdrant_service import qdrant_service
 
 logger = logging.getLogger(__name__)
@@ -26,11 +40,36 @@ logger = logging.getLogger(__name__)
 LOG_EMBEDDINGS_COLLECTION = "log_embeddings"
 CONVERSATION_HISTORY_COLLECTION = "conversation_history"
 
+# Tenant field; log_embeddings is partitioned by it (per-tenant HNSW graphs)
+TENANT_FIELD = "project_id"
+
 # Feature flags
 # Default to disabled so CI/tests never depend on external services.
 ENABLE_VECTOR_SEARCH = os.getenv("ENABLE_VECTOR_SEARCH", "false").lower() == "true"
 ENABLE_LOG_EMBEDDINGS = os.getenv("ENABLE_LOG_EMBEDDINGS", "false").lower() == "true"
 
+# Batch dedup pre-check: per-(collection, project) Bloom filter of stored text
+# hashes, warmed from Qdrant in the background and kept current by this
+# process's own writes. It is per-process: hashes other writers stored since
+# the last warm-up are unknown to it until the next one.
+DEDUP_BLOOM_ERROR_RATE = float(os.getenv("DEDUP_BLOOM_ERROR_RATE", "0.01"))
+DEDUP_BLOOM_TTL_SEC = int(os.getenv("DEDUP_BLOOM_TTL_SEC", "900"))  # re-warm to see other writers
+DEDUP_BLOOM_MAX_WARM = int(os.getenv("DEDUP_BLOOM_MAX_WARM", "200000"))  # skip bloom for larger tenants
+DEDUP_WARM_PAGE_SIZE = 1000
+DEDUP_WARM_WORKERS = int(os.getenv("DEDUP_WARM_WORKERS", "2"))
+
+
+@dataclass
+class _HashFilter:
+    """One tenant's Bloom filter and its warm-up state."""
+    bloom: Optional[BloomFilter] = None
+    warmed_at: float = 0.0
+    # Tenant had more than DEDUP_BLOOM_MAX_WARM points; never warmed again
+    oversized: bool = False
+    # Hashes stored while a warm-up runs, added to its filter when it lands
+    warming: Optional[set] = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
 
 @dataclass
 class EmbeddingResult:
@@ -66,6 +105,10 @@ class VectorService:
     def __new__(cls) -> "VectorService":
         if cls._instance is None:
             cls._instance = super().__new__(cls)
+            cls._instance._hash_filters: Dict[Tuple[str, str], _HashFilter] = {}
+            # Guards the dict only; each tenant's filter has its own lock
+            cls._instance._hash_filter_lock = threading.Lock()
+            cls._instance._warm_executor = None
         return cls._instance
 
     def __init__(self):
@@ -100,11 +143,13 @@ class VectorService:
                         size=768,  # text-embedding-004 dimension
                         distance=models.Distance.COSINE
                     ),
+                    # Per-tenant graphs only once tenant scoping is required
+                    hnsw_config=collection_hnsw_config(),
                 )
 
                 # Create indexes for efficient filtering
                 indexes = [
-                    ("project_id", models.PayloadSchemaType.KEYWORD),
+                    (TENANT_FIELD, TENANT_INDEX),
                     ("severity", models.PayloadSchemaType.KEYWORD),
                     ("service", models.PayloadSchemaType.KEYWORD),
                     ("source_type", models.PayloadSchemaType.KEYWORD),
@@ -123,6 +168,8 @@ class VectorService:
                     except Exception as e:
                         logger.warning(f"Failed to create index for {field_name}: {e}")
 
+                ensure_timestamp_epoch_index(qdrant_service.client, LOG_EMBEDDINGS_COLLECTION)
+
                 logger.info(f"Created Qdrant collection: {LOG_EMBEDDINGS_COLLECTION}")
 
             self._log_collection_initialized = True
@@ -194,34 +241,22 @@ class VectorService:
 
         # Prepare metadata with timestamp hierarchy
         now = datetime.now(timezone.utc)
-        full_metadata = {
-            "project_id": project_id,
-            "source_type": source_type,
-            "text_hash": text_hash,
-            "content_preview": text[:500] if len(text) > 500 else text,
-            "timestamp": {
-                "iso": now.isoformat(),
-                "year": now.year,
-                "month": now.month,
-                "day": now.day,
-                "hour": now.hour,
-            },
-            **(metadata or {}),
-        }
+        full_metadata = self._build_payload(text, text_hash, project_id, source_type, now, metadata)
 
         # Store in Qdrant
         vector_id = str(uuid.uuid4())
         try:
-            qdrant_service.client.upsert(
-                collection_name=collection,
-                points=[
-                    models.PointStruct(
-                        id=vector_id,
-                        vector=embedding,
-                        payload=full_metadata,
-                    )
-                ],
-            )
+            stats = QdrantBulkWriter(qdrant_service.client, collection).write([
+                models.PointStruct(
+                    id=vector_id,
+                    vector=embedding,
+                    payload=full_metadata,
+                )
+            ])
+            if not stats.written:
+                logger.error(f"Failed to store embedding {vector_id}")
+                return None
+            self._remember_hashes(collection, project_id, [text_hash])
 
             return EmbeddingResult(
                 vector_id=vector_id,
@@ -236,6 +271,290 @@ class VectorService:
             logger.error(f"Failed to store embedding: {e}")
             return None
 
+    def embed_and_store_batch(
+        self,
+        texts: List[str],
+        project_id: str,
+        source_type: str = "log",
+        metadatas: Optional[List[Optional[Dict[str, Any]]]] = None,
+        collection: str = LOG_EMBEDDINGS_COLLECTION,
+        deduplicate: bool = True,
+    ) -> List[Optional[EmbeddingResult]]:
+        """Embed and store many texts with one dedup lookup, one embed call and one bulk upsert.
+
+        Texts are hashed up front and resolved with a single ``MatchAny``
+        scroll on ``text_hash``. Once this process has warmed the tenant's
+        Bloom filter, hashes it has never seen skip that scroll and are
+        treated as new, so a text another process stored since the last
+        warm-up can be stored twice. Only texts that are still new are
+        embedded (one batched call) and written together through the bulk
+        writer. Repeated texts within the batch share a single point.
+
+        Args:
+            texts: Texts to embed
+            project_id: Project/tenant ID for filtering
+            source_type: Type of source (log, conversation, etc.)
+            metadatas: Optional per-text metadata, aligned with ``texts``
+            collection: Qdrant collection name
+            deduplicate: Skip texts whose hash already exists
+
+        Returns:
+            One EmbeddingResult (new or existing) per text, None where the
+            text was empty or embedding/storage failed
+        """
+        results: List[Optional[EmbeddingResult]] = [None] * len(texts)
+        if not texts:
+            return results
+
+        if not self.enabled:
+            logger.debug("Vector search disabled")
+            return results
+
+        if collection == LOG_EMBEDDINGS_COLLECTION:
+            self.ensure_log_embeddings_collection()
+
+        # Hash once; first occurrence of each hash is the one we store
+        first_index: Dict[str, int] = {}
+        hashes: List[Optional[str]] = []
+        for idx, text in enumerate(texts):
+            if not text or not text.strip():
+                hashes.append(None)
+                continue
+            text_hash = self.compute_text_hash(text)
+            hashes.append(text_hash)
+            first_index.setdefault(text_hash, idx)
+
+        by_hash: Dict[str, EmbeddingResult] = {}
+        if deduplicate and first_index:
+            by_hash = self._find_by_hashes(list(first_index), project_id, collection)
+
+        new_hashes = [h for h in first_index if h not in by_hash]
+        if new_hashes:
+            new_texts = [texts[first_index[h]] for h in new_hashes]
+            embeddings = embedding_service.get_embeddings_batch(new_texts)
+
+            now = datetime.now(timezone.utc)
+            points = []
+            pending: Dict[str, EmbeddingResult] = {}
+            for text_hash, text, embedding in zip(new_hashes, new_texts, embeddings):
+                if not embedding or all(v == 0.0 for v in embedding):
+                    continue
+                idx = first_index[text_hash]
+                metadata = metadatas[idx] if metadatas else None
+                payload = self._build_payload(text, text_hash, project_id, source_type, now, metadata)
+                vector_id = str(uuid.uuid4())
+                points.append(models.PointStruct(id=vector_id, vector=embedding, payload=payload))
+                pending[text_hash] = EmbeddingResult(
+                    vector_id=vector_id,
+                    text_hash=text_hash,
+                    embedding_dim=len(embedding),
+                    created_at=now.isoformat(),
+                    collection=collection,
+                    metadata=payload,
+                )
+
+            skipped = len(new_hashes) - len(points)
+            if skipped:
+                logger.error(f"Failed to generate {skipped} of {len(new_hashes)} embeddings")
+
+            if points:
+                try:
+                    stats = QdrantBulkWriter(qdrant_service.client, collection).write(points)
+                    if stats.failed_points:
+                        # The writer does not report which batch failed; report the
+                        # whole write as failed so callers retry (dedup absorbs repeats).
+                        logger.error(f"Failed to store {stats.failed_points} of {len(points)} embeddings")
+                    else:
+                        by_hash.update(pending)
+                        self._remember_hashes(collection, project_id, pending)
+                except Exception as e:
+                    logger.error(f"Failed to store embedding batch: {e}")
+
+        for idx, text_hash in enumerate(hashes):
+            if text_hash is not None:
+                results[idx] = by_hash.get(text_hash)
+
+        logger.debug(
+            f"embed_and_store_batch: {len(texts)} texts, {len(first_index)} unique, "
+            f"{len(first_index) - len(new_hashes)} existing, {len(new_hashes)} embedded"
+        )
+        return results
+
+    @staticmethod
+    def _build_payload(
+        text: str,
+        text_hash: str,
+        project_id: str,
+        source_type: str,
+        now: datetime,
+        metadata: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        return {
+            "project_id": project_id,
+            "source_type": source_type,
+            "text_hash": text_hash,
+            "content_preview": text[:500] if len(text) > 500 else text,
+            **timestamp_payload(now),
+            **(metadata or {}),
+        }
+
+    @staticmethod
+    def _result_from_point(point, text_hash: str, collection: str) -> EmbeddingResult:
+        return EmbeddingResult(
+            vector_id=str(point.id),
+            text_hash=text_hash,
+            embedding_dim=768,
+            created_at=(point.payload or {}).get("timestamp", {}).get("iso", ""),
+            collection=collection,
+            metadata=point.payload,
+        )
+
+    def _hash_filter(self, project_id: str, collection: str) -> Optional[BloomFilter]:
+        """Bloom filter of the ``text_hash`` values stored for a tenant.
+
+        A missing or expired filter is warmed on a background thread; until
+        the first warm-up lands (and for tenants too large to warm, or whose
+        warm-up failed) this returns None and callers look up every hash.
+        """
+        key = (collection, project_id)
+        with self._hash_filter_lock:
+            state = self._hash_filters.setdefault(key, _HashFilter())
+
+        with state.lock:
+            if state.oversized:
+                return None
+            warm = state.warming is None and time.time() - state.warmed_at >= DEDUP_BLOOM_TTL_SEC
+            if warm:
+                state.warming = set()
+            bloom = state.bloom
+
+        if warm:
+            try:
+                self._get_warm_executor().submit(self._warm_hash_filter, project_id, collection)
+            except Exception as e:
+                logger.warning(f"Dedup bloom warm-up not started for {collection}/{project_id}: {e}")
+                with state.lock:
+                    state.warming = None
+        return bloom
+
+    def _get_warm_executor(self) -> ThreadPoolExecutor:
+        if self._warm_executor is None:
+            with self._hash_filter_lock:
+                if self._warm_executor is None:
+                    self._warm_executor = ThreadPoolExecutor(
+                        max_workers=DEDUP_WARM_WORKERS, thread_name_prefix="dedup-bloom-warm"
+                    )
+        return self._warm_executor
+
+    def _warm_hash_filter(self, project_id: str, collection: str) -> Optional[BloomFilter]:
+        """Scroll a tenant's hashes into a new filter and install it."""
+        key = (collection, project_id)
+        with self._hash_filter_lock:
+            state = self._hash_filters.setdefault(key, _HashFilter())
+
+        bloom: Optional[BloomFilter] = BloomFilter(capacity=DEDUP_BLOOM_MAX_WARM, error_rate=DEDUP_BLOOM_ERROR_RATE)
+        oversized = False
+        scroll_filter = models.Filter(must=[tenant_condition(TENANT_FIELD, project_id)])
+        offset = None
+        try:
+            while True:
+                points, offset = qdrant_service.client.scroll(
+                    collection_name=collection,
+                    scroll_filter=scroll_filter,
+                    limit=DEDUP_WARM_PAGE_SIZE,
+                    offset=offset,
+                    with_payload=["text_hash"],
+                    with_vectors=False,
+                )
+                bloom.update(p.payload["text_hash"] for p in points if (p.payload or {}).get("text_hash"))
+                if len(bloom) > DEDUP_BLOOM_MAX_WARM:
+                    logger.info(f"Dedup bloom disabled for {collection}/{project_id}: "
+                                f"more than {DEDUP_BLOOM_MAX_WARM} points")
+                    bloom, oversized = None, True
+                    break
+                if offset is None:
+                    break
+        except Exception as e:
+            logger.warning(f"Dedup bloom warm-up failed for {collection}/{project_id}: {e}")
+            bloom = None
+
+        with state.lock:
+            if bloom is not None and state.warming:
+                bloom.update(state.warming)
+            state.bloom = bloom
+            state.oversized = oversized
+            state.warmed_at = time.time()
+            state.warming = None
+
+        if bloom is not None:
+            logger.info(f"Warmed dedup bloom for {collection}/{project_id}: {len(bloom)} hashes")
+        return bloom
+
+    def _remember_hashes(self, collection: str, project_id: str, hashes) -> None:
+        """Record hashes this process just stored so the warmed filter stays complete."""
+        state = self._hash_filters.get((collection, project_id))
+        if state is None:
+            return
+        with state.lock:
+            if state.bloom is not None:
+                state.bloom.update(hashes)
+            if state.warming is not None:
+                state.warming.update(hashes)
+
+    def _find_by_hashes(
+        self,
+        text_hashes: List[str],
+        project_id: str,
+        collection: str,
+    ) -> Dict[str, EmbeddingResult]:
+        """Resolve many text hashes with one ``MatchAny`` scroll.
+
+        Hashes the tenant's warmed Bloom filter rules out are not sent to
+        Qdrant (see ``embed_and_store_batch`` for what that misses).
+
+        Args:
+            text_hashes: Distinct SHA-256 hashes
+            project_id: Project ID for filtering
+            collection: Collection to search
+
+        Returns:
+            Mapping of hash to existing EmbeddingResult for hashes already stored
+        """
+        bloom = self._hash_filter(project_id, collection)
+        candidates = [h for h in text_hashes if bloom is None or h in bloom]
+        if not candidates:
+            return {}
+
+        found: Dict[str, EmbeddingResult] = {}
+        scroll_filter = models.Filter(
+            must=[
+                tenant_condition(TENANT_FIELD, project_id),
+                models.FieldCondition(key="text_hash", match=models.MatchAny(any=candidates)),
+            ]
+        )
+        offset = None
+        try:
+            # One page normally covers every candidate; more only if a hash
+            # was stored more than once before dedup existed.
+            while True:
+                points, offset = qdrant_service.client.scroll(
+                    collection_name=collection,
+                    scroll_filter=scroll_filter,
+                    limit=len(candidates),
+                    offset=offset,
+                    with_vectors=False,
+                )
+                for point in points:
+                    text_hash = (point.payload or {}).get("text_hash")
+                    if text_hash and text_hash not in found:
+                        found[text_hash] = self._result_from_point(point, text_hash, collection)
+                if offset is None or len(found) >= len(candidates):
+                    break
+        except Exception as e:
+            logger.debug(f"Batch hash lookup failed: {e}")
+
+        return found
+
     def _find_by_hash(
         self,
         text_hash: str,
@@ -257,10 +576,7 @@ class VectorService:
                 collection_name=collection,
                 scroll_filter=models.Filter(
                     must=[
-                        models.FieldCondition(
-                            key="project_id",
-                            match=models.MatchValue(value=project_id),
-                        ),
+                        tenant_condition(TENANT_FIELD, project_id),
                         models.FieldCondition(
                             key="text_hash",
                             match=models.MatchValue(value=text_hash),
@@ -271,15 +587,7 @@ class VectorService:
             )
 
             if results and results[0]:
-                point = results[0][0]
-                return EmbeddingResult(
-                    vector_id=str(point.id),
-                    text_hash=text_hash,
-                    embedding_dim=768,
-                    created_at=point.payload.get("timestamp", {}).get("iso", ""),
-                    collection=collection,
-                    metadata=point.payload,
-                )
+                return self._result_from_point(results[0][0], text_hash, collection)
 
         except Exception as e:
             logger.debug(f"Hash lookup failed: {e}")
@@ -301,7 +609,8 @@ class VectorService:
             query: Search query text
             project_id: Project ID for tenant isolation
             top_k: Number of results to return
-            filters: Additional filters (severity, service, time range, etc.)
+            filters: Additional filters (severity, service, hours,
+                start_time/end_time, year/month/day)
             collection: Collection to search
             score_threshold: Minimum similarity score (0-1)
 
@@ -320,13 +629,13 @@ class VectorService:
             logger.error("Failed to generate query embedding")
             return []
 
-        # Build filter conditions
-        must_conditions = [
-            models.FieldCondition(
-                key="project_id",
-                match=models.MatchValue(value=project_id),
-            )
-        ]
+        # Build filter conditions; the tenant predicate routes the search
+        # to the project's own HNSW graph
+        try:
+            must_conditions = [tenant_condition(TENANT_FIELD, project_id)]
+        except MissingTenantFilterError as e:
+            logger.error(f"Semantic search rejected: {e}")
+            return []
 
         if filters:
             # Severity filter
@@ -347,7 +656,16 @@ class VectorService:
                     )
                 )
 
-            # Time filters
+            # Time range on the indexed epoch field
+            time_condition = time_range_condition(
+                start=filters.get("start_time"),
+                end=filters.get("end_time"),
+                hours_back=filters.get("hours"),
+            )
+            if time_condition:
+                must_conditions.append(time_condition)
+
+            # Calendar filters
             if "year" in filters:
                 must_conditions.append(
                     models.FieldCondition(
@@ -411,7 +729,7 @@ class VectorService:
             top_k: Number of results
             severity: Filter by severity (ERROR, WARNING, etc.)
             service: Filter by service name
-            hours: Limit to last N hours (not implemented yet)
+            hours: Limit to last N hours
 
         Returns:
             List of SearchResult objects
@@ -421,6 +739,8 @@ class VectorService:
             filters["severity"] = severity
         if service:
             filters["service"] = service
+        if hours:
+            filters["hours"] = hours
 
         return self.semantic_search(
             query=query,
@@ -481,14 +801,7 @@ class VectorService:
             qdrant_service.client.delete(
                 collection_name=collection,
                 points_selector=models.FilterSelector(
-                    filter=models.Filter(
-                        must=[
-                            models.FieldCondition(
-                                key="project_id",
-                                match=models.MatchValue(value=project_id),
-                            )
-                        ]
-                    )
+                    filter=models.Filter(must=[tenant_condition(TENANT_FIELD, project_id)])
                 ),
             )
             logger.info(f"Deleted embeddings for project: {project_id}")
@@ -22,7 +22,6 @@ from typing import Any, Dict, List, Optional, Generator
 
 import httpx
 from google.cloud import bigquery
-from qdrant_client import QdrantClient
 from qdrant_client.http import models
 
 # Ensure project root is in path
@@ -32,6 +31,15 @@ sys.path.insert(0, str(REPO_ROOT))
 from src.services.redis_service import redis_service
 from src.services.embedding_queue import embedding_queue, EmbeddingJob, QUEUE_BACKLOG
 from src.services.batch_optimizer import batch_optimizer
+from src.services.qdrant_bulk_writer import BulkWriteStats, QdrantBulkWriter, create_qdrant_client
+from src.services.qdrant_schema import (
+    collection_has_sparse,
+    ensure_timestamp_epoch_index,
+    point_vector,
+    sparse_vectors_config,
+    timestamp_payload,
+)
+from src.services.sparse_encoder import sparse_encoder
 
 logger = logging.getLogger(__name__)
 
@@ -137,13 +145,7 @@ class LogEntry:
         """Convert to Qdrant payload with hierarchical metadata."""
         return {
             "log_id": self.log_id,
-            "timestamp": {
-                "iso": self.timestamp.isoformat() if self.timestamp else None,
-                "year": self.timestamp.year if self.timestamp else None,
-                "month": self.timestamp.month if self.timestamp else None,
-                "day": self.timestamp.day if self.timestamp else None,
-                "hour": self.timestamp.hour if self.timestamp else None,
-            },
+            **timestamp_payload(self.timestamp),
             "severity": self.severity,
             "service_name": self.service_name,
             "resource_type": self.resource_type,
@@ -229,9 +231,12 @@ class QdrantUpserter:
         self.vector_size = vector_size
         self.url = os.getenv("QDRANT_URL", "http://localhost:6333")
         self.api_key = os.getenv("QDRANT_API_KEY")
-        self.client = QdrantClient(url=self.url, api_key=self.api_key, timeout=60.0)
+        self.client = create_qdrant_client(self.url, self.api_key, timeout=60.0)
         self._ensure_collection()
-        logger.info(f"Initialized Qdrant upserter: {self.url} -> {self.collection}")
+        self.sparse_enabled = collection_has_sparse(self.client, self.collection)
+        self.writer = QdrantBulkWriter(self.client, self.collection)
+        self.last_stats: Optional[BulkWriteStats] = None
+        logger.info(f"Initialized Qdrant upserter: {self.url} -> {self.collection} (sparse={self.sparse_enabled})")
 
     def _ensure_collection(self):
         """Create collection if it doesn't exist."""
@@ -244,7 +249,8 @@ class QdrantUpserter:
                     vectors_config=models.VectorParams(
                         size=self.vector_size,
                         distance=models.Distance.COSINE
-                    )
+                    ),
+                    sparse_vectors_config=sparse_vectors_config(),
                 )
                 # Create payload indexes
                 for field in ["severity", "service_name", "resource_type", "dataset", "table_name"]:
@@ -259,58 +265,57 @@ class QdrantUpserter:
                         field_name=field,
                         field_schema=models.PayloadSchemaType.INTEGER
                     )
+                ensure_timestamp_epoch_index(self.client, self.collection)
                 logger.info(f"Created collection {self.collection} with indexes")
         except Exception as e:
             logger.error(f"Error ensuring collection: {e}")
 
-    def upsert_batch(self, logs: List[LogEntry], embeddings: List[List[float]]) -> int:
-        """Upsert a batch of log embeddings with metrics recording."""
+    def upsert_batch(
+        self,
+        logs: List[LogEntry],
+        embeddings: List[List[float]],
+        texts: Optional[List[str]] = None,
+    ) -> int:
+        """Upsert log embeddings through the bulk writer.
+
+        Any number of logs may be passed; the bulk writer splits them into
+        size-tuned batches, sends them concurrently with ``wait=False`` and
+        finishes with a durability barrier. Latency per batch is recorded
+        with the batch optimizer.
+
+        When the collection has a sparse vector, BM25 sparse vectors are
+        computed from ``texts`` (the dense-embedded trace texts) and stored
+        alongside the dense vectors.
+
+        Returns:
+            Number of points written
+        """
         if not logs or not embeddings:
             return 0
 
-        start = time.time()
-        success = True
-
         try:
-            points = [
+            sparse_vectors = [None] * len(logs)
+            if self.sparse_enabled:
+                if texts is None:
+                    texts = [log.get_full_trace_text() for log in logs]
+                sparse_vectors = sparse_encoder.encode_documents(texts)
+
+            points = (
                 models.PointStruct(
                     id=str(uuid.uuid4()),
-                    vector=emb,
+                    vector=point_vector(emb, sparse),
                     payload=log.to_qdrant_payload()
                 )
-                for log, emb in zip(logs, embeddings)
+                for log, emb, sparse in zip(logs, embeddings, sparse_vectors)
                 if emb and any(v != 0.0 for v in emb)  # Skip zero vectors
-            ]
+            )
 
-            if not points:
-                return 0
-
-            for attempt in range(MAX_RETRIES):
-                try:
-                    self.client.upsert(
-                        collection_name=self.collection,
-                        points=points,
-                        wait=True
-                    )
-                    logger.info(f"Upserted {len(points)} points to {self.collection}")
-                    return len(points)
-                except Exception as e:
-                    if attempt < MAX_RETRIES - 1:
-                        backoff = RETRY_DELAY * (2 ** attempt)
-                        logger.warning(f"Qdrant upsert error, retrying in {backoff}s: {e}")
-                        time.sleep(backoff)
-                        continue
-                    raise
+            self.last_stats = self.writer.write(points)
+            return self.last_stats.written
 
         except Exception as e:
             logger.error(f"Upsert error: {e}")
-            success = False
             return 0
-        finally:
-            latency_ms = (time.time() - start) * 1000
-            batch_optimizer.record_upsert_latency(latency_ms, success)
-
-        return 0
 
 
 class BigQueryLogFetcher:
@@ -551,18 +556,9 @@ class EmbeddingWorker:
                 # Yield to event loop
                 await asyncio.sleep(0)
 
-            # 4. Upsert to Qdrant in optimal batch sizes
-            upsert_batch_size = batch_optimizer.upsert_batch_size
-            total_upserted = 0
-
-            for i in range(0, len(logs), upsert_batch_size):
-                batch_logs = logs[i:i + upsert_batch_size]
-                batch_embeddings = embeddings[i:i + upsert_batch_size]
-                upserted = self.upserter.upsert_batch(batch_logs, batch_embeddings)
-                total_upserted += upserted
-
-                # Yield to event loop
-                await asyncio.sleep(0)
+            # 4. Bulk upsert to Qdrant (size-tuned, concurrent batches)
+            total_upserted = self.upserter.upsert_batch(logs, embeddings, texts)
+            await asyncio.sleep(0)
 
             # 5. Update checkpoint
             new_offset = job.offset + len(logs)
@@ -609,6 +605,7 @@ class EmbeddingWorker:
             "logs_embedded": self.logs_embedded,
             "queues": queue_stats,
             "optimizer": optimizer_stats,
+            "last_upsert": self.upserter.last_stats.to_dict() if self.upserter.last_stats else None,
             "global_progress": global_checkpoint
         }
 
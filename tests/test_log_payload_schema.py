@@ -40,6 +40,7 @@ def test_derived_fields():
     assert log.timestamp_month == 5
     assert log.timestamp_day == 15
     assert log.timestamp_hour == 14
+    assert log.timestamp_epoch == 1684161000
 
 
 def test_missing_required_field():
@@ -0,0 +1,21 @@
+"""Unit tests for the in-process Bloom filter."""
+
+from src.services.bloom_filter import BloomFilter
+
+
+class TestBloomFilter:
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        keys = [f"hash-{i}" for i in range(1000)]
+        bloom.update(keys)
+        assert all(k in bloom for k in keys)
+        assert len(bloom) == 1000
+
+    def test_false_positive_rate_near_target(self):
+        bloom = BloomFilter(capacity=2000, error_rate=0.01)
+        bloom.update(f"in-{i}" for i in range(2000))
+        false_positives = sum(f"out-{i}" in bloom for i in range(10000))
+        assert false_positives < 300  # 1% target, generous bound
+
+    def test_empty_filter_contains_nothing(self):
+        assert "anything" not in BloomFilter(capacity=10)
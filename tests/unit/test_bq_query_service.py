@@ -0,0 +1,154 @@
+"""Unit tests for the async BigQuery query service and the endpoints using it."""
+
+import asyncio
+import threading
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.services.bq_query_service import BigQueryQueryService, QueryTimeoutError
+
+
+class FakeJob:
+    def __init__(self, rows, polls_until_done=0):
+        self.rows = rows
+        self.polls_left = polls_until_done
+        self.cancelled = False
+        self.job_id = "job-1"
+        self.total_bytes_processed = 1024
+        self.result_kwargs = None
+
+    def done(self):
+        if self.polls_left <= 0:
+            return True
+        self.polls_left -= 1
+        return False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def result(self, **kwargs):
+        self.result_kwargs = kwargs
+        return iter(self.rows[: kwargs.get("max_results") or len(self.rows)])
+
+
+class FakeClient:
+    def __init__(self, make_job):
+        self.make_job = make_job
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def query(self, sql, job_config=None):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        job = self.make_job()
+        original_result = job.result
+
+        def result(**kwargs):
+            with self._lock:
+                self.active -= 1
+            return original_result(**kwargs)
+
+        job.result = result
+        return job
+
+
+def _service(client, **kwargs):
+    kwargs.setdefault("poll_initial", 0.001)
+    kwargs.setdefault("poll_max", 0.005)
+    return BigQueryQueryService(client_factory=lambda: client, **kwargs)
+
+
+class TestBigQueryQueryService:
+    def test_returns_rows_and_records_metrics(self):
+        job = FakeJob([{"severity": "ERROR", "count": 3}, {"severity": "INFO", "count": 9}], polls_until_done=2)
+        service = _service(FakeClient(lambda: job))
+
+        rows = asyncio.run(service.query("SELECT 1", max_results=1))
+
+        assert rows == [{"severity": "ERROR", "count": 3}]
+        assert job.result_kwargs["max_results"] == 1
+        stats = service.get_stats()
+        assert stats["succeeded"] == 1
+        assert stats["rows_returned"] == 1
+        assert stats["bytes_processed"] == 1024
+        assert stats["in_flight"] == 0
+
+    def test_timeout_cancels_job(self):
+        job = FakeJob([], polls_until_done=10_000)
+        service = _service(FakeClient(lambda: job), timeout=0.02)
+
+        with pytest.raises(QueryTimeoutError):
+            asyncio.run(service.query("SELECT slow"))
+
+        assert job.cancelled
+        assert service.get_stats()["timeouts"] == 1
+
+    def test_concurrency_is_capped_and_loop_stays_responsive(self):
+        client = FakeClient(lambda: FakeJob([{"n": 1}], polls_until_done=5))
+        service = _service(client, max_concurrent=2, executor_workers=2)
+
+        async def scenario():
+            ticks = 0
+
+            async def heartbeat():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.001)
+
+            beat = asyncio.create_task(heartbeat())
+            results = await asyncio.gather(*(service.query(f"SELECT {i}") for i in range(6)))
+            beat.cancel()
+            return results, ticks
+
+        results, ticks = asyncio.run(scenario())
+
+        assert len(results) == 6
+        assert client.peak <= 2
+        assert ticks > 5  # event loop kept running while jobs were polled
+        stats = service.get_stats()
+        assert stats["succeeded"] == 6
+        assert stats["max_queue_wait_ms"] > 0
+
+    def test_failure_is_counted_and_raised(self):
+        class Boom(Exception):
+            pass
+
+        def make_job():
+            job = FakeJob([])
+            job.result = lambda **kwargs: (_ for _ in ()).throw(Boom("bad sql"))
+            return job
+
+        service = _service(FakeClient(make_job))
+        with pytest.raises(Boom):
+            asyncio.run(service.query("SELECT broken"))
+        assert service.get_stats()["failed"] == 1
+
+
+class TestLogEndpoints:
+    @pytest.fixture
+    def client(self):
+        from src.api.main import app
+        return TestClient(app)
+
+    def test_severity_stats_awaits_service(self, client):
+        rows = [{"severity": "ERROR", "count": 2}]
+        with patch("src.api.main.bq_query_service.query", new=AsyncMock(return_value=rows)) as query:
+            response = client.get("/api/stats/severity?hours=2")
+        assert response.status_code == 200
+        assert response.json()["data"] == {"ERROR": 2}
+        query.assert_awaited_once()
+
+    def test_logs_timeout_returns_504(self, client):
+        with patch("src.api.main.bq_query_service.query", new=AsyncMock(side_effect=QueryTimeoutError("slow"))):
+            response = client.get("/api/logs?hours=1&limit=5")
+        assert response.status_code == 504
+        assert response.json()["error_type"] == "timeout"
+
+    def test_health_reports_query_stats(self, client):
+        response = client.get("/health")
+        assert "in_flight" in response.json()["bigquery_queries"]
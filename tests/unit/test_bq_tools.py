@@ -1,10 +1,16 @@
 import pytest
 from unittest.mock import MagicMock, patch
 
-from src.agent.tools.bq import run_bq_query
+from src.agent.tools.bq import dry_run_cache, run_bq_query
 from src.agent.tools.contracts import BQQueryInput
 from src.config import config
 
+@pytest.fixture(autouse=True)
+def clear_dry_run_cache():
+    dry_run_cache.clear()
+    yield
+    dry_run_cache.clear()
+
 @patch("src.agent.tools.bq.get_client")
 def test_bq_query_dry_run_limit_exceeded(mock_get_client):
     # Setup mock client
@@ -45,3 +51,142 @@ def test_bq_query_success(mock_get_client):
 
     assert res.job_id == "job_123"
     assert res.rows == [{"col": "val"}]
+
+def _fake_client(bytes_by_sql=None, delay=0.0):
+    """Client whose dry runs report bytes_by_sql[sql] and whose queries return the SQL."""
+    import time
+
+    def query(sql, job_config=None):
+        time.sleep(delay)
+        job = MagicMock()
+        job.job_id = f"job-{sql}"
+        job.cache_hit = False
+        job.total_bytes_processed = (bytes_by_sql or {}).get(sql, 100)
+        job.result.return_value = [{"sql": sql}]
+        return job
+
+    client = MagicMock()
+    client.query.side_effect = query
+    return client
+
+@patch("src.agent.tools.bq.get_client")
+def test_bq_queries_run_concurrently_in_order(mock_get_client):
+    import time
+    from src.agent.tools.bq import run_bq_queries
+
+    mock_get_client.return_value = _fake_client(delay=0.1)
+
+    start = time.monotonic()
+    results = run_bq_queries([BQQueryInput(sql=f"SELECT {i}") for i in range(4)])
+    elapsed = time.monotonic() - start
+
+    # Two round trips (dry run + execute), not eight
+    assert elapsed < 0.35
+    assert [r.rows[0]["sql"] for r in results] == [f"SELECT {i}" for i in range(4)]
+
+@patch("src.agent.tools.bq.get_client")
+def test_bq_queries_gate_each_query_on_its_dry_run(mock_get_client):
+    from src.agent.tools.bq import run_bq_queries
+
+    client = _fake_client({"SELECT big": config.MAX_BQ_BYTES_ESTIMATE + 1})
+    mock_get_client.return_value = client
+
+    small, big = run_bq_queries([BQQueryInput(sql="SELECT small"), BQQueryInput(sql="SELECT big")])
+
+    assert small.job_id == "job-SELECT small"
+    assert isinstance(big, ValueError) and "Query exceeds byte limit" in str(big)
+    executed = [c.args[0] for c in client.query.call_args_list if not c.kwargs["job_config"].dry_run]
+    assert executed == ["SELECT small"]
+
+@patch("src.agent.tools.definitions.run_bq_queries")
+def test_analyze_logs_issues_sections_as_one_batch(mock_run):
+    from src.agent.tools.contracts import BQQueryOutput
+    from src.agent.tools.definitions import analyze_logs
+
+    def out(rows):
+        return BQQueryOutput(job_id="j", rows=rows, total_bytes_processed=0, cache_hit=False)
+
+    mock_run.side_effect = [
+        [
+            out([{"severity": "ERROR", "count": 3}]),
+            out([{"service_name": "api", "count": 3, "error_count": 3, "warning_count": 0}]),
+            out([{"event_timestamp": "t", "severity": "ERROR", "service_name": "api", "source_table": "s", "message": "boom"}]),
+            out([]),
+        ],
+        [RuntimeError("pattern query failed")],
+    ]
+
+    result = analyze_logs.invoke({"timeframe": "6h"})
+
+    assert len(mock_run.call_args_list[0].args[0]) == 4
+    assert "error_type" in mock_run.call_args_list[1].args[0][0].sql
+    assert result["stats"]["error_count"] == 3
+    assert result["top_errors"][0]["message"] == "boom"
+    assert result["patterns"] == []
+
+@patch("src.agent.tools.definitions.run_bq_queries")
+def test_analyze_logs_skips_pattern_query_without_errors(mock_run):
+    from src.agent.tools.contracts import BQQueryOutput
+    from src.agent.tools.definitions import analyze_logs
+
+    def out(rows):
+        return BQQueryOutput(job_id="j", rows=rows, total_bytes_processed=0, cache_hit=False)
+
+    mock_run.return_value = [out([{"severity": "INFO", "count": 9}]), out([]), out([]), out([])]
+
+    result = analyze_logs.invoke({"timeframe": "3h"})
+
+    mock_run.assert_called_once()
+    assert result["patterns"] == []
+
+def _dry_runs(client):
+    return [c for c in client.query.call_args_list if c.kwargs["job_config"].dry_run]
+
+@patch("src.agent.tools.bq.get_client")
+def test_dry_run_reused_for_same_template_and_window(mock_get_client):
+    client = _fake_client()
+    mock_get_client.return_value = client
+    sql = "SELECT * FROM t WHERE service_name = @service AND log_date >= DATE(@start_time)"
+    hits = dry_run_cache.get_stats()["hits"]
+
+    run_bq_query(BQQueryInput(sql=sql, params={"service": "api", "start_time": "2026-10-01T10:00:00"}))
+    # Same day bucket and reformatted SQL: no second dry run
+    run_bq_query(BQQueryInput(sql=sql.replace(" AND ", "\n  AND "), params={"service": "worker", "start_time": "2026-10-01T11:30:00"}))
+    assert len(_dry_runs(client)) == 1
+
+    # New partition window: dry run again
+    run_bq_query(BQQueryInput(sql=sql, params={"service": "api", "start_time": "2026-10-02T00:00:00"}))
+    assert len(_dry_runs(client)) == 2
+    assert dry_run_cache.get_stats()["hits"] == hits + 1
+
+@patch("src.agent.tools.bq.get_client")
+def test_dry_run_cache_expires_and_ignores_failures(mock_get_client):
+    from src.agent.tools.bq import DryRunCache
+
+    cache = DryRunCache(ttl=0)
+    key = cache.key("SELECT 1", {"hours": 24})
+    cache.put(key, MagicMock())
+    assert cache.get(key) is None
+    assert cache.key("SELECT 1", {"hours": 24}) != cache.key("SELECT 1", {"hours": 48})
+
+    client = MagicMock()
+    client.query.side_effect = RuntimeError("dry run failed")
+    mock_get_client.return_value = client
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            run_bq_query(BQQueryInput(sql="SELECT broken"))
+    assert client.query.call_count == 2
+
+@patch("src.agent.tools.bq.get_client")
+def test_skip_dry_run_caps_bytes_billed(mock_get_client):
+    client = _fake_client()
+    mock_get_client.return_value = client
+
+    skipped = dry_run_cache.get_stats()["skipped"]
+
+    run_bq_query(BQQueryInput(sql="SELECT rollup", params={"hours": 24}, skip_dry_run=True))
+
+    (call,) = client.query.call_args_list
+    assert not call.kwargs["job_config"].dry_run
+    assert call.kwargs["job_config"].maximum_bytes_billed == config.MAX_BQ_BYTES_ESTIMATE
+    assert dry_run_cache.get_stats()["skipped"] == skipped + 1
@@ -0,0 +1,181 @@
+"""Unit tests for write-behind chat persistence."""
+
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.services.chat_persistence import ChatPersistenceQueue
+
+
+class TestPersistenceLane:
+    def test_calls_run_in_submission_order(self):
+        calls = []
+
+        def write(name, delay):
+            time.sleep(delay)
+            calls.append(name)
+
+        async def run():
+            lane = ChatPersistenceQueue(max_workers=4).lane()
+            lane.submit("slow", write, "first", 0.05)
+            lane.submit("fast", write, "second", 0)
+            assert await lane.flush(timeout=2)
+
+        asyncio.run(run())
+        assert calls == ["first", "second"]
+
+    def test_failures_are_collected(self):
+        def boom():
+            raise ConnectionError("firestore down")
+
+        async def run():
+            queue = ChatPersistenceQueue(max_workers=2)
+            lane = queue.lane()
+            lane.submit("user_message", boom)
+            lane.submit("user_embedding", lambda: False)
+            lane.submit("user_realtime", lambda: None)
+            await lane.flush()
+            return queue, lane.pop_failures()
+
+        queue, failures = asyncio.run(run())
+
+        assert [(f.step, f.error_type) for f in failures] == [
+            ("user_message", "ConnectionError"),
+            ("user_embedding", "write_failed"),
+        ]
+        assert queue.get_stats()["completed"] == 1
+        assert queue.get_stats()["failed"] == 2
+
+    def test_required_failure_skips_rest_of_lane(self):
+        written = []
+
+        def fail():
+            raise RuntimeError("no firestore")
+
+        async def run():
+            lane = ChatPersistenceQueue().lane()
+            lane.submit("create_session", fail, required=True)
+            lane.submit("user_message", written.append, "msg")
+            await lane.flush()
+            return lane.pop_failures()
+
+        failures = asyncio.run(run())
+
+        assert written == []
+        assert failures[1].skipped
+        assert failures[1].to_event()["data"]["error_type"] == "skipped_after_create_session"
+
+    def test_flush_times_out_without_cancelling(self):
+        done = threading.Event()
+
+        def slow():
+            time.sleep(0.2)
+            done.set()
+
+        async def run():
+            queue = ChatPersistenceQueue()
+            lane = queue.lane()
+            lane.submit("slow", slow)
+            assert not await lane.flush(timeout=0.01)
+            assert await queue.drain(timeout=2) == 0
+
+        asyncio.run(run())
+        assert done.is_set()
+
+
+class FakeGraph:
+    def __init__(self, started: threading.Event):
+        self.started = started
+
+    async def astream_events(self, inputs, version=None):
+        self.started.set()
+        yield {"event": "on_chat_model_stream", "data": {"chunk": SimpleNamespace(content="hello")}}
+        # Give write-behind calls a chance to report before the stream ends
+        await asyncio.sleep(0.05)
+        yield {"event": "on_chain_end", "data": {}}
+
+
+class TestChatEndpoint:
+    @pytest.fixture(autouse=True)
+    def authenticated(self):
+        from src.api.auth import get_current_user_uid
+        from src.api.main import app
+
+        app.dependency_overrides[get_current_user_uid] = lambda: "user-1"
+        yield
+        app.dependency_overrides.pop(get_current_user_uid, None)
+
+    @pytest.fixture
+    def token_manager(self):
+        manager = MagicMock()
+        manager.count_tokens.return_value = 1
+        manager.estimate_tokens.return_value = 0.25
+        manager.get_budget_status.return_value = {"tokens_used": 5, "tokens_remaining": 95, "max_tokens": 100}
+        return manager
+
+    def _post(self, firebase, dual_write, token_manager, started):
+        from src.api.main import app
+
+        with patch("src.api.main.firebase_service", firebase), \
+                patch("src.api.main.dual_write_service", dual_write), \
+                patch("src.api.main.redis_service") as redis, \
+                patch("src.agent.graph.graph", FakeGraph(started)), \
+                patch("src.agent.nodes.get_token_manager", return_value=token_manager), \
+                patch("src.agent.nodes.reset_token_manager"):
+            redis.enqueue.return_value = True
+            response = TestClient(app).post("/api/chat", json={"message": "why is api failing?"})
+        return [json.loads(line[6:]) for line in response.text.splitlines() if line.startswith("data: {")]
+
+    def test_stream_starts_before_session_is_persisted(self, token_manager):
+        started = threading.Event()
+        order = []
+
+        def create_session(**kwargs):
+            # Only returns once the graph is already streaming
+            order.append(("graph_started_first", started.wait(timeout=2)))
+            return kwargs["session_id"]
+
+        firebase = MagicMock(enabled=True, realtime_enabled=False)
+        firebase.create_session.side_effect = create_session
+        dual_write = MagicMock()
+        dual_write.write_event.return_value = True
+
+        events = self._post(firebase, dual_write, token_manager, started)
+
+        assert order == [("graph_started_first", True)]
+        session_id = events[0]["data"]["session_id"]
+        assert firebase.create_session.call_args.kwargs["session_id"] == session_id
+        roles = [c.args[0].role for c in dual_write.write_event.call_args_list]
+        assert roles == ["user", "assistant"]
+        assert not any(e["type"] == "persistence_error" for e in events)
+
+    def test_persistence_failure_is_reported_on_stream(self, token_manager):
+        firebase = MagicMock(enabled=True, realtime_enabled=False)
+        firebase.create_session.side_effect = lambda **kwargs: kwargs["session_id"]
+        dual_write = MagicMock()
+        dual_write.write_event.side_effect = ConnectionError("firestore unavailable")
+
+        events = self._post(firebase, dual_write, token_manager, threading.Event())
+
+        failures = [e["data"] for e in events if e["type"] == "persistence_error"]
+        assert {f["step"] for f in failures} == {"user_message", "assistant_message"}
+        assert all(f["error_type"] == "ConnectionError" for f in failures)
+        assert any(e["type"] == "on_chat_model_stream" for e in events)
+
+    def test_failed_session_create_tells_client_to_drop_id(self, token_manager):
+        firebase = MagicMock(enabled=True, realtime_enabled=False)
+        firebase.create_session.side_effect = ConnectionError("firestore unavailable")
+        dual_write = MagicMock()
+
+        events = self._post(firebase, dual_write, token_manager, threading.Event())
+
+        sessions = [e["data"] for e in events if e["type"] == "session"]
+        assert len(sessions) == 2
+        assert sessions[1] == {"session_id": sessions[0]["session_id"], "persisted": False}
+        dual_write.write_event.assert_not_called()
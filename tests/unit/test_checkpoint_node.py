@@ -7,6 +7,12 @@ import pytest
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime, timezone
 from src.agent.checkpoint import (
+    CheckpointEncoder,
+    CheckpointWriter,
+    _snapshot_state,
+    apply_delta,
+    build_checkpoint,
+    diff_snapshots,
     save_checkpoint,
     load_checkpoint,
     restore_state_from_checkpoint,
@@ -314,3 +320,139 @@ class TestCheckpointIntegration:
         assert restored_state["run_id"] == sample_state["run_id"]
         assert restored_state["user_query"] == sample_state["user_query"]
         assert restored_state["phase"] == sample_state["phase"]
+
+
+class TestDeltaEncoding:
+    """Tests for delta-encoded, compressed checkpoints."""
+
+    def _grow(self, state, step):
+        state["evidence"] = state["evidence"] + [{"type": "log", "step": step, "message": "x" * 50}]
+        state["tool_calls"] = state["tool_calls"] + [{"tool_name": "analyze_logs", "step": step}]
+        state["phase"] = "verify" if step > 2 else "diagnose"
+
+    def test_diff_round_trips(self):
+        previous = {"evidence": [1, 2], "phase": "diagnose", "scope": {"a": 1}, "hypotheses": ["h"]}
+        current = {"evidence": [1, 2, 3], "phase": "verify", "scope": {"a": 1}, "hypotheses": []}
+
+        delta = diff_snapshots(previous, current)
+
+        assert delta == {"evidence": {"append": [3]}, "phase": {"set": "verify"}, "hypotheses": {"set": []}}
+        assert apply_delta(previous, delta) == current
+
+    def test_full_snapshot_every_n(self, sample_state):
+        encoder = CheckpointEncoder(full_every=3, compress_min_bytes=10**9)
+        kinds = []
+        for step in range(7):
+            self._grow(sample_state, step)
+            doc, _ = build_checkpoint(sample_state, checkpoint_id=f"ckpt-{step}", encoder=encoder)
+            kinds.append(doc["kind"])
+
+        assert kinds == ["full", "delta", "delta", "full", "delta", "delta", "full"]
+        assert doc["state"]["evidence"][-1]["step"] == 6
+
+        encoder.reset(sample_state["run_id"])
+        doc, _ = build_checkpoint(sample_state, checkpoint_id="ckpt-7", encoder=encoder)
+        assert doc["kind"] == "full"
+
+    def test_restore_replays_deltas(self, sample_state):
+        encoder = CheckpointEncoder(full_every=10, compress_min_bytes=200)
+        docs = {}
+        for step in range(5):
+            self._grow(sample_state, step)
+            doc, _ = build_checkpoint(sample_state, checkpoint_id=f"ckpt-{step}", encoder=encoder)
+            docs[doc["checkpoint_id"]] = doc
+
+        tip = docs["ckpt-4"]
+        assert tip["kind"] == "delta" and tip["base_checkpoint_id"] == "ckpt-3"
+        assert docs["ckpt-0"]["encoding"] == "zlib+json" and "state" not in docs["ckpt-0"]
+
+        restored = restore_state_from_checkpoint(tip, loader=docs.get)
+
+        assert restored["evidence"] == sample_state["evidence"]
+        assert restored["tool_calls"] == sample_state["tool_calls"]
+        assert restored["phase"] == "verify"
+
+    def test_restore_missing_base_raises(self, sample_state):
+        encoder = CheckpointEncoder(full_every=10)
+        build_checkpoint(sample_state, checkpoint_id="ckpt-0", encoder=encoder)
+        self._grow(sample_state, 1)
+        tip, _ = build_checkpoint(sample_state, checkpoint_id="ckpt-1", encoder=encoder)
+
+        with pytest.raises(ValueError, match="missing base ckpt-0"):
+            restore_state_from_checkpoint(tip, loader=lambda _id: None)
+
+    def test_deltas_write_fewer_bytes(self, sample_state):
+        encoder = CheckpointEncoder(full_every=5, compress_min_bytes=10**9)
+        for step in range(20):
+            self._grow(sample_state, step)
+            build_checkpoint(sample_state, checkpoint_id=f"ckpt-{step}", encoder=encoder)
+
+        stats = encoder.get_stats()
+        assert (stats["full"], stats["delta"]) == (4, 16)
+        assert stats["bytes_written"] < stats["full_snapshot_bytes"] / 2
+
+
+class TestCheckpointWriter:
+    """Tests for the write-behind checkpoint queue."""
+
+    def test_batches_and_flushes(self, sample_state):
+        client = MagicMock()
+        encoder = CheckpointEncoder()
+        writer = CheckpointWriter(get_db=lambda: client, encoder=encoder, flush_interval=0.05)
+
+        for step in range(3):
+            doc, _ = build_checkpoint(sample_state, checkpoint_id=f"ckpt-{step}", encoder=encoder)
+            writer.enqueue(doc)
+
+        assert writer.flush(timeout=5)
+        batch = client.batch.return_value
+        assert batch.set.call_count == 3
+        assert writer.get_stats()["written"] == 3
+        assert writer.get_stats()["pending"] == 0
+
+    def test_failed_batch_resets_run(self, sample_state):
+        client = MagicMock()
+        client.batch.return_value.commit.side_effect = Exception("Firestore error")
+        encoder = CheckpointEncoder()
+        writer = CheckpointWriter(get_db=lambda: client, encoder=encoder, flush_interval=0.01)
+
+        doc, _ = build_checkpoint(sample_state, checkpoint_id="ckpt-0", encoder=encoder)
+        writer.enqueue(doc)
+
+        assert writer.flush(timeout=5)
+        assert writer.get_stats()["failed"] == 1
+        doc, _ = build_checkpoint(sample_state, checkpoint_id="ckpt-1", encoder=encoder)
+        assert doc["kind"] == "full"
+
+    def test_delta_on_failed_base_is_written_full(self, sample_state):
+        client = MagicMock()
+        client.batch.return_value.commit.side_effect = [Exception("Firestore error"), None]
+        encoder = CheckpointEncoder(full_every=5)
+        writer = CheckpointWriter(get_db=lambda: client, encoder=encoder, batch_max=1, flush_interval=0.01)
+
+        for step in range(2):
+            sample_state["phase"] = f"phase-{step}"
+            snapshot = _snapshot_state(sample_state)
+            doc, _ = build_checkpoint(sample_state, checkpoint_id=f"ckpt-{step}", encoder=encoder, snapshot=snapshot)
+            writer.enqueue(doc, snapshot)
+
+        assert writer.flush(timeout=5)
+        written = client.batch.return_value.set.call_args_list[-1].args[1]
+        assert written["checkpoint_id"] == "ckpt-1"
+        assert written["kind"] == "full"
+        assert "base_checkpoint_id" not in written
+        assert restore_state_from_checkpoint(written, loader=lambda _id: None)["phase"] == "phase-1"
+        assert writer.get_stats()["rebased"] == 1
+
+    def test_batches_capped_by_bytes(self, sample_state):
+        client = MagicMock()
+        encoder = CheckpointEncoder()
+        writer = CheckpointWriter(get_db=lambda: client, encoder=encoder, batch_max_bytes=1, flush_interval=0.05)
+
+        for step in range(3):
+            doc, _ = build_checkpoint(sample_state, checkpoint_id=f"ckpt-{step}", encoder=encoder)
+            writer.enqueue(doc)
+
+        assert writer.flush(timeout=5)
+        assert client.batch.return_value.commit.call_count == 3
+        assert writer.get_stats()["written"] == 3
@@ -0,0 +1,148 @@
+"""Unit tests for context compaction of tool outputs."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from src.agent import tokenization
+from src.agent.compaction import PayloadStore, compact_messages, summarize_value
+from src.agent.tokenization import TokenBudgetManager
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def get_cache(self, key):
+        data = self.store.get(key)
+        return json.loads(data) if data is not None else None
+
+    def set_cache(self, key, value, ttl=None):
+        self.store[key] = json.dumps(value)
+
+
+def _store(db=None):
+    return PayloadStore(redis=FakeRedis(), firestore_db=lambda: db)
+
+
+def _tool_output(i, rows=200):
+    return ToolMessage(
+        content=json.dumps({"rows": [{"message": f"error {n}", "service": "api"} for n in range(rows)], "total": rows}),
+        name="bq_query_tool",
+        tool_call_id=f"call-{i}",
+        id=f"tool-{i}",
+    )
+
+
+def _count(text):
+    return len(text.split())
+
+
+class TestSummaries:
+    def test_summary_keeps_shape(self):
+        value = {"rows": [{"m": "x" * 500}] * 10, "total": 10, "nested": {"a": {"b": {"c": {"d": 1}}}}}
+
+        summary = summarize_value(value)
+
+        assert summary["total"] == 10
+        assert summary["rows"]["count"] == 10
+        assert len(summary["rows"]["first"]) == 3
+        assert summary["rows"]["first"][0]["m"].endswith("...")
+        assert summary["nested"]["a"]["b"] == "<1 keys>"
+
+
+class TestCompactMessages:
+    def test_older_large_outputs_are_replaced(self):
+        store = _store()
+        messages = [
+            HumanMessage(content="what broke?", id="h1"),
+            _tool_output(1),
+            ToolMessage(content="ok", name="get_log_summary", tool_call_id="call-2", id="tool-2"),
+            _tool_output(3),
+            _tool_output(4),
+        ]
+
+        replacements = compact_messages(messages, _count, store=store, keep_recent=2, min_tokens=100)
+
+        # tool-2 is too small, tool-3/tool-4 are the newest two
+        assert [m.id for m in replacements] == ["tool-1"]
+        body = json.loads(replacements[0].content)
+        assert body["compacted"] is True
+        assert body["summary"]["total"] == 200
+        assert store.get(body["ref"]) == messages[1].content
+        assert replacements[0].tool_call_id == "call-1"
+
+        # Already-compacted outputs are left alone
+        assert compact_messages([replacements[0]] + messages[2:], _count, store=store, keep_recent=2, min_tokens=100) == []
+
+    def test_payload_falls_back_to_firestore(self):
+        db = MagicMock()
+        store = _store(db)
+        ref = store.put("full output", {"tool": "bq_query_tool"})
+
+        store.redis.store.clear()
+        db.collection.return_value.document.return_value.get.return_value = MagicMock(
+            exists=True, to_dict=MagicMock(return_value={"content": "full output"})
+        )
+
+        assert store.get(ref) == "full output"
+        db.collection.assert_called_with("agent_payloads")
+
+
+class TestCompactionNode:
+    @pytest.fixture
+    def manager(self):
+        with patch.object(tokenization, "tiktoken", None):
+            return TokenBudgetManager(max_tokens=1000)
+
+    def test_compacts_when_prompt_crosses_threshold(self, manager):
+        from src.agent.nodes import compaction_node
+
+        store = _store()
+        state = {"run_id": "r1", "messages": [HumanMessage(content="q", id="h1"), _tool_output(1), _tool_output(2), _tool_output(3)]}
+
+        with patch("src.agent.nodes.get_token_manager", return_value=manager), \
+                patch("src.agent.compaction.payload_store", store):
+            update = compaction_node(state)
+
+        assert [m.id for m in update["messages"]] == ["tool-1"]
+        assert update["evidence"][0]["type"] == "compaction"
+        assert update["evidence"][0]["tokens_saved"] > 0
+
+    def test_no_op_below_threshold(self, manager):
+        from src.agent.nodes import compaction_node
+
+        state = {"messages": [HumanMessage(content="q", id="h1"), AIMessage(content="short answer", id="a1")]}
+
+        with patch("src.agent.nodes.get_token_manager", return_value=manager):
+            assert compaction_node(state) == {}
+
+    def test_replacement_keeps_position_in_state(self):
+        from langgraph.graph.message import add_messages
+
+        messages = add_messages([], [HumanMessage(content="q", id="h1"), _tool_output(1), AIMessage(content="a", id="a1")])
+        replacements = compact_messages(messages, _count, store=_store(), keep_recent=0, min_tokens=10)
+
+        merged = add_messages(messages, replacements)
+
+        assert [m.id for m in merged] == ["h1", "tool-1", "a1"]
+        assert json.loads(merged[1].content)["compacted"] is True
+
+
+class TestFetchToolOutput:
+    def test_fetch_pages_through_stored_output(self):
+        from src.agent.tools.definitions import fetch_tool_output
+
+        store = _store()
+        ref = store.put("abcdefghij")
+
+        with patch("src.agent.compaction.payload_store", store):
+            first = fetch_tool_output.invoke({"ref": ref, "max_chars": 4})
+            last = fetch_tool_output.invoke({"ref": ref, "offset": 8, "max_chars": 4})
+            missing = fetch_tool_output.invoke({"ref": "payload:nope"})
+
+        assert (first["content"], first["next_offset"]) == ("abcd", 4)
+        assert last["content"] == "ij" and "next_offset" not in last
+        assert "error" in missing
@@ -0,0 +1,212 @@
+"""Unit tests for GraphQL resolvers, DataLoaders and the shared log query service."""
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, Mock, patch
+
+import pytest
+
+from src.api.graphql.loaders import GraphQLLoaders
+from src.api.graphql.schema import schema
+from src.services.hot_tier import HotTierStore
+from src.services.log_query_service import LogQueryService
+from src.services.query_cache import QueryCache, pack_rows, unpack_rows
+
+
+class FakeRedis:
+    """Dict-backed stand-in for redis_service; stores JSON like the real one."""
+
+    def __init__(self):
+        self.store = {}
+
+    def get_cache(self, key):
+        data = self.store.get(key)
+        return json.loads(data) if data is not None else None
+
+    def set_cache(self, key, value, ttl=None):
+        self.store[key] = json.dumps(value)
+        return True
+
+    def try_lock(self, key, ttl=30):
+        return True
+
+    def release_lock(self, key):
+        pass
+
+
+class FakeQueryService:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    async def query(self, sql, params=None, max_results=None, **kwargs):
+        values = {p.name: p.values if hasattr(p, "values") else p.value for p in params}
+        self.calls.append(values)
+        ids = values.get("log_ids")
+        return [r for r in self.rows if ids is None or r["log_id"] in ids]
+
+
+def _row(log_id, minutes_ago=5, **extra):
+    return {
+        "log_id": log_id,
+        "event_timestamp": datetime.now(timezone.utc) - timedelta(minutes=minutes_ago),
+        "severity": "ERROR",
+        "service_name": "api",
+        "message": f"message {log_id}",
+        **extra,
+    }
+
+
+def _service(rows, hot_tier=None):
+    return LogQueryService(
+        query_service=FakeQueryService(rows),
+        hot_tier=hot_tier or HotTierStore(path=""),
+        cache=QueryCache("logs", fresh_ttl=60, stale_ttl=300, redis=FakeRedis()),
+        stats=QueryCache("stats", fresh_ttl=60, stale_ttl=300, redis=FakeRedis()),
+    )
+
+
+class TestPackRows:
+    def test_round_trip(self):
+        rows = [_row("a"), _row("b", trace_id="t1")]
+
+        unpacked = unpack_rows(json.loads(json.dumps(pack_rows(rows))))
+
+        assert [r["log_id"] for r in unpacked] == ["a", "b"]
+        assert unpacked[0]["trace_id"] is None
+        assert unpacked[1]["event_timestamp"] == rows[1]["event_timestamp"].isoformat()
+
+    def test_smaller_than_row_dicts(self):
+        rows = [_row(f"id{i}") for i in range(50)]
+        plain = json.dumps([{k: str(v) for k, v in r.items()} for r in rows])
+        assert len(json.dumps(pack_rows(rows))) < len(plain)
+
+
+class TestLogQueryService:
+    def test_logs_by_id_is_one_query(self):
+        service = _service([_row("a"), _row("b"), _row("c")])
+
+        found = asyncio.run(service.logs_by_id(["a", "c", "a", "missing"]))
+
+        assert set(found) == {"a", "c"}
+        assert len(service.query_service.calls) == 1
+        assert service.query_service.calls[0]["log_ids"] == ["a", "c", "missing"]
+
+    def test_hot_tier_rows_skip_bigquery(self, tmp_path):
+        hot = HotTierStore(path=str(tmp_path / "hot.db"), retention_hours=6)
+        hot.ingest([{**_row("a"), "event_timestamp": _row("a")["event_timestamp"].isoformat()}])
+        service = _service([_row("b")], hot_tier=hot)
+
+        found = asyncio.run(service.logs_by_id(["a", "b"]))
+
+        assert set(found) == {"a", "b"}
+        assert service.query_service.calls[0]["log_ids"] == ["b"]
+
+    def test_list_logs_served_from_cache(self):
+        from src.glass_pane.query_builder import LogQueryParams
+
+        service = _service([_row("a"), _row("b")])
+
+        async def run():
+            first = await service.list_logs(LogQueryParams(hours=24, limit=10))
+            second = await service.list_logs(LogQueryParams(hours=24, limit=10))
+            return first, second
+
+        first, second = asyncio.run(run())
+
+        assert first == second
+        assert len(service.query_service.calls) == 1
+
+
+class TestResolvers:
+    @pytest.fixture(autouse=True)
+    def authenticated(self):
+        with patch("src.api.graphql.resolvers.get_user_from_context", return_value="user-1"):
+            yield
+
+    def _execute(self, query, queries=None):
+        context = SimpleNamespace(loaders=GraphQLLoaders(), queries=queries)
+        return asyncio.run(schema.execute(query, context_value=context))
+
+    def test_log_fields_share_one_lookup(self):
+        service = _service([_row("a"), _row("b")])
+
+        with patch("src.api.graphql.loaders.log_query_service", service):
+            result = self._execute('{ x: log(id: "a") { id } y: log(id: "b") { id } z: log(id: "nope") { id } }')
+
+        assert result.errors is None
+        assert result.data == {"x": {"id": "a"}, "y": {"id": "b"}, "z": None}
+        assert len(service.query_service.calls) == 1
+
+    def test_chat_fields_share_one_firestore_batch(self):
+        firebase = MagicMock()
+        firebase.get_messages_for_sessions.return_value = {
+            "s1": [{"id": "m1", "session_id": "s1", "content": "hi", "timestamp": "2026-10-01T00:00:00"}],
+        }
+
+        with patch("src.api.graphql.loaders.firebase_service", firebase):
+            result = self._execute('{ a: chat(sessionId: "s1") { id message } b: chat(sessionId: "s2") { id } }')
+
+        assert result.errors is None
+        assert result.data == {"a": [{"id": "m1", "message": "hi"}], "b": []}
+        firebase.get_messages_for_sessions.assert_called_once_with(["s1", "s2"], "user-1")
+
+    def test_services_and_logs(self):
+        service = _service([_row("a"), _row("b")])
+        service.service_stats = Mock(side_effect=lambda hours: asyncio.sleep(0, [{"service_name": "api", "count": 2}]))
+
+        result = self._execute("{ services { name } logs(filter: {hours: 2, limit: 2}) { totalCount hasMore } }", service)
+
+        assert result.errors is None
+        assert result.data["services"] == [{"name": "api"}]
+        assert result.data["logs"] == {"totalCount": 2, "hasMore": True}
+
+    def test_logs_rejects_region_and_env_filters(self):
+        service = _service([_row("a")])
+
+        result = self._execute('{ logs(filter: {region: "us-central1"}) { totalCount } }', service)
+
+        assert "region or env" in result.errors[0].message
+        assert service.query_service.calls == []
+
+
+class TestFirestoreBatch:
+    def test_messages_for_sessions_batches_and_checks_owner(self):
+        from src.services.firebase_service import FirebaseService
+
+        def doc(doc_id, data, exists=True):
+            return Mock(id=doc_id, exists=exists, to_dict=Mock(return_value=data))
+
+        service = FirebaseService()
+        db = MagicMock()
+        db.get_all.return_value = [doc("s1", {"user_id": "u1"}), doc("s2", {"user_id": "other"}), doc("s3", None, exists=False)]
+        db.collection_group.return_value.where.return_value.stream.return_value = [
+            doc("m2", {"session_id": "s1", "content": "second", "timestamp": datetime(2026, 10, 1, 0, 1)}),
+            doc("m1", {"session_id": "s1", "content": "first", "timestamp": datetime(2026, 10, 1, 0, 0)}),
+        ]
+        service.firestore_db = db
+
+        messages = service.get_messages_for_sessions(["s1", "s2", "s3"], user_id="u1")
+
+        assert [m["content"] for m in messages["s1"]] == ["first", "second"]
+        assert set(messages) == {"s1"}
+        db.collection_group.return_value.where.assert_called_once_with("session_id", "in", ["s1"])
+
+    def test_messages_for_sessions_falls_back_without_group_index(self):
+        from src.services.firebase_service import FirebaseService
+
+        service = FirebaseService()
+        db = MagicMock()
+        db.get_all.return_value = [Mock(id="s1", exists=True, to_dict=Mock(return_value={"user_id": "u1"}))]
+        db.collection_group.return_value.where.return_value.stream.side_effect = RuntimeError("FAILED_PRECONDITION")
+        messages_ref = db.collection.return_value.document.return_value.collection.return_value
+        messages_ref.order_by.return_value.limit.return_value.stream.return_value = [
+            Mock(to_dict=Mock(return_value={"session_id": "s1", "content": "hi", "timestamp": datetime(2026, 10, 1)})),
+        ]
+        service.firestore_db = db
+
+        messages = service.get_messages_for_sessions(["s1"], user_id="u1")
+
+        assert [m["content"] for m in messages["s1"]] == ["hi"]
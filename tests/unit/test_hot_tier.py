@@ -0,0 +1,268 @@
+"""Unit tests for the local hot tier store and its query routing."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.glass_pane.query_builder import CanonicalQueryBuilder, LogQueryParams, encode_cursor
+from src.services.bq_query_service import BigQueryQueryService
+from src.services.hot_tier import HotTierStore
+from src.services.log_pager import LogPager
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _row(i, minutes_ago, severity="INFO", service="api", message="request served"):
+    return {
+        "log_id": f"id{i:03d}",
+        "event_timestamp": (_now() - timedelta(minutes=minutes_ago)).isoformat(),
+        "severity": severity,
+        "service_name": service,
+        "message": message,
+        "source_table": "run_requests",
+        "stream_id": "central_logging_v1.run_requests",
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HotTierStore(path=str(tmp_path / "hot.db"), retention_hours=6)
+
+
+def _backdate_coverage(store, hours):
+    store.restart_coverage()
+    start = (datetime.utcnow() - timedelta(hours=hours)).strftime("%Y-%m-%dT%H:%M:%S.%f")
+    with store._connect() as conn:
+        conn.execute("UPDATE hot_meta SET value = ? WHERE key = 'coverage_start'", (start,))
+
+
+def _run(store, query):
+    return asyncio.run(store.query(query["sql"], query["params"]))
+
+
+class TestHotTierStore:
+    def test_disabled_without_path(self):
+        store = HotTierStore(path="")
+        assert not store.enabled
+        assert store.coverage_start() is None
+
+    def test_ingest_skips_rows_past_retention(self, store):
+        written = store.ingest([_row(1, 5), _row(2, 60 * 7)])
+
+        assert written == 1
+        assert store.coverage_start() is not None
+
+    def test_coverage_read_is_cached(self, store):
+        store.ingest([_row(1, 5)])
+        first = store.coverage_start()
+        with patch.object(store, "_connect", side_effect=AssertionError("hot_meta re-read")):
+            assert store.coverage_start() == first
+
+        store.restart_coverage()
+        assert store.coverage_start() >= first
+
+    def test_coverage_is_clamped_to_retention(self, store):
+        _backdate_coverage(store, hours=48)
+        assert store.coverage_start() >= datetime.utcnow() - timedelta(hours=6, minutes=1)
+
+    def test_upsert_by_log_id(self, store):
+        store.ingest([_row(1, 5, message="first")])
+        store.ingest([_row(1, 5, message="second")])
+
+        rows = _run(store, CanonicalQueryBuilder("proj").build_hot_list_query(LogQueryParams(hours=1)))
+        assert [r["message"] for r in rows] == ["second"]
+        assert rows[0]["event_timestamp"].tzinfo is not None
+
+
+class TestHotQueries:
+    @pytest.fixture
+    def builder(self, store):
+        store.ingest([
+            _row(1, 1, "ERROR", "api", "connection refused by upstream"),
+            _row(2, 2, "INFO", "api"),
+            _row(3, 3, "WARNING", "worker", "queue 100% full"),
+            _row(4, 90, "ERROR", "worker", "Timeout talking to db"),
+        ])
+        return CanonicalQueryBuilder("proj", hot_tier=store)
+
+    def test_list_filters_and_order(self, builder, store):
+        rows = _run(store, builder.build_hot_list_query(LogQueryParams(hours=1)))
+        assert [r["log_id"] for r in rows] == ["id001", "id002", "id003"]
+
+        rows = _run(store, builder.build_hot_list_query(LogQueryParams(hours=2, severity="error")))
+        assert [r["log_id"] for r in rows] == ["id001", "id004"]
+
+        rows = _run(store, builder.build_hot_list_query(LogQueryParams(hours=2, service="work")))
+        assert [r["log_id"] for r in rows] == ["id003", "id004"]
+
+    def test_search_matches_tokens_and_like_fallback(self, builder, store):
+        rows = _run(store, builder.build_hot_list_query(LogQueryParams(hours=2, search="TIMEOUT")))
+        assert [r["log_id"] for r in rows] == ["id004"]
+
+        # Whole-token semantics, like SEARCH()
+        assert _run(store, builder.build_hot_list_query(LogQueryParams(hours=2, search="refuse"))) == []
+
+        rows = _run(store, builder.build_hot_list_query(LogQueryParams(hours=2, search="100%")))
+        assert [r["log_id"] for r in rows] == ["id003"]
+
+    def test_cursor_continues_keyset(self, builder, store):
+        first = _run(store, builder.build_hot_list_query(LogQueryParams(hours=2, limit=2)))
+        cursor = encode_cursor(first[-1]["event_timestamp"], first[-1]["log_id"])
+
+        rows = _run(store, builder.build_hot_list_query(LogQueryParams(hours=2, limit=2, cursor=cursor)))
+        assert [r["log_id"] for r in rows] == ["id003", "id004"]
+
+    def test_stats_match_bigquery_columns(self, builder, store):
+        severity = _run(store, builder.build_hot_count_by_severity_query(hours=2))
+        assert {r["severity"]: r["count"] for r in severity} == {"ERROR": 2, "INFO": 1, "WARNING": 1}
+
+        services = {r["service_name"]: r for r in _run(store, builder.build_hot_count_by_service_query(hours=2))}
+        assert services["worker"]["error_count"] == 1
+        assert services["worker"]["warning_count"] == 1
+
+        summary = _run(store, builder.build_hot_summary_query(hours=2))[0]
+        assert summary["total_logs"] == 4
+        assert summary["services_active"] == 2
+        assert isinstance(summary["latest"], datetime)
+
+    def test_routing(self, builder, store):
+        _backdate_coverage(store, hours=3)
+
+        assert builder.hot_covers(2)
+        assert not builder.hot_covers(24)
+        assert builder.hot_boundary(use_envelope=True) is None
+        assert not CanonicalQueryBuilder("proj").hot_covers(1)
+
+    def test_bigquery_part_excludes_hot_window(self, builder):
+        boundary = datetime.utcnow() - timedelta(hours=3)
+
+        query = builder.build_list_query(LogQueryParams(hours=24), before=boundary)
+
+        assert "event_timestamp < @hot_boundary" in query["sql"]
+        assert {p.name: p.value for p in query["params"]}["hot_boundary"] == boundary
+
+
+class FakeQueryService(BigQueryQueryService):
+    """Serves BigQuery rows older than @hot_boundary from a list."""
+
+    def __init__(self, rows):
+        super().__init__(client_factory=Mock())
+        self.rows = rows
+        self.calls = []
+
+    async def open_result(self, sql, params, page_size=None, max_results=None, **kwargs):
+        values = {p.name: p.value for p in params}
+        self.calls.append(values)
+        boundary = values["hot_boundary"].replace(tzinfo=timezone.utc)
+        rows = [r for r in self.rows if r["event_timestamp"] < boundary][:max_results]
+        result = Mock(destination=None, next_page_token=None, total_rows=len(rows), done=False)
+
+        async def next_page():
+            result.done = True
+            return rows
+
+        result.next_page = next_page
+        return result
+
+
+class TestHotTierPaging:
+    def _setup(self, store, hot_minutes, bq_hours):
+        store.ingest([_row(i, m) for i, m in enumerate(hot_minutes)])
+        _backdate_coverage(store, hours=1)
+        bq_rows = [
+            {"log_id": f"bq{i:03d}", "event_timestamp": _now() - timedelta(hours=h)}
+            for i, h in enumerate(bq_hours)
+        ]
+        service = FakeQueryService(bq_rows)
+        return CanonicalQueryBuilder("proj", hot_tier=store), LogPager(query_service=service, redis=Mock())
+
+    def _read(self, pager, builder, params):
+        async def run():
+            page = await pager.open(builder, params)
+            rows = [row async for batch in pager.read(builder, page) for row in batch]
+            return page, rows
+
+        return asyncio.run(run())
+
+    def test_full_page_from_hot_tier_skips_bigquery(self, store):
+        builder, pager = self._setup(store, [1, 2, 3], [5, 6])
+
+        page, rows = self._read(pager, builder, LogQueryParams(hours=24, limit=2))
+
+        assert page.source == "hot"
+        assert [r["log_id"] for r in rows] == ["id000", "id001"]
+        assert pager.query_service.calls == []
+        assert page.next_cursor is not None
+
+    def test_short_page_is_completed_from_bigquery(self, store):
+        builder, pager = self._setup(store, [1, 2], [5, 6, 7])
+
+        page, rows = self._read(pager, builder, LogQueryParams(hours=24, limit=4))
+
+        assert page.source == "hot+query"
+        assert [r["log_id"] for r in rows] == ["id000", "id001", "bq000", "bq001"]
+        assert pager.query_service.calls[0]["hot_boundary"] == store.coverage_start()
+
+    def test_window_inside_hot_tier_never_queries_bigquery(self, store):
+        builder, pager = self._setup(store, [1, 2], [5])
+
+        page, rows = self._read(pager, builder, LogQueryParams(hours=1, limit=10))
+
+        assert page.source == "hot"
+        assert len(rows) == 2
+        assert page.next_cursor is None
+
+
+class TestHotTierEndpoints:
+    def test_stats_served_from_hot_tier(self, store):
+        from src.api.main import app
+
+        store.ingest([_row(1, 1, "ERROR"), _row(2, 2, "ERROR"), _row(3, 3, "INFO")])
+        _backdate_coverage(store, hours=5)
+
+        with patch("src.api.main.hot_tier_store", store), \
+                patch("src.api.main.bq_query_service") as bq:
+            response = TestClient(app).get("/api/stats/severity?hours=4")
+
+        assert response.headers["X-Stats-Source"] == "hot"
+        assert response.json()["data"] == {"ERROR": 2, "INFO": 1}
+        bq.query.assert_not_called()
+
+
+class TestLoaderFeed:
+    @pytest.fixture
+    def loader(self, store):
+        with patch("src.etl.loader.bigquery.Client"):
+            from src.etl.loader import LogLoader
+            loader = LogLoader("proj")
+        loader.client = Mock()
+        loader.client.insert_rows_json.return_value = []
+        loader.hot_tier = store
+        return loader
+
+    def test_loaded_rows_reach_hot_tier(self, loader, store):
+        rows = [_row(1, 1), _row(2, 2)]
+        loader.client.insert_rows_json.side_effect = [[{"index": 1, "errors": ["bad"]}], [], []]
+
+        with patch.object(loader, "_to_bq_row", side_effect=rows):
+            loader.load([Mock(), Mock()], "batch-1")
+
+        hot = _run(store, CanonicalQueryBuilder("proj").build_hot_list_query(LogQueryParams(hours=1)))
+        assert [r["log_id"] for r in hot] == ["id001"]
+        assert loader.get_stats()["hot_tier_rows"] == 1
+
+    def test_hot_tier_failure_restarts_coverage(self, loader, store):
+        _backdate_coverage(store, hours=3)
+        loader.hot_tier = Mock(wraps=store, enabled=True)
+        loader.hot_tier.ingest.side_effect = OSError("disk full")
+
+        with patch.object(loader, "_to_bq_row", side_effect=[_row(1, 1)]):
+            assert loader.load([Mock()], "batch-1") == 1
+
+        assert loader.get_stats()["hot_tier_failed"] == 1
+        assert store.coverage_start() > datetime.utcnow() - timedelta(minutes=1)
@@ -0,0 +1,211 @@
+"""Unit tests for the LLM gateway (rate limit, fair queue, queue events)."""
+
+import asyncio
+import threading
+import time
+from typing import List, TypedDict
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.agent.llm_gateway import (
+    GatedLLM,
+    LLMCaller,
+    LLMGateway,
+    LLMQueueTimeoutError,
+    ModelGate,
+    TokenBucket,
+    llm_caller,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _wait_queued(gate: ModelGate, n: int) -> None:
+    deadline = time.monotonic() + 5
+    while gate.get_stats()["waiting"] < n:
+        assert time.monotonic() < deadline, "waiters never queued"
+        time.sleep(0.005)
+
+
+def _grant_order(gate: ModelGate, callers: List[LLMCaller]) -> List[str]:
+    """Queue callers behind a held permit, release it and record who gets in."""
+    gate.acquire(LLMCaller("holder", "interactive"))
+    order, threads = [], []
+
+    def worker(name, caller):
+        gate.acquire(caller)
+        order.append(name)
+        gate.release()
+
+    for i, caller in enumerate(callers):
+        thread = threading.Thread(target=worker, args=(f"{caller.user_id}-{i}", caller))
+        thread.start()
+        threads.append(thread)
+        _wait_queued(gate, i + 1)
+
+    gate.release()
+    for thread in threads:
+        thread.join(5)
+    return order
+
+
+class TestTokenBucket:
+    def test_refills_at_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+
+        assert bucket.try_acquire() == 0.0
+        assert bucket.try_acquire() == 0.0
+        assert bucket.try_acquire() == pytest.approx(0.5)
+
+        clock.now = 0.5
+        assert bucket.try_acquire() == 0.0
+
+
+class TestModelGate:
+    def test_interactive_before_batch(self):
+        gate = ModelGate("m", rate_per_sec=1000, burst=1000, max_concurrency=1)
+
+        order = _grant_order(gate, [LLMCaller("a", "batch"), LLMCaller("b", "interactive")])
+
+        assert order == ["b-1", "a-0"]
+
+    def test_round_robin_across_users(self):
+        gate = ModelGate("m", rate_per_sec=1000, burst=1000, max_concurrency=1)
+        callers = [LLMCaller("u1", "interactive")] * 3 + [LLMCaller("u2", "interactive")]
+
+        order = _grant_order(gate, callers)
+
+        assert order == ["u1-0", "u2-3", "u1-1", "u1-2"]
+        stats = gate.get_stats()
+        assert (stats["admitted"], stats["queued"], stats["active"]) == (5, 4, 0)
+
+    def test_rate_limit_delays_calls(self):
+        gate = ModelGate("m", rate_per_sec=20, burst=1, max_concurrency=10)
+        caller = LLMCaller("u1", "interactive")
+
+        assert gate.acquire(caller) < 0.01
+        waited = gate.acquire(caller)
+
+        assert 0.02 < waited < 1
+
+    def test_queue_timeout(self):
+        gate = ModelGate("m", rate_per_sec=1000, burst=1000, max_concurrency=1)
+        gate.acquire(LLMCaller("holder"))
+
+        with pytest.raises(LLMQueueTimeoutError):
+            gate.acquire(LLMCaller("u1"), timeout=0.05)
+
+        stats = gate.get_stats()
+        assert (stats["timeouts"], stats["waiting"]) == (1, 0)
+
+
+class TestGatedLLM:
+    def test_bind_tools_keeps_gate(self):
+        llm = MagicMock()
+        gated = LLMGateway().wrap(llm, model="m")
+
+        bound = gated.bind_tools(["tool"])
+        bound.invoke(["hi"])
+
+        assert isinstance(bound, GatedLLM)
+        llm.bind_tools.return_value.invoke.assert_called_once_with(["hi"], None)
+
+    def test_disabled_gateway_returns_model(self):
+        llm = MagicMock()
+        assert LLMGateway(enabled=False).wrap(llm) is llm
+
+    def test_every_call_path_is_gated(self):
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        from langchain_core.prompts import ChatPromptTemplate
+
+        gateway = LLMGateway()
+        gated = gateway.wrap(FakeListChatModel(responses=["ok"]), model="m")
+        chain = ChatPromptTemplate.from_messages([("human", "{q}")]) | gated
+
+        async def run_async():
+            await gated.ainvoke("hi")
+            return [c async for c in gated.astream("hi")]
+
+        assert chain.invoke({"q": "hi"}).content == "ok"
+        assert "".join(c.content for c in gated.stream("hi")) == "ok"
+        assert len(gated.batch(["a", "b"])) == 2
+        assert "".join(c.content for c in asyncio.run(run_async())) == "ok"
+
+        stats = gateway.gate("m").get_stats()
+        assert (stats["admitted"], stats["active"]) == (6, 0)
+
+    def test_queue_events_reach_the_graph_stream(self):
+        from langgraph.graph import END, StateGraph
+
+        gateway = LLMGateway()
+        gate = gateway.gate("m")
+        gate.max_concurrency = 1
+        gated = gateway.wrap(MagicMock(invoke=MagicMock(return_value="answer")), model="m")
+
+        class State(TypedDict):
+            answer: str
+
+        def node(state):
+            return {"answer": gated.invoke("question")}
+
+        workflow = StateGraph(State)
+        workflow.add_node("model", node)
+        workflow.set_entry_point("model")
+        workflow.add_edge("model", END)
+        graph = workflow.compile()
+
+        async def run():
+            llm_caller.set(LLMCaller("u1", "interactive"))
+            gate.acquire(LLMCaller("holder", "interactive"))
+            threading.Timer(0.1, gate.release).start()
+            return [e async for e in graph.astream_events({"answer": ""}, version="v2") if e["event"] == "on_custom_event"]
+
+        events = asyncio.run(run())
+
+        assert [e["data"]["status"] for e in events] == ["queued", "admitted"]
+        assert events[0]["data"]["priority"] == "interactive"
+        assert events[1]["data"]["wait_ms"] > 0
+
+    def test_async_queue_events_reach_the_graph_stream(self):
+        from langgraph.graph import END, StateGraph
+
+        gateway = LLMGateway()
+        gate = gateway.gate("m")
+        gate.max_concurrency = 1
+
+        async def answer(*args, **kwargs):
+            return "answer"
+
+        gated = gateway.wrap(MagicMock(ainvoke=answer), model="m")
+
+        class State(TypedDict):
+            answer: str
+
+        async def node(state):
+            return {"answer": await gated.ainvoke("question")}
+
+        workflow = StateGraph(State)
+        workflow.add_node("model", node)
+        workflow.set_entry_point("model")
+        workflow.add_edge("model", END)
+        graph = workflow.compile()
+
+        async def run():
+            llm_caller.set(LLMCaller("u1", "interactive"))
+            gate.acquire(LLMCaller("holder", "interactive"))
+            threading.Timer(0.1, gate.release).start()
+            return [e async for e in graph.astream_events({"answer": ""}, version="v2") if e["event"] == "on_custom_event"]
+
+        events = asyncio.run(run())
+
+        assert [e["data"]["status"] for e in events] == ["queued", "admitted"]
+        assert events[1]["data"]["wait_ms"] > 0
+        assert gate.get_stats()["active"] == 0
@@ -0,0 +1,206 @@
+"""Unit tests for the live log broker and the logStream subscription."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from src.services.log_broker import LogStreamBroker, compile_log_filter, encode_stream_row, filter_key
+
+
+def _row(i, severity="ERROR", service="api"):
+    return {"log_id": f"id{i}", "event_timestamp": "2026-10-01T00:00:00+00:00", "severity": severity, "service_name": service}
+
+
+class ListReader:
+    """Serves queued batches once each, then nothing."""
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.calls = []
+
+    def __call__(self, last_id, count):
+        self.calls.append(last_id)
+        if not self.batches:
+            return []
+        batch = self.batches.pop(0)
+        return [(f"{len(self.calls)}-{i}", row) for i, row in enumerate(batch)]
+
+
+class FakeStream:
+    """Redis stream with XREAD semantics: "$" only sees entries added during the read."""
+
+    def __init__(self):
+        self.entries = []
+        self.reads = 0
+
+    def append(self, row):
+        self.entries.append((f"{len(self.entries) + 1}-0", encode_stream_row(row)))
+
+    def stream_last_id(self, stream_name):
+        return self.entries[-1][0] if self.entries else "0-0"
+
+    def stream_read(self, stream_name, last_id, count):
+        self.reads += 1
+        if last_id == "$":
+            return []
+        after = int(last_id.split("-")[0])
+        new = [(entry_id, fields) for entry_id, fields in self.entries if int(entry_id.split("-")[0]) > after]
+        return [[stream_name, new[:count]]] if new else []
+
+
+class TestFilters:
+    def test_compiled_predicates(self):
+        assert compile_log_filter(filter_key())(_row(1))
+        assert compile_log_filter(filter_key(severity="error"))(_row(1))
+        assert not compile_log_filter(filter_key(severity="INFO"))(_row(1))
+        assert compile_log_filter(filter_key(service="ap"))(_row(1))
+        assert not compile_log_filter(filter_key(severity="ERROR", service="worker"))(_row(1))
+        assert compile_log_filter(filter_key(region="us-central1"))({**_row(1), "resource_location": "us-central1"})
+        assert not compile_log_filter(filter_key(region="us-central1"))(_row(1))
+
+    def test_equal_filters_share_a_group(self):
+        async def run():
+            broker = LogStreamBroker(reader=ListReader([]), idle_sleep=0.01)
+            subs = [broker.subscribe(severity="error", service="api"), broker.subscribe(severity="ERROR", service="api")]
+            stats = broker.get_stats()
+            for s in subs:
+                s.close()
+            return stats, broker.get_stats()
+
+        during, after = asyncio.run(run())
+
+        assert (during["subscribers"], during["filters"], during["tail_running"]) == (2, 1, True)
+        assert (after["subscribers"], after["tail_running"]) == (0, False)
+
+
+class TestFanOut:
+    def test_one_upstream_read_per_batch_for_1k_subscribers(self):
+        rows = [_row(i, severity) for i, severity in enumerate(["ERROR", "INFO", "ERROR", "WARNING"])]
+        reader = ListReader([rows[:2], rows[2:]])
+
+        async def run():
+            broker = LogStreamBroker(reader=reader, idle_sleep=0.01)
+            errors = [broker.subscribe(severity="ERROR") for _ in range(500)]
+            everything = [broker.subscribe() for _ in range(500)]
+
+            async def take(sub, n):
+                return [(await sub.__anext__())["log_id"] for _ in range(n)]
+
+            got_errors = await asyncio.gather(*(take(s, 2) for s in errors))
+            got_all = await asyncio.gather(*(take(s, 4) for s in everything))
+            stats = broker.get_stats()
+            for s in errors + everything:
+                s.close()
+            return got_errors, got_all, stats
+
+        got_errors, got_all, stats = asyncio.run(run())
+
+        assert all(ids == ["id0", "id2"] for ids in got_errors)
+        assert all(ids == ["id0", "id1", "id2", "id3"] for ids in got_all)
+        assert stats["deliveries"] == 500 * 2 + 500 * 4
+        # Two batches, read once each (plus idle polls), independent of subscriber count
+        assert stats["rows_in"] == 4
+        assert reader.calls[:3] == ["$", "1-1", "2-1"]
+
+    def test_new_first_subscriber_starts_at_stream_end(self):
+        reader = ListReader([[_row(1)], [], [_row(2)]])
+
+        async def run():
+            broker = LogStreamBroker(reader=reader, idle_sleep=0.01)
+            first = broker.subscribe()
+            await first.__anext__()
+            first.close()
+            second = broker.subscribe()
+            await asyncio.sleep(0.05)
+            second.close()
+
+        asyncio.run(run())
+
+        # The second tail reads from "$", not from where the first one stopped
+        assert reader.calls[0] == "$"
+        assert "$" in reader.calls[1:]
+
+    def test_row_appended_between_empty_reads_is_delivered(self):
+        stream = FakeStream()
+        stream.append(_row(0))
+
+        async def run():
+            broker = LogStreamBroker(redis=stream, idle_sleep=0.01)
+            sub = broker.subscribe()
+            while stream.reads < 2:
+                await asyncio.sleep(0.005)
+            stream.append(_row(1))
+            row = await asyncio.wait_for(sub.__anext__(), timeout=2)
+            sub.close()
+            return row
+
+        # Starts after the existing row and picks up the new one
+        assert asyncio.run(run())["log_id"] == "id1"
+
+    def test_slow_subscriber_drops_oldest(self):
+        async def run():
+            broker = LogStreamBroker(reader=ListReader([]), max_queue=2, idle_sleep=0.01)
+            sub = broker.subscribe()
+            broker.publish([_row(1), _row(2), _row(3)])
+            first = await sub.__anext__()
+            sub.close()
+            return first, sub.dropped, broker.get_stats()["dropped"]
+
+        first, dropped, total_dropped = asyncio.run(run())
+
+        assert first["log_id"] == "id2"
+        assert dropped == total_dropped == 1
+
+    def test_reads_redis_stream_entries(self):
+        redis = Mock()
+        redis.stream_read.return_value = [["stream:logs:live", [("5-0", encode_stream_row(_row(1))), ("6-0", {"bad": "x"})]]]
+        broker = LogStreamBroker(redis=redis)
+
+        entries = broker._read_redis("$", 10)
+
+        assert entries == [("5-0", _row(1))]
+        redis.stream_read.assert_called_once_with("stream:logs:live", "$", 10)
+
+
+class TestLogStreamSubscription:
+    def test_subscription_yields_matching_entries(self):
+        from src.api.graphql.schema import schema
+
+        broker = LogStreamBroker(reader=ListReader([[_row(1, "INFO"), _row(2, "ERROR")]]), idle_sleep=0.01)
+
+        async def run():
+            with patch("src.api.graphql.resolvers.log_broker", broker), \
+                    patch("src.api.graphql.resolvers.get_user_from_context", return_value="user-1"):
+                stream = await schema.subscribe(
+                    "subscription { logStream(filter: {severity: ERROR}) { id severity } }",
+                    context_value=SimpleNamespace(),
+                )
+                result = await stream.__anext__()
+                await stream.aclose()
+            return result
+
+        result = asyncio.run(run())
+
+        assert result.errors is None
+        assert result.data == {"logStream": {"id": "id2", "severity": "ERROR"}}
+        assert broker.subscriber_count == 0
+
+
+class TestLoaderPublishes:
+    def test_loaded_rows_are_appended_to_live_stream(self):
+        with patch("src.etl.loader.bigquery.Client"):
+            from src.etl.loader import LogLoader
+            loader = LogLoader("proj")
+        loader.client = Mock()
+        loader.client.insert_rows_json.return_value = []
+        loader.redis = Mock()
+        loader.redis.stream_add_many.return_value = 1
+
+        with patch.object(loader, "_to_bq_row", side_effect=[_row(1)]):
+            loader.load([Mock()], "batch-1")
+
+        key, entries = loader.redis.stream_add_many.call_args.args
+        assert key == "stream:logs:live"
+        assert json.loads(entries[0]["row"])["log_id"] == "id1"
+        assert loader.get_stats()["live_stream_rows"] == 1
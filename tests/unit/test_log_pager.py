@@ -0,0 +1,244 @@
+"""Unit tests for keyset log pagination, page-token reuse and NDJSON streaming."""
+
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.glass_pane.query_builder import CanonicalQueryBuilder, LogQueryParams, decode_cursor, encode_cursor
+from src.services.bq_query_service import BigQueryQueryService
+from src.services.log_pager import LogPager
+
+BASE_TS = datetime(2026, 10, 18, 12, 0, 0, tzinfo=timezone.utc)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.threads = set()
+
+    def get_cache(self, key):
+        self.threads.add(threading.get_ident())
+        return self.store.get(key)
+
+    def set_cache(self, key, value, ttl=None):
+        self.threads.add(threading.get_ident())
+        self.store[key] = json.loads(json.dumps(value))
+        return True
+
+
+class FakeRowIterator:
+    """Mimics RowIterator paging over tabledata.list with offset page tokens."""
+
+    def __init__(self, rows, page_size, max_results, page_token):
+        self.rows = rows
+        self.page_size = page_size
+        self.max_results = max_results
+        self.offset = int(page_token or 0)
+        self.total_rows = len(rows)
+        self.next_page_token = page_token
+
+    @property
+    def pages(self):
+        read = 0
+        while self.offset < len(self.rows) and (self.max_results is None or read < self.max_results):
+            n = self.page_size if self.max_results is None else min(self.page_size, self.max_results - read)
+            page = self.rows[self.offset:self.offset + n]
+            self.offset += len(page)
+            read += len(page)
+            self.next_page_token = str(self.offset) if self.offset < len(self.rows) else None
+            yield page
+
+
+class FakeJob:
+    def __init__(self, destination):
+        self.destination = destination
+        self.total_bytes_processed = 2048
+        self.job_id = "job"
+
+    def done(self):
+        return True
+
+
+class FakeClient:
+    """Each query materializes the matching rows (respecting LIMIT) into a destination table."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.tables = {}
+        self.queries = []
+        self.expired = set()
+
+    def query(self, sql, job_config=None):
+        params = {p.name: p.value for p in job_config.query_parameters}
+        self.queries.append(params)
+        rows = self.rows
+        if "cursor_ts" in params:
+            key = (params["cursor_ts"], params["cursor_id"])
+            rows = [r for r in rows if (r["event_timestamp"], r["log_id"]) < key]
+        destination = f"proj._anon.t{len(self.queries)}"
+        self.tables[destination] = rows[: params["limit"]]
+        return FakeJob(destination)
+
+    def list_rows(self, destination, page_size=None, max_results=None, page_token=None):
+        if destination in self.expired:
+            raise LookupError(f"Not found: {destination}")
+        return FakeRowIterator(self.tables[destination], page_size, max_results, page_token)
+
+
+def _rows(n):
+    return [{"log_id": f"id{i:03d}", "event_timestamp": BASE_TS - timedelta(seconds=i // 2)} for i in range(n)]
+
+
+def _ordered(rows):
+    return sorted(rows, key=lambda r: (r["event_timestamp"], r["log_id"]), reverse=True)
+
+
+def _pager(client, prefetch=3):
+    service = BigQueryQueryService(client_factory=lambda: client, poll_initial=0.001, poll_max=0.001)
+    return LogPager(query_service=service, redis=FakeRedis(), prefetch_pages=prefetch)
+
+
+def _read_page(pager, params):
+    builder = CanonicalQueryBuilder("proj")
+
+    async def run():
+        page = await pager.open(builder, params)
+        rows = [row async for batch in pager.read(builder, page) for row in batch]
+        return page, rows
+
+    return asyncio.run(run())
+
+
+class TestCursorQuery:
+    def test_cursor_round_trip(self):
+        ts = datetime(2026, 10, 18, 1, 2, 3, 456789)
+        assert decode_cursor(encode_cursor(ts, "abc")) == (ts, "abc")
+
+    def test_invalid_cursor_fails_validation(self):
+        assert "Invalid cursor" in LogQueryParams(cursor="not-a-cursor").validate()
+
+    def test_keyset_predicate_and_prefetch_limit(self):
+        params = LogQueryParams(limit=50, cursor=encode_cursor(BASE_TS, "id007"))
+
+        query = CanonicalQueryBuilder("proj").build_list_query(params, prefetch_pages=4)
+
+        assert "(event_timestamp < @cursor_ts OR (event_timestamp = @cursor_ts AND log_id < @cursor_id))" in query["sql"]
+        assert "ORDER BY event_timestamp DESC, log_id DESC" in query["sql"]
+        values = {p.name: p.value for p in query["params"]}
+        assert values["limit"] == 200
+        assert values["cursor_id"] == "id007"
+
+
+class TestLogPager:
+    def test_cursor_state_is_read_and_written_off_the_loop(self):
+        pager = _pager(FakeClient(_ordered(_rows(25))))
+
+        first, _ = _read_page(pager, LogQueryParams(limit=4))
+        _read_page(pager, LogQueryParams(limit=4, cursor=first.next_cursor))
+
+        assert pager.redis.store
+        assert threading.get_ident() not in pager.redis.threads
+
+    def test_pages_walk_the_keyset_order(self):
+        client = FakeClient(_ordered(_rows(25)))
+        pager = _pager(client)
+        seen, cursor = [], None
+
+        while True:
+            page, rows = _read_page(pager, LogQueryParams(limit=4, cursor=cursor))
+            seen.extend(r["log_id"] for r in rows)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        assert seen == [r["log_id"] for r in _ordered(_rows(25))]
+        # 25 rows / (4 * 3 prefetched) -> 3 queries instead of 7
+        assert len(client.queries) == 3
+        assert pager.get_stats()["reused"] == 4
+
+    def test_reused_page_reads_destination_without_query(self):
+        client = FakeClient(_ordered(_rows(30)))
+        pager = _pager(client)
+
+        first, _ = _read_page(pager, LogQueryParams(limit=5))
+        second, rows = _read_page(pager, LogQueryParams(limit=5, cursor=first.next_cursor))
+
+        assert second.reused
+        assert len(client.queries) == 1
+        assert [r["log_id"] for r in rows] == [r["log_id"] for r in _ordered(_rows(30))[5:10]]
+
+    def test_cursor_state_is_scoped_to_filters(self):
+        client = FakeClient(_ordered(_rows(30)))
+        pager = _pager(client)
+
+        first, _ = _read_page(pager, LogQueryParams(limit=5))
+        second, _ = _read_page(pager, LogQueryParams(limit=5, severity="ERROR", cursor=first.next_cursor))
+
+        assert not second.reused
+        assert len(client.queries) == 2
+
+    def test_larger_page_than_prefetched_rows_requeries(self):
+        client = FakeClient(_ordered(_rows(30)))
+        pager = _pager(client, prefetch=2)
+
+        first, _ = _read_page(pager, LogQueryParams(limit=5))
+        second, rows = _read_page(pager, LogQueryParams(limit=8, cursor=first.next_cursor))
+
+        assert not second.reused
+        assert len(rows) == 8
+
+    def test_expired_destination_falls_back_to_query(self):
+        client = FakeClient(_ordered(_rows(30)))
+        pager = _pager(client)
+
+        first, _ = _read_page(pager, LogQueryParams(limit=5))
+        client.expired.add("proj._anon.t1")
+        second, rows = _read_page(pager, LogQueryParams(limit=5, cursor=first.next_cursor))
+
+        assert [r["log_id"] for r in rows] == [r["log_id"] for r in _ordered(_rows(30))[5:10]]
+        assert len(client.queries) == 2
+        assert pager.get_stats()["reuse_failed"] == 1
+        assert second.next_cursor is not None
+
+    def test_last_page_has_no_cursor(self):
+        client = FakeClient(_ordered(_rows(3)))
+        page, rows = _read_page(_pager(client), LogQueryParams(limit=5))
+        assert len(rows) == 3
+        assert page.next_cursor is None
+
+
+class TestLogsV2Endpoint:
+    @pytest.fixture
+    def client(self):
+        from src.api.main import app
+        return TestClient(app)
+
+    def test_json_page_includes_next_cursor(self, client):
+        pager = _pager(FakeClient(_ordered(_rows(10))))
+        with patch("src.api.main.log_pager", pager):
+            body = client.get("/api/v2/logs?limit=4").json()
+
+        assert body["count"] == 4
+        assert body["next_cursor"]
+        assert body["data"][0]["event_timestamp"] == BASE_TS.isoformat()
+
+    def test_ndjson_streams_rows_then_meta(self, client):
+        pager = _pager(FakeClient(_ordered(_rows(2500))))
+        with patch("src.api.main.log_pager", pager):
+            response = client.get("/api/v2/logs?limit=2100&format=ndjson")
+
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) == 2101
+        assert lines[-1]["_meta"]["count"] == 2100
+        assert lines[-1]["_meta"]["next_cursor"]
+
+    def test_bad_cursor_is_rejected(self, client):
+        response = client.get("/api/v2/logs?cursor=garbage")
+        assert response.status_code == 400
+        assert "Invalid cursor" in response.json()["errors"]
@@ -3,6 +3,7 @@
 Phase 3, Task 3.4: MeteredToolNode wrapper
 """
 
+import json
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime, timezone
@@ -13,6 +14,7 @@ from src.agent.metered_tool_node import (
     MeteredToolNode,
 )
 from src.agent.state import create_initial_state
+from src.services.pubsub_publisher import FakePublisherClient, SharedPublisher
 
 
 # Sample tool for testing
@@ -267,14 +269,10 @@ class TestMeteredToolNode:
         node.clear_metrics_buffer()
         assert len(node.get_metrics_buffer()) == 0
 
-    @patch("google.cloud.pubsub_v1.PublisherClient")
-    def test_metrics_publishing(self, mock_publisher_class):
+    def test_metrics_publishing(self):
         """Test metrics publishing to Pub/Sub."""
-        mock_publisher = Mock()
-        mock_publisher_class.return_value = mock_publisher
-        mock_publisher.topic_path.return_value = "projects/test/topics/metrics"
-        mock_future = Mock()
-        mock_publisher.publish.return_value = mock_future
+        client = FakePublisherClient()
+        publisher = SharedPublisher(client_factory=lambda: client)
 
         tools = [sample_tool]
         node = MeteredToolNode(tools, publish_metrics=True)
@@ -296,10 +294,16 @@ class TestMeteredToolNode:
             ],
         )
 
-        node(state)
+        with patch("src.services.pubsub_publisher.pubsub_publisher", publisher):
+            node(state)
 
-        # Verify publish was called
-        mock_publisher.publish.assert_called_once()
+        # Verify publish was called through the shared publisher
+        assert len(client.published) == 1
+        topic, data, attrs = client.published[0]
+        assert topic.endswith("/topics/tool-invocation-metrics")
+        assert json.loads(data)["tool_name"] == "sample_tool"
+        assert attrs == {"tool_name": "sample_tool"}
+        assert publisher.get_stats()["published"] == 1
 
     def test_multiple_tool_calls(self):
         """Test handling multiple tool calls."""
@@ -333,3 +337,154 @@ class TestMeteredToolNode:
         # Should track both calls
         assert len(result["tool_calls"]) == 2
         assert len(node.get_metrics_buffer()) == 2
+
+
+@tool
+def slow_tool(query: str) -> str:
+    """Tool that sleeps for the given number of seconds."""
+    import time
+    time.sleep(float(query))
+    return f"slept {query}"
+
+
+def _multi_call_state(*calls):
+    return create_initial_state(
+        run_id="test-run",
+        user_query="test",
+        messages=[
+            AIMessage(
+                content="",
+                tool_calls=[
+                    {"name": name, "args": {"query": query}, "id": f"call-{i}"}
+                    for i, (name, query) in enumerate(calls)
+                ],
+            )
+        ],
+    )
+
+
+class TestParallelToolCalls:
+    """Concurrent execution of one turn's tool calls."""
+
+    def test_calls_run_concurrently_in_order(self):
+        import time
+        node = MeteredToolNode([slow_tool], publish_metrics=False)
+
+        start = time.monotonic()
+        result = node(_multi_call_state(("slow_tool", "0.3"), ("slow_tool", "0.1"), ("slow_tool", "0.2")))
+        elapsed = time.monotonic() - start
+
+        # max(), not sum(), of the call latencies
+        assert elapsed < 0.5
+        assert [m.tool_call_id for m in result["messages"]] == ["call-0", "call-1", "call-2"]
+        assert [m.content for m in result["messages"]] == ["slept 0.3", "slept 0.1", "slept 0.2"]
+        assert [c["status"] for c in result["tool_calls"]] == ["success"] * 3
+        assert result["tool_calls"][0]["duration_ms"] >= 300
+
+    def test_concurrency_cap(self):
+        import time
+        from src.agent.metered_tool_node import create_metered_tool_node
+
+        node = create_metered_tool_node([slow_tool], publish_metrics=False, max_concurrency=2)
+
+        start = time.monotonic()
+        result = node(_multi_call_state(*[("slow_tool", "0.15")] * 4))
+        elapsed = time.monotonic() - start
+
+        assert 0.3 <= elapsed < 0.55
+        queued = [c["metadata"]["queue_ms"] for c in result["tool_calls"]]
+        assert queued[2] >= 100 and queued[3] >= 100
+
+    def test_timeout_becomes_error_message(self):
+        from src.agent.metered_tool_node import create_metered_tool_node
+
+        node = create_metered_tool_node(
+            [slow_tool, sample_tool], publish_metrics=False, tool_timeouts={"slow_tool": 0.1}
+        )
+
+        result = node(_multi_call_state(("slow_tool", "1"), ("sample_tool", "fast")))
+
+        slow, fast = result["messages"]
+        assert slow.status == "error" and "timed out" in slow.content
+        assert fast.content == "Result for: fast"
+        assert [c["status"] for c in result["tool_calls"]] == ["timeout", "success"]
+
+    def test_timeout_counts_from_call_start(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from src.agent import metered_tool_node
+        from src.agent.metered_tool_node import create_metered_tool_node
+
+        node = create_metered_tool_node([slow_tool], publish_metrics=False, timeout=0.25)
+
+        # One thread: the second call waits 0.15s for it, then runs 0.15s
+        with patch.object(metered_tool_node, "_tool_executor", ThreadPoolExecutor(max_workers=1)):
+            result = node(_multi_call_state(("slow_tool", "0.15"), ("slow_tool", "0.15")))
+
+        assert [c["status"] for c in result["tool_calls"]] == ["success", "success"]
+        assert result["tool_calls"][1]["metadata"]["queue_ms"] >= 100
+
+    def test_hung_calls_do_not_starve_later_calls(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from src.agent import metered_tool_node
+        from src.agent.metered_tool_node import create_metered_tool_node
+
+        hung = create_metered_tool_node([slow_tool], publish_metrics=False, timeout=0.05)
+        later = create_metered_tool_node([slow_tool], publish_metrics=False, timeout=0.2)
+        executor = ThreadPoolExecutor(max_workers=2)
+
+        with patch.object(metered_tool_node, "_tool_executor", executor), \
+                patch.object(metered_tool_node, "_abandoned", 0), \
+                patch.object(metered_tool_node, "TOOL_EXECUTOR_MAX_ABANDONED", 2):
+            first = hung(_multi_call_state(("slow_tool", "1"), ("slow_tool", "1")))
+            # Both threads of the old executor are still busy with the hung calls
+            second = later(_multi_call_state(("slow_tool", "0.05"), ("slow_tool", "0.05")))
+            replaced = metered_tool_node._tool_executor is not executor
+
+        assert [c["status"] for c in first["tool_calls"]] == ["timeout", "timeout"]
+        assert [c["status"] for c in second["tool_calls"]] == ["success", "success"]
+        assert replaced
+
+    def test_call_without_a_free_thread_is_not_started(self):
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from src.agent import metered_tool_node
+        from src.agent.metered_tool_node import create_metered_tool_node
+
+        node = create_metered_tool_node([sample_tool], publish_metrics=False, timeout=0.05)
+        executor = ThreadPoolExecutor(max_workers=1)
+        release = threading.Event()
+        executor.submit(release.wait, 5)
+
+        try:
+            with patch.object(metered_tool_node, "_tool_executor", executor):
+                result = node(_multi_call_state(("sample_tool", "x")))
+        finally:
+            release.set()
+
+        assert "could not start" in result["messages"][0].content
+        assert result["tool_calls"][0]["status"] == "timeout"
+        assert result["tool_calls"][0]["metadata"]["started"] is False
+
+    def test_failure_waits_for_siblings_and_records_all(self):
+        node = MeteredToolNode([failing_tool, slow_tool], publish_metrics=False)
+
+        with pytest.raises(ValueError, match="Tool error"):
+            node(_multi_call_state(("slow_tool", "0.1"), ("failing_tool", "x")))
+
+        assert [m["status"] for m in node.get_metrics_buffer()] == ["success", "error"]
+
+    def test_dry_run_cache_usage_in_metadata(self):
+        from src.agent.tools.bq import dry_run_cache
+
+        @tool
+        def bq_tool(query: str) -> str:
+            """Tool that records dry-run cache events."""
+            dry_run_cache.record(query)
+            return "ok"
+
+        node = MeteredToolNode([bq_tool, sample_tool], publish_metrics=False)
+
+        result = node(_multi_call_state(("bq_tool", "hits"), ("sample_tool", "x")))
+
+        assert result["tool_calls"][0]["metadata"]["dry_run_cache"] == {"hits": 1}
+        assert "dry_run_cache" not in result["tool_calls"][1]["metadata"]
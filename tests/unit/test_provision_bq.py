@@ -10,7 +10,9 @@ from src.cli.provision_bq import (
     create_dataset,
     create_table,
     create_views,
+    create_search_index,
     provision_chat_analytics,
+    provision_log_search_index,
     DEFAULT_DATASET,
     DEFAULT_PROJECT,
     DEFAULT_LOCATION,
@@ -242,6 +244,45 @@ class TestCreateTable:
         assert table.clustering_fields == ["session_id"]
 
 
+class TestSearchIndex:
+    """Test master_logs search index provisioning."""
+
+    def test_create_search_index_dry_run(self, capsys):
+        """Dry run prints the index without touching BigQuery."""
+        assert provision_log_search_index(project_id="test-project", dry_run=True) is True
+
+        captured = capsys.readouterr()
+        assert "master_logs_search_idx" in captured.out
+        assert "test-project.central_logging_v1.master_logs" in captured.out
+        assert "LOG_ANALYZER" in captured.out
+
+    def test_create_search_index_ddl(self):
+        """The DDL is idempotent and indexes the requested columns."""
+        mock_client = Mock()
+
+        result = create_search_index(
+            client=mock_client,
+            project_id="test-project",
+            dataset_id="logs",
+            table_id="master_logs",
+            index_name="idx",
+            columns=["message", "json_payload"],
+        )
+
+        assert result is True
+        ddl = mock_client.query.call_args.args[0]
+        assert "CREATE SEARCH INDEX IF NOT EXISTS idx" in ddl
+        assert "`test-project.logs.master_logs`(message, json_payload)" in ddl
+        assert "analyzer = 'LOG_ANALYZER'" in ddl
+
+    def test_create_search_index_error(self):
+        """Errors are reported, not raised."""
+        mock_client = Mock()
+        mock_client.query.side_effect = Exception("Access denied")
+
+        assert create_search_index(mock_client, "p", "d", "t", "idx", ["message"]) is False
+
+
 class TestDefaults:
     """Test default configuration values."""
 
@@ -0,0 +1,83 @@
+"""Unit tests for the shared Pub/Sub publisher."""
+
+import json
+from unittest.mock import patch
+
+from src.services import dual_write_service as dws
+from src.services.dual_write_service import ChatEvent, DualWriteService
+from src.services.pubsub_publisher import FakePublisherClient, SharedPublisher
+
+
+class TestSharedPublisher:
+    def test_client_created_once_and_shared(self):
+        created = []
+
+        def factory():
+            created.append(FakePublisherClient())
+            return created[-1]
+
+        publisher = SharedPublisher(client_factory=factory)
+        for i in range(3):
+            publisher.publish("projects/p/topics/t", f"m{i}".encode())
+
+        assert len(created) == 1
+        assert created[0].messages("projects/p/topics/t") == [b"m0", b"m1", b"m2"]
+        assert publisher.get_stats() == {"published": 3, "failed": 0, "outstanding": 0}
+
+    def test_failures_are_counted(self):
+        publisher = SharedPublisher(client_factory=lambda: FakePublisherClient(fail=True))
+
+        publisher.publish("projects/p/topics/t", b"m")
+
+        assert publisher.get_stats()["failed"] == 1
+
+    def test_unavailable_client_skips_publish(self):
+        def factory():
+            raise RuntimeError("no credentials")
+
+        publisher = SharedPublisher(client_factory=factory)
+
+        assert publisher.publish("projects/p/topics/t", b"m") is None
+        assert publisher.available is False
+
+    def test_shutdown_stops_client(self):
+        client = FakePublisherClient()
+        publisher = SharedPublisher(client_factory=lambda: client)
+        publisher.publish("projects/p/topics/t", b"m")
+
+        assert publisher.shutdown(timeout=1) == 0
+        assert client.stopped is True
+        # Nothing to flush once stopped
+        assert publisher.shutdown(timeout=1) == 0
+
+    def test_real_client_gets_batch_and_flow_settings(self):
+        from src.services import pubsub_publisher as module
+
+        with patch("google.cloud.pubsub_v1.PublisherClient") as client_class:
+            module.create_publisher_client()
+
+        kwargs = client_class.call_args.kwargs
+        assert kwargs["batch_settings"].max_messages == module.PUBSUB_BATCH_MAX_MESSAGES
+        assert kwargs["batch_settings"].max_latency == module.PUBSUB_BATCH_MAX_LATENCY_SEC
+        assert kwargs["publisher_options"].flow_control.message_limit == module.PUBSUB_FLOW_MAX_MESSAGES
+
+
+class TestDualWriteUsesSharedPublisher:
+    def test_events_published_through_shared_publisher(self):
+        client = FakePublisherClient()
+        publisher = SharedPublisher(client_factory=lambda: client)
+        event = ChatEvent.create_message_event(
+            session_id="session-123", user_id="user-456", role="user", content="hi"
+        )
+
+        with patch.object(dws, "ENABLE_PUBSUB", True), patch.object(dws, "pubsub_publisher", publisher):
+            DualWriteService()._publish_to_pubsub(event)
+
+        topic, data, attrs = client.published[0]
+        assert topic == f"projects/{dws.PUBSUB_PROJECT}/topics/{dws.PUBSUB_TOPIC}"
+        assert json.loads(data)["event_id"] == event.event_id
+        assert attrs == {"event_type": "message_sent", "session_id": "session-123"}
+
+    def test_disabled_pubsub_skips_publisher(self):
+        with patch.object(dws, "ENABLE_PUBSUB", False):
+            assert DualWriteService()._get_publisher() is None
@@ -0,0 +1,129 @@
+"""Unit tests for the concurrent Qdrant bulk writer."""
+
+import random
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from qdrant_client.http import models
+
+from src.services.qdrant_bulk_writer import QdrantBulkWriter, create_qdrant_client
+
+
+class RecordingClient:
+    """Thread-safe fake client that records every upsert in arrival order."""
+
+    def __init__(self, jitter: float = 0.0, fail: bool = False):
+        self.calls = []
+        self.jitter = jitter
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def upsert(self, collection_name, points, wait):
+        if self.jitter:
+            time.sleep(random.random() * self.jitter)
+        if self.fail:
+            raise ConnectionError("qdrant unavailable")
+        with self._lock:
+            self.calls.append((wait, [(p.id, p.payload["v"]) for p in points]))
+
+
+def _points(ids):
+    return [models.PointStruct(id=pid, vector=[0.1], payload={"v": seq}) for seq, pid in enumerate(ids)]
+
+
+def _writer(client, **kwargs):
+    optimizer = kwargs.pop("optimizer", None)
+    return QdrantBulkWriter(client, "logs", retry_delay=0, optimizer=optimizer, **kwargs)
+
+
+class TestQdrantBulkWriter:
+    def test_batches_follow_optimizer_size(self):
+        client = RecordingClient()
+        optimizer = Mock(upsert_batch_size=3)
+
+        stats = _writer(client, concurrency=1, optimizer=optimizer).write(_points(range(10)))
+
+        assert [len(batch) for _, batch in client.calls] == [3, 3, 3, 1]
+        assert stats.points == stats.written == 10
+        assert stats.batches == 4
+        assert optimizer.record_upsert_latency.call_count == 4
+
+    def test_final_barrier_waits_after_all_batches(self):
+        client = RecordingClient(jitter=0.005)
+
+        stats = _writer(client, concurrency=4, batch_size=5).write(_points(range(103)))
+
+        waits = [wait for wait, _ in client.calls]
+        assert waits[-1] is True
+        assert not any(waits[:-1])
+        assert stats.durable
+        assert sorted(pid for _, batch in client.calls for pid, _ in batch) == list(range(103))
+
+    def test_repeated_ids_keep_stream_order(self):
+        client = RecordingClient(jitter=0.002)
+        ids = [random.randrange(20) for _ in range(400)]
+
+        _writer(client, concurrency=4, batch_size=7).write(iter(_points(ids)))
+
+        last_seen = {}
+        for _, batch in client.calls:
+            for pid, seq in batch:
+                assert seq > last_seen.get(pid, -1)
+                last_seen[pid] = seq
+        expected = {pid: seq for seq, pid in enumerate(ids)}
+        assert last_seen == expected
+
+    def test_barrier_resends_last_point_when_no_tail(self):
+        client = RecordingClient()
+
+        stats = _writer(client, concurrency=1, batch_size=5).write(_points(range(10)))
+
+        assert client.calls[-1] == (True, [(9, 9)])
+        assert stats.batches == 2 and stats.durable
+
+    def test_not_durable_sends_everything_without_wait(self):
+        client = RecordingClient()
+
+        stats = _writer(client, concurrency=2, batch_size=4).write(_points(range(9)), durable=False)
+
+        assert not any(wait for wait, _ in client.calls)
+        assert stats.written == 9 and not stats.durable
+
+    def test_failed_batches_are_counted(self):
+        client = RecordingClient(fail=True)
+
+        stats = _writer(client, concurrency=2, batch_size=2, max_retries=2).write(_points(range(5)))
+
+        assert stats.failed_points == 5
+        assert stats.written == 0
+        assert not stats.durable
+        assert stats.points_per_sec == 0.0
+
+    def test_empty_stream(self):
+        client = RecordingClient()
+        stats = _writer(client).write([])
+        assert client.calls == []
+        assert stats.points == 0 and not stats.durable
+
+    def test_throttle_called_per_request(self):
+        client = RecordingClient()
+        throttle = Mock()
+
+        _writer(client, concurrency=1, batch_size=2, throttle=throttle).write(_points(range(5)))
+
+        assert throttle.call_count == len(client.calls) == 3
+
+
+class TestCreateQdrantClient:
+    def test_prefer_grpc(self):
+        with patch("src.services.qdrant_bulk_writer.QdrantClient") as mock_client:
+            create_qdrant_client("http://q:6333", "key", prefer_grpc=True)
+        kwargs = mock_client.call_args.kwargs
+        assert kwargs["prefer_grpc"] is True
+        assert kwargs["grpc_port"] == 6334
+
+    def test_rest_default(self):
+        with patch("src.services.qdrant_bulk_writer.QdrantClient") as mock_client:
+            create_qdrant_client("http://q:6333", prefer_grpc=False)
+        assert "prefer_grpc" not in mock_client.call_args.kwargs
@@ -0,0 +1,180 @@
+"""Unit tests for shared Qdrant payload conventions."""
+
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+
+from qdrant_client.http import models
+
+from src.services.qdrant_schema import (
+    TENANT_INDEX,
+    TIMESTAMP_EPOCH_FIELD,
+    MissingTenantFilterError,
+    apply_tenant_layout,
+    backfill_timestamp_epoch,
+    collection_hnsw_config,
+    has_tenant_condition,
+    tenant_condition,
+    time_range_condition,
+    timestamp_payload,
+    to_epoch,
+)
+from src.services.qdrant_optimized import OptimizedQdrantService
+from src.services.qdrant_query_engine import QdrantQueryEngine
+
+
+class TestToEpoch:
+    def test_aware_datetime(self):
+        ts = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        assert to_epoch(ts) == 1735689600
+
+    def test_naive_datetime_is_utc(self):
+        assert to_epoch(datetime(2025, 1, 1)) == 1735689600
+
+    def test_iso_string_with_z(self):
+        assert to_epoch("2025-01-01T00:00:00Z") == 1735689600
+
+    def test_int_passthrough_and_none(self):
+        assert to_epoch(1735689600) == 1735689600
+        assert to_epoch(None) is None
+
+
+class TestTimestampPayload:
+    def test_includes_hierarchy_and_epoch(self):
+        ts = datetime(2025, 3, 4, 5, 6, tzinfo=timezone.utc)
+        payload = timestamp_payload(ts)
+        assert payload["timestamp"]["year"] == 2025
+        assert payload["timestamp"]["hour"] == 5
+        assert payload[TIMESTAMP_EPOCH_FIELD] == int(ts.timestamp())
+
+    def test_missing_timestamp(self):
+        payload = timestamp_payload(None)
+        assert payload["timestamp"]["iso"] is None
+        assert payload[TIMESTAMP_EPOCH_FIELD] is None
+
+
+class TestTimeRangeCondition:
+    def test_no_bounds_returns_none(self):
+        assert time_range_condition() is None
+
+    def test_hours_back_is_real_range(self):
+        before = int(time.time()) - 3600
+        cond = time_range_condition(hours_back=1)
+        assert cond.key == TIMESTAMP_EPOCH_FIELD
+        assert before - 1 <= cond.range.gte <= before + 1
+        assert cond.range.lte is None
+
+    def test_explicit_bounds(self):
+        cond = time_range_condition(start=100, end=200)
+        assert cond.range.gte == 100
+        assert cond.range.lte == 200
+
+
+class TestFilterBuilders:
+    def test_query_engine_uses_epoch_range(self):
+        f = QdrantQueryEngine.build_filter(timestamp_from=100, timestamp_to=200)
+        (cond,) = f.must
+        assert cond.key == TIMESTAMP_EPOCH_FIELD
+        assert cond.range == models.Range(gte=100, lte=200)
+
+    def test_optimized_service_hours_back(self):
+        service = OptimizedQdrantService.__new__(OptimizedQdrantService)
+        f = service._build_filters(severity="ERROR", hours_back=6)
+        keys = [c.key for c in f.must]
+        assert keys == ["severity", TIMESTAMP_EPOCH_FIELD]
+        assert f.must[1].range.gte >= int(time.time()) - 6 * 3600 - 1
+
+
+class TestBackfill:
+    def test_sets_epoch_and_skips_unparseable(self):
+        client = Mock()
+        client.scroll.side_effect = [
+            (
+                [
+                    SimpleNamespace(id="a", payload={"timestamp": {"iso": "2025-01-01T00:00:00+00:00"}}),
+                    SimpleNamespace(id="b", payload={"timestamp_iso": "2025-01-01T00:00:10"}),
+                    SimpleNamespace(id="c", payload={}),
+                ],
+                None,
+            )
+        ]
+
+        stats = backfill_timestamp_epoch(client, "logs")
+
+        assert stats == {"scanned": 3, "updated": 2, "skipped": 1}
+        client.create_payload_index.assert_called_once()
+        ops = client.batch_update_points.call_args.kwargs["update_operations"]
+        assert [op.set_payload.payload[TIMESTAMP_EPOCH_FIELD] for op in ops] == [1735689600, 1735689610]
+
+    def test_dry_run_does_not_write(self):
+        client = Mock()
+        client.scroll.return_value = (
+            [SimpleNamespace(id="a", payload={"timestamp": {"iso": "2025-01-01T00:00:00+00:00"}})],
+            None,
+        )
+
+        stats = backfill_timestamp_epoch(client, "logs", dry_run=True)
+
+        assert stats["updated"] == 1
+        client.batch_update_points.assert_not_called()
+
+
+class TestTenantLayout:
+    def test_tenant_condition_requires_value(self):
+        assert tenant_condition("project_id", "p1").match.value == "p1"
+        with pytest.raises(MissingTenantFilterError):
+            tenant_condition("project_id", "")
+
+    def test_apply_tenant_layout(self):
+        client = Mock()
+        assert apply_tenant_layout(client, "logs_v1", "tenant_id", payload_m=8) is True
+        assert client.create_payload_index.call_args.kwargs["field_schema"] == TENANT_INDEX
+        hnsw = client.update_collection.call_args.kwargs["hnsw_config"]
+        assert hnsw.m == 0 and hnsw.payload_m == 8
+
+    def test_new_collections_keep_global_graph_unless_tenant_required(self):
+        assert collection_hnsw_config() is None
+        with patch("src.services.qdrant_schema.QDRANT_REQUIRE_TENANT", True):
+            assert collection_hnsw_config().m == 0
+
+    def test_has_tenant_condition(self):
+        f = models.Filter(must=[tenant_condition("tenant_id", "t1")])
+        assert has_tenant_condition(f, "tenant_id")
+        assert not has_tenant_condition(f, "project_id")
+        assert not has_tenant_condition(None, "tenant_id")
+
+
+class TestQueryEngineTenantScoping:
+    @pytest.fixture
+    def engine(self):
+        with patch("src.services.qdrant_query_engine.QdrantClient"):
+            engine = QdrantQueryEngine()
+        engine.tenant_id = None
+        engine.require_tenant = True
+        return engine
+
+    def test_rejects_unscoped_query(self, engine):
+        with pytest.raises(MissingTenantFilterError):
+            engine.query_points(query_vector=[0.1], limit=1)
+        engine.client.query_points.assert_not_called()
+
+    def test_passes_explicit_tenant_through(self, engine):
+        f = QdrantQueryEngine.build_filter(tenant_id="t1", severity="ERROR")
+        assert engine.scope_filter(f) is f
+
+    def test_adds_default_tenant(self, engine):
+        engine.tenant_id = "t9"
+        scoped = engine.scope_filter(QdrantQueryEngine.build_filter(severity="ERROR"))
+        assert [c.key for c in scoped.must] == ["tenant_id", "severity"]
+        assert scoped.must[0].match.value == "t9"
+
+    def test_unscoped_query_allowed_by_default(self):
+        with patch("src.services.qdrant_query_engine.QdrantClient"):
+            engine = QdrantQueryEngine()
+        engine.tenant_id = None
+
+        assert engine.require_tenant is False
+        assert engine.scope_filter(None) is None
@@ -0,0 +1,210 @@
+"""Unit tests for the stale-while-revalidate query cache."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.services.query_cache import HIT, MISS, STALE, QueryCache
+
+
+class FakeRedis:
+    """Dict-backed stand-in for redis_service (TTL ignored)."""
+
+    def __init__(self, lock_free: bool = True):
+        self.store = {}
+        self.lock_free = lock_free
+        self.locks = []
+        self.holders = {}
+
+    def get_cache(self, key):
+        return self.store.get(key)
+
+    def set_cache(self, key, value, ttl=None):
+        self.store[key] = value
+        return True
+
+    def try_lock(self, key, ttl=30, token="1"):
+        self.locks.append(key)
+        if self.lock_free:
+            self.holders[key] = token
+        return self.lock_free
+
+    def release_lock(self, key, token=None):
+        if token is None or self.holders.get(key) == token:
+            self.holders.pop(key, None)
+
+
+class CountingLoader:
+    def __init__(self, delay: float = 0.0):
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return {"n": self.calls}
+
+
+def _cache(redis=None, **kwargs):
+    kwargs.setdefault("fresh_ttl", 60)
+    kwargs.setdefault("stale_ttl", 600)
+    return QueryCache("test", redis=redis or FakeRedis(), **kwargs)
+
+
+class TestQueryCache:
+    def test_miss_then_hit(self):
+        cache = _cache()
+        loader = CountingLoader()
+
+        async def scenario():
+            first = await cache.get_or_load("SELECT 1", [], loader)
+            second = await cache.get_or_load("SELECT  1", [], loader)
+            return first, second
+
+        first, second = asyncio.run(scenario())
+
+        assert (first.status, second.status) == (MISS, HIT)
+        assert second.value == {"n": 1}
+        assert loader.calls == 1
+        assert cache.get_stats()["hit_rate"] == 0.5
+
+    def test_hit_served_from_redis_in_new_process(self):
+        redis = FakeRedis()
+        loader = CountingLoader()
+        asyncio.run(_cache(redis).get_or_load("SELECT 1", [], loader))
+
+        result = asyncio.run(_cache(redis).get_or_load("SELECT 1", [], loader))
+
+        assert result.status == HIT
+        assert loader.calls == 1
+
+    def test_concurrent_misses_share_one_load(self):
+        cache = _cache()
+        loader = CountingLoader(delay=0.01)
+
+        async def scenario():
+            return await asyncio.gather(*(cache.get_or_load("SELECT 1", [], loader) for _ in range(5)))
+
+        results = asyncio.run(scenario())
+
+        assert loader.calls == 1
+        assert all(r.status == MISS and r.value == {"n": 1} for r in results)
+
+    def test_stale_served_while_single_refresh_runs(self):
+        cache = _cache(fresh_ttl=10)
+        loader = CountingLoader(delay=0.01)
+
+        async def scenario():
+            with patch("src.services.query_cache.time.time", return_value=1000.0):
+                await cache.get_or_load("SELECT 1", [], loader)
+            # Next bucket: current key misses, latest is still within stale_ttl
+            with patch("src.services.query_cache.time.time", return_value=1015.0):
+                stale = await asyncio.gather(*(cache.get_or_load("SELECT 1", [], loader) for _ in range(4)))
+                await asyncio.gather(*cache._background)
+                fresh = await cache.get_or_load("SELECT 1", [], loader)
+            return stale, fresh
+
+        stale, fresh = asyncio.run(scenario())
+
+        assert all(r.status == STALE and r.value == {"n": 1} for r in stale)
+        assert stale[0].age_s == 15.0
+        assert loader.calls == 2  # initial load + one background refresh
+        assert fresh.status == HIT and fresh.value == {"n": 2}
+        assert cache.get_stats()["refreshes"] == 1
+
+    def test_refresh_skipped_when_another_instance_holds_lock(self):
+        redis = FakeRedis(lock_free=False)
+        cache = _cache(redis, fresh_ttl=10)
+        loader = CountingLoader()
+
+        async def scenario():
+            with patch("src.services.query_cache.time.time", return_value=1000.0):
+                await cache.get_or_load("SELECT 1", [], loader)
+            with patch("src.services.query_cache.time.time", return_value=1015.0):
+                result = await cache.get_or_load("SELECT 1", [], loader)
+                await asyncio.gather(*cache._background)
+                return result
+
+        result = asyncio.run(scenario())
+
+        assert result.status == STALE
+        assert loader.calls == 1
+        assert redis.locks
+
+    def test_refresh_releases_only_its_own_lock(self):
+        redis = FakeRedis()
+        cache = _cache(redis, fresh_ttl=10)
+        loader = CountingLoader()
+
+        async def scenario():
+            with patch("src.services.query_cache.time.time", return_value=1000.0):
+                await cache.get_or_load("SELECT 1", [], loader)
+            real_load = cache._load
+
+            async def slow_load(base, loader):
+                # Our lock expired and another instance took it mid-refresh
+                redis.holders[f"{base}:refresh"] = "other-instance"
+                return await real_load(base, loader)
+
+            cache._load = slow_load
+            with patch("src.services.query_cache.time.time", return_value=1015.0):
+                await cache.get_or_load("SELECT 1", [], loader)
+                await asyncio.gather(*cache._background)
+
+        asyncio.run(scenario())
+
+        assert list(redis.holders.values()) == ["other-instance"]
+
+    def test_expired_stale_entry_is_a_miss(self):
+        cache = _cache(fresh_ttl=10, stale_ttl=20)
+        loader = CountingLoader()
+
+        async def scenario():
+            with patch("src.services.query_cache.time.time", return_value=1000.0):
+                await cache.get_or_load("SELECT 1", [], loader)
+            with patch("src.services.query_cache.time.time", return_value=1030.0):
+                return await cache.get_or_load("SELECT 1", [], loader)
+
+        assert asyncio.run(scenario()).status == MISS
+        assert loader.calls == 2
+
+    def test_keys_depend_on_params_and_bucket(self):
+        cache = _cache(fresh_ttl=60)
+        base = cache.base_key("SELECT 1", [1])
+
+        assert base != cache.base_key("SELECT 1", [2])
+        assert base == cache.base_key("SELECT\n   1", [1])
+        assert cache.bucket_key(base, 119) == cache.bucket_key(base, 60)
+        assert cache.bucket_key(base, 120) != cache.bucket_key(base, 119)
+
+    def test_cache_headers(self):
+        cache = _cache(fresh_ttl=60, stale_ttl=600)
+        loader = CountingLoader()
+        result = asyncio.run(cache.get_or_load("SELECT 1", [], loader))
+
+        headers = cache.cache_headers(result)
+
+        assert headers["X-Cache"] == MISS
+        assert headers["Cache-Control"] == "private, max-age=60, stale-while-revalidate=600"
+
+
+class TestStatsEndpointCaching:
+    @pytest.fixture
+    def client(self):
+        from src.api.main import app
+        return TestClient(app)
+
+    def test_services_endpoint_reports_cache_status(self, client):
+        rows = [{"service_name": "api", "count": 4, "error_count": 1}]
+        with patch("src.api.main.stats_cache", _cache()), \
+                patch("src.api.main.bq_query_service.query", new=AsyncMock(return_value=rows)) as query:
+            first = client.get("/api/stats/services?hours=3")
+            second = client.get("/api/stats/services?hours=3")
+
+        assert first.headers["X-Cache"] == MISS
+        assert second.headers["X-Cache"] == HIT
+        assert second.json() == first.json()
+        query.assert_awaited_once()
@@ -0,0 +1,158 @@
+"""Unit tests for stats rollups: aggregation, loader maintenance and query routing."""
+
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.etl.rollups import aggregate_rollups, build_backfill_sql, truncate_timestamp
+from src.glass_pane.query_builder import CanonicalQueryBuilder
+
+
+def _row(ts, severity="INFO", service="api", **flags):
+    return {
+        "log_id": f"{ts}-{severity}",
+        "event_timestamp": ts,
+        "severity": severity,
+        "service_name": service,
+        "source_table": "run_requests",
+        "stream_id": "central_logging_v1.run_requests",
+        **flags,
+    }
+
+
+class TestAggregateRollups:
+    def test_minute_buckets_and_flags(self):
+        rows = [
+            _row("2026-10-18T10:00:05", "ERROR", is_error=True, has_trace=True),
+            _row("2026-10-18T10:00:40", "ERROR", is_error=True),
+            _row("2026-10-18T10:01:10", "ERROR", is_error=True),
+            _row("2026-10-18T10:00:20", "INFO", is_request=True),
+        ]
+
+        rollups = aggregate_rollups(rows, "minute", "batch-1")
+
+        by_key = {(r["bucket_ts"], r["severity"]): r for r in rollups}
+        errors = by_key[("2026-10-18T10:00:00", "ERROR")]
+        assert errors["log_count"] == 2
+        assert errors["error_count"] == 2
+        assert errors["trace_count"] == 1
+        assert errors["first_event_ts"] == "2026-10-18T10:00:05"
+        assert errors["last_event_ts"] == "2026-10-18T10:00:40"
+        assert by_key[("2026-10-18T10:01:00", "ERROR")]["log_count"] == 1
+        assert by_key[("2026-10-18T10:00:00", "INFO")]["request_count"] == 1
+        assert sum(r["log_count"] for r in rollups) == len(rows)
+
+    def test_hour_buckets(self):
+        rows = [_row("2026-10-18T10:05:00"), _row("2026-10-18T10:59:59"), _row("2026-10-18T11:00:00")]
+
+        rollups = aggregate_rollups(rows, "hour", "batch-1")
+
+        assert sorted((r["bucket_ts"], r["log_count"]) for r in rollups) == [
+            ("2026-10-18T10:00:00", 2),
+            ("2026-10-18T11:00:00", 1),
+        ]
+
+    def test_rollup_ids_follow_the_logs_not_the_batch(self):
+        rows = [_row("2026-10-18T10:05:00"), _row("2026-10-18T10:05:30", "WARNING")]
+        more = rows + [_row("2026-10-18T10:05:40")]
+
+        def ids(batch_rows, batch_id):
+            return {r["rollup_id"] for r in aggregate_rollups(batch_rows, "minute", batch_id)}
+
+        assert ids(rows, "batch-1") == ids(list(reversed(rows)), "batch-2")
+        assert ids(rows, "batch-1") != ids(more, "batch-1")
+
+    def test_unknown_granularity(self):
+        with pytest.raises(ValueError):
+            truncate_timestamp(datetime(2026, 1, 1), "day")
+
+    def test_backfill_replaces_range(self):
+        delete_sql, insert_sql = build_backfill_sql("p.d.log_rollups_hour", "p.d.master_logs", "hour", "2026-10-01", "2026-10-02")
+
+        assert "DELETE FROM `p.d.log_rollups_hour`" in delete_sql
+        assert "TIMESTAMP_TRUNC(event_timestamp, HOUR)" in insert_sql
+        assert "log_date BETWEEN '2026-10-01' AND '2026-10-02'" in insert_sql
+
+
+class TestLoaderRollups:
+    @pytest.fixture
+    def loader(self):
+        with patch("src.etl.loader.bigquery.Client"):
+            from src.etl.loader import LogLoader
+            loader = LogLoader("proj")
+        loader.client = Mock()
+        loader.client.insert_rows_json.return_value = []
+        return loader
+
+    def test_rollups_follow_successful_rows(self, loader):
+        rows = [_row("2026-10-18T10:00:05"), _row("2026-10-18T10:00:06"), _row("2026-10-18T10:00:07")]
+
+        loader._load_rollups([r for i, r in enumerate(rows) if i != 1], "batch-1")
+
+        calls = {c.args[0]: c.args[1] for c in loader.client.insert_rows_json.call_args_list}
+        assert set(calls) == set(loader.ROLLUP_TABLES.values())
+        minute = calls[loader.ROLLUP_TABLES["minute"]]
+        assert [r["log_count"] for r in minute] == [2]
+        assert loader.get_stats()["rollup_rows"] == 2
+
+    def test_load_excludes_failed_rows_from_rollups(self, loader):
+        logs = [Mock(), Mock(), Mock()]
+        rows = [_row(f"2026-10-18T10:00:0{i}", is_error=True) for i in range(3)]
+        loader.client.insert_rows_json.side_effect = [[{"index": 0, "errors": ["bad"]}], [], []]
+
+        with patch.object(loader, "_to_bq_row", side_effect=rows):
+            loaded = loader.load(logs, "batch-1")
+
+        assert loaded == 2
+        minute = loader.client.insert_rows_json.call_args_list[1].args[1]
+        assert minute[0]["log_count"] == 2
+        assert minute[0]["error_count"] == 2
+
+    def test_rollup_failure_does_not_fail_load(self, loader):
+        rows = [_row("2026-10-18T10:00:05")]
+        loader.client.insert_rows_json.side_effect = [[], ConnectionError("down"), ConnectionError("down")]
+
+        with patch.object(loader, "_to_bq_row", side_effect=rows):
+            assert loader.load([Mock()], "batch-1") == 1
+
+        assert loader.get_stats()["rollup_failed"] == 2
+
+
+class TestRollupQueryRouting:
+    def _builder(self, rollups_since):
+        return CanonicalQueryBuilder("proj", rollups_since=rollups_since)
+
+    def test_raw_scan_without_rollups(self):
+        query = self._builder(None).build_count_by_severity_query(hours=24)
+
+        assert "log_rollups" not in query["sql"]
+        assert "log_date BETWEEN" in query["sql"]
+        assert [p.name for p in query["params"]] == ["hours"]
+
+    def test_raw_scan_when_window_predates_rollups(self):
+        builder = self._builder(datetime.utcnow() - timedelta(hours=12))
+
+        assert not builder.uses_rollups(24)
+        assert "log_rollups" not in builder.build_count_by_service_query(hours=24)["sql"]
+
+    def test_rollups_with_raw_edges(self):
+        builder = self._builder(datetime.utcnow() - timedelta(days=30))
+
+        sql = builder.build_count_by_severity_query(hours=24)["sql"]
+
+        assert "`proj.central_logging_v1.log_rollups_hour`" in sql
+        assert "`proj.central_logging_v1.log_rollups_minute`" in sql
+        assert "`proj.central_logging_v1.master_logs`" in sql
+        assert "log_date IN (" in sql
+        assert "SUM(log_count) as count" in sql
+
+    def test_sql_is_stable_within_a_day(self):
+        # Cache keys are derived from SQL text; boundaries must not be baked in
+        builder = self._builder(datetime.utcnow() - timedelta(days=30))
+        assert builder.build_summary_query(hours=6)["sql"] == builder.build_summary_query(hours=6)["sql"]
+
+    def test_service_query_columns(self):
+        sql = self._builder(None).build_count_by_service_query(hours=24)["sql"]
+        for column in ("service_name", "as count", "as error_count", "as warning_count"):
+            assert column in sql
@@ -0,0 +1,59 @@
+"""Unit tests for SEARCH()/LIKE log search predicates."""
+
+import pytest
+
+from src.glass_pane.query_builder import (
+    CanonicalQueryBuilder,
+    LogQueryParams,
+    is_search_tokenizable,
+    text_search_clause,
+)
+
+
+class TestTextSearchClause:
+    @pytest.mark.parametrize("term", ["timeout", "connection refused", "  OOMKilled  ", "error 503"])
+    def test_plain_words_are_tokenizable(self, term):
+        assert is_search_tokenizable(term)
+
+    @pytest.mark.parametrize("term", ["conn*", "user_id=42", '"exact phrase"', "10.0.0.1", "a-b", ""])
+    def test_punctuation_is_not_tokenizable(self, term):
+        assert not is_search_tokenizable(term)
+
+    def test_auto_mode_emits_search(self):
+        predicate, value = text_search_clause("connection   refused")
+
+        assert predicate == "(SEARCH(message, @search) OR SEARCH(json_payload, @search))"
+        assert value == "connection refused"
+
+    def test_auto_mode_falls_back_to_like(self):
+        predicate, value = text_search_clause("Pod_OOM 100%")
+
+        assert "LOWER(message) LIKE @search" in predicate
+        assert "LOWER(CAST(json_payload AS STRING)) LIKE @search" in predicate
+        assert value == "%pod\\_oom 100\\%%"
+
+    def test_forced_modes(self):
+        assert text_search_clause("a.b", mode="search")[0].startswith("(SEARCH(")
+        assert "LIKE" in text_search_clause("timeout", mode="like")[0]
+
+    def test_custom_param_and_columns(self):
+        predicate, _ = text_search_clause("timeout", param="pattern", columns=("message",))
+        assert predicate == "(SEARCH(message, @pattern))"
+
+
+class TestBuilderSearch:
+    def _params(self, query):
+        return {p.name: p.value for p in query["params"]}
+
+    def test_list_query_uses_search_index(self):
+        query = CanonicalQueryBuilder("proj").build_list_query(LogQueryParams(search="timeout"))
+
+        assert "SEARCH(message, @search)" in query["sql"]
+        assert self._params(query)["search"] == "timeout"
+
+    def test_like_mode_builder(self):
+        builder = CanonicalQueryBuilder("proj", search_mode="like")
+        query = builder.build_list_query(LogQueryParams(search="timeout"))
+
+        assert "SEARCH(" not in query["sql"]
+        assert self._params(query)["search"] == "%timeout%"
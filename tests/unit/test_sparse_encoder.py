@@ -0,0 +1,117 @@
+"""Unit tests for the BM25 sparse encoder and hybrid query construction."""
+
+import math
+from unittest.mock import Mock, patch
+
+from qdrant_client.http import models
+
+from src.services.sparse_encoder import BM25SparseEncoder, token_index, tokenize
+from src.services.qdrant_query_engine import QdrantQueryEngine
+
+
+def _dot(a: models.SparseVector, b: models.SparseVector) -> float:
+    weights = dict(zip(a.indices, a.values))
+    return sum(weights.get(i, 0.0) * v for i, v in zip(b.indices, b.values))
+
+
+class TestTokenize:
+    def test_keeps_identifiers_and_parts(self):
+        tokens = tokenize("Upstream ERR_CONN_REFUSED at 10.0.0.1:5432")
+        assert "err_conn_refused" in tokens
+        assert "refused" in tokens
+        assert "10.0.0.1:5432" in tokens
+
+    def test_drops_stopwords(self):
+        assert tokenize("the error is in the db") == ["error", "db"]
+
+    def test_token_index_is_stable(self):
+        assert token_index("e1234") == token_index("e1234")
+        assert 0 <= token_index("e1234") < 2 ** 31
+
+
+class TestBM25SparseEncoder:
+    def _idf(self, texts, token):
+        """What Qdrant's IDF modifier applies for ``token`` over ``texts``."""
+        n = len(texts)
+        df = sum(token in tokenize(t) for t in texts)
+        return math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+
+    def test_rare_exact_code_outranks_common_terms(self):
+        encoder = BM25SparseEncoder()
+        texts = [
+            "request failed with error E4012 payment gateway",
+            "request failed with error timeout",
+            "request failed with error timeout retry",
+        ]
+        docs = encoder.encode_documents(texts)
+        query = encoder.encode_query("error E4012")
+        idf = {token_index(t): self._idf(texts, t) for t in ("error", "e4012")}
+        query = models.SparseVector(indices=query.indices, values=[idf[i] for i in query.indices])
+
+        scores = [_dot(d, query) for d in docs]
+        assert scores[0] > scores[1]
+        assert scores[0] > scores[2]
+
+    def test_encoding_is_stateless(self):
+        first, second = BM25SparseEncoder(), BM25SparseEncoder()
+        first.encode_documents(["disk full on node-1", "disk ok"])
+
+        assert first.encode_query("disk full") == second.encode_query("disk full")
+        assert set(first.encode_query("disk full").values) == {1.0}
+
+    def test_shorter_documents_weigh_terms_higher(self):
+        encoder = BM25SparseEncoder()
+        short, long = encoder.encode_documents(["disk full", "disk full " + "noise " * 60])
+        idx = token_index("disk")
+
+        assert dict(zip(short.indices, short.values))[idx] > dict(zip(long.indices, long.values))[idx]
+
+    def test_empty_text(self):
+        encoder = BM25SparseEncoder()
+        (vec,) = encoder.encode_documents([""])
+        assert vec.indices == []
+        assert encoder.encode_query("").indices == []
+
+
+class TestSparseSchema:
+    def test_new_collections_use_idf_modifier(self):
+        from src.services.qdrant_schema import SPARSE_VECTOR_NAME, sparse_vectors_config
+
+        assert sparse_vectors_config()[SPARSE_VECTOR_NAME].modifier == models.Modifier.IDF
+
+    def test_existing_collection_gets_idf_modifier(self):
+        from src.services.qdrant_schema import SPARSE_VECTOR_NAME, collection_has_sparse
+
+        client = Mock()
+        client.get_collection.return_value.config.params.sparse_vectors = {
+            SPARSE_VECTOR_NAME: models.SparseVectorParams()
+        }
+
+        assert collection_has_sparse(client, "logs") is True
+        update = client.update_collection.call_args.kwargs
+        assert update["sparse_vectors_config"][SPARSE_VECTOR_NAME].modifier == models.Modifier.IDF
+
+
+class TestHybridSearch:
+    def test_prefetch_dense_and_sparse_with_rrf(self):
+        with patch("src.services.qdrant_query_engine.QdrantClient") as mock_client_cls:
+            client = Mock()
+            mock_client_cls.return_value = client
+            engine = QdrantQueryEngine()
+
+            query_filter = QdrantQueryEngine.build_filter(tenant_id="t1", severity="ERROR")
+            engine.hybrid_search(
+                dense_vector=[0.1, 0.2],
+                query_text="ERR_CONN_REFUSED",
+                limit=5,
+                query_filter=query_filter,
+            )
+
+            kwargs = client.query_points.call_args.kwargs
+            assert kwargs["query"] == models.FusionQuery(fusion=models.Fusion.RRF)
+            dense, sparse = kwargs["prefetch"]
+            assert dense.using is None
+            assert sparse.using == engine.sparse_vector
+            assert isinstance(sparse.query, models.SparseVector)
+            assert dense.filter == query_filter and sparse.filter == query_filter
+            assert dense.limit == 20
@@ -0,0 +1,134 @@
+"""Unit tests for speculative retrieval."""
+
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.agent import tokenization
+from src.agent.speculative import SpeculativeRetrieval
+from src.agent.state import create_initial_state
+from src.agent.tokenization import TokenBudgetManager
+
+
+def _result(content="checkout 503"):
+    return SimpleNamespace(score=0.9, content=content, metadata={"severity": "ERROR", "service": "checkout"}, timestamp="t")
+
+
+def _search(delay=0.0, results=None, release=None):
+    def search(query):
+        if release is not None:
+            release.wait(5)
+        time.sleep(delay)
+        return results if results is not None else [_result()]
+    return search
+
+
+class TestSpeculativeRetrieval:
+    def test_collect_in_time(self):
+        retrieval = SpeculativeRetrieval(search_fn=_search())
+        retrieval.start("run-1", "why 503?")
+
+        context = retrieval.collect("run-1", timeout=1)
+
+        assert context["type"] == "semantic_search"
+        assert context["arrival"] == "in_time"
+        assert context["results"][0]["service"] == "checkout"
+        assert retrieval.collect("run-1") is None  # consumed
+        assert retrieval.get_stats()["in_time"] == 1
+
+    def test_slow_search_arrives_late(self):
+        release = threading.Event()
+        retrieval = SpeculativeRetrieval(search_fn=_search(release=release))
+        retrieval.start("run-1", "why 503?")
+
+        assert retrieval.collect("run-1", timeout=0.01) is None
+        release.set()
+        context = retrieval.collect("run-1", timeout=1)
+
+        assert context["arrival"] == "late"
+        stats = retrieval.get_stats()
+        assert (stats["in_time"], stats["late"], stats["pending"]) == (0, 1, 0)
+
+    def test_uncollected_search_is_missed(self):
+        release = threading.Event()
+        retrieval = SpeculativeRetrieval(search_fn=_search(release=release))
+        retrieval.start("run-1", "q")
+        retrieval.start("run-2", "q")
+        release.set()
+        assert retrieval.collect("run-2", timeout=1) is not None
+
+        retrieval.discard("run-1")
+
+        stats = retrieval.get_stats()
+        assert (stats["in_time"], stats["missed"]) == (1, 1)
+        assert stats["in_time_rate"] == 0.5
+
+    def test_failed_and_empty_searches(self):
+        def broken(query):
+            raise RuntimeError("qdrant down")
+
+        failing = SpeculativeRetrieval(search_fn=broken)
+        failing.start("run-1", "q")
+        empty = SpeculativeRetrieval(search_fn=_search(results=[]))
+        empty.start("run-1", "q")
+
+        assert failing.collect("run-1", timeout=1) is None
+        assert empty.collect("run-1", timeout=1) is None
+        assert failing.get_stats()["failed"] == 1
+        assert empty.get_stats()["empty"] == 1
+
+
+class TestRetrievalOverlapsDiagnose:
+    @pytest.fixture
+    def manager(self):
+        with patch.object(tokenization, "tiktoken", None):
+            return TokenBudgetManager(max_tokens=100_000)
+
+    def _state(self):
+        return create_initial_state(
+            run_id="run-1",
+            user_query="why is checkout returning 503?",
+            messages=[HumanMessage(content="why is checkout returning 503?")],
+        )
+
+    def _run(self, retrieval, manager, model_delay):
+        from src.agent.nodes import diagnose_node, retrieval_node
+
+        llm = MagicMock()
+        llm.invoke.side_effect = lambda messages: time.sleep(model_delay) or AIMessage(content="Looking into it")
+        state = self._state()
+
+        with patch("src.services.vector_service.vector_service", MagicMock(enabled=True)), \
+                patch("src.agent.nodes.speculative_retrieval", retrieval), \
+                patch("src.agent.nodes.get_bound_llm", return_value=llm), \
+                patch("src.agent.nodes.get_token_manager", return_value=manager):
+            start = time.monotonic()
+            state.update(retrieval_node(state))
+            retrieval_s = time.monotonic() - start
+            update = diagnose_node(state)
+        return retrieval_s, update
+
+    def test_results_join_evidence_when_ready(self, manager):
+        retrieval = SpeculativeRetrieval(search_fn=_search(delay=0.1))
+
+        retrieval_s, update = self._run(retrieval, manager, model_delay=0.2)
+
+        assert retrieval_s < 0.05  # the node no longer waits for the search
+        assert update["evidence"][-1]["arrival"] == "in_time"
+
+    def test_slow_retrieval_does_not_block_diagnose(self, manager):
+        release = threading.Event()
+        retrieval = SpeculativeRetrieval(search_fn=_search(release=release))
+
+        _, update = self._run(retrieval, manager, model_delay=0.0)
+
+        assert "evidence" not in update
+        release.set()
+        from src.agent.nodes import collect_retrieval
+        with patch("src.agent.nodes.speculative_retrieval", retrieval):
+            late = collect_retrieval(self._state(), timeout=1)
+        assert late["evidence"][-1]["arrival"] == "late"
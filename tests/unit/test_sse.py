@@ -0,0 +1,119 @@
+"""Unit tests for chat SSE framing and coalescing."""
+
+import asyncio
+import json
+
+import pytest
+
+from src.agent.tokenization import IncrementalTokenCounter
+from src.api.sse import ContentDelta, EnvelopeEncoder, SSECoalescer, content_encoder, sse_frame
+
+
+def _collect(coalescer, source):
+    async def run():
+        return [w async for w in coalescer.stream(source)]
+
+    return asyncio.run(run())
+
+
+async def _items(items, delay=0.0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+def _payloads(writes):
+    text = "".join(writes)
+    return [json.loads(frame[6:]) for frame in text.split("\n\n") if frame]
+
+
+class TestEnvelopeEncoder:
+    def test_matches_json_dumps(self):
+        for text in ["plain", 'quote " and \\ slash', "naïve ✓ 日本", "line\nbreak\ttab"]:
+            expected = sse_frame({"type": "on_chat_model_stream", "data": {"content": text}})
+            assert content_encoder.frame(text) == expected
+
+    def test_custom_envelope(self):
+        encoder = EnvelopeEncoder("status", "message")
+        assert json.loads(encoder.frame("ok")[6:]) == {"type": "status", "data": {"message": "ok"}}
+
+
+class TestSSECoalescer:
+    def test_merges_deltas_and_preserves_order(self):
+        status = sse_frame({"type": "tool_call", "data": {"tool": "search"}})
+        items = [ContentDelta("Hel"), ContentDelta("lo "), status, ContentDelta("world")]
+        coalescer = SSECoalescer(max_delay=1.0)
+
+        writes = _collect(coalescer, _items(items))
+
+        assert writes == ["".join([content_encoder.frame("Hello "), status, content_encoder.frame("world")])]
+        assert coalescer.frames_in == 4
+        assert coalescer.writes_out == 1
+
+    def test_flushes_on_byte_budget(self):
+        coalescer = SSECoalescer(max_delay=10.0, max_bytes=10)
+
+        writes = _collect(coalescer, _items([ContentDelta("x" * 6)] * 4))
+
+        assert len(writes) == 2
+        assert "".join(p["data"]["content"] for p in _payloads(writes)) == "x" * 24
+
+    def test_flushes_on_delay_while_source_is_idle(self):
+        received = []
+
+        async def source():
+            yield ContentDelta("first")
+            await asyncio.sleep(0.2)
+            yield ContentDelta("second")
+
+        async def run():
+            async for write in SSECoalescer(max_delay=0.01).stream(source()):
+                received.append((asyncio.get_running_loop().time(), write))
+
+        asyncio.run(run())
+
+        assert [_payloads([w])[0]["data"]["content"] for _, w in received] == ["first", "second"]
+        assert received[1][0] - received[0][0] >= 0.15
+
+    def test_source_error_is_raised_after_flush(self):
+        async def source():
+            yield ContentDelta("partial")
+            raise RuntimeError("model failed")
+
+        writes = []
+
+        async def run():
+            async for write in SSECoalescer().stream(source()):
+                writes.append(write)
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(run())
+
+        assert _payloads(writes)[0]["data"]["content"] == "partial"
+
+
+class TestIncrementalTokenCounter:
+    def test_total_matches_full_text_count(self):
+        def count(text):
+            return len(text.split())
+
+        text = "the quick brown fox jumps over the lazy dog " * 40
+        counter = IncrementalTokenCounter(count, min_segment=32)
+        for i in range(0, len(text), 3):
+            counter.add(text[i:i + 3])
+
+        assert counter.total() == count(text)
+
+    def test_add_only_encodes_complete_segments(self):
+        calls = []
+
+        def count(text):
+            calls.append(text)
+            return len(text.split())
+
+        counter = IncrementalTokenCounter(count, min_segment=8)
+        assert counter.add("abc") == 0
+        assert calls == []
+        assert counter.add("def ghij") == 1
+        assert calls == ["abcdef"]
@@ -244,3 +244,93 @@ class TestIntegration:
         
         # Should trigger summarization
         assert manager.should_summarize(threshold=0.8) is True
+
+
+class CountingEncoding:
+    """Whitespace encoding that counts encode calls."""
+
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        return text.split()
+
+
+class TestTokenizerCaching:
+    """Process-wide encoding cache, memoized message counts and estimates."""
+
+    def test_encoding_loaded_once_per_model(self):
+        from unittest.mock import Mock, patch
+        from src.agent import tokenization
+
+        fake_tiktoken = Mock()
+        fake_tiktoken.encoding_for_model.return_value = CountingEncoding()
+
+        with patch.object(tokenization, "tiktoken", fake_tiktoken), \
+                patch.dict(tokenization._encoding_cache, clear=True):
+            first = TokenBudgetManager(model="gpt-4")
+            second = TokenBudgetManager(model="gpt-4")
+
+        assert first.encoding is second.encoding
+        fake_tiktoken.encoding_for_model.assert_called_once_with("gpt-4")
+
+    def test_history_counted_once(self):
+        from unittest.mock import patch
+        from src.agent import tokenization
+
+        tokenization._message_tokens.clear()
+        with patch.object(tokenization, "tiktoken", None):
+            manager = TokenBudgetManager()
+        manager.encoding = CountingEncoding()
+        history = [HumanMessage(content="show errors", id="m1"), AIMessage(content="found three errors", id="m2")]
+
+        first = manager.count_messages(history)
+        second = manager.count_messages(history + [HumanMessage(content="and warnings?", id="m3")])
+        edited = manager.count_messages([AIMessage(content="found four errors today", id="m2")])
+
+        assert first == (2 + 4) + (3 + 4)
+        assert second == first + 2 + 4
+        assert edited == 4 + 4
+        # m1, m2, m3, then m2 again because its content changed
+        assert manager.encoding.calls == 4
+
+    def test_byte_length_estimate(self):
+        from src.agent.tokenization import ByteLengthEstimator
+
+        estimator = ByteLengthEstimator(ascii_bytes_per_token=4.0, other_bytes_per_token=2.0)
+
+        assert estimator.estimate("") == 0
+        assert estimator.estimate("a" * 40) == 10
+        assert estimator.estimate("ab" + "é" * 4) == pytest.approx(2 / 4 + 8 / 2)
+        # Chunk estimates add up to the estimate of the whole text
+        text = "connection pool exhausted"
+        assert sum(estimator.estimate(text[i:i + 3]) for i in range(0, len(text), 3)) == pytest.approx(estimator.estimate(text))
+
+    def test_calibrate_fits_encoding(self):
+        from src.agent.tokenization import ByteLengthEstimator
+
+        estimator = ByteLengthEstimator.calibrate(CountingEncoding())
+
+        assert 3 < estimator.ascii_bytes_per_token < 12
+        assert estimator.other_bytes_per_token > 0
+
+    def test_streaming_estimate_encodes_once(self):
+        from src.agent.tokenization import ByteLengthEstimator, IncrementalTokenCounter
+
+        encoding = CountingEncoding()
+        counter = IncrementalTokenCounter(
+            lambda text: len(encoding.encode(text)),
+            min_segment=8,
+            estimate_fn=ByteLengthEstimator(ascii_bytes_per_token=5.0).estimate,
+        )
+        chunks = ["the serv", "ice retu", "rned 503 ", "errors"]
+
+        progress = [counter.add(chunk) for chunk in chunks]
+
+        assert encoding.calls == 0
+        assert progress == [2, 3, 5, 6]
+        assert counter.total() == 5
+        assert encoding.calls == 1
@@ -0,0 +1,111 @@
+"""Unit tests for the agent tool result cache."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from src.agent.tokenization import TOOL_FRESHNESS, ToolFreshness
+from src.agent.tools.result_cache import ToolResultCache, cached_tool, tool_result_cache
+
+CALLS = []
+
+
+@tool
+@cached_tool
+def fake_analyze(intent: str = "summary", timeframe: str = "24h", service: str = "") -> dict:
+    """Counts calls and echoes its arguments."""
+    CALLS.append((intent, timeframe, service))
+    if service == "broken":
+        return {"error": "query failed"}
+    return {"intent": intent, "timeframe": timeframe, "run": len(CALLS)}
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def get_cache(self, key):
+        data = self.store.get(key)
+        return json.loads(data) if data is not None else None
+
+    def set_cache(self, key, value, ttl=None):
+        self.store[key] = json.dumps(value)
+
+
+@pytest.fixture(autouse=True)
+def policy():
+    CALLS.clear()
+    tool_result_cache.clear()
+    with patch.dict(TOOL_FRESHNESS, {"fake_analyze": ToolFreshness(60, ("intent", "timeframe"))}):
+        yield
+    tool_result_cache.clear()
+
+
+class TestCachedTool:
+    def test_equivalent_args_share_an_entry(self):
+        first = fake_analyze.invoke({})
+        second = fake_analyze.invoke({"intent": " Summary", "timeframe": "24H"})
+
+        assert first == second
+        assert len(CALLS) == 1
+
+        fake_analyze.invoke({"service": "API"})  # service is case-sensitive
+        fake_analyze.invoke({"service": "api"})
+        assert len(CALLS) == 3
+
+    def test_errors_are_not_cached(self):
+        fake_analyze.invoke({"service": "broken"})
+        fake_analyze.invoke({"service": "broken"})
+
+        assert len(CALLS) == 2
+
+    def test_no_policy_runs_uncached(self):
+        with patch.dict(TOOL_FRESHNESS, clear=True):
+            fake_analyze.invoke({})
+            fake_analyze.invoke({})
+
+        assert len(CALLS) == 2
+
+    def test_time_bucket_bounds_freshness(self):
+        policy = ToolFreshness(60)
+        key, expires_at = ToolResultCache.key("t", {"hours": 24}, policy, now=119.0)
+
+        assert expires_at == 120
+        assert ToolResultCache.key("t", {"hours": 24}, policy, now=61.0)[0] == key
+        assert ToolResultCache.key("t", {"hours": 24}, policy, now=120.0)[0] != key
+
+    def test_redis_tier_is_shared_between_instances(self):
+        redis = FakeRedis()
+        writer, reader = ToolResultCache(redis=redis), ToolResultCache(redis=redis)
+        key, expires_at = writer.key("t", {}, ToolFreshness(60))
+
+        writer.put(key, {"rows": [1, 2]}, expires_at)
+
+        assert reader.get(key) == {"rows": [1, 2]}
+        assert reader.get_stats()["hits"] == 1
+
+
+class TestMeteredCacheHit:
+    def test_cache_hit_recorded_on_metrics(self):
+        from src.agent.metered_tool_node import MeteredToolNode
+        from src.agent.state import create_initial_state
+
+        node = MeteredToolNode([fake_analyze], publish_metrics=False)
+
+        def state(call_id):
+            return create_initial_state(
+                run_id="test-run",
+                user_query="test",
+                messages=[AIMessage(content="", tool_calls=[{"name": "fake_analyze", "args": {}, "id": call_id}])],
+            )
+
+        first = node(state("call-1"))
+        second = node(state("call-2"))
+
+        assert first["tool_calls"][0]["cache_hit"] is False
+        assert second["tool_calls"][0]["cache_hit"] is True
+        assert second["messages"][0].content == first["messages"][0].content
+        assert len(CALLS) == 1
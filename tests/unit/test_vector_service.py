@@ -257,6 +257,115 @@ class TestEmbedAndStore:
                     mock_qdrant_client.upsert.assert_not_called()
 
 
+class TestEmbedAndStoreBatch:
+    """Tests for batched dedup + embed + upsert."""
+
+    @pytest.fixture
+    def batch_service(self, mock_qdrant_client, mock_embedding):
+        with patch("src.services.vector_service.qdrant_service") as mock_qdrant:
+            mock_qdrant.client = mock_qdrant_client
+            with patch("src.services.vector_service.embedding_service") as mock_embed:
+                mock_embed.get_embeddings_batch.side_effect = lambda texts: [mock_embedding for _ in texts]
+                with patch("src.services.vector_service.ENABLE_VECTOR_SEARCH", True):
+                    VectorService._instance = None
+                    VectorService._log_collection_initialized = True
+                    service = VectorService()
+                    service.mock_embed = mock_embed
+                    yield service
+
+    def test_bloom_misses_skip_lookup(self, batch_service, mock_qdrant_client):
+        """Hashes absent from the warmed filter are embedded without a MatchAny scroll."""
+        batch_service._warm_hash_filter("test-project", LOG_EMBEDDINGS_COLLECTION)
+
+        results = batch_service.embed_and_store_batch(
+            ["error one", "error two", "error one", ""],
+            project_id="test-project",
+        )
+
+        # Only the warm-up scroll ran
+        assert mock_qdrant_client.scroll.call_count == 1
+        assert mock_qdrant_client.scroll.call_args.kwargs["with_payload"] == ["text_hash"]
+        batch_service.mock_embed.get_embeddings_batch.assert_called_once_with(["error one", "error two"])
+        upserts = mock_qdrant_client.upsert.call_args_list
+        assert sum(len(c.kwargs["points"]) for c in upserts) == 2
+        assert upserts[-1].kwargs["wait"] is True
+        assert results[0].vector_id == results[2].vector_id
+        assert results[1] is not None and results[3] is None
+
+    def test_existing_hashes_resolved_with_one_match_any(self, batch_service, mock_qdrant_client):
+        """Known hashes are fetched in a single scroll and not re-embedded."""
+        known = batch_service.compute_text_hash("seen before")
+        existing = Mock(id="existing-id", payload={"text_hash": known, "timestamp": {"iso": "2025-01-01T00:00:00Z"}})
+        mock_qdrant_client.scroll.side_effect = [
+            ([existing], None),  # warm-up
+            ([existing], None),  # MatchAny lookup
+        ]
+        batch_service._warm_hash_filter("test-project", LOG_EMBEDDINGS_COLLECTION)
+
+        results = batch_service.embed_and_store_batch(["seen before", "brand new"], project_id="test-project")
+
+        lookup = mock_qdrant_client.scroll.call_args_list[1].kwargs["scroll_filter"]
+        assert lookup.must[1].match.any == [known]
+        batch_service.mock_embed.get_embeddings_batch.assert_called_once_with(["brand new"])
+        assert results[0].vector_id == "existing-id"
+        assert results[1].vector_id != "existing-id"
+
+    def test_stored_hashes_join_filter(self, batch_service, mock_qdrant_client):
+        """A second batch finds what the first one stored via a MatchAny lookup."""
+        batch_service._warm_hash_filter("test-project", LOG_EMBEDDINGS_COLLECTION)
+        batch_service.embed_and_store_batch(["disk full"], project_id="test-project")
+        mock_qdrant_client.scroll.reset_mock()
+
+        batch_service.embed_and_store_batch(["disk full"], project_id="test-project")
+
+        (lookup,) = mock_qdrant_client.scroll.call_args_list
+        assert lookup.kwargs["scroll_filter"].must[1].match.any == [
+            batch_service.compute_text_hash("disk full")
+        ]
+
+    def test_cold_filter_warms_in_background(self, batch_service, mock_qdrant_client):
+        """Without a warmed filter every hash is looked up and the warm-up is handed off."""
+        executor = Mock()
+        batch_service._warm_executor = executor
+
+        batch_service.embed_and_store_batch(["disk full"], project_id="test-project")
+        batch_service.embed_and_store_batch(["disk full"], project_id="test-project")
+
+        assert mock_qdrant_client.scroll.call_count == 2  # two MatchAny lookups, no warm-up
+        executor.submit.assert_called_once_with(
+            batch_service._warm_hash_filter, "test-project", LOG_EMBEDDINGS_COLLECTION
+        )
+
+    def test_hashes_stored_during_warm_up_join_filter(self, batch_service):
+        batch_service._warm_executor = Mock()
+        batch_service._hash_filter("test-project", LOG_EMBEDDINGS_COLLECTION)
+        batch_service._remember_hashes(LOG_EMBEDDINGS_COLLECTION, "test-project", ["h1"])
+
+        bloom = batch_service._warm_hash_filter("test-project", LOG_EMBEDDINGS_COLLECTION)
+
+        assert "h1" in bloom
+
+    def test_oversized_tenant_is_not_rewarmed(self, batch_service, mock_qdrant_client):
+        points = [Mock(payload={"text_hash": f"h{i}"}) for i in range(3)]
+        mock_qdrant_client.scroll.return_value = (points, None)
+        batch_service._warm_executor = Mock()
+
+        with patch("src.services.vector_service.DEDUP_BLOOM_MAX_WARM", 2), \
+                patch("src.services.vector_service.DEDUP_BLOOM_TTL_SEC", 0):
+            assert batch_service._warm_hash_filter("test-project", LOG_EMBEDDINGS_COLLECTION) is None
+            assert batch_service._hash_filter("test-project", LOG_EMBEDDINGS_COLLECTION) is None
+
+        batch_service._warm_executor.submit.assert_not_called()
+
+    def test_returns_nones_when_disabled(self, mock_qdrant_client):
+        with patch("src.services.vector_service.qdrant_service") as mock_qdrant:
+            mock_qdrant.client = mock_qdrant_client
+            with patch("src.services.vector_service.ENABLE_VECTOR_SEARCH", False):
+                VectorService._instance = None
+                service = VectorService()
+                assert service.embed_and_store_batch(["a", "b"], project_id="p") == [None, None]
+
+
 class TestSemanticSearch:
     """Tests for semantic search functionality."""
 
@@ -345,6 +454,38 @@ class TestSemanticSearch:
                     assert call_args.kwargs["query_filter"] is not None
 
 
+    def test_search_with_hours_uses_epoch_range(self, mock_qdrant_client, mock_embedding):
+        """Test that an hours filter becomes a range predicate on timestamp_epoch."""
+        with patch("src.services.vector_service.qdrant_service") as mock_qdrant:
+            mock_qdrant.client = mock_qdrant_client
+            mock_qdrant_client.search.return_value = []
+
+            with patch("src.services.vector_service.embedding_service") as mock_embed:
+                mock_embed.get_embedding.return_value = mock_embedding
+                with patch("src.services.vector_service.ENABLE_VECTOR_SEARCH", True):
+                    VectorService._instance = None
+                    service = VectorService()
+
+                    service.semantic_search_logs(
+                        query="test",
+                        project_id="test-project",
+                        hours=24,
+                    )
+
+                    query_filter = mock_qdrant_client.search.call_args.kwargs["query_filter"]
+                    range_conditions = [c for c in query_filter.must if c.key == "timestamp_epoch"]
+                    assert len(range_conditions) == 1
+                    assert range_conditions[0].range.gte is not None
+
+
+    def test_search_without_project_is_rejected(self, vector_service, mock_qdrant_client):
+        """Test that searches without a tenant never hit the collection."""
+        results = vector_service.semantic_search(query="test", project_id="")
+
+        assert results == []
+        mock_qdrant_client.search.assert_not_called()
+
+
 class TestSemanticSearchLogs:
     """Tests for semantic_search_logs convenience method."""
 